@@ -1,14 +1,30 @@
 # Arquivo: app_web.py - Servidor Flask (Controlador Web)
 
-from flask import Flask, render_template, request, redirect, url_for
+import sys
+import time
+from datetime import datetime, timezone
+
+from flask import Flask, Response, g, render_template, request, redirect, url_for, jsonify
+from flask import before_render_template, template_rendered
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
 import database # Importa o módulo de persistência (database.py)
+import importacao # Validação e gravação em lote (também usadas pela API em lote)
+import exportacao # Exportação em fluxo (NDJSON/CSV) de clientes, produtos e pedidos
 
 # Importa os modelos de domínio
 from core.cliente import Cliente
-from core.produto import Produto
 from core.pedido import Pedido 
 from pagamentos.pagamento_cartao import PagamentoCartao
 from pagamentos.pagamento_pix import PagamentoPix
+from pagamentos import processador
+from relatorios import analise_vendas
+from relatorios.totais_loja import obter_totais
+from persistencia.indices import obter_indices
+from persistencia.cache import obter_cache, obter_versoes
+from persistencia.colecao import ordem_id
+from monitoramento import metricas
+from monitoramento.perfil import PERFIL_HABILITADO, PerfilRequisicao
 
 
 # 1. Configuração Inicial do Flask
@@ -16,38 +32,581 @@ app = Flask(__name__, template_folder='templates')
 
 # Carrega o estado do sistema do JSON para a memória no início
 DB = database.carregar_dados_json() 
+obter_indices(DB) # Índices secundários (CPF, nomes, pedidos por cliente) montados na carga
+# Visões de vendas (por cliente/produto) refeitas na carga. Antes das versões: os
+# observadores são avisados na ordem em que se registraram, então quando a versão
+# de 'pedidos' avança as visões já estão atualizadas
+obter_totais(DB)
+obter_versoes(DB) # Versões das seções (chaves do cache de respostas e ETags)
+metricas.observar_colecoes(DB)
+
+
+# ----------------------------------------------------------------------
+# INSTRUMENTAÇÃO (LATÊNCIA POR ROTA, TEMPLATES E PERFIL SOB DEMANDA)
+# ----------------------------------------------------------------------
+
+@app.before_request
+def iniciar_medicao():
+    """
+    Marca o início da requisição (registrado antes da sincronização, que entra na
+    latência) e, com LOJA_PERFIL=1, liga o cProfile se a requisição pediu ?perfil=1.
+    """
+    g.inicio_requisicao = time.perf_counter()
+    if PERFIL_HABILITADO and '1' in (request.args.get('perfil'), request.headers.get('X-Perfil')):
+        perfil = PerfilRequisicao(f"{request.method}-{request.path}")
+        if perfil.iniciar(): # Outro perfil em andamento: a requisição segue sem perfil
+            g.perfil = perfil
+
+
+@app.before_request
+def sincronizar_db():
+    """Aplica ao DB em memória o que outros workers gravaram desde a última requisição."""
+    database.sincronizar(DB)
+
+
+@app.after_request
+def concluir_perfil(resposta):
+    """Grava o perfil da requisição (se houver) e informa o arquivo no cabeçalho X-Perfil-Arquivo."""
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        resposta.headers['X-Perfil-Arquivo'] = perfil.concluir()
+    g.status_resposta = resposta.status_code
+    return resposta
+
+
+@app.teardown_request
+def registrar_latencia(erro=None):
+    """Registra a duração da requisição no histograma da rota (status 500 se uma exceção escapou)."""
+    inicio = g.pop('inicio_requisicao', None)
+    if inicio is None:
+        return
+    perfil = g.pop('perfil', None) # A view levantou exceção antes do after_request
+    if perfil is not None:
+        perfil.concluir()
+    rota = request.url_rule.rule if request.url_rule is not None else 'desconhecida' # Sem IDs: cardinalidade fixa
+    metricas.LATENCIA_ROTAS.registrar(time.perf_counter() - inicio, rota=rota, metodo=request.method,
+                                      status=g.get('status_resposta', 500))
+
+
+def _inicio_template(remetente, template, context, **extra):
+    g.setdefault('inicio_templates', []).append(time.perf_counter())
+
+
+def _fim_template(remetente, template, context, **extra):
+    inicios = g.get('inicio_templates')
+    if inicios:
+        metricas.TEMPO_TEMPLATES.registrar(time.perf_counter() - inicios.pop(), template=template.name)
+
 
-# Associa a referência do dicionário de clientes ao objeto Cliente (necessário para serialização do Pedido)
-Cliente.db_ref = DB['clientes'] 
+before_render_template.connect(_inicio_template, app)
+template_rendered.connect(_fim_template, app)
+
+
+@app.route('/metrics')
+def exportar_metricas():
+    """
+    Endpoint: exportar_metricas (Rota: /metrics)
+    Objetivo: Expor as métricas deste worker no formato texto do Prometheus
+              (latência por rota, templates, carga/gravação, bytes, entidades e pagamentos).
+    """
+    return Response(metricas.REGISTRO.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 # ----------------------------------------------------------------------
 # ROTAS DE VISUALIZAÇÃO E LISTAGEM
 # ----------------------------------------------------------------------
 
+# Tamanho das páginas do dashboard e da API (parâmetro ?limite=)
+LIMITE_PAGINA_PADRAO = 20
+LIMITE_PAGINA_MAXIMO = 100
+
+
+def _cursor(nome):
+    """
+    Lê um cursor de paginação (último ID da página anterior); None = primeira página.
+    Qualquer ID é aceito: a coleção ordena também os não numéricos (ver ordem_id).
+    """
+    valor = request.args.get(nome, '').strip()
+    return valor or None
+
+
+def _limite():
+    limite = request.args.get('limite', LIMITE_PAGINA_PADRAO, type=int)
+    return max(1, min(limite, LIMITE_PAGINA_MAXIMO))
+
+
+def _filtros_pedidos(status=None, cliente_id=None):
+    """Monta os filtros de pedidos por status ('pago'/'aberto') e/ou cliente."""
+    filtros = {}
+    if status in ('pago', 'aberto'):
+        filtros['pago'] = status == 'pago'
+    if cliente_id:
+        if not cliente_id.isdigit():
+            raise ValueError(f"ID de cliente inválido: {cliente_id!r}")
+        filtros['cliente_id'] = cliente_id
+    return filtros
+
+
+def _link_proxima(parametro, cursor):
+    """URL do dashboard para a próxima página de uma das listas, mantendo os demais parâmetros."""
+    if cursor is None:
+        return None
+    argumentos = request.args.to_dict()
+    argumentos[parametro] = cursor
+    return url_for('index', **argumentos)
+
+
+def _responder_em_cache(secoes, montar):
+    """
+    Objetivo: Responder um GET cujo conteúdo depende só das 'secoes' do DB e da URL.
+    Função: O ETag vem das versões das seções (ver persistencia/cache.py), então
+            um cliente que já tem a versão atual recebe 304 sem nada ser montado.
+            Só o ETag decide o 304: o Last-Modified (resolução de 1 segundo) é
+            apenas informativo, senão duas escritas no mesmo segundo fariam um
+            If-Modified-Since antigo receber 304. Senão, o corpo sai do cache de
+            respostas ou é montado por 'montar()' (que retorna o mesmo que uma
+            view); só respostas 200 são guardadas.
+    """
+    versoes = obter_versoes(DB)
+    etag = versoes.etag(secoes) # Lido antes de montar: o conteúdo nunca é mais antigo que a versão
+    modificado = datetime.fromtimestamp(versoes.modificado_em(secoes), timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag):
+        resposta = Response(status=304)
+    else:
+        cache = obter_cache(DB)
+        chave = ('resposta', request.full_path, etag)
+        guardada = cache.obter(chave)
+        if guardada is not None:
+            resposta = Response(guardada[0], mimetype=guardada[1])
+        else:
+            resposta = app.make_response(montar())
+            if resposta.status_code != 200:
+                return resposta
+            corpo = resposta.get_data()
+            cache.guardar(chave, (corpo, resposta.mimetype), sys.getsizeof(corpo))
+    resposta.set_etag(etag)
+    resposta.last_modified = modificado
+    resposta.cache_control.no_cache = True # O navegador guarda, mas revalida (304) a cada uso
+    return resposta
+
+
+def _fragmento(secao, dependencias, parametros, buscar, **contexto):
+    """
+    Tabela 'secao' do dashboard (templates/fragmentos/tabela_<secao>.html) já
+    renderizada, e o cursor da próxima página. Fica no cache enquanto as
+    'dependencias' não mudarem: um cliente novo só refaz a tabela de clientes.
+    """
+    cache = obter_cache(DB)
+    chave = ('fragmento', secao, obter_versoes(DB).versoes_de(dependencias), parametros)
+    fragmento = cache.obter(chave)
+    if fragmento is None:
+        linhas, proximo = buscar()
+        html = Markup(render_template(f'fragmentos/tabela_{secao}.html', **{secao: linhas}, **contexto))
+        fragmento = (html, proximo)
+        cache.guardar(chave, fragmento, sys.getsizeof(html))
+    return fragmento
+
+
+def _tabela_com_vendas(secao, parametros, buscar, vendas_da_linha):
+    """
+    Tabela de clientes ou produtos do dashboard, com as colunas de vendas de cada linha.
+    As células de cadastro (macro 'cadastro' de fragmentos/tabela_<secao>.html) ficam
+    no cache pela versão da própria seção e as de vendas (macro 'vendas', com os
+    valores de 'vendas_da_linha(chave)') pela versão dos pedidos: um pedido novo
+    refaz só as colunas de vendas da página, um cadastro novo só as de cadastro.
+    """
+    cache = obter_cache(DB)
+    versoes = obter_versoes(DB)
+    macros = app.jinja_env.get_template(f'fragmentos/tabela_{secao}.html').module
+
+    chave = ('fragmento', secao, versoes.versoes_de((secao,)), parametros)
+    cadastro = cache.obter(chave)
+    if cadastro is None:
+        linhas, proximo = buscar()
+        celulas = [Markup(macros.cadastro(chave_linha, obj)) for chave_linha, obj in linhas]
+        cadastro = (tuple(chave_linha for chave_linha, _ in linhas), celulas, proximo)
+        cache.guardar(chave, cadastro, sum(sys.getsizeof(html) for html in celulas))
+    chaves, celulas_cadastro, proximo = cadastro
+
+    # Pelas linhas da página (não pelo cursor): um cadastro novo muda as linhas sem mudar os pedidos
+    chave = ('fragmento', f'{secao}_vendas', versoes.versoes_de(('pedidos',)), chaves)
+    celulas_vendas = cache.obter(chave)
+    if celulas_vendas is None:
+        celulas_vendas = [Markup(macros.vendas(vendas_da_linha(chave_linha))) for chave_linha in chaves]
+        cache.guardar(chave, celulas_vendas, sum(sys.getsizeof(html) for html in celulas_vendas))
+
+    html = render_template(f'fragmentos/tabela_{secao}.html', linhas=zip(celulas_cadastro, celulas_vendas))
+    return Markup(html), proximo
+
+
 @app.route('/')
 def index():
     """
     Endpoint: index (Rota: /)
     Objetivo: Rota principal. Carrega o estado atual dos modelos e renderiza o Dashboard.
+    Função: Cada lista é paginada por cursor (?pedidos_apos=, ?clientes_apos=,
+            ?produtos_apos=), então só as linhas da página são lidas/renderizadas.
+            A página inteira e cada tabela ficam no cache até a sua seção mudar.
     """
-    clientes_data = DB['clientes'].items()
-    produtos_data = DB['produtos'].items()
-    pedidos_data = DB['pedidos'].items()
+    return _responder_em_cache(('clientes', 'produtos', 'pedidos'), _montar_dashboard)
+
+
+def _montar_dashboard():
+    limite = _limite()
+    status = request.args.get('status', '')
+    cliente_filtro = request.args.get('cliente_id', '').strip()
+    cursores = {nome: _cursor(f'{nome}_apos') for nome in ('pedidos', 'clientes', 'produtos')}
+
+    def buscar(secao, filtros=None):
+        try:
+            return DB[secao].pagina(cursores[secao], limite, filtros() if filtros else None)
+        except ValueError: # Filtro (ou, no SQLite, cursor não numérico) inválido: nenhuma linha atende
+            return [], None
+
+    tabela_pedidos, proximo_pedidos = _fragmento(
+        'pedidos', ('pedidos', 'nomes_clientes'), (cursores['pedidos'], limite, status, cliente_filtro),
+        lambda: buscar('pedidos', lambda: _filtros_pedidos(status, cliente_filtro))
+    )
+    totais = obter_totais(DB) # Mantidos incrementalmente: não percorre os pedidos
+    # As colunas de vendas (total gasto, unidades vendidas) vêm das visões, num cache à parte
+    tabela_clientes, proximo_clientes = _tabela_com_vendas(
+        'clientes', (cursores['clientes'], limite), lambda: buscar('clientes'), totais.cliente
+    )
+    tabela_produtos, proximo_produtos = _tabela_com_vendas(
+        'produtos', (cursores['produtos'], limite), lambda: buscar('produtos'), totais.produto
+    )
 
     # Renderiza o template principal (Dashboard)
     return render_template(
         'dashboard.html', # CHAMA O ARQUIVO CORRETO
-        clientes=clientes_data,
-        produtos=produtos_data,
-        pedidos=pedidos_data
+        fragmentos={'pedidos': tabela_pedidos, 'clientes': tabela_clientes, 'produtos': tabela_produtos},
+        totais=totais,
+        status=status,
+        cliente_filtro=cliente_filtro,
+        proximas={
+            'pedidos': _link_proxima('pedidos_apos', proximo_pedidos),
+            'clientes': _link_proxima('clientes_apos', proximo_clientes),
+            'produtos': _link_proxima('produtos_apos', proximo_produtos),
+        }
+    )
+
+
+@app.route('/relatorios')
+def relatorio_vendas():
+    """
+    Endpoint: relatorio_vendas (Rota: /relatorios)
+    Objetivo: Exibir receita por produto, melhores clientes e totais pago x aberto,
+              calculados pelo motor colunar (relatorios/analise_vendas.py).
+    """
+    if not analise_vendas.numpy_disponivel():
+        return render_template('relatorio_vendas.html', relatorio=None)
+
+    relatorio = analise_vendas.montar_relatorio(DB)
+    return render_template('relatorio_vendas.html', relatorio=relatorio)
+
+
+# ----------------------------------------------------------------------
+# API JSON (LISTAGENS PAGINADAS)
+# ----------------------------------------------------------------------
+
+def _responder_pagina(secao, serializar, filtros=None):
+    """
+    Lê ?apos= e ?limite=, busca só a página pedida e responde {'itens': [...], 'proximo': cursor}.
+    A resposta fica no cache (com ETag) até a coleção DB[secao] mudar.
+    """
+    def montar():
+        try:
+            pagina, proximo = DB[secao].pagina(_cursor('apos'), _limite(), filtros)
+        except ValueError as e:
+            return jsonify({'erro': str(e)}), 400
+        return jsonify({
+            'itens': [serializar(chave, obj) for chave, obj in pagina],
+            'proximo': proximo
+        })
+    return _responder_em_cache((secao,), montar)
+
+
+@app.route('/api/pedidos')
+def api_pedidos():
+    """
+    Endpoint: api_pedidos (Rota: /api/pedidos)
+    Objetivo: Listar pedidos paginados; filtros opcionais ?status=pago|aberto e ?cliente_id=.
+    """
+    try:
+        filtros = _filtros_pedidos(request.args.get('status'), request.args.get('cliente_id', '').strip())
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    return _responder_pagina(
+        'pedidos',
+        lambda chave, pedido: dict(id=chave, total=pedido.calcular_total(), **pedido.to_json()),
+        filtros
     )
 
 
+@app.route('/api/clientes')
+def api_clientes():
+    """Endpoint: api_clientes (Rota: /api/clientes) - Lista clientes paginados."""
+    return _responder_pagina('clientes', lambda chave, cliente: dict(id=chave, **cliente.to_json()))
+
+
+@app.route('/api/produtos')
+def api_produtos():
+    """Endpoint: api_produtos (Rota: /api/produtos) - Lista produtos paginados."""
+    return _responder_pagina('produtos', lambda chave, produto: dict(id=chave, **produto.to_json()))
+
+
+# ----------------------------------------------------------------------
+# BUSCA E AUTOCOMPLETAR (ÍNDICES SECUNDÁRIOS)
+# ----------------------------------------------------------------------
+
+def _responder_busca(buscar, colecao, serializar):
+    """Lê ?q= e ?limite= e responde {'itens': [...]} com as entidades encontradas pelo índice."""
+    termo = request.args.get('q', '').strip()
+    if not termo:
+        return jsonify({'erro': "Informe o termo de busca em ?q=."}), 400
+    itens = []
+    for chave in buscar(termo, _limite()):
+        obj = colecao.get(chave)
+        if obj is not None:
+            itens.append(serializar(chave, obj))
+    return jsonify({'itens': itens})
+
+
+@app.route('/api/clientes/busca')
+def api_buscar_clientes():
+    """
+    Endpoint: api_buscar_clientes (Rota: /api/clientes/busca?q=)
+    Objetivo: Autocompletar clientes pelo CPF ou pelo nome (prefixo ou trecho).
+    """
+    return _responder_busca(
+        obter_indices(DB).buscar_clientes,
+        DB['clientes'],
+        lambda chave, cliente: dict(id=chave, **cliente.to_json())
+    )
+
+
+@app.route('/api/produtos/busca')
+def api_buscar_produtos():
+    """Endpoint: api_buscar_produtos (Rota: /api/produtos/busca?q=) - Autocompletar produtos pelo nome."""
+    return _responder_busca(
+        obter_indices(DB).buscar_produtos,
+        DB['produtos'],
+        lambda chave, produto: dict(id=chave, **produto.to_json())
+    )
+
+
+@app.route('/api/clientes/<cliente_id>/pedidos')
+def api_pedidos_do_cliente(cliente_id):
+    """
+    Endpoint: api_pedidos_do_cliente (Rota: /api/clientes/<id>/pedidos)
+    Objetivo: Listar os pedidos de um cliente pelo índice reverso, paginados por ?apos= e ?limite=.
+    Função: 'vendas' traz o total gasto (pago e em aberto) pela visão materializada,
+            sem somar os pedidos do cliente. Os pedidos arquivados vêm do índice
+            por cliente de cada segmento do arquivo morto.
+    """
+    if DB['clientes'].get(cliente_id) is None:
+        return jsonify({'erro': "Cliente não encontrado."}), 404
+    apos = _cursor('apos')
+    limite = _limite()
+    indice = obter_indices(DB).pedidos_por_cliente
+    arquivo = database.obter_arquivo()
+    arquivados = arquivo.pedidos_do_cliente(cliente_id, apos, limite + 1)
+    chaves = sorted(set(indice.pedidos(cliente_id, apos, limite + 1)).union(arquivados), key=ordem_id)[:limite + 1]
+    itens = []
+    for chave in chaves[:limite]:
+        pedido = DB['pedidos'].get(chave)
+        if pedido is None:
+            pedido = arquivo.pedido(DB, chave)
+        if pedido is not None:
+            itens.append(dict(id=chave, total=pedido.calcular_total(), **pedido.to_json()))
+    vendas = obter_totais(DB).cliente(cliente_id) # Inclui os pedidos arquivados
+    return jsonify({
+        'total_pedidos': vendas.pedidos,
+        'vendas': vendas.como_dict(),
+        'itens': itens,
+        'proximo': chaves[limite - 1] if len(chaves) > limite else None
+    })
+
+
+# ----------------------------------------------------------------------
+# PAGAMENTOS ASSÍNCRONOS
+# ----------------------------------------------------------------------
+
+def _forma_pagamento(valores):
+    """Cria o Pagamento pedido em 'forma' (cartao|pix); ValueError se for inválida."""
+    forma = valores.get('forma', '')
+    if forma == 'cartao': # Polimorfismo: a subclasse define o processar()
+        return PagamentoCartao(num_cartao=valores.get('num_cartao') or "**** **** **** 3456")
+    if forma == 'pix':
+        return PagamentoPix(chave_pix=valores.get('chave_pix') or "mariapix@email.com")
+    raise ValueError("Forma de pagamento inválida (use 'cartao' ou 'pix').")
+
+
+@app.route('/api/pedidos/<pedido_id>/pagamento', methods=['GET', 'POST'])
+def api_pagamento(pedido_id):
+    """
+    Endpoint: api_pagamento (Rota: /api/pedidos/<id>/pagamento)
+    Objetivo: POST envia o pagamento para a fila e responde 202 na hora (sem esperar
+              a operadora); GET consulta a situação: pendente, pago, falhou ou aberto.
+    """
+    if request.method == 'GET':
+        try:
+            return jsonify(processador.situacao(DB, pedido_id))
+        except KeyError:
+            return jsonify({'erro': "Pedido não encontrado."}), 404
+
+    try:
+        pagamento = _forma_pagamento(request.get_json(silent=True) or request.values)
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    try:
+        trabalho = processador.solicitar_pagamento(DB, pedido_id, pagamento, _duravel())
+    except KeyError:
+        return jsonify({'erro': "Pedido não encontrado."}), 404
+    except ValueError as e: # Já pago ou com pagamento em andamento
+        return jsonify({'erro': str(e)}), 409
+    resposta = jsonify(trabalho.como_dict())
+    resposta.headers['Location'] = url_for('api_pagamento', pedido_id=pedido_id)
+    return resposta, 202
+
+
+# ----------------------------------------------------------------------
+# API EM LOTE (INTEGRAÇÕES)
+# ----------------------------------------------------------------------
+
+# Máximo de itens por requisição em lote
+LIMITE_LOTE = 10000
+
+
+def _lote(campo):
+    """
+    Lê o corpo JSON de uma requisição em lote: uma lista ou {campo: lista}.
+    ValueError se o corpo não for uma lista válida ou passar de LIMITE_LOTE itens.
+    """
+    corpo = request.get_json(silent=True)
+    if isinstance(corpo, dict):
+        corpo = corpo.get(campo)
+    if not isinstance(corpo, list) or not corpo:
+        raise ValueError(f"Envie uma lista JSON não vazia (ou um objeto com '{campo}': [...]).")
+    if len(corpo) > LIMITE_LOTE:
+        raise ValueError(f"Lote com {len(corpo)} itens; o máximo é {LIMITE_LOTE}.")
+    return corpo
+
+
+def _responder_lote(resultados, status_sucesso):
+    """
+    Resposta com um resultado por item: 'status_sucesso' se todos foram aceitos,
+    207 se só parte deles e 422 se nenhum.
+    """
+    aceitos = sum(1 for resultado in resultados if 'erro' not in resultado)
+    resposta = {'aceitos': aceitos, 'rejeitados': len(resultados) - aceitos, 'resultados': resultados}
+    if aceitos == len(resultados):
+        return jsonify(resposta), status_sucesso
+    return jsonify(resposta), 207 if aceitos else 422
+
+
+@app.route('/api/pedidos/lote', methods=['POST'])
+def api_pedidos_lote():
+    """
+    Endpoint: api_pedidos_lote (Rota: /api/pedidos/lote)
+    Objetivo: Cadastrar muitos pedidos numa requisição: [{"cliente_id": "1", "itens":
+              [{"produto_id": "101", "quantidade": 2}]}, ...]. Tudo é validado antes,
+              os IDs são reservados em bloco e o lote é salvo uma única vez.
+              '?atomico=1' recusa o lote inteiro se algum pedido for inválido.
+    """
+    try:
+        registros = _lote('pedidos')
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    resultados = importacao.registrar_pedidos(DB, registros, _duravel(), request.values.get('atomico') == '1')
+    return _responder_lote(resultados, 201)
+
+
+@app.route('/api/pagamentos/lote', methods=['POST'])
+def api_pagamentos_lote():
+    """
+    Endpoint: api_pagamentos_lote (Rota: /api/pagamentos/lote)
+    Objetivo: Registrar pagamentos já liquidados na operadora: [{"pedido_id": "5",
+              "valor": 99.9}, ...] ('valor' é opcional e, se vier, é conferido com o
+              total). Os pedidos válidos são marcados como pagos numa única gravação.
+              '?atomico=1' recusa o lote inteiro se alguma liquidação for inválida.
+    """
+    try:
+        liquidacoes = _lote('pagamentos')
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+    resultados = processador.liquidar_lote(DB, liquidacoes, _duravel(), request.values.get('atomico') == '1')
+    return _responder_lote(resultados, 200)
+
+
+# ----------------------------------------------------------------------
+# EXPORTAÇÃO EM FLUXO (NDJSON/CSV)
+# ----------------------------------------------------------------------
+
+TIPOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+@app.route('/api/exportar/<colecao>')
+def api_exportar(colecao):
+    """
+    Endpoint: api_exportar (Rota: /api/exportar/<clientes|produtos|pedidos>)
+    Objetivo: Baixar a coleção inteira (ou uma faixa ?desde=&ate= de IDs) em
+              ?formato=ndjson|csv, com ?gzip=1 para comprimir durante o envio.
+              Pedidos aceitam ?status=pago|aberto e ?cliente_id= e saem com uma
+              linha por item. O corpo é gerado página por página (exportacao.py):
+              nada é montado antes do envio.
+    """
+    if colecao not in exportacao.COLECOES_EXPORTAVEIS:
+        return jsonify({'erro': "Coleção não encontrada."}), 404
+    formato = request.args.get('formato', 'ndjson')
+    compactar = request.args.get('gzip') == '1'
+    try:
+        filtros = None
+        if colecao == 'pedidos':
+            filtros = _filtros_pedidos(request.args.get('status'), request.args.get('cliente_id', '').strip())
+        partes = exportacao.exportar(DB, colecao, formato, compactar, filtros or None,
+                                     exportacao.faixa_id(request.args.get('desde'), 'desde'),
+                                     exportacao.faixa_id(request.args.get('ate'), 'ate'))
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+    arquivo = f"{colecao}.{formato}" + ('.gz' if compactar else '')
+    resposta = Response(partes, content_type='application/gzip' if compactar else TIPOS_EXPORTACAO[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{arquivo}"'
+    resposta.headers['X-Accel-Buffering'] = 'no' # Proxy (nginx) repassa cada bloco assim que é gerado
+    return resposta
+
+
+@app.route('/pagar_pedido/<pedido_id>', methods=['POST'])
+def pagar_pedido_web(pedido_id):
+    """
+    Endpoint: pagar_pedido_web (Rota: /pagar_pedido/<id>)
+    Demonstra: DEPENDÊNCIA e POLIMORFISMO (processados em segundo plano).
+    """
+    try:
+        processador.solicitar_pagamento(DB, pedido_id, _forma_pagamento(request.form), _duravel())
+    except KeyError:
+        return render_template('error.html', message="Pedido não encontrado."), 404
+    except ValueError as e:
+        return render_template('error.html', message=str(e)), 400
+    return redirect(url_for('index'))
+
+
 # ----------------------------------------------------------------------
 # ROTAS DE CRIAÇÃO E LÓGICA DE NEGÓCIO
 # ----------------------------------------------------------------------
 
+def _duravel():
+    """
+    Com a gravação em grupo ativa, '?duravel=1' (ou o campo 'duravel' do formulário)
+    faz a requisição esperar até a alteração estar gravada em disco.
+    """
+    return request.values.get('duravel') == '1'
+
+
 @app.route('/cadastrar_cliente', methods=['GET', 'POST'])
 def cadastrar_cliente_web():
     """
@@ -60,14 +619,16 @@ def cadastrar_cliente_web():
         cpf = request.form['cpf']
         endereco = request.form['endereco']
         
-        # Lógica POO (Herança)
-        novo_cliente = Cliente(nome, cpf, endereco)
-        
-        # 2. Persistência
-        cliente_id = str(DB['next_ids']['cliente'])
-        DB['clientes'][cliente_id] = novo_cliente
-        DB['next_ids']['cliente'] += 1
-        database.salvar_dados_json(DB)
+        # 2. Persistência (ID alocado e cliente salvo atomicamente, mesmo com vários workers).
+        # O CPF é conferido dentro da transação, já com os cadastros dos outros workers
+        try:
+            with database.transacao(DB, duravel=_duravel()):
+                obter_indices(DB).cpf.verificar(cpf)
+                cliente_id = database.alocar_id(DB, 'cliente')
+                novo_cliente = Cliente(nome, cpf, endereco, cliente_id) # Lógica POO (Herança)
+                DB['clientes'][cliente_id] = novo_cliente
+        except ValueError as e:
+            return render_template('error.html', message=str(e)), 409
         
         return redirect(url_for('index'))
     
@@ -114,20 +675,15 @@ def cadastrar_pedido_web():
         if total_itens_adicionados == 0:
             return render_template('error.html', message="O pedido deve ter pelo menos um item."), 400
 
-        # 3. Persistência
-        pedido_id = str(DB['next_ids']['pedido'])
-        DB['pedidos'][pedido_id] = novo_pedido
-        DB['next_ids']['pedido'] += 1
-        database.salvar_dados_json(DB)
+        # 3. Persistência (ID alocado e pedido salvo atomicamente, mesmo com vários workers)
+        with database.transacao(DB, duravel=_duravel()):
+            pedido_id = database.alocar_id(DB, 'pedido')
+            DB['pedidos'][pedido_id] = novo_pedido
         
         return redirect(url_for('index'))
 
-    # GET: Exibe o formulário
-    return render_template(
-        'cadastro_pedido.html', 
-        clientes=clientes_data.items(), 
-        produtos=produtos_data.items()
-    )
+    # GET: Exibe o formulário (clientes e produtos são buscados pelo autocompletar)
+    return render_template('cadastro_pedido.html')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+# Arquivo: arquivamento.py - Move pedidos pagos antigos de DB['pedidos'] para o arquivo morto
+#
+# Uso (na raiz do projeto, com o app_web no ar ou não; ex.: uma vez por dia no cron):
+#     python3 arquivamento.py [--manter N] [--segmento N]
+#
+# Um pedido é arquivado quando está pago e não está entre os MANTER pedidos mais
+# recentes (os IDs são alocados em ordem, então "antigo" = ID até next_ids['pedido']
+# - MANTER - 1). Cada leva de até TAMANHO_SEGMENTO pedidos vira um segmento
+# (persistencia/arquivo.py) e sai de DB['pedidos'] na mesma transação. O segmento
+# chega ao disco antes de a remoção ser salva: uma interrupção no meio deixa o
+# pedido nos dois lugares (os leitores ignoram a cópia e o próximo arquivamento a
+# tira de DB['pedidos']), nunca em nenhum.
+
+import argparse
+import os
+import time
+
+import database
+from persistencia.arquivo import escrever_segmento, id_arquivavel
+from persistencia.colecao import ordem_id
+
+
+# Quantos pedidos mais recentes (por ID) ficam sempre em DB['pedidos'], pagos ou não
+ARQUIVO_MANTER = int(os.environ.get('LOJA_ARQUIVO_MANTER', 10000))
+# Máximo de pedidos por segmento (e por transação do arquivamento)
+TAMANHO_SEGMENTO = int(os.environ.get('LOJA_ARQUIVO_SEGMENTO', 50000))
+# Pedidos lidos por página ao procurar os arquiváveis
+_PAGINA = 1000
+
+
+def _candidatos(pedidos, apos, limite):
+    """Gera (id, pedido) dos pedidos pagos com ID depois de 'apos' e até 'limite', em ordem de ID."""
+    while True:
+        pagina, apos = pedidos.pagina(apos, _PAGINA, {'pago': True})
+        for chave, pedido in pagina:
+            if ordem_id(chave) >= (0, limite + 1):
+                return
+            yield chave, pedido
+        if apos is None:
+            return
+
+
+def arquivar(dados, manter=ARQUIVO_MANTER, tamanho=TAMANHO_SEGMENTO):
+    """
+    Objetivo: Tirar de DB['pedidos'] os pedidos pagos antigos, gravando-os no arquivo morto.
+    Função: Uma transação por segmento: lê até 'tamanho' candidatos, grava o
+            segmento e remove os pedidos (os relatórios reconhecem a remoção de um
+            pedido arquivado e mantêm a venda na conta). Pedidos que já estão no
+            arquivo só são removidos. Retorna {'arquivados', 'segmentos', 'bytes',
+            'repetidos', 'segundos'}.
+    """
+    arquivo = database.obter_arquivo()
+    resultado = {'arquivados': 0, 'segmentos': 0, 'bytes': 0, 'repetidos': 0}
+    inicio = time.perf_counter()
+    apos = None
+    while True:
+        with database.transacao(dados, duravel=True):
+            pedidos = dados['pedidos']
+            limite = dados['next_ids']['pedido'] - 1 - manter
+            arquivo.atualizar()
+            lote, repetidos = [], []
+            for chave, pedido in _candidatos(pedidos, apos, limite):
+                apos = chave
+                if arquivo.contem(chave, atualizar=False):
+                    repetidos.append(chave)
+                elif id_arquivavel(chave) and id_arquivavel(str(pedido.cliente.id)):
+                    lote.append((chave, pedido.to_json()))
+                if len(lote) + len(repetidos) == tamanho:
+                    break
+            if lote:
+                os.makedirs(arquivo.pasta, exist_ok=True)
+                resultado['bytes'] += escrever_segmento(arquivo.proximo_segmento(), lote)
+                resultado['segmentos'] += 1
+                arquivo.atualizar() # Antes das remoções: os observadores consultam o arquivo
+            for chave in [chave for chave, _ in lote] + repetidos:
+                del pedidos[chave]
+        resultado['arquivados'] += len(lote)
+        resultado['repetidos'] += len(repetidos)
+        if len(lote) + len(repetidos) < tamanho:
+            break
+    resultado['segundos'] = time.perf_counter() - inicio
+    return resultado
+
+
+def exibir_resultado(resultado):
+    print(f"\n[ARQUIVAMENTO] {resultado['arquivados']} pedidos arquivados em {resultado['segmentos']} segmento(s) "
+          f"({resultado['bytes']} bytes) em {resultado['segundos']:.2f}s")
+    if resultado['repetidos']:
+        print(f"   {resultado['repetidos']} pedido(s) já estavam no arquivo e só saíram de DB['pedidos'].")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Arquivamento dos pedidos pagos antigos.")
+    parser.add_argument('--manter', type=int, default=ARQUIVO_MANTER,
+                        help="Pedidos mais recentes (por ID) que nunca são arquivados")
+    parser.add_argument('--segmento', type=int, default=TAMANHO_SEGMENTO, help="Máximo de pedidos por segmento")
+    args = parser.parse_args()
+
+    DB = database.carregar_dados_json()
+    resultado = arquivar(DB, args.manter, args.segmento)
+    database.encerrar(DB)
+    exibir_resultado(resultado)
@@ -0,0 +1,130 @@
+# Arquivo: benchmarks/bench_arquivo.py - Carga, gravação e tamanho do banco antes e depois do arquivamento
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_arquivo.py [pedidos] [modo] [manter]
+# Gera um banco sintético (benchmarks/gerador.py) e, num processo novo de cada vez:
+#   1. carrega o banco como o app_web (DB, visões de vendas e relatório) e paga um
+#      pedido recente, medindo a carga, a gravação desse pagamento e a regravação
+#      completa do snapshot;
+#   2. roda arquivamento.py (mantendo os 'manter' pedidos mais recentes);
+#   3. repete a medição 1 com o banco já arquivado (pagando outro pedido).
+# Ao final confere que totais, relatório e exportação ficaram iguais (os pedidos
+# arquivados continuam contando) e que um pedido arquivado ainda é lido pelo ID.
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerador import gerar_arquivo
+
+
+# Executado num processo novo: carga fria, como a de um worker do app_web
+MEDICAO = r'''
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+os.chdir(sys.argv[2])
+import database
+import exportacao
+from pagamentos import processador
+from relatorios import analise_vendas
+from relatorios.totais_loja import obter_totais
+
+inicio = time.perf_counter()
+DB = database.carregar_dados_json()
+totais = obter_totais(DB)
+relatorio = analise_vendas.montar_relatorio(DB)
+carga = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+with database.transacao(DB, duravel=True):
+    DB['pedidos'][sys.argv[3]].pago = True
+pagamento = time.perf_counter() - inicio
+
+inicio = time.perf_counter()
+database.salvar_dados_json(DB, completo=True)
+completo = time.perf_counter() - inicio
+
+relatorio = analise_vendas.montar_relatorio(DB)
+exportados = sum(bloco.count(b'\n') for bloco in exportacao.exportar(DB, 'pedidos', 'ndjson'))
+print(json.dumps({
+    'carga': carga, 'pagamento': pagamento, 'completo': completo,
+    'quentes': len(DB['pedidos']), 'conferir': totais.conferir(DB['pedidos']),
+    'totais': totais.como_dict(), 'relatorio': relatorio['totais'], 'exportados': exportados,
+    'pedido_1': processador.situacao(DB, '1'),
+}))
+database.encerrar(DB)
+'''
+
+
+def tamanho(pasta, prefixo):
+    """Bytes ocupados pelos arquivos/pastas de 'pasta' cujo nome começa com 'prefixo'."""
+    total = 0
+    for nome in os.listdir(pasta):
+        if not nome.startswith(prefixo):
+            continue
+        caminho = os.path.join(pasta, nome)
+        if os.path.isdir(caminho):
+            total += sum(os.path.getsize(os.path.join(raiz, arquivo))
+                         for raiz, _, arquivos in os.walk(caminho) for arquivo in arquivos)
+        else:
+            total += os.path.getsize(caminho)
+    return total
+
+
+def medir(pasta, pedido_id):
+    saida = subprocess.run([sys.executable, '-c', MEDICAO, RAIZ, pasta, pedido_id],
+                           check=True, capture_output=True, text=True).stdout
+    return json.loads(saida)
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+    manter = int(sys.argv[3]) if len(sys.argv) > 3 else pedidos // 10
+
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_arquivo(os.path.join(pasta, 'data.json'), clientes=max(1, pedidos // 10), produtos=500,
+                      pedidos=pedidos, proporcao_pagos=0.9)
+        with open(os.path.join(pasta, 'data.json'), encoding='utf-8') as f:
+            brutos = json.load(f)['pedidos']
+        abertos = [chave for chave, data in brutos.items() if not data['pago']]
+        print(f"{pedidos} pedidos ({len(brutos) - len(abertos)} pagos), modo {os.environ['LOJA_ARMAZENAMENTO']}, "
+              f"mantendo os {manter} mais recentes")
+
+        antes = medir(pasta, abertos[-1])
+        banco_antes = tamanho(pasta, 'data.')
+
+        saida = subprocess.run([sys.executable, os.path.join(RAIZ, 'arquivamento.py'), '--manter', str(manter)],
+                               cwd=pasta, check=True, capture_output=True, text=True).stdout
+        print(saida.strip())
+
+        depois = medir(pasta, abertos[-2])
+        banco_depois = tamanho(pasta, 'data.') - tamanho(pasta, 'data.arquivo')
+        arquivo = tamanho(pasta, 'data.arquivo')
+
+        print(f"\n{'':>12} {'pedidos':>9} {'carga (s)':>10} {'pagamento (ms)':>15} {'completo (s)':>13} {'banco (MB)':>11}")
+        for rotulo, medida, banco in (('antes', antes, banco_antes), ('depois', depois, banco_depois)):
+            print(f"{rotulo:>12} {medida['quentes']:>9} {medida['carga']:>10.3f} {medida['pagamento'] * 1000:>15.1f} "
+                  f"{medida['completo']:>13.3f} {banco / 2 ** 20:>11.1f}")
+        print(f"{'arquivo':>12} {pedidos - depois['quentes']:>9} {'':>10} {'':>15} {'':>13} {arquivo / 2 ** 20:>11.1f}")
+
+        # Conferência: o segundo pagamento entra nas duas medições (é o único pedido que mudou)
+        falhas = []
+        if antes['conferir'] or depois['conferir']:
+            falhas.append('visões divergem dos pedidos')
+        if depois['exportados'] != antes['exportados']:
+            falhas.append(f"exportação: {depois['exportados']} linhas, esperado {antes['exportados']}")
+        if depois['pedido_1'] != antes['pedido_1']:
+            falhas.append(f"situação do pedido 1: {depois['pedido_1']}")
+        for nome in ('totais', 'relatorio'):
+            a, d = antes[nome], depois[nome]
+            total = a['total_pago'] + a['total_aberto']
+            if (d['pedidos_pagos'], d['pedidos_abertos']) != (a['pedidos_pagos'] + 1, a['pedidos_abertos'] - 1) \
+                    or abs(d['total_pago'] + d['total_aberto'] - total) > 1e-6 * total:
+                falhas.append(f"{nome}: {d}, antes {a}")
+        print(f"\nconferência: {'ok' if not falhas else 'FALHOU: ' + '; '.join(falhas)}")
+        sys.exit(0 if not falhas else 1)
@@ -0,0 +1,59 @@
+# Arquivo: benchmarks/bench_cache.py - Custo do dashboard com e sem o cache de respostas
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_cache.py [pedidos] [modo]
+# Gera um banco sintético (benchmarks/gerador.py) e mede, pelo cliente de testes
+# do Flask, o GET / em quatro situações: primeira renderização, repetição (resposta
+# do cache), revalidação com If-None-Match (304) e a primeira carga depois de um
+# pedido novo (só a tabela de pedidos é refeita). Também mede a listagem /api/pedidos.
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_arquivo
+
+
+def medir(funcao, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar() # Fora da medição
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        gerar_arquivo('data.json', clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+
+        import app_web
+        from persistencia.cache import obter_cache
+        cliente = app_web.app.test_client()
+        cache = obter_cache(app_web.DB)
+
+        def alterar_pedido():
+            with app_web.database.transacao(app_web.DB):
+                app_web.DB['pedidos']['1'].status_pagamento = None # Só toca a seção de pedidos
+
+        etag = cliente.get('/').headers['ETag']
+        print(f"{pedidos} pedidos ({app_web.database.MODO_ARMAZENAMENTO}), mediana em ms:")
+        dashboard = lambda: cliente.get('/')
+        for rotulo, funcao, preparar, repeticoes in (
+            ("GET / sem cache", dashboard, cache.limpar, 200),
+            ("GET / repetido", dashboard, None, 200),
+            ("GET / com If-None-Match (304)", lambda: cliente.get('/', headers={'If-None-Match': etag}), None, 200),
+            ("GET / após alterar um pedido", dashboard, alterar_pedido, 50),
+            ("GET /api/pedidos repetido", lambda: cliente.get('/api/pedidos'), None, 200),
+        ):
+            print(f"{rotulo:>32}: {medir(funcao, repeticoes, preparar):8.3f}")
+        print(cache.estatisticas())
@@ -0,0 +1,69 @@
+# Arquivo: benchmarks/bench_carga.py - Compara a carga completa com a carga preguiçosa
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_carga.py [num_pedidos]
+# Cada medição roda em um processo novo, para que o pico de memória (RSS) de uma
+# não contamine a outra. O pico é lido de VmHWM em /proc/self/status (Linux),
+# pois o ru_maxrss do filho herda o pico do processo pai.
+
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from persistencia.snapshot import escrever_snapshot
+
+MEDIR = """
+import os, sys, time
+sys.path.insert(0, {raiz!r})
+os.chdir({pasta!r})
+inicio = time.perf_counter()
+import database
+DB = database.carregar_dados_json()
+tempo = time.perf_counter() - inicio
+pedido = DB['pedidos'][str(len(DB['pedidos']) // 2)] # Primeiro acesso a um pedido
+with open('/proc/self/status') as f:
+    pico_kb = next(int(l.split()[1]) for l in f if l.startswith('VmHWM:'))
+print(tempo, pico_kb)
+"""
+
+
+def gerar_arquivo(caminho, num_pedidos, itens_por_pedido=3):
+    clientes = {str(i): {'nome': f"Cliente {i}", 'cpf': f"{i:011d}", 'endereco': "Rua Teste"}
+                for i in range(1, num_pedidos // 10 + 2)}
+    produtos = {str(100 + i): {'nome': f"Produto {i}", 'preco': 10.0 + i} for i in range(1, 51)}
+    pedidos = {}
+    for i in range(1, num_pedidos + 1):
+        itens = []
+        for j in range(itens_por_pedido):
+            pid = str(101 + (i + j) % 50)
+            itens.append({'produto_id': pid, 'preco': produtos[pid]['preco'], 'quantidade': 1 + j})
+        pedidos[str(i)] = {'cliente_id': str(1 + i % len(clientes)), 'itens': itens, 'pago': i % 2 == 0}
+    escrever_snapshot(caminho, {
+        'clientes': clientes, 'produtos': produtos, 'pedidos': pedidos,
+        'next_ids': {'cliente': len(clientes) + 1, 'pedido': num_pedidos + 1},
+    })
+
+
+def medir(pasta, preguicoso):
+    ambiente = dict(os.environ, LOJA_ARMAZENAMENTO='json', LOJA_CARGA_PREGUICOSA='1' if preguicoso else '0')
+    saida = subprocess.run(
+        [sys.executable, '-c', MEDIR.format(raiz=RAIZ, pasta=pasta)],
+        env=ambiente, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(saida[0]), int(saida[1])
+
+
+if __name__ == '__main__':
+    num_pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'data.json')
+        gerar_arquivo(caminho, num_pedidos)
+        tamanho = os.path.getsize(caminho) / 1e6
+        print(f"Arquivo: {num_pedidos} pedidos, {tamanho:.1f} MB")
+        print(f"{'modo':>12} {'carga (s)':>10} {'pico RSS (MB)':>14}")
+        for preguicoso in (False, True):
+            tempo, rss_kb = medir(pasta, preguicoso)
+            print(f"{'preguiçoso' if preguicoso else 'completo':>12} {tempo:>10.3f} {rss_kb / 1024:>14.1f}")
@@ -0,0 +1,105 @@
+# Arquivo: benchmarks/bench_exportacao.py - Exportação em fluxo x montada inteira na memória
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_exportacao.py [pedidos] [modo]
+# Gera um banco sintético (benchmarks/gerador.py) e baixa /api/exportar/pedidos pelo
+# cliente de testes do Flask (sem rede, lendo o corpo bloco a bloco) em NDJSON e CSV,
+# com e sem gzip. Para cada um mede o tempo até o primeiro bloco, o tempo total e
+# o pico de memória alocada durante o download (tracemalloc, numa segunda passada);
+# a referência é a mesma exportação montada inteira antes de responder.
+# Ao final confere o conteúdo: gzip igual ao texto puro, uma linha por item e filtros.
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_arquivo
+
+
+def baixar(cliente_web, url):
+    """(segundos até o primeiro bloco, segundos no total, corpo) lendo a resposta em fluxo."""
+    inicio = time.perf_counter()
+    resposta = cliente_web.get(url, buffered=False)
+    assert resposta.status_code == 200, resposta.get_data()
+    blocos = iter(resposta.response)
+    corpo = [next(blocos)]
+    primeiro = time.perf_counter() - inicio
+    corpo.extend(blocos)
+    resposta.close()
+    return primeiro, time.perf_counter() - inicio, b''.join(corpo)
+
+
+def pico_baixando(cliente_web, url):
+    """Pico de memória (MB) alocada enquanto os blocos são consumidos (e descartados)."""
+    tracemalloc.start()
+    resposta = cliente_web.get(url, buffered=False)
+    for _ in resposta.response:
+        pass
+    resposta.close()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pico / 2 ** 20
+
+
+def montar_inteira(DB, exportacao):
+    """Referência: todas as linhas achatadas e o texto NDJSON montados antes de responder."""
+    linhas = [linha for chave, pedido in DB['pedidos'].items()
+              for linha in exportacao.ACHATADORES['pedidos'](chave, pedido)]
+    return ''.join(json.dumps(linha, ensure_ascii=False) + '\n' for linha in linhas).encode('utf-8')
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        gerar_arquivo('data.json', clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+
+        import app_web
+        import database
+        import exportacao
+
+        cliente_web = app_web.app.test_client()
+        DB = app_web.DB
+        print(f"{pedidos} pedidos no banco ({database.MODO_ARMAZENAMENTO}), páginas de {exportacao.TAMANHO_PAGINA}")
+        print(f"{'exportação':>28} {'1º bloco (ms)':>14} {'total (s)':>10} {'MB':>8} {'pico (MB)':>10}")
+
+        inicio = time.perf_counter()
+        referencia = montar_inteira(DB, exportacao)
+        segundos = time.perf_counter() - inicio
+        tracemalloc.start()
+        montar_inteira(DB, exportacao)
+        pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"{'montada inteira (ndjson)':>28} {segundos * 1000:>14.1f} {segundos:>10.3f} "
+              f"{len(referencia) / 2 ** 20:>8.1f} {pico:>10.1f}")
+
+        corpos = {}
+        for formato in ('ndjson', 'csv'):
+            for compactar in (False, True):
+                url = f"/api/exportar/pedidos?formato={formato}" + ('&gzip=1' if compactar else '')
+                primeiro, total, corpo = baixar(cliente_web, url)
+                pico = pico_baixando(cliente_web, url)
+                corpos[formato, compactar] = corpo
+                rotulo = f"fluxo ({formato}{', gzip' if compactar else ''})"
+                print(f"{rotulo:>28} {primeiro * 1000:>14.1f} {total:>10.3f} {len(corpo) / 2 ** 20:>8.1f} {pico:>10.1f}")
+
+        # Conferência
+        itens = sum(max(1, len(pedido.itens)) for pedido in DB['pedidos'].values())
+        pagos = sum(len(pedido.itens) or 1 for pedido in DB['pedidos'].values() if pedido.pago)
+        ok = corpos['ndjson', False] == referencia
+        ok &= gzip.decompress(corpos['ndjson', True]) == corpos['ndjson', False]
+        ok &= gzip.decompress(corpos['csv', True]) == corpos['csv', False]
+        ok &= corpos['csv', False].count(b'\n') == itens + 1 # + cabeçalho
+        _, _, corpo = baixar(cliente_web, '/api/exportar/pedidos?status=pago')
+        ok &= corpo.count(b'\n') == pagos
+        _, _, corpo = baixar(cliente_web, '/api/exportar/clientes?formato=csv&desde=10&ate=19')
+        ok &= corpo.splitlines()[1].startswith(b'10,') and len(corpo.splitlines()) == 11
+        print(f"\nconferência: {'ok' if ok else 'FALHOU'} ({itens} linhas de item, {pagos} de pedidos pagos)")
+        sys.exit(0 if ok else 1)
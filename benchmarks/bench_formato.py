@@ -0,0 +1,90 @@
+# Arquivo: benchmarks/bench_formato.py - Snapshot JSON x binário: tamanho, carga e gravação
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_formato.py [pedidos]
+# Gera um banco sintético (benchmarks/gerador.py) e grava o mesmo conteúdo em três
+# formatos: o JSON legado (indent=4), o JSON atual (uma entidade por linha) e o
+# binário (persistencia/binario.py). Para cada um mede o tamanho do arquivo, a
+# leitura crua (ler_snapshot), a carga completa do DB (carregar_dados_json, com e
+# sem LOJA_CARGA_PREGUICOSA), a gravação completa e a gravação incremental depois
+# de pagar um único pedido.
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from gerador import gerar_dados
+from persistencia.binario import SnapshotBinario
+from persistencia.snapshot import COLECOES, SnapshotIncremental, escrever_snapshot, ler_snapshot
+
+
+def melhor_de(funcao, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def gravar_legado(caminho, bruto):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(bruto, f, indent=4)
+
+
+def medir_carga(caminho, preguicoso):
+    database.DB_FILE = caminho
+    database.CARREGAMENTO_PREGUICOSO = preguicoso
+    return melhor_de(database.carregar_dados_json)
+
+
+def medir_incremental(classe, caminho, dados):
+    """Gravação completa seguida de um pedido pago: retorna (completa, incremental)."""
+    sem_alteracoes = {nome: ((), ()) for nome in COLECOES}
+    extras = {'next_ids': dados['next_ids']}
+    snapshot = classe(caminho)
+    inicio = time.perf_counter()
+    snapshot.gravar(dados, sem_alteracoes, extras)
+    completa = time.perf_counter() - inicio
+
+    alteracoes = dict(sem_alteracoes, pedidos=(('1',), ()))
+    dados['pedidos']['1'].pago = True
+    inicio = time.perf_counter()
+    snapshot.gravar(dados, alteracoes, extras)
+    return completa, time.perf_counter() - inicio
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    bruto = gerar_dados(clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = {formato: os.path.join(pasta, f"{formato}.dat") for formato in ('legado', 'json', 'binario')}
+        gravacao = {
+            'legado': lambda: gravar_legado(caminhos['legado'], bruto),
+            'json': lambda: escrever_snapshot(caminhos['json'], bruto, formato='json'),
+            'binario': lambda: escrever_snapshot(caminhos['binario'], bruto, formato='binario'),
+        }
+
+        print(f"{pedidos} pedidos, melhor de 3 em segundos:")
+        print(f"{'formato':>10} {'MB':>8} {'gravar':>8} {'ler':>8} {'carga':>8} {'preguiç.':>8}")
+        for formato, caminho in caminhos.items():
+            gravar = melhor_de(gravacao[formato])
+            ler = melhor_de(lambda: ler_snapshot(caminho))
+            carga = medir_carga(caminho, False)
+            preguicosa = medir_carga(caminho, True)
+            tamanho = os.path.getsize(caminho) / 1e6
+            print(f"{formato:>10} {tamanho:>8.2f} {gravar:>8.3f} {ler:>8.3f} {carga:>8.3f} {preguicosa:>8.3f}")
+
+        # Salvamento pelo caminho do database (objetos reais, um pedido pago)
+        database.CARREGAMENTO_PREGUICOSO = False
+        print(f"\n{'snapshot':>20} {'completo':>10} {'1 pedido':>10}")
+        for classe, caminho in ((SnapshotIncremental, caminhos['json']), (SnapshotBinario, caminhos['binario'])):
+            database.DB_FILE = caminho
+            dados = database.carregar_dados_json()
+            completa, incremental = medir_incremental(classe, caminho, dados)
+            print(f"{classe.__name__:>20} {completa:>10.3f} {incremental:>10.3f}")
@@ -0,0 +1,119 @@
+# Arquivo: benchmarks/bench_gravacao_grupo.py - Latência e nº de gravações com e sem gravação em grupo
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_gravacao_grupo.py [pedidos_iniciais]
+# Simula rajadas: várias threads disparam POSTs em /cadastrar_pedido ao mesmo tempo,
+# com pausas entre as rajadas. Para cada modo de armazenamento, compara a gravação
+# síncrona (uma gravação por requisição) com LOJA_GRAVACAO_EM_GRUPO=1, mostrando a
+# latência p50/p99 das requisições e quantas gravações físicas cada alteração custou.
+# Com a gravação em grupo, o p99 e as gravações por alteração devem cair.
+# Requer o Flask instalado.
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ('json', 'journal', 'sqlite')
+THREADS = 16
+RAJADAS = 10
+PEDIDOS_POR_RAJADA = 5 # Por thread
+
+
+def criar_banco(pasta, n):
+    """data.json com n pedidos já existentes (deixa cada gravação completa mais cara)."""
+    itens = [{'produto_id': '101', 'preco': 6500.0, 'quantidade': 1}]
+    data = {
+        'clientes': {'1': {'nome': "Cliente", 'cpf': "000.000.000-00", 'endereco': "Rua"}},
+        'produtos': {'101': {'nome': "PC Gamer Z100", 'preco': 6500.0}},
+        'pedidos': {str(i): {'cliente_id': '1', 'itens': itens, 'pago': False} for i in range(1, n + 1)},
+        'next_ids': {'cliente': 2, 'pedido': n + 1},
+    }
+    from persistencia.snapshot import escrever_snapshot
+    escrever_snapshot(os.path.join(pasta, 'data.json'), data)
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def executar(pasta, fila):
+    os.chdir(pasta)
+    import app_web
+    import database
+
+    # Conta as gravações que realmente foram ao disco
+    gravacoes = [0]
+    gravar_original = database._gravar
+
+    def gravar_contando(*args):
+        escritas = gravar_original(*args)
+        if escritas:
+            gravacoes[0] += 1
+        return escritas
+    database._gravar = gravar_contando
+
+    latencias = []
+    barreira = threading.Barrier(THREADS)
+
+    def disparar():
+        cliente = app_web.app.test_client()
+        for _ in range(RAJADAS):
+            barreira.wait() # Todas as threads começam a rajada juntas
+            for _ in range(PEDIDOS_POR_RAJADA):
+                inicio = time.perf_counter()
+                cliente.post('/cadastrar_pedido', data={
+                    'cliente_id': '1', 'produto_id': ['101'], 'quantidade_101': '1',
+                })
+                latencias.append(time.perf_counter() - inicio)
+            time.sleep(0.05) # Pausa entre as rajadas
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=disparar) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    database.descarregar(app_web.DB)
+    tempo = time.perf_counter() - inicio
+    fila.put((latencias, gravacoes[0], tempo))
+
+
+def medir(modo, grupo, n):
+    os.environ['LOJA_ARMAZENAMENTO'] = modo
+    os.environ['LOJA_GRAVACAO_EM_GRUPO'] = '1' if grupo else '0'
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        criar_banco(pasta, n)
+        fila = contexto.Queue()
+        processo = contexto.Process(target=executar, args=(pasta, fila))
+        processo.start()
+        latencias, gravacoes, tempo = fila.get()
+        processo.join()
+    alteracoes = len(latencias)
+    return {
+        'modo': modo,
+        'grupo': grupo,
+        'p50_ms': percentil(latencias, 0.50) * 1000,
+        'p99_ms': percentil(latencias, 0.99) * 1000,
+        'gravacoes': gravacoes,
+        'gravacoes_por_alteracao': gravacoes / alteracoes,
+        'pedidos_por_s': alteracoes / tempo,
+    }
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    total = THREADS * RAJADAS * PEDIDOS_POR_RAJADA
+    print(f"{n} pedidos iniciais, {THREADS} threads x {RAJADAS} rajadas x {PEDIDOS_POR_RAJADA} pedidos = {total}")
+    print(f"{'modo':>8} {'grupo':>6} {'p50 (ms)':>9} {'p99 (ms)':>9} {'gravações':>10} {'grav/alt':>9} {'pedidos/s':>10}")
+    for modo in MODOS:
+        for grupo in (False, True):
+            r = medir(modo, grupo, n)
+            print(f"{modo:>8} {'sim' if grupo else 'não':>6} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['gravacoes']:>10} {r['gravacoes_por_alteracao']:>9.3f} {r['pedidos_por_s']:>10.1f}")
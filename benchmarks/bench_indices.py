@@ -0,0 +1,96 @@
+# Arquivo: benchmarks/bench_indices.py - Montagem e consulta dos índices secundários
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_indices.py [clientes] [modo]
+# Gera um banco com 'clientes' clientes (nomes combinados de listas fixas, CPFs
+# únicos), 2 pedidos por cliente e mede: o tempo de montagem dos índices na carga,
+# a latência média/p99 do autocompletar por prefixo, da busca por palavras (com
+# combinações que existem e que não existem), da busca por CPF e da listagem de
+# pedidos de um cliente, e o custo de cada inserção nos índices.
+# Todas as consultas devem ficar abaixo de 1 ms mesmo com 1 milhão de clientes.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRIMEIROS = ["Ana", "Bruno", "Carla", "Diego", "Élida", "Fábio", "Gustavo", "Helena", "Igor", "Júlia",
+             "Kléber", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Quésia", "Rafael", "Sônia", "Tiago"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Ferreira", "Almeida", "Costa",
+              "Gomes", "Ribeiro", "Martins", "Carvalho", "Araújo", "Melo", "Barbosa", "Rocha", "Dias"]
+
+
+def criar_banco(caminho, n):
+    aleatorio = random.Random(7)
+    clientes = {}
+    for i in range(1, n + 1):
+        nome = f"{aleatorio.choice(PRIMEIROS)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)} {i}"
+        clientes[str(i)] = {'nome': nome, 'cpf': f"{i:011d}", 'endereco': "Rua"}
+    itens = [{'produto_id': '101', 'preco': 6500.0, 'quantidade': 1}]
+    pedidos = {str(i): {'cliente_id': str((i - 1) // 2 + 1), 'itens': itens, 'pago': False}
+               for i in range(1, 2 * n + 1)}
+    data = {
+        'clientes': clientes,
+        'produtos': {'101': {'nome': "PC Gamer Z100", 'preco': 6500.0}},
+        'pedidos': pedidos,
+        'next_ids': {'cliente': n + 1, 'pedido': 2 * n + 1},
+    }
+    from persistencia.snapshot import escrever_snapshot
+    escrever_snapshot(caminho, data)
+
+
+def medir(funcao, termos):
+    tempos = []
+    for termo in termos:
+        inicio = time.perf_counter()
+        funcao(termo)
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return sum(tempos) / len(tempos) * 1000, tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))] * 1000
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+    os.environ.setdefault('LOJA_CARGA_PREGUICOSA', '1')
+
+    import database
+    from core.cliente import Cliente
+    from persistencia import indices
+
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_FILE = os.path.join(pasta, 'data.json')
+        database.SQLITE_FILE = os.path.join(pasta, 'data.db')
+        criar_banco(database.DB_FILE, n)
+        dados = database.carregar_dados_json()
+
+        inicio = time.perf_counter()
+        ix = indices.obter_indices(dados)
+        print(f"{n} clientes ({database.MODO_ARMAZENAMENTO}): índices montados em {time.perf_counter() - inicio:.2f}s")
+
+        aleatorio = random.Random(1)
+        prefixos = [f"{aleatorio.choice(PRIMEIROS)[:aleatorio.randint(2, 5)]}" for _ in range(1000)]
+        palavras = [f"{aleatorio.choice(SOBRENOMES)[:4]} {aleatorio.choice(PRIMEIROS + SOBRENOMES)[:3]}" for _ in range(1000)]
+        cpfs = [f"{aleatorio.randint(1, n):011d}" for _ in range(1000)]
+        clientes = [str(aleatorio.randint(1, n)) for _ in range(1000)]
+
+        print(f"{'consulta':>22} {'média (ms)':>11} {'p99 (ms)':>9}")
+        for rotulo, funcao, termos in (
+            ("prefixo (autocompletar)", ix.nomes_clientes.prefixo, prefixos),
+            ("palavras", ix.nomes_clientes.palavras, palavras),
+            ("CPF", ix.cpf.buscar, cpfs),
+            ("pedidos do cliente", ix.pedidos_por_cliente.pedidos, clientes),
+            ("buscar_clientes", ix.buscar_clientes, prefixos),
+        ):
+            media, p99 = medir(funcao, termos)
+            print(f"{rotulo:>22} {media:>11.4f} {p99:>9.4f}")
+
+        total = 5000
+        with database.transacao(dados):
+            inicio = time.perf_counter() # Só as inserções (e os índices); a gravação vem depois
+            for cid in database.alocar_ids(dados, 'cliente', total):
+                dados['clientes'][str(cid)] = Cliente(f"Novo Cliente {cid}", f"9{cid:010d}", "Rua")
+            tempo = time.perf_counter() - inicio
+        print(f"Inserção com os índices: {tempo / total * 1000:.4f} ms por cliente")
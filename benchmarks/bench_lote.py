@@ -0,0 +1,109 @@
+# Arquivo: benchmarks/bench_lote.py - Cadastro e pagamento um a um x API em lote
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_lote.py [pedidos] [modo]
+# Gera um banco sintético (benchmarks/gerador.py) e, pelo cliente de testes do
+# Flask (sem rede), mede pedidos por segundo:
+#   - cadastrando pelo formulário /cadastrar_pedido (uma requisição e um salvamento
+#     por pedido) e pela rota /api/pedidos/lote (uma requisição e um salvamento);
+#   - pagando pela rota /api/pedidos/<id>/pagamento (fila assíncrona, um salvamento
+#     ao enfileirar e outro ao concluir) e liquidando em /api/pagamentos/lote.
+# Ao final confere que os pedidos gravados em disco são os esperados.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_arquivo
+
+
+def linha(rotulo, quantidade, segundos):
+    print(f"{rotulo:>34} {quantidade:>8} {segundos:>9.3f} {quantidade / segundos:>12.0f}")
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+    individuais = max(1, min(200, pedidos // 100)) # O caminho unitário é lento: amostra menor
+    lote = 2000
+
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        gerar_arquivo('data.json', clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+
+        import app_web
+        import database
+        from pagamentos import processador
+
+        cliente_web = app_web.app.test_client()
+        DB = app_web.DB
+        aleatorio = random.Random(3)
+        clientes = list(DB['clientes'].keys())
+        produtos = list(DB['produtos'].keys())
+
+        def novo_pedido():
+            itens = aleatorio.sample(produtos, 3)
+            return {'cliente_id': aleatorio.choice(clientes),
+                    'itens': [{'produto_id': p, 'quantidade': aleatorio.randint(1, 5)} for p in itens]}
+
+        print(f"{pedidos} pedidos no banco ({database.MODO_ARMAZENAMENTO})")
+        print(f"{'operação':>34} {'itens':>8} {'segundos':>9} {'itens/s':>12}")
+
+        # 1. Cadastro pelo formulário: uma transação (e um salvamento) por pedido
+        inicio = time.perf_counter()
+        for _ in range(individuais):
+            pedido = novo_pedido()
+            formulario = {'cliente_id': pedido['cliente_id'], 'produto_id': [i['produto_id'] for i in pedido['itens']]}
+            formulario.update({f"quantidade_{i['produto_id']}": i['quantidade'] for i in pedido['itens']})
+            assert cliente_web.post('/cadastrar_pedido', data=formulario).status_code == 302
+        unitario = time.perf_counter() - inicio
+        linha("POST /cadastrar_pedido", individuais, unitario)
+
+        # 2. Cadastro em lote: uma requisição e um salvamento por lote
+        registros = [novo_pedido() for _ in range(lote)]
+        registros[7] = {'cliente_id': '0', 'itens': []} # Inválido: rejeitado, o resto é gravado
+        inicio = time.perf_counter()
+        resposta = cliente_web.post('/api/pedidos/lote', json={'pedidos': registros})
+        em_lote = time.perf_counter() - inicio
+        corpo = resposta.get_json()
+        assert resposta.status_code == 207 and corpo['aceitos'] == lote - 1, corpo['rejeitados']
+        linha("POST /api/pedidos/lote", lote, em_lote)
+        print(f"{'ganho':>34} {'':>8} {'':>9} {(lote / em_lote) / (individuais / unitario):>11.0f}x")
+        novos = [r['id'] for r in corpo['resultados'] if 'id' in r]
+
+        # 3. Pagamento um a um pela fila assíncrona (até todos concluírem)
+        inicio = time.perf_counter()
+        for pedido_id in novos[:individuais]:
+            resposta = cliente_web.post(f'/api/pedidos/{pedido_id}/pagamento', json={'forma': 'pix'})
+            assert resposta.status_code == 202
+        processador.obter_processador(DB).aguardar_todos()
+        unitario = time.perf_counter() - inicio
+        linha("POST /api/pedidos/<id>/pagamento", individuais, unitario)
+
+        # 4. Liquidação em lote (o primeiro já foi pago no passo 3: rejeitado)
+        liquidacoes = [{'pedido_id': pedido_id, 'valor': DB['pedidos'][pedido_id].calcular_total()}
+                       for pedido_id in novos[individuais - 1:]]
+        inicio = time.perf_counter()
+        resposta = cliente_web.post('/api/pagamentos/lote', json=liquidacoes)
+        em_lote = time.perf_counter() - inicio
+        corpo = resposta.get_json()
+        assert resposta.status_code == 207 and corpo['rejeitados'] == 1, corpo['resultados'][0]
+        linha("POST /api/pagamentos/lote", len(liquidacoes), em_lote)
+        print(f"{'ganho':>34} {'':>8} {'':>9} {(len(liquidacoes) / em_lote) / (individuais / unitario):>11.0f}x")
+
+        # 5. Atomicidade: um item inválido recusa o lote inteiro sem gravar nada
+        antes = dict(DB['next_ids'])
+        resposta = cliente_web.post('/api/pedidos/lote?atomico=1', json=[novo_pedido(), {'cliente_id': '0'}])
+        assert resposta.status_code == 422 and DB['next_ids'] == antes
+
+        # Conferência: o disco tem todos os pedidos, com os pagamentos do lote
+        processador.encerrar(DB)
+        database.encerrar(DB)
+        recarregado = database.carregar_dados_json()
+        esperado = pedidos + individuais + lote - 1
+        pagos = sum(1 for pedido_id in novos if recarregado['pedidos'][pedido_id].pago)
+        print(f"\nconferência: {len(recarregado['pedidos'])}/{esperado} pedidos, {pagos}/{len(novos)} novos pagos")
+        sys.exit(0 if len(recarregado['pedidos']) == esperado and pagos == len(novos) else 1)
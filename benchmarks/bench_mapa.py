@@ -0,0 +1,120 @@
+# Arquivo: benchmarks/bench_mapa.py - Memória por worker e atualização entre workers: json x mapeado
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_mapa.py [pedidos] [workers]
+# Gera um banco sintético (benchmarks/gerador.py) e sobe 'workers' processos que
+# carregam o DB e ficam vivos.
+# Cada configuração roda duas vezes: só com o DB carregado e também com os índices
+# (persistencia/indices.py) e as visões de vendas (relatorios/totais_loja.py), que
+# continuam privadas de cada processo. Para cada uma mede, com todos os workers no
+# ar (Linux, /proc/<pid>/smaps_rollup):
+#   - USS: memória só daquele worker; PSS: USS + a sua fração das páginas
+#     compartilhadas (no modo 'mapeado', o arquivo mapeado é dividido entre todos);
+#   - o tempo de carga de cada worker;
+#   - depois que o primeiro worker paga um pedido, o tempo que cada um dos outros
+#     leva em database.sincronizar para enxergar o pagamento.
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerador import gerar_arquivo
+
+
+# Executado em cada worker: responde comandos lidos da entrada padrão
+WORKER = r'''
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+os.chdir(sys.argv[2])
+import database
+from persistencia.indices import obter_indices
+from relatorios.totais_loja import obter_totais
+
+inicio = time.perf_counter()
+DB = database.carregar_dados_json()
+if sys.argv[3] == '1': # Como o app_web: índices e visões de vendas montados na carga
+    obter_indices(DB)
+    totais = obter_totais(DB)
+print(json.dumps({'carga': time.perf_counter() - inicio}), flush=True)
+for comando in sys.stdin:
+    comando, chave = comando.split()
+    if comando == 'pagar':
+        with database.transacao(DB):
+            DB['pedidos'][chave].pago = True
+        print(json.dumps({}), flush=True)
+    elif comando == 'sincronizar':
+        inicio = time.perf_counter()
+        database.sincronizar(DB)
+        segundos = time.perf_counter() - inicio
+        assert DB['pedidos'][chave].pago and (sys.argv[3] == '0' or not totais.conferir(DB['pedidos']))
+        print(json.dumps({'sincronizar': segundos}), flush=True)
+'''
+
+
+def memoria(pid):
+    """(USS, PSS) do processo em MB, lidos de /proc/<pid>/smaps_rollup."""
+    campos = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if len(partes) == 3 and partes[2] == 'kB':
+                campos[partes[0].rstrip(':')] = int(partes[1])
+    uss = campos['Private_Clean'] + campos['Private_Dirty']
+    return uss / 1024, campos['Pss'] / 1024
+
+
+def comando(worker, texto):
+    worker.stdin.write(texto + '\n')
+    worker.stdin.flush()
+    return json.loads(worker.stdout.readline())
+
+
+def medir(pasta, workers, pedido, visoes, **ambiente):
+    processos = [subprocess.Popen([sys.executable, '-c', WORKER, RAIZ, pasta, visoes], env=dict(os.environ, **ambiente),
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    try:
+        cargas = [json.loads(p.stdout.readline())['carga'] for p in processos]
+        memorias = [memoria(p.pid) for p in processos]
+        comando(processos[0], f'pagar {pedido}')
+        sincronizacoes = [comando(p, f'sincronizar {pedido}')['sincronizar'] for p in processos[1:]]
+    finally:
+        for p in processos:
+            p.stdin.close()
+            p.wait()
+    return {
+        'carga': max(cargas),
+        'uss': sum(uss for uss, _ in memorias) / workers,
+        'pss': sum(pss for _, pss in memorias) / workers,
+        'pss_total': sum(pss for _, pss in memorias),
+        'sincronizar': max(sincronizacoes) if sincronizacoes else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"{pedidos} pedidos, {workers} workers (médias por worker em MB)")
+    print(f"{'configuração':>24} {'visões':>6} {'carga (s)':>10} {'USS':>8} {'PSS':>8} {'PSS total':>10} {'sincronizar (ms)':>17}")
+    for rotulo, ambiente in (
+        ("json", {'LOJA_ARMAZENAMENTO': 'json'}),
+        ("json, carga preguiçosa", {'LOJA_ARMAZENAMENTO': 'json', 'LOJA_CARGA_PREGUICOSA': '1'}),
+        ("mapeado", {'LOJA_ARMAZENAMENTO': 'mapeado'}),
+    ):
+        for visoes in ('0', '1'):
+            with tempfile.TemporaryDirectory() as pasta: # Banco novo a cada medição: o pedido ainda está em aberto
+                gerar_arquivo(os.path.join(pasta, 'data.json'), clientes=max(1, pedidos // 10), produtos=500,
+                              pedidos=pedidos)
+                with open(os.path.join(pasta, 'data.json')) as f:
+                    pedido = next(chave for chave, d in json.load(f)['pedidos'].items() if not d['pago'])
+                if ambiente['LOJA_ARMAZENAMENTO'] == 'mapeado': # Conversão fora da medição
+                    subprocess.run([sys.executable, '-m', 'persistencia.mapeado', os.path.join(pasta, 'data.json'),
+                                    os.path.join(pasta, 'data.mapa')], cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+                r = medir(pasta, workers, pedido, visoes, **ambiente)
+            print(f"{rotulo:>24} {'sim' if visoes == '1' else 'não':>6} {r['carga']:>10.3f} {r['uss']:>8.1f} "
+                  f"{r['pss']:>8.1f} {r['pss_total']:>10.1f} {r['sincronizar'] * 1000:>17.2f}")
@@ -0,0 +1,53 @@
+# Arquivo: benchmarks/bench_memoria.py - Bytes por cliente, pedido e linha de pedido
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_memoria.py [quantidade]
+# Mede com tracemalloc a memória alocada para criar N objetos de cada tipo
+# (os textos compartilhados são criados antes da medição e não entram na conta).
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cliente import Cliente
+from core.produto import Produto
+from core.pedido import Pedido
+from pagamentos.pagamento_pix import PagamentoPix
+
+
+def medir(fabrica, n):
+    """Retorna os bytes alocados por objeto criado por 'fabrica(i)'."""
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    objetos = [fabrica(i) for i in range(n)]
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Desconta a própria lista que guarda os objetos
+    return (depois - antes - sys.getsizeof(objetos)) / n
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    nome, cpf, endereco, chave = "Cliente Teste", "000.000.000-00", "Rua Teste", "chave@pix"
+    produto = Produto("Produto Teste", 10.0, "101")
+    cliente = Cliente(nome, cpf, endereco, "1")
+
+    def novo_pedido(i):
+        return Pedido(cliente)
+
+    def pedido_com_linha(i):
+        pedido = Pedido(cliente)
+        pedido.adicionar_item(produto, 1)
+        return pedido
+
+    bytes_cliente = medir(lambda i: Cliente(nome, cpf, endereco, None), n)
+    bytes_pedido = medir(novo_pedido, n)
+    bytes_linha = medir(pedido_com_linha, n) - bytes_pedido
+    bytes_pagamento = medir(lambda i: PagamentoPix(10.0, chave), n)
+
+    print(f"{'objeto':>12} {'bytes/objeto':>14}")
+    print(f"{'cliente':>12} {bytes_cliente:>14.1f}")
+    print(f"{'pedido':>12} {bytes_pedido:>14.1f}")
+    print(f"{'linha':>12} {bytes_linha:>14.1f}")
+    print(f"{'pagamento':>12} {bytes_pagamento:>14.1f}")
@@ -0,0 +1,83 @@
+# Arquivo: benchmarks/bench_pagamentos.py - Vazão do processador assíncrono de pagamentos
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_pagamentos.py [latencia_ms] [pagamentos]
+# Usa o GatewaySimulado (operadora lenta, com 5% de instabilidade) e envia
+# 'pagamentos' pagamentos para cada tamanho de pool. O envio (o que a requisição
+# web ou o menu esperam) deve custar poucos milissegundos, e a vazão deve crescer
+# quase linearmente com o número de trabalhadores até o custo de gravação dominar.
+# Com 1 trabalhador, o resultado equivale ao processamento síncrono original.
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from core.pedido import Pedido
+from pagamentos import processador
+from pagamentos.pagamento_pix import PagamentoPix
+
+
+def criar_pedidos(dados, n):
+    """Cria n pedidos em aberto e retorna os IDs."""
+    cliente = dados['clientes']['1']
+    produto = dados['produtos']['101']
+    ids = []
+    with database.transacao(dados):
+        for _ in range(n):
+            pedido = Pedido(cliente)
+            pedido.adicionar_item(produto, 1)
+            pedido_id = database.alocar_id(dados, 'pedido')
+            dados['pedidos'][pedido_id] = pedido
+            ids.append(pedido_id)
+    return ids
+
+
+def medir(dados, trabalhadores, latencia, n):
+    """Envia n pagamentos a um pool de 'trabalhadores' e mede envio e vazão."""
+    ids = criar_pedidos(dados, n)
+    gateway = processador.GatewaySimulado(latencia, taxa_instabilidade=0.05, semente=42)
+    pool = processador.ProcessadorPagamentos(
+        lambda pedido_id, sucesso, prazo: processador._registrar_resultado(dados, pedido_id, sucesso, prazo),
+        trabalhadores=trabalhadores, gateway=gateway, espera=0.01,
+    )
+    processador._processadores[id(dados['pedidos'])] = pool # solicitar_pagamento usa este pool
+
+    envios = []
+    inicio = time.perf_counter()
+    for pedido_id in ids:
+        t0 = time.perf_counter()
+        processador.solicitar_pagamento(dados, pedido_id, PagamentoPix(chave_pix="bench@pix"))
+        envios.append(time.perf_counter() - t0)
+    pool.aguardar_todos()
+    tempo = time.perf_counter() - inicio
+    pool.encerrar()
+
+    pagos = sum(1 for pedido_id in ids if dados['pedidos'][pedido_id].pago)
+    envios.sort()
+    return {
+        'envio_medio_ms': sum(envios) / n * 1000,
+        'envio_p99_ms': envios[min(n - 1, int(n * 0.99))] * 1000,
+        'pagamentos_por_s': n / tempo,
+        'pagos': pagos,
+        'chamadas': gateway.chamadas,
+    }
+
+
+if __name__ == '__main__':
+    latencia = (float(sys.argv[1]) if len(sys.argv) > 1 else 100) / 1000
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_FILE = os.path.join(pasta, 'data.json')
+        database.SQLITE_FILE = os.path.join(pasta, 'data.db')
+        dados = database.carregar_dados_json()
+
+        print(f"Gateway simulado: {latencia * 1000:.0f} ms por chamada, {n} pagamentos por medição")
+        print(f"{'trabalhadores':>13} {'envio (ms)':>11} {'envio p99':>10} {'pagamentos/s':>13} {'pagos':>6} {'chamadas':>9}")
+        for trabalhadores in (1, 4, 16, 64):
+            r = medir(dados, trabalhadores, latencia, n)
+            print(f"{trabalhadores:>13} {r['envio_medio_ms']:>11.3f} {r['envio_p99_ms']:>10.3f} "
+                  f"{r['pagamentos_por_s']:>13.1f} {r['pagos']:>6} {r['chamadas']:>9}")
@@ -0,0 +1,82 @@
+# Arquivo: benchmarks/bench_particoes.py - Snapshot único x armazenamento particionado
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_particoes.py [pedidos] [processos]
+# Gera um banco sintético (benchmarks/gerador.py), converte-o para a pasta
+# particionada e mede, no modo 'json' e no 'particionado':
+#   - a carga completa (carregar_dados_json), também com LOJA_CARGA_PREGUICOSA e,
+#     no particionado, lendo as partições com um pool de 'processos';
+#   - o pagamento de dois pedidos antigos da mesma faixa: tempo de cada salvamento e
+#     bytes regravados (no json, o data.json inteiro; no particionado, a faixa do
+#     pedido e o manifesto). No particionado sem carga preguiçosa, o primeiro
+#     pagamento ainda serializa os pedidos da faixa; o segundo já só regrava.
+# Cada medição roda num processo novo (o modo é lido do ambiente na importação).
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from gerador import gerar_arquivo
+
+
+# Executado em cada processo filho: imprime um JSON com as medições
+FILHO = r'''
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+os.chdir(sys.argv[2])
+import database
+from monitoramento import metricas
+
+inicio = time.perf_counter()
+DB = database.carregar_dados_json()
+carga = time.perf_counter() - inicio
+
+database.salvar_dados_json(DB) # Primeiro salvamento do processo: nada pendente
+resultado = {'carga': carga, 'pagamentos': []}
+for chave in ('2', '3'):
+    pedido = DB['pedidos'][chave]
+    bytes_antes = metricas.BYTES_GRAVADOS.valor(destino='snapshot')
+    inicio = time.perf_counter()
+    with database.transacao(DB):
+        pedido.pago = not pedido.pago
+    resultado['pagamentos'].append(time.perf_counter() - inicio)
+    resultado['bytes'] = metricas.BYTES_GRAVADOS.valor(destino='snapshot') - bytes_antes
+print(json.dumps(resultado))
+'''
+
+
+def medir(pasta, **ambiente):
+    saida = subprocess.run(
+        [sys.executable, '-c', FILHO, RAIZ, pasta], env=dict(os.environ, **ambiente),
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    processos = sys.argv[2] if len(sys.argv) > 2 else str(os.cpu_count() or 1)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_arquivo(os.path.join(pasta, 'data.json'), clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+        subprocess.run([sys.executable, '-m', 'persistencia.particoes', os.path.join(pasta, 'data.json'),
+                        os.path.join(pasta, 'data.particoes')], cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+        particoes = len(os.listdir(os.path.join(pasta, 'data.particoes'))) - 1
+
+        print(f"{pedidos} pedidos, {particoes} partições, {os.cpu_count()} CPUs")
+        print(f"{'configuração':>36} {'carga (s)':>10} {'1º pag. (ms)':>13} {'2º pag. (ms)':>13} {'KB regravados':>14}")
+        for rotulo, ambiente in (
+            ("json", {'LOJA_ARMAZENAMENTO': 'json'}),
+            ("json, carga preguiçosa", {'LOJA_ARMAZENAMENTO': 'json', 'LOJA_CARGA_PREGUICOSA': '1'}),
+            ("particionado", {'LOJA_ARMAZENAMENTO': 'particionado'}),
+            (f"particionado, {processos} processos", {'LOJA_ARMAZENAMENTO': 'particionado', 'LOJA_PROCESSOS_CARGA': processos}),
+            ("particionado, carga preguiçosa", {'LOJA_ARMAZENAMENTO': 'particionado', 'LOJA_CARGA_PREGUICOSA': '1'}),
+        ):
+            resultado = medir(pasta, **ambiente)
+            primeiro, segundo = resultado['pagamentos']
+            print(f"{rotulo:>36} {resultado['carga']:>10.3f} {primeiro * 1000:>13.2f} {segundo * 1000:>13.2f} "
+                  f"{resultado['bytes'] / 1024:>14.1f}")
@@ -0,0 +1,72 @@
+# Arquivo: benchmarks/bench_salvar.py - Mede o custo de salvar_dados_json conforme o tamanho do banco
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_salvar.py
+# Cada pedido referencia um cliente diferente; com a resolução de ID em O(1)
+# o tempo por entidade deve ficar aproximadamente constante (crescimento linear).
+# A segunda tabela paga um único pedido e mostra quantas entidades o salvamento
+# incremental escreveu (deve ser 1, independentemente do tamanho do banco).
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from core.cliente import Cliente
+from core.produto import Produto
+from core.pedido import Pedido
+from persistencia.colecao import Colecao
+
+
+def montar_banco(n):
+    """Cria um banco em memória com n clientes e n pedidos (1 item cada)."""
+    produto = Produto("Produto Teste", 10.0, "101")
+    dados = {'clientes': {}, 'produtos': {'101': produto}, 'pedidos': {}, 'next_ids': {}}
+    for i in range(1, n + 1):
+        cid = str(i)
+        cliente = Cliente(f"Cliente {i}", f"{i:011d}", "Rua Teste", cid)
+        dados['clientes'][cid] = cliente
+        pedido = Pedido(cliente)
+        pedido.adicionar_item(produto, 1)
+        dados['pedidos'][cid] = pedido
+    dados['next_ids'] = {'cliente': n + 1, 'pedido': n + 1}
+    for nome in ('clientes', 'produtos', 'pedidos'):
+        dados[nome] = Colecao(nome[:-1], dados[nome])
+    return dados
+
+
+def medir(n, repeticoes=3):
+    """Tempo do salvamento completo (melhor de 'repeticoes')."""
+    dados = montar_banco(n)
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        database.salvar_dados_json(dados, completo=True)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir_pagamento(n):
+    """Paga um pedido e mede o salvamento incremental seguinte."""
+    dados = montar_banco(n)
+    database.salvar_dados_json(dados, completo=True)
+    dados['pedidos'][str(n // 2)].pago = True
+    inicio = time.perf_counter()
+    escritas = database.salvar_dados_json(dados)
+    return time.perf_counter() - inicio, escritas
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_FILE = os.path.join(pasta, 'data.json')
+        print(f"{'pedidos':>10} {'tempo (s)':>12} {'us/pedido':>12}")
+        for n in (1000, 2000, 4000, 8000, 16000):
+            tempo = medir(n)
+            print(f"{n:>10} {tempo:>12.4f} {tempo / n * 1e6:>12.2f}")
+
+        print(f"\n{'pedidos':>10} {'pagamento (s)':>14} {'entidades escritas':>20}")
+        for n in (1000, 4000, 16000):
+            tempo, escritas = medir_pagamento(n)
+            print(f"{n:>10} {tempo:>14.4f} {escritas:>20}")
@@ -0,0 +1,120 @@
+# Arquivo: benchmarks/bench_visoes.py - Visões de vendas materializadas: conferência e custo
+#
+# Execute (na raiz do projeto): python3 benchmarks/bench_visoes.py [pedidos] [modo]
+# Gera um banco sintético (benchmarks/gerador.py), aplica uma sequência aleatória de
+# operações (pedidos novos, itens adicionados/removidos, quantidades alteradas,
+# pagamentos, pedidos removidos) e confere as visões de relatorios/totais_loja.py
+# contra uma soma completa feita do zero, antes e depois de salvar e recarregar.
+# Depois compara "quanto o cliente X gastou" e "unidades vendidas do produto Y"
+# pela visão (O(1)) e percorrendo todos os pedidos e itens.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gerador import gerar_arquivo
+
+
+def conferir(rotulo, totais, pedidos):
+    divergencias = totais.conferir(pedidos)
+    print(f"{rotulo:>32}: {'ok' if not divergencias else 'DIVERGE'}")
+    for linha in divergencias:
+        print(f"    {linha}")
+    return not divergencias
+
+
+def operar(database, dados, aleatorio, operacoes):
+    """Aplica 'operacoes' alterações aleatórias pelos métodos do domínio, salvando a cada 50."""
+    from core.pedido import Pedido
+    from pagamentos.pagamento_pix import PagamentoPix
+
+    clientes = list(dados['clientes'].keys())
+    produtos = list(dados['produtos'].values())
+    pedidos = dados['pedidos']
+    ids = list(pedidos.keys())
+    saida = sys.stdout
+    sys.stdout = open(os.devnull, 'w') # finalizar_compra imprime o recibo
+    try:
+        for numero in range(operacoes):
+            escolha = aleatorio.random()
+            if escolha < 0.25 or not ids:
+                pedido = Pedido(dados['clientes'][aleatorio.choice(clientes)])
+                pedido.adicionar_item(aleatorio.choice(produtos), aleatorio.randint(1, 5))
+                chave = database.alocar_id(dados, 'pedido')
+                pedidos[chave] = pedido
+                ids.append(chave)
+                continue
+            pedido = pedidos[aleatorio.choice(ids)]
+            if escolha < 0.45:
+                pedido.adicionar_item(aleatorio.choice(produtos), aleatorio.randint(1, 5))
+            elif escolha < 0.55 and len(pedido.itens) > 1:
+                pedido.remover_item(aleatorio.randrange(len(pedido.itens)))
+            elif escolha < 0.65 and pedido.itens:
+                pedido.alterar_quantidade(aleatorio.randrange(len(pedido.itens)), aleatorio.randint(1, 9))
+            elif escolha < 0.9:
+                if not pedido.pago:
+                    pedido.finalizar_compra(PagamentoPix(0, "chave@loja"))
+            else:
+                ids.remove(pedido.id)
+                del pedidos[pedido.id]
+            if numero % 50 == 49:
+                database.salvar_dados_json(dados)
+    finally:
+        sys.stdout.close()
+        sys.stdout = saida
+    database.salvar_dados_json(dados)
+
+
+def medir(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+if __name__ == '__main__':
+    pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    os.environ['LOJA_ARMAZENAMENTO'] = sys.argv[2] if len(sys.argv) > 2 else 'json'
+
+    with tempfile.TemporaryDirectory() as pasta:
+        os.chdir(pasta)
+        gerar_arquivo('data.json', clientes=max(1, pedidos // 10), produtos=500, pedidos=pedidos)
+
+        import database
+        from relatorios.totais_loja import obter_totais
+
+        dados = database.carregar_dados_json()
+        inicio = time.perf_counter()
+        totais = obter_totais(dados)
+        print(f"{pedidos} pedidos ({database.MODO_ARMAZENAMENTO}), visões montadas em {time.perf_counter() - inicio:.3f} s")
+
+        ok = conferir("após a carga", totais, dados['pedidos'])
+        operar(database, dados, random.Random(7), 2000)
+        ok &= conferir("após 2000 operações", totais, dados['pedidos'])
+
+        recarregado = database.carregar_dados_json()
+        ok &= conferir("após recarregar do disco", obter_totais(recarregado), recarregado['pedidos'])
+        ok &= conferir("recarga == visão incremental", totais, recarregado['pedidos'])
+
+        cliente_id = max(totais.por_cliente, key=lambda cid: totais.por_cliente[cid].pedidos)
+        produto_id = next(iter(dados['produtos'].keys()))
+
+        def gasto_percorrendo():
+            return sum(p.calcular_total() for p in dados['pedidos'].values() if p.cliente.id == cliente_id)
+
+        def unidades_percorrendo():
+            return sum(i.quantidade for p in dados['pedidos'].values() for i in p.itens if i.produto.id == produto_id)
+
+        print(f"\n{'consulta':>32} {'percorrendo':>12} {'visão':>10} (ms)")
+        for rotulo, lento, rapido in (
+            (f"gasto do cliente {cliente_id}", gasto_percorrendo, lambda: totais.cliente(cliente_id).total),
+            (f"unidades do produto {produto_id}", unidades_percorrendo, lambda: totais.produto(produto_id).unidades),
+        ):
+            print(f"{rotulo:>32} {medir(lento):>12.3f} {medir(rapido):>10.4f}")
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,115 @@
+# Arquivo: benchmarks/gerador.py - Gerador determinístico de bancos sintéticos (data.json)
+#
+# Execute (na raiz do projeto):
+#     python3 benchmarks/gerador.py --clientes 10000 --produtos 500 --pedidos 100000 --linhas 3 --saida data.json
+# A mesma '--semente' gera sempre o mesmo arquivo, então medições de commits
+# diferentes usam exatamente os mesmos dados. Os nomes têm acentos e repetições,
+# os preços variam, e a distribuição de pedidos por cliente é desigual (poucos
+# clientes concentram muitos pedidos), como numa loja real.
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistencia.snapshot import escrever_snapshot
+
+
+PRIMEIROS = ["Ana", "Bruno", "Carla", "Diego", "Élida", "Fábio", "Gustavo", "Helena", "Igor", "Júlia",
+             "Kléber", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Quésia", "Rafael", "Sônia", "Tiago",
+             "João", "Maria", "José", "Antônio", "Francisca", "Luíza", "Pedro", "Letícia", "Caio", "Beatriz"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Ferreira", "Almeida", "Costa",
+              "Gomes", "Ribeiro", "Martins", "Carvalho", "Araújo", "Melo", "Barbosa", "Rocha", "Dias",
+              "Nascimento", "Conceição", "Monteiro", "Cardoso", "Teixeira", "Correia", "Vieira", "Mendes"]
+LOGRADOUROS = ["Rua", "Avenida", "Travessa", "Alameda", "Quadra"]
+CATEGORIAS = ["Notebook", "Monitor", "Teclado", "Mouse", "Headset", "Cadeira", "SSD", "Placa de Vídeo",
+              "Memória RAM", "Webcam", "Impressora", "Roteador", "Gabinete", "Fonte", "Processador"]
+MARCAS = ["Z100", "Ultra", "Pro", "Max", "Lite", "Plus", "X", "Prime", "Neo", "Turbo"]
+
+
+def _cpf(numero):
+    texto = f"{numero:011d}"
+    return f"{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}"
+
+
+def gerar_dados(clientes=1000, produtos=100, pedidos=10000, linhas=3, semente=42, proporcao_pagos=0.6):
+    """
+    Objetivo: Montar um banco sintético no formato bruto do data.json.
+    Função: 'linhas' é a média de itens por pedido (cada pedido tem de 1 a
+            2*linhas-1 itens de produtos distintos). IDs de cliente começam em 1,
+            de produto em 101 e de pedido em 1, como nos dados iniciais.
+    """
+    aleatorio = random.Random(semente)
+
+    dados_clientes = {}
+    for i in range(1, clientes + 1):
+        nome = f"{aleatorio.choice(PRIMEIROS)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+        endereco = f"{aleatorio.choice(LOGRADOUROS)} {aleatorio.choice(SOBRENOMES)}, {aleatorio.randint(1, 2000)}"
+        dados_clientes[str(i)] = {'nome': nome, 'cpf': _cpf(i), 'endereco': endereco}
+
+    dados_produtos = {}
+    for i in range(produtos):
+        nome = f"{aleatorio.choice(CATEGORIAS)} {aleatorio.choice(MARCAS)} {i + 1}"
+        preco = round(aleatorio.lognormvariate(5.5, 1.0), 2) + 1.0 # Maioria barata, alguns muito caros
+        dados_produtos[str(101 + i)] = {'nome': nome, 'preco': preco}
+
+    ids_produtos = list(dados_produtos)
+    maximo_linhas = max(1, min(2 * linhas - 1, len(ids_produtos)))
+    dados_pedidos = {}
+    for i in range(1, pedidos + 1):
+        # random() ** 2 concentra os pedidos nos primeiros clientes
+        cliente_id = str(1 + int(clientes * aleatorio.random() ** 2))
+        itens = []
+        for produto_id in aleatorio.sample(ids_produtos, aleatorio.randint(1, maximo_linhas)):
+            itens.append({
+                'produto_id': produto_id,
+                'preco': dados_produtos[produto_id]['preco'],
+                'quantidade': aleatorio.randint(1, 5),
+            })
+        dados_pedidos[str(i)] = {'cliente_id': cliente_id, 'itens': itens, 'pago': aleatorio.random() < proporcao_pagos}
+
+    return {
+        'clientes': dados_clientes,
+        'produtos': dados_produtos,
+        'pedidos': dados_pedidos,
+        'next_ids': {'cliente': clientes + 1, 'pedido': pedidos + 1},
+    }
+
+
+def gerar_arquivo(caminho, **escala):
+    """Grava o banco sintético em 'caminho' no formato do snapshot (uma entidade por linha)."""
+    escrever_snapshot(caminho, gerar_dados(**escala))
+
+
+def argumentos_escala(parser):
+    """Opções de escala compartilhadas com benchmarks/suite.py."""
+    parser.add_argument('--clientes', type=int, default=1000)
+    parser.add_argument('--produtos', type=int, default=100)
+    parser.add_argument('--pedidos', type=int, default=10000)
+    parser.add_argument('--linhas', type=int, default=3, help="média de itens por pedido")
+    parser.add_argument('--semente', type=int, default=42)
+
+
+def escala_dos_argumentos(args):
+    return {
+        'clientes': args.clientes,
+        'produtos': args.produtos,
+        'pedidos': args.pedidos,
+        'linhas': args.linhas,
+        'semente': args.semente,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera um data.json sintético e reprodutível.")
+    argumentos_escala(parser)
+    parser.add_argument('--saida', default='data.json')
+    args = parser.parse_args()
+    if args.clientes < 1 or args.produtos < 1:
+        parser.error("--clientes e --produtos devem ser pelo menos 1.")
+
+    gerar_arquivo(args.saida, **escala_dos_argumentos(args))
+    print(f"{args.saida}: {args.clientes} clientes, {args.produtos} produtos, {args.pedidos} pedidos "
+          f"({os.path.getsize(args.saida) / 1e6:.1f} MB)")
@@ -0,0 +1,128 @@
+# Arquivo: benchmarks/stress_concorrencia.py - Teste de estresse de escritas concorrentes no app_web
+#
+# Execute (na raiz do projeto):
+#     python3 benchmarks/stress_concorrencia.py [processos] [threads] [pedidos_por_thread]
+# Cada processo simula um worker do gunicorn (carrega o app_web com o seu próprio DB)
+# e cada thread dispara POSTs em /cadastrar_pedido. A quantidade de cada pedido é um
+# número único, então ao final dá para conferir, para cada modo de armazenamento:
+#   - nenhum pedido perdido (todas as quantidades estão no banco recarregado);
+#   - nenhum ID duplicado (um ID repetido sobrescreveria outro pedido);
+#   - todos os workers enxergam os pedidos dos demais sem recarregar o banco.
+# Com LOJA_GRAVACAO_EM_GRUPO=1 o mesmo teste cobre a gravação em grupo.
+# Requer o Flask instalado.
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ('json', 'journal', 'sqlite', 'particionado', 'mapeado')
+
+
+def marcador(worker, thread, i):
+    """Quantidade única que identifica cada pedido criado no teste."""
+    return worker * 1000000 + thread * 10000 + i + 1
+
+
+def worker(numero, pasta, threads, por_thread, barreira, resultados):
+    os.chdir(pasta)
+    sys.path.insert(0, RAIZ)
+    import app_web
+    import database
+
+    erros = []
+
+    def disparar(thread):
+        cliente = app_web.app.test_client()
+        for i in range(por_thread):
+            resposta = cliente.post('/cadastrar_pedido', data={
+                'cliente_id': '1',
+                'produto_id': ['101'],
+                'quantidade_101': str(marcador(numero, thread, i)),
+            })
+            if resposta.status_code != 302:
+                erros.append(resposta.status_code)
+
+    executoras = [threading.Thread(target=disparar, args=(t,)) for t in range(threads)]
+    for t in executoras:
+        t.start()
+    for t in executoras:
+        t.join()
+
+    database.descarregar(app_web.DB) # Gravação em grupo: esvazia a fila antes de conferir
+    barreira.wait() # Todos terminaram de escrever
+    database.sincronizar(app_web.DB)
+    resultados.put((numero, len(app_web.DB['pedidos']), erros))
+
+
+def verificar(pasta):
+    """Recarrega o banco do zero (outro processo) e confere os pedidos gravados."""
+    os.chdir(pasta)
+    import database
+    DB = database.carregar_dados_json()
+    quantidades = [item.quantidade for pedido in DB['pedidos'].values() for item in pedido.itens]
+    return len(DB['pedidos']), quantidades, dict(DB['next_ids'])
+
+
+def rodar(modo, processos, threads, por_thread):
+    os.environ['LOJA_ARMAZENAMENTO'] = modo
+    contexto = multiprocessing.get_context('spawn') # Cada worker importa o app_web do zero
+    with tempfile.TemporaryDirectory() as pasta:
+        shutil.copy(os.path.join(RAIZ, 'data.json'), os.path.join(pasta, 'data.json'))
+        with contexto.Pool(1) as pool:
+            iniciais = pool.apply(verificar, (pasta,))[0]
+
+        barreira = contexto.Barrier(processos)
+        resultados = contexto.Queue()
+        inicio = time.perf_counter()
+        workers = [
+            contexto.Process(target=worker, args=(n, pasta, threads, por_thread, barreira, resultados))
+            for n in range(processos)
+        ]
+        for p in workers:
+            p.start()
+        vistos = [resultados.get() for _ in workers]
+        for p in workers:
+            p.join()
+        tempo = time.perf_counter() - inicio
+
+        with contexto.Pool(1) as pool:
+            total, quantidades, next_ids = pool.apply(verificar, (pasta,))
+
+    esperados = {marcador(w, t, i) for w in range(processos) for t in range(threads) for i in range(por_thread)}
+    criados = len(esperados)
+    encontrados = esperados & set(quantidades)
+    falhas = []
+    if total != iniciais + criados:
+        falhas.append(f"{total - iniciais} pedidos no banco, esperados {criados}")
+    if len(encontrados) != criados:
+        falhas.append(f"{criados - len(encontrados)} pedidos perdidos")
+    if next_ids['pedido'] <= total:
+        falhas.append(f"next_ids['pedido'] = {next_ids['pedido']} não está além dos IDs usados")
+    for numero, visto, erros in vistos:
+        if erros:
+            falhas.append(f"worker {numero}: {len(erros)} POSTs falharam ({sorted(set(erros))})")
+        if visto != iniciais + criados:
+            falhas.append(f"worker {numero} enxerga {visto - iniciais} de {criados} pedidos")
+
+    print(f"{modo:>8} {criados:>8} {tempo:>9.2f} {criados / tempo:>10.1f}  {'OK' if not falhas else 'FALHOU'}")
+    for falha in falhas:
+        print(f"         - {falha}")
+    return not falhas
+
+
+if __name__ == '__main__':
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    por_thread = int(sys.argv[3]) if len(sys.argv) > 3 else 25
+
+    print(f"{processos} processos x {threads} threads x {por_thread} pedidos")
+    print(f"{'modo':>8} {'pedidos':>8} {'tempo (s)':>9} {'pedidos/s':>10}  resultado")
+    sucesso = all([rodar(modo, processos, threads, por_thread) for modo in MODOS])
+    sys.exit(0 if sucesso else 1)
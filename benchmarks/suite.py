@@ -0,0 +1,333 @@
+# Arquivo: benchmarks/suite.py - Suíte de benchmarks em escala, com resultado em JSON
+#
+# Execute (na raiz do projeto):
+#     python3 benchmarks/suite.py --pedidos 100000 --saida base.json
+#     python3 benchmarks/suite.py --pedidos 100000 --saida novo.json --comparar base.json
+# Gera um data.json sintético e reprodutível (benchmarks/gerador.py) e, para cada
+# modo de armazenamento, mede num processo novo os caminhos reais do sistema:
+# carregar_dados_json (processo limpo a cada repetição, com o pico de RSS),
+# Pedido.to_json/from_json, salvar_dados_json (completo e incremental), o
+# dashboard pelo test client do Flask (renderizado e servido do cache) e a
+# vazão de POST /cadastrar_pedido.
+# O resultado (JSON) traz o commit, a escala e a configuração LOJA_*; com
+# '--comparar', o melhor tempo (min_s, o menos sensível a ruído da máquina) de
+# cada medição é comparado ao de um resultado anterior e a suíte termina com
+# código 1 se algum piorou além da '--tolerancia'.
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import gerador
+
+
+MODOS = ('json', 'journal', 'sqlite', 'particionado', 'mapeado')
+VERSAO_FORMATO = 1
+
+MEDIR_CARGA = """
+import os, sys, time
+sys.path.insert(0, {raiz!r})
+os.chdir({pasta!r})
+inicio = time.perf_counter()
+import database
+DB = database.carregar_dados_json()
+tempo = time.perf_counter() - inicio
+with open('/proc/self/status') as f:
+    pico_kb = next((int(l.split()[1]) for l in f if l.startswith('VmHWM:')), 0)
+print(tempo, pico_kb)
+"""
+
+
+def estatisticas(tempos, **extras):
+    """Resumo de uma lista de durações (segundos), no formato gravado no JSON."""
+    ordenados = sorted(tempos)
+    resumo = {
+        'n': len(ordenados),
+        'min_s': ordenados[0],
+        'mediana_s': statistics.median(ordenados),
+        'media_s': statistics.fmean(ordenados),
+        'p95_s': ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))],
+        'max_s': ordenados[-1],
+    }
+    resumo.update(extras)
+    return resumo
+
+
+def cronometrar(funcao, repeticoes):
+    """Tempo de cada execução de funcao(); como no timeit, sem coletas do GC no meio da medição."""
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        gc.disable()
+        try:
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            gc.enable()
+    return tempos
+
+
+# ----------------------------------------------------------------------
+# MEDIÇÕES (EXECUTADAS NO PROCESSO FILHO, UM POR MODO)
+# ----------------------------------------------------------------------
+
+def medir_carga(pasta, repeticoes):
+    """carregar_dados_json num processo novo por repetição (a primeira, descartada, aquece o cache)."""
+    tempos = []
+    picos = []
+    for repeticao in range(repeticoes + 1):
+        saida = subprocess.run(
+            [sys.executable, '-c', MEDIR_CARGA.format(raiz=RAIZ, pasta=pasta)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        if repeticao > 0:
+            tempos.append(float(saida[-2]))
+            picos.append(int(saida[-1]) / 1024)
+    return estatisticas(tempos, pico_rss_mb=max(picos))
+
+
+def medir_serializacao(dados, repeticoes):
+    """Pedido.to_json e Pedido.from_json sobre todos os pedidos (já materializados)."""
+    from core.pedido import Pedido
+
+    pedidos = list(dados['pedidos'].items())
+    tempos = cronometrar(lambda: [pedido.to_json() for _, pedido in pedidos], repeticoes)
+    to_json = estatisticas(tempos, itens=len(pedidos))
+
+    brutos = [(chave, pedido.to_json()) for chave, pedido in pedidos]
+    clientes, produtos = dados['clientes'], dados['produtos']
+    tempos = cronometrar(
+        lambda: [Pedido.from_json(d, clientes[d['cliente_id']], produtos, chave) for chave, d in brutos],
+        repeticoes,
+    )
+    from_json = estatisticas(tempos, itens=len(brutos))
+    return to_json, from_json
+
+
+def medir_salvamento(database, dados, repeticoes):
+    """Salvamento completo (snapshot inteiro) e incremental (um pedido pago por repetição)."""
+    resultados = {}
+    if database.MODO_ARMAZENAMENTO != 'sqlite': # No SQLite todo salvamento é incremental
+        tempos = cronometrar(lambda: database.salvar_dados_json(dados, completo=True), repeticoes)
+        resultados['salvar_dados_json_completo'] = estatisticas(tempos)
+
+    abertos = (pedido for pedido in dados['pedidos'].values() if not pedido.pago)
+    tempos = []
+    for _ in range(repeticoes * 10):
+        pedido = next(abertos, None)
+        if pedido is None:
+            break
+        pedido.pago = True
+        inicio = time.perf_counter()
+        database.salvar_dados_json(dados)
+        tempos.append(time.perf_counter() - inicio)
+    if tempos:
+        resultados['salvar_dados_json_incremental'] = estatisticas(tempos)
+    return resultados
+
+
+def medir_dashboard(app_web, cliente, requisicoes, frio):
+    """
+    Latências de GET /. Com 'frio', o cache de respostas e fragmentos é esvaziado
+    antes de cada requisição (o dashboard é renderizado inteiro, como antes do cache).
+    """
+    from persistencia.cache import obter_cache
+    cache = obter_cache(app_web.DB)
+    tempos = []
+    for _ in range(requisicoes):
+        if frio:
+            cache.limpar()
+        inicio = time.perf_counter()
+        resposta = cliente.get('/')
+        tempos.append(time.perf_counter() - inicio)
+        if resposta.status_code != 200:
+            raise RuntimeError(f"GET / respondeu {resposta.status_code}")
+    return estatisticas(tempos, requisicoes_por_s=len(tempos) / sum(tempos))
+
+
+def medir_web(app_web, database, requisicoes, semente):
+    """
+    GET / (dashboard) e POST /cadastrar_pedido pelo test client: latências e vazão.
+    O dashboard é medido renderizado a cada requisição (comparável com resultados de
+    antes do cache) e servido do cache de respostas (o DB não muda entre as requisições).
+    """
+    cliente = app_web.app.test_client()
+    cliente.get('/') # Aquece (templates, totais da loja)
+    dashboard = medir_dashboard(app_web, cliente, requisicoes, frio=True)
+    dashboard_cache = medir_dashboard(app_web, cliente, requisicoes, frio=False)
+
+    aleatorio = random.Random(semente)
+    ids_clientes = [chave for chave, _ in app_web.DB['clientes'].pagina(None, 1000)[0]]
+    ids_produtos = [chave for chave, _ in app_web.DB['produtos'].pagina(None, 1000)[0]]
+    tempos = []
+    inicio_total = time.perf_counter()
+    for _ in range(requisicoes):
+        escolhidos = aleatorio.sample(ids_produtos, min(len(ids_produtos), aleatorio.randint(1, 3)))
+        formulario = {'cliente_id': aleatorio.choice(ids_clientes), 'produto_id': escolhidos}
+        formulario.update({f'quantidade_{pid}': str(aleatorio.randint(1, 5)) for pid in escolhidos})
+        inicio = time.perf_counter()
+        resposta = cliente.post('/cadastrar_pedido', data=formulario)
+        tempos.append(time.perf_counter() - inicio)
+        if resposta.status_code != 302:
+            raise RuntimeError(f"POST /cadastrar_pedido respondeu {resposta.status_code}")
+    database.descarregar(app_web.DB) # Com a gravação em grupo, inclui o que ficou na fila
+    cadastro = estatisticas(tempos, requisicoes_por_s=len(tempos) / (time.perf_counter() - inicio_total))
+    return dashboard, dashboard_cache, cadastro
+
+
+def executar_modo(pasta, repeticoes, requisicoes, semente):
+    """Roda todas as medições de um modo (LOJA_ARMAZENAMENTO já definido) e retorna o dicionário de resultados."""
+    os.chdir(pasta)
+    resultados = {'carregar_dados_json': medir_carga(pasta, repeticoes)}
+
+    try:
+        import app_web # Carrega o DB como o servidor faria
+    except ImportError as e:
+        app_web = None
+        resultados['web'] = {'ignorado': f"Flask indisponível ({e})"}
+    import database
+    dados = app_web.DB if app_web is not None else database.carregar_dados_json()
+
+    resultados['pedido_to_json'], resultados['pedido_from_json'] = medir_serializacao(dados, repeticoes)
+    resultados.update(medir_salvamento(database, dados, repeticoes))
+    if app_web is not None:
+        (resultados['dashboard_get'], resultados['dashboard_get_cache'],
+         resultados['cadastrar_pedido_post']) = medir_web(app_web, database, requisicoes, semente)
+    return resultados
+
+
+# ----------------------------------------------------------------------
+# PROCESSO PRINCIPAL: GERA OS DADOS, RODA OS MODOS E GRAVA O JSON
+# ----------------------------------------------------------------------
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def rodar(args):
+    escala = gerador.escala_dos_argumentos(args)
+    documento = {
+        'versao': VERSAO_FORMATO,
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'escala': escala,
+        'configuracao': {nome: valor for nome, valor in sorted(os.environ.items()) if nome.startswith('LOJA_')},
+        'parametros': {'repeticoes': args.repeticoes, 'requisicoes': args.requisicoes},
+        'resultados': {},
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        base = os.path.join(pasta, 'data.json')
+        inicio = time.perf_counter()
+        gerador.gerar_arquivo(base, **escala)
+        documento['gerador_s'] = time.perf_counter() - inicio
+        documento['arquivo_mb'] = os.path.getsize(base) / 1e6
+        print(f"Dados: {escala} -> {documento['arquivo_mb']:.1f} MB", file=sys.stderr)
+
+        for modo in args.modos:
+            pasta_modo = os.path.join(pasta, modo)
+            os.mkdir(pasta_modo)
+            shutil.copy(base, os.path.join(pasta_modo, 'data.json'))
+            arquivo_resultado = os.path.join(pasta, f'{modo}.json')
+            print(f"Medindo o modo '{modo}'...", file=sys.stderr)
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--filho', pasta_modo, '--resultado', arquivo_resultado,
+                 '--repeticoes', str(args.repeticoes), '--requisicoes', str(args.requisicoes),
+                 '--semente', str(args.semente)],
+                env=dict(os.environ, LOJA_ARMAZENAMENTO=modo), check=True, stdout=subprocess.DEVNULL,
+            )
+            with open(arquivo_resultado, encoding='utf-8') as f:
+                documento['resultados'][modo] = json.load(f)
+    return documento
+
+
+def exibir(documento, anterior=None, tolerancia=0.15):
+    """Tabela legível (stderr); com 'anterior', mostra a variação e retorna as regressões."""
+    regressoes = []
+    print(f"\n{'modo':>8} {'medição':>30} {'mín (ms)':>10} {'mediana (ms)':>13} {'p95 (ms)':>10} {'variação':>9}",
+          file=sys.stderr)
+    for modo, medicoes in documento['resultados'].items():
+        for nome, resumo in medicoes.items():
+            if 'mediana_s' not in resumo:
+                print(f"{modo:>8} {nome:>30} {resumo}", file=sys.stderr)
+                continue
+            variacao = ''
+            base = (anterior or {}).get('resultados', {}).get(modo, {}).get(nome, {}).get('min_s')
+            if base:
+                razao = resumo['min_s'] / base - 1
+                variacao = f"{razao:+.0%}"
+                if razao > tolerancia:
+                    regressoes.append((modo, nome, razao))
+                    variacao += ' !'
+            print(f"{modo:>8} {nome:>30} {resumo['min_s'] * 1000:>10.3f} {resumo['mediana_s'] * 1000:>13.3f} "
+                  f"{resumo['p95_s'] * 1000:>10.3f} "
+                  f"{variacao:>9}", file=sys.stderr)
+    return regressoes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks da loja em escala, com saída JSON.")
+    gerador.argumentos_escala(parser)
+    parser.add_argument('--modos', default=','.join(MODOS), type=lambda v: [m for m in v.split(',') if m],
+                        help="modos de armazenamento, separados por vírgula (padrão: todos)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--requisicoes', type=int, default=200, help="requisições por medição web")
+    parser.add_argument('--saida', help="arquivo JSON de resultado (padrão: stdout)")
+    parser.add_argument('--comparar', help="resultado anterior para detectar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.15, help="piora aceita no melhor tempo (0.15 = 15%%)")
+    parser.add_argument('--filho', help=argparse.SUPPRESS) # Pasta do modo (uso interno)
+    parser.add_argument('--resultado', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        resultados = executar_modo(args.filho, args.repeticoes, args.requisicoes, args.semente)
+        with open(args.resultado, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f)
+        sys.exit(0)
+
+    invalidos = [modo for modo in args.modos if modo not in MODOS]
+    if invalidos:
+        parser.error(f"modo(s) inválido(s): {', '.join(invalidos)}")
+
+    documento = rodar(args)
+    texto = json.dumps(documento, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(texto + '\n')
+    else:
+        print(texto)
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        if anterior.get('escala') != documento['escala']:
+            print("AVISO: o resultado anterior usou outra escala; a comparação não é válida.", file=sys.stderr)
+    regressoes = exibir(documento, anterior, args.tolerancia)
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:", file=sys.stderr)
+        for modo, nome, razao in regressoes:
+            print(f"   {modo}/{nome}: {razao:+.0%}", file=sys.stderr)
+        sys.exit(1)
@@ -7,9 +7,12 @@ class Cliente(Pessoa):
     Objetivo: Demonstrar HERANÇA (extensão de Pessoa), POLIMORFISMO (apresentar_dados)
               e participa da ASSOCIAÇÃO (com Pedido).
     """
-    def __init__(self, nome, cpf, endereco):
+    __slots__ = ('endereco', 'id')
+
+    def __init__(self, nome, cpf, endereco, id=None):
         super().__init__(nome, cpf) # Chamada ao construtor da superclasse (Herança)
         self.endereco = endereco
+        self.id = id # ID no banco (definido no cadastro ou na carga)
 
     def apresentar_dados(self):
         """Método Sobrescrito para demonstrar o POLIMORFISMO."""
@@ -23,6 +26,6 @@ class Cliente(Pessoa):
         return base_data
 
     @staticmethod
-    def from_json(data):
+    def from_json(data, cliente_id=None):
         """Reconstrói a instância de Cliente a partir dos dados JSON."""
-        return Cliente(data['nome'], data['cpf'], data['endereco'])
\ No newline at end of file
+        return Cliente(data['nome'], data['cpf'], data['endereco'], cliente_id)
\ No newline at end of file
@@ -1,28 +1,125 @@
 # Arquivo: core/item_pedido.py
 from .produto import Produto # IMPORTAÇÃO RELATIVA CORRETA
+from .rastreavel import Rastreavel
 
-class ItemPedido:
+# Caches do último catálogo (DB['produtos']) consultado, refeitos quando outro
+# catálogo (outro DB carregado) é consultado:
+#  - produtos que não estão (mais) no catálogo, compartilhados por todos os itens
+#    que os referenciam: evita um objeto Produto duplicado por linha de pedido;
+#  - formato antigo (produto embutido): (tamanho do catálogo, {(nome, preço): ID}),
+#    refeito também quando o tamanho muda (produto criado, importado ou removido).
+#    Um ID achado é sempre conferido no catálogo
+_catalogo = None
+_produtos_internados = {}
+_indice_legado = (0, {})
+
+
+def _usar_catalogo(produtos_db):
+    global _catalogo, _produtos_internados, _indice_legado
+    if produtos_db is not _catalogo:
+        _catalogo = produtos_db
+        _produtos_internados = {}
+        _indice_legado = (-1, {})
+
+
+def _indexar_catalogo(produtos_db):
+    global _indice_legado
+    indice = {}
+    for produto in produtos_db.values():
+        indice.setdefault((produto.nome, produto.preco), produto.id)
+    _indice_legado = (len(produtos_db), indice)
+    return indice
+
+
+def _produto_legado(produtos_db, nome, preco):
+    """Produto do catálogo com esse nome e preço (None se não houver)."""
+    tamanho, indice = _indice_legado
+    if tamanho != len(produtos_db):
+        indice = _indexar_catalogo(produtos_db)
+    pid = indice.get((nome, preco))
+    produto = produtos_db.get(pid) if pid is not None else None
+    if pid is not None and (produto is None or (produto.nome, produto.preco) != (nome, preco)):
+        # O produto indexado saiu ou mudou de nome/preço depois do índice: refaz uma vez
+        pid = _indexar_catalogo(produtos_db).get((nome, preco))
+        produto = produtos_db.get(pid) if pid is not None else None
+    return produto
+
+
+def resolver_produto(produtos_db, produto_id=None, nome=None, preco=None):
+    """
+    Objetivo: Encontrar a instância de Produto que uma linha de pedido referencia.
+    Função: Usa a instância compartilhada do catálogo ('produtos_db') quando ela
+            existe; caso contrário devolve uma instância internada (uma só por
+            produto removido ou por produto embutido no formato antigo).
+    """
+    _usar_catalogo(produtos_db)
+    if produto_id is not None:
+        produto = produtos_db.get(produto_id) if produtos_db is not None else None
+        if produto is not None:
+            return produto
+        chave = ('id', produto_id)
+        if chave not in _produtos_internados:
+            nome = nome or f"Produto {produto_id} (removido)"
+            _produtos_internados[chave] = Produto(nome, preco, produto_id)
+        return _produtos_internados[chave]
+
+    # Formato antigo: tenta achar o mesmo produto (nome e preço) no catálogo
+    produto = _produto_legado(produtos_db, nome, preco) if produtos_db is not None else None
+    if produto is not None:
+        return produto
+
+    chave = ('legado', nome, preco)
+    if chave not in _produtos_internados:
+        _produtos_internados[chave] = Produto(nome, preco)
+    return _produtos_internados[chave]
+
+
+class ItemPedido(Rastreavel):
     """
     Classe Parte (na Composição).
     Objetivo: Representar uma linha de produto. Sua existência depende da classe 'Pedido'.
     """
-    def __init__(self, produto: Produto, quantidade: int):
+    __slots__ = ('produto', 'quantidade', 'preco_unitario')
+
+    def __init__(self, produto: Produto, quantidade: int, preco_unitario=None):
+        super().__init__()
         self.produto = produto
         self.quantidade = quantidade
-        self.subtotal = produto.preco * quantidade
+        # Preço no momento da compra (não muda se o catálogo mudar depois)
+        self.preco_unitario = produto.preco if preco_unitario is None else preco_unitario
+
+    @property
+    def subtotal(self):
+        """Calculado na hora: não ocupa memória e acompanha mudanças de quantidade."""
+        return self.preco_unitario * self.quantidade
 
     def to_json(self):
-        """Serializa o ItemPedido para salvar como parte do Pedido."""
+        """Serializa o ItemPedido como referência ao produto + preço praticado."""
+        if self.produto.id is None:
+            # Produto sem ID (veio embutido no formato antigo): mantém o formato antigo
+            return {
+                'produto_data': self.produto.to_json(),
+                'quantidade': self.quantidade
+            }
         return {
-            'produto_data': self.produto.to_json(),
+            'produto_id': self.produto.id,
+            'preco': self.preco_unitario,
             'quantidade': self.quantidade
         }
-    
+
     @staticmethod
-    def from_json(data):
-        """Reconstrói a instância de ItemPedido (usado na desserialização de Pedido)."""
-        produto_obj = Produto.from_json(data['produto_data'])
-        return ItemPedido(produto_obj, data['quantidade'])
+    def from_json(data, produtos_db=None):
+        """
+        Reconstrói a instância de ItemPedido (usado na desserialização de Pedido),
+        aceitando tanto o formato normalizado quanto o antigo ('produto_data').
+        """
+        if 'produto_id' in data:
+            produto_obj = resolver_produto(produtos_db, data['produto_id'], preco=data['preco'])
+            return ItemPedido(produto_obj, data['quantidade'], data['preco'])
+
+        embutido = data['produto_data']
+        produto_obj = resolver_produto(produtos_db, nome=embutido['nome'], preco=embutido['preco'])
+        return ItemPedido(produto_obj, data['quantidade'], embutido['preco'])
 
     def __str__(self):
-        return f"   - {self.quantidade}x {self.produto.nome} (R$ {self.subtotal:.2f})"
\ No newline at end of file
+        return f"   - {self.quantidade}x {self.produto.nome} (R$ {self.subtotal:.2f})"
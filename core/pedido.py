@@ -1,27 +1,98 @@
 # Arquivo: core/pedido.py
+import time
+
 from .cliente import Cliente
 from .item_pedido import ItemPedido
 from .produto import Produto 
+from .rastreavel import Rastreavel
 from pagamentos.pagamento import Pagamento # IMPORTAÇÃO EXTERNA
 
-class Pedido:
+class Pedido(Rastreavel):
     """
     Classe de Transação.
     Objetivo: Orquestrar ASSOCIAÇÃO (Cliente), COMPOSIÇÃO (ItemPedido) e 
               DEPENDÊNCIA/POLIMORFISMO (Pagamento).
     """
-    def __init__(self, cliente: Cliente):
+    __slots__ = ('cliente', 'itens', 'pago', 'status_pagamento', 'pagamento_expira', 'id', '_total', '_unidades')
+
+    # Pagamento assíncrono (pagamentos/processador.py): enquanto não está pago, o
+    # pedido pode ter um pagamento em andamento ou recusado. O pagamento em andamento
+    # vale até 'pagamento_expira' (instante, em segundos desde a época): vencido o
+    # prazo, o processo que pagava caiu ou desistiu e o pedido aceita outro pagamento
+    PAGAMENTO_PENDENTE = 'pendente'
+    PAGAMENTO_FALHOU = 'falhou'
+
+    def __init__(self, cliente: Cliente, id=None):
+        super().__init__()
         self.cliente = cliente
-        self.itens = [] 
+        self.itens = [] # Altere apenas pelos métodos abaixo (mantêm o total em cache)
         self.pago = False
+        self.status_pagamento = None # None, PAGAMENTO_PENDENTE ou PAGAMENTO_FALHOU
+        self.pagamento_expira = None # Prazo do pagamento PENDENTE
+        self.id = id # ID no banco (definido ao registrar o pedido)
+        self._total = 0
+        self._unidades = 0
 
     def adicionar_item(self, produto: Produto, quantidade: int):
         """Função de Composição: anexa ItemPedido ao Pedido."""
         item = ItemPedido(produto, quantidade)
+        self._anexar_item(item)
+        self._marcar_alterado('itens')
+
+    def _anexar_item(self, item: ItemPedido):
+        """Anexa o item, soma-o ao total em cache e passa a ser avisado das alterações feitas nele."""
+        item._ouvinte = self
         self.itens.append(item)
+        self._total += item.subtotal
+        self._unidades += item.quantidade
+
+    def remover_item(self, indice: int):
+        """Remove (e retorna) o item na posição 'indice'."""
+        item = self.itens.pop(indice)
+        item._ouvinte = None
+        self._recalcular()
+        self._marcar_alterado('itens')
+        return item
+
+    def alterar_quantidade(self, indice: int, quantidade: int):
+        """Altera a quantidade de um item (o total é atualizado via ao_alterar)."""
+        self.itens[indice].quantidade = quantidade
+
+    def _recalcular(self):
+        """Refaz o total em cache (somente após remoções/edições de itens)."""
+        self._total = sum(item.subtotal for item in self.itens)
+        self._unidades = sum(item.quantidade for item in self.itens)
+
+    def _copiar_estado(self, outro):
+        super()._copiar_estado(outro)
+        for item in self.itens: # Os itens copiados passam a avisar este pedido
+            item._ouvinte = self
+
+    def ao_alterar(self, item, campo):
+        """Uma alteração em um ItemPedido é uma alteração do próprio Pedido."""
+        self._recalcular()
+        self._marcar_alterado('itens')
 
     def calcular_total(self):
-        return sum(item.subtotal for item in self.itens)
+        """Total do pedido, mantido a cada item anexado/removido/editado: O(1)."""
+        return self._total
+
+    def quantidade_itens(self):
+        """Soma das quantidades de todos os itens (O(1))."""
+        return self._unidades
+
+    def pagamento_em_andamento(self):
+        """Se há um pagamento PENDENTE dentro do prazo (sem prazo = deixado por uma versão antiga: vencido)."""
+        return (self.status_pagamento == self.PAGAMENTO_PENDENTE and self.pagamento_expira is not None
+                and self.pagamento_expira > time.time())
+
+    def situacao_pagamento(self):
+        """Situação exibida ao usuário: 'pago', 'pendente', 'falhou' ou 'aberto'."""
+        if self.pago:
+            return 'pago'
+        if self.status_pagamento == self.PAGAMENTO_PENDENTE and not self.pagamento_em_andamento():
+            return self.PAGAMENTO_FALHOU # O pagamento foi interrompido (prazo vencido)
+        return self.status_pagamento or 'aberto'
 
     def finalizar_compra(self, forma_pagamento: Pagamento):
         """
@@ -35,30 +106,37 @@ class Pedido:
         print(f"** PROCESSANDO PAGAMENTO - Cliente: {self.cliente.nome} | Total: R$ {total:.2f} **")
         
         forma_pagamento.valor = total
-        forma_pagamento.processar() # Chamada polimórfica
+        print(forma_pagamento.processar()) # Chamada polimórfica (retorna o recibo)
         print("="*70)
         self.pago = True
+        if self.status_pagamento is not None:
+            self.status_pagamento = None
+            self.pagamento_expira = None
 
     def to_json(self):
         """Serializa o Pedido, salvando apenas o ID do cliente (Associação)."""
-        # (Lógica para obter o ID do cliente - simplificada)
-        cliente_id = [cid for cid, c in Cliente.db_ref.items() if c is self.cliente][0] if hasattr(Cliente, 'db_ref') else None
-        
-        return {
-            'cliente_id': cliente_id,
+        data = {
+            'cliente_id': self.cliente.id,
             'itens': [item.to_json() for item in self.itens], # Composição
             'pago': self.pago
         }
+        if self.status_pagamento is not None:
+            data['status_pagamento'] = self.status_pagamento
+        if self.pagamento_expira is not None:
+            data['pagamento_expira'] = self.pagamento_expira
+        return data
 
     @staticmethod
-    def from_json(data, cliente_ref: Cliente, produtos_db):
+    def from_json(data, cliente_ref: Cliente, produtos_db, pedido_id=None):
         """Reconstrói o Pedido, restaurando a Associação e Composição."""
-        pedido = Pedido(cliente_ref)
+        pedido = Pedido(cliente_ref, pedido_id)
         pedido.pago = data.get('pago', False)
+        pedido.status_pagamento = data.get('status_pagamento')
+        pedido.pagamento_expira = data.get('pagamento_expira')
         
         # Reconstroi os itens (Composição)
         for item_data in data['itens']:
-            item = ItemPedido.from_json(item_data)
-            pedido.itens.append(item)
+            item = ItemPedido.from_json(item_data, produtos_db)
+            pedido._anexar_item(item)
             
         return pedido
\ No newline at end of file
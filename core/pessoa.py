@@ -1,11 +1,15 @@
 # Arquivo: core/pessoa.py
+from .rastreavel import Rastreavel
 
-class Pessoa:
+class Pessoa(Rastreavel):
     """
     Classe Abstrata Base.
     Objetivo: Definir atributos comuns (nome, cpf) para demonstrar a HERANÇA.
     """
+    __slots__ = ('nome', 'cpf')
+
     def __init__(self, nome, cpf):
+        super().__init__()
         self.nome = nome
         self.cpf = cpf
 
@@ -1,19 +1,24 @@
 # Arquivo: core/produto.py
+from .rastreavel import Rastreavel
 
-class Produto:
+class Produto(Rastreavel):
     """
     Classe de Domínio.
     Objetivo: Representar o item vendido, usado pela classe ItemPedido.
     """
-    def __init__(self, nome, preco):
+    __slots__ = ('nome', 'preco', 'id')
+
+    def __init__(self, nome, preco, id=None):
+        super().__init__()
         self.nome = nome
         self.preco = preco
+        self.id = id # ID no catálogo (definido na carga)
 
     def to_json(self):
         """Serializa o Produto."""
         return {'nome': self.nome, 'preco': self.preco}
     
     @staticmethod
-    def from_json(data):
+    def from_json(data, produto_id=None):
         """Reconstrói a instância de Produto a partir dos dados JSON."""
-        return Produto(data['nome'], data['preco'])
\ No newline at end of file
+        return Produto(data['nome'], data['preco'], produto_id)
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Arquivo: core/rastreavel.py
+
+class Rastreavel:
+    """
+    Classe Base (Mixin).
+    Objetivo: Detectar alterações nos objetos de domínio para que a persistência
+              grave apenas o que mudou.
+    Função: Toda escrita em um atributo público avisa o '_ouvinte' do objeto (a
+            coleção do banco onde ele está registrado, ou o Pedido dono de um
+            ItemPedido). Objetos ainda não registrados não têm ouvinte.
+            Usa __slots__ (como todo o modelo de domínio): sem __dict__ por
+            instância, cada objeto ocupa só o espaço dos seus atributos.
+    """
+    __slots__ = ('_ouvinte',)
+
+    def __init__(self):
+        self._ouvinte = None
+
+    def __setattr__(self, nome, valor):
+        object.__setattr__(self, nome, valor)
+        if nome[0] != '_':
+            ouvinte = self._ouvinte # Objetos fora do banco não avisam ninguém
+            if ouvinte is not None:
+                ouvinte.ao_alterar(self, nome)
+
+    def _copiar_estado(self, outro):
+        """
+        Copia para este objeto todos os atributos de 'outro' (exceto ID e ouvinte),
+        sem avisar o ouvinte: usado para aplicar alterações feitas por outro processo
+        mantendo a identidade do objeto (quem o referencia continua válido).
+        """
+        for classe in type(self).__mro__:
+            for nome in getattr(classe, '__slots__', ()):
+                if nome not in ('_ouvinte', 'id'):
+                    object.__setattr__(self, nome, getattr(outro, nome))
+
+    def _marcar_alterado(self, campo):
+        """Notifica o ouvinte de que 'campo' foi alterado."""
+        ouvinte = self._ouvinte
+        if ouvinte is not None:
+            ouvinte.ao_alterar(self, campo)
@@ -1,8 +1,12 @@
 # Arquivo: database.py - Gerencia a leitura e escrita no arquivo data.json
 
+import atexit
+import copy
+import gc
 import json
 import os
 import sys
+from contextlib import contextmanager
 
 # Adiciona o diretório atual ao PATH para garantir que os pacotes sejam encontrados
 sys.path.append(os.path.dirname(os.path.abspath(__file__))) 
@@ -11,10 +15,67 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from core.cliente import Cliente
 from core.produto import Produto
 from core.pedido import Pedido
+from persistencia.colecao import Colecao, ColecaoPreguicosa
+from persistencia.concorrencia import TravaArquivo
+from persistencia.gravador import GravadorEmGrupo
+from persistencia.journal import Journal
+from persistencia.snapshot import COLECOES, SnapshotIncremental, escrever_snapshot, fragmento, ler_snapshot
+from persistencia.snapshot import FORMATO_SNAPSHOT
+from persistencia.binario import SnapshotBinario, SnapshotBinarioInvalido
+from persistencia.particoes import ArmazemParticionado, colecao_do_arquivo
+from persistencia.mapeado import ColecaoMapeada, MapaCompartilhado, MapaInvalido, escrever_mapa
+from persistencia.mapeado import publicar as publicar_mapa
+from persistencia.sqlite import ArmazemSQLite
+from persistencia.arquivo import obter_arquivo as abrir_arquivo
+from monitoramento import metricas
 
 
 DB_FILE = 'data.json'
 
+# --- CONFIGURAÇÃO DO ARMAZENAMENTO ---
+# 'json'    -> cada salvamento reescreve o data.json inteiro (comportamento original)
+# 'journal' -> cada criação/pagamento anexa um registro ao journal; o data.json vira
+#              um snapshot que é compactado em segundo plano quando o journal cresce
+# 'sqlite'  -> tabelas em SQLITE_FILE; cada salvamento é uma transação pequena e os
+#              objetos só são lidos do disco quando acessados
+# 'particionado' -> uma pasta com um arquivo para clientes, um para produtos e um por
+#              faixa de LOJA_TAMANHO_PARTICAO IDs de pedido (persistencia/particoes.py);
+#              cada salvamento regrava só as partições alteradas
+# 'mapeado' -> um snapshot compacto (MAPA_FILE) mapeado com mmap por todos os processos,
+#              que compartilham as mesmas páginas em memória; cada salvamento publica
+#              uma nova geração e os outros workers relêem só as entidades alteradas
+#              (persistencia/mapeado.py). Os IDs precisam ser numéricos
+MODO_ARMAZENAMENTO = os.environ.get('LOJA_ARMAZENAMENTO', 'json')
+LIMITE_JOURNAL_BYTES = int(os.environ.get('LOJA_LIMITE_JOURNAL', 1024 * 1024))
+SQLITE_FILE = os.environ.get('LOJA_SQLITE', 'data.db')
+# Pasta do modo 'particionado' (padrão: 'data.particoes', ao lado do DB_FILE). Na
+# primeira carga ela é criada a partir do data.json existente
+PASTA_PARTICOES = os.environ.get('LOJA_PASTA_PARTICOES')
+# Arquivo do modo 'mapeado' (padrão: 'data.mapa', ao lado do DB_FILE). Na primeira
+# carga ele é gerado a partir do data.json existente
+MAPA_FILE = os.environ.get('LOJA_MAPA')
+# Pasta do arquivo morto de pedidos pagos antigos (arquivamento.py; padrão:
+# 'data.arquivo', ao lado do DB_FILE), em qualquer modo de armazenamento
+PASTA_ARQUIVO = os.environ.get('LOJA_PASTA_ARQUIVO')
+# Processos usados para ler as partições na carga (1 = leitura sequencial)
+PROCESSOS_CARGA = int(os.environ.get('LOJA_PROCESSOS_CARGA', 1))
+# Nos modos 'json' e 'journal', LOJA_FORMATO_SNAPSHOT=binario grava o data.json no
+# formato binário compacto (persistencia/binario.py); a leitura detecta o formato
+
+# Carga preguiçosa (modos 'json', 'journal' e 'particionado'): clientes e produtos
+# são reconstruídos na inicialização; cada pedido só é decodificado quando acessado
+# pela primeira vez
+CARREGAMENTO_PREGUICOSO = os.environ.get('LOJA_CARGA_PREGUICOSA', '0') == '1'
+
+# Gravação em grupo (group commit): cada transação é confirmada assim que entra na
+# fila e uma thread de fundo grava, de uma só vez, tudo o que chegou dentro de
+# JANELA_GRUPO_MS (ou ao juntar MAXIMO_GRUPO alterações). Os IDs passam a ser
+# reservados em blocos de BLOCO_IDS por processo, então a numeração pode ter lacunas.
+GRAVACAO_EM_GRUPO = os.environ.get('LOJA_GRAVACAO_EM_GRUPO', '0') == '1'
+JANELA_GRUPO_MS = float(os.environ.get('LOJA_JANELA_GRUPO_MS', 20))
+MAXIMO_GRUPO = int(os.environ.get('LOJA_MAXIMO_GRUPO', 64))
+BLOCO_IDS = int(os.environ.get('LOJA_BLOCO_IDS', 16))
+
 # --- DADOS INICIAIS (Em formato JSON PURO - Dicionários) ---
 DADOS_INICIAIS = {
     'clientes': {
@@ -28,28 +89,255 @@ DADOS_INICIAIS = {
     'next_ids': {'cliente': 2, 'pedido': 1}
 }
 
+_journais = {}
+_snapshots = {}
+_armazens_sqlite = {}
+_armazens_particionados = {}
+_travas = {}
+# Até onde cada DB carregado (chave: id da coleção de pedidos) já viu o que foi
+# gravado em disco: {'posicao': (segmento, byte)} no journal, {'assinatura': ...} no json
+# e, no modo particionado, a assinatura do manifesto e 'posicao' = geração de cada partição
+_sincronia = {}
+_gravadores = {} # Um GravadorEmGrupo por DB carregado
+_reservas = {} # (DB, tipo) -> [próximo ID, limite] do bloco reservado por este processo
 
-def carregar_dados_json():
+
+def obter_journal():
+    """Retorna o Journal associado ao DB_FILE atual (um por arquivo de snapshot)."""
+    journal = _journais.get(DB_FILE)
+    if journal is None:
+        journal = Journal(DB_FILE, LIMITE_JOURNAL_BYTES)
+        _journais[DB_FILE] = journal
+    return journal
+
+
+def obter_armazem_sqlite():
     """
-    Objetivo: Carregar dados do arquivo JSON e reconstruir os objetos Python.
-    Função: Lida com a leitura do disco e chama o método estático 'from_json' 
-            de cada classe para recriar as instâncias.
+    Objetivo: Abrir (uma única vez) o armazém SQLite configurado em SQLITE_FILE.
+    Função: Se o arquivo ainda não existir, faz a migração única a partir do
+            data.json atual (incluindo o journal) ou dos dados iniciais.
+    """
+    armazem = _armazens_sqlite.get(SQLITE_FILE)
+    if armazem is None:
+        novo = not os.path.exists(SQLITE_FILE)
+        armazem = ArmazemSQLite(SQLITE_FILE)
+        if novo or armazem.vazio():
+            armazem.migrar_de_json(ler_dados_brutos())
+        _armazens_sqlite[SQLITE_FILE] = armazem
+    return armazem
+
+
+def obter_particoes():
+    """
+    Objetivo: Abrir (uma única vez) a pasta do modo 'particionado'.
+    Função: Se ela ainda não existir, faz a conversão única a partir do data.json
+            atual ou dos dados iniciais (o data.json não é alterado).
+    """
+    pasta = PASTA_PARTICOES or os.path.splitext(DB_FILE)[0] + '.particoes'
+    armazem = _armazens_particionados.get(pasta)
+    if armazem is None:
+        armazem = ArmazemParticionado(pasta)
+        if not armazem.existe():
+            if os.path.exists(DB_FILE):
+                armazem.escrever(ler_snapshot(DB_FILE))
+            else:
+                armazem.escrever(copy.deepcopy(DADOS_INICIAIS))
+        _armazens_particionados[pasta] = armazem
+    return armazem
+
+
+def _arquivo_mapa():
+    return MAPA_FILE or os.path.splitext(DB_FILE)[0] + '.mapa'
+
+
+def abrir_mapa():
+    """
+    Objetivo: Mapear a geração atual do snapshot compartilhado (modo 'mapeado').
+    Função: Se o arquivo ainda não existir, gera-o uma única vez a partir do
+            data.json atual ou dos dados iniciais (o data.json não é alterado).
+            Depois disso o mapa é a única cópia dos dados: um arquivo inválido
+            levanta MapaInvalido (ver _mapear) em vez de ser gerado de novo.
+    """
+    caminho = _arquivo_mapa()
+    if not os.path.exists(caminho):
+        escrever_mapa(caminho, ler_snapshot(DB_FILE) if os.path.exists(DB_FILE) else copy.deepcopy(DADOS_INICIAIS))
+    return _mapear(caminho)
+
+
+def _mapear(caminho):
+    """
+    MapaCompartilhado de 'caminho'. Se ele é inválido (corrompido, truncado ou de outra
+    arquitetura), levanta MapaInvalido com a orientação: o modo 'mapeado' não grava o
+    data.json, então gerar o mapa a partir dele perderia as gravações e reusaria IDs.
+    """
+    try:
+        return MapaCompartilhado(caminho)
+    except (MapaInvalido, FileNotFoundError) as e:
+        raise MapaInvalido(
+            f"{e} O snapshot mapeado ({caminho}) é a única cópia das gravações do modo 'mapeado' "
+            f"(o {DB_FILE} não é atualizado): restaure-o de um backup. Para recomeçar do "
+            f"{DB_FILE}, perdendo o que foi gravado depois dele, remova o arquivo."
+        ) from e
+
+
+def obter_arquivo():
+    """
+    Retorna o arquivo morto (ArquivoPedidos) do banco atual. É o único lugar que
+    resolve a pasta: relatórios, pagamentos, exportação e o arquivamento a usam.
+    """
+    return abrir_arquivo(PASTA_ARQUIVO or os.path.splitext(DB_FILE)[0] + '.arquivo')
+
+
+def _arquivo_versionado():
+    """Arquivo cuja assinatura muda a cada salvamento (modos 'json', 'particionado' e 'mapeado')."""
+    if MODO_ARMAZENAMENTO == 'particionado':
+        return obter_particoes().manifesto
+    if MODO_ARMAZENAMENTO == 'mapeado':
+        return _arquivo_mapa()
+    return DB_FILE
+
+
+def obter_trava():
+    """
+    Retorna a trava de escrita do armazenamento atual (uma por arquivo). Ela é
+    exclusiva entre as threads deste processo e entre processos (flock).
+    """
+    caminho = (SQLITE_FILE if MODO_ARMAZENAMENTO == 'sqlite' else DB_FILE) + '.lock'
+    trava = _travas.get(caminho)
+    if trava is None:
+        trava = _travas[caminho] = TravaArquivo(caminho)
+    return trava
+
+
+def ler_dados_brutos(adiar=()):
+    """
+    Objetivo: Ler o estado do disco como dicionários JSON (sem criar objetos).
+    Função: Cria o data.json com os dados iniciais se ele não existir e, no modo
+            'journal', reaplica os registros ainda não compactados. As coleções
+            em 'adiar' podem vir com o texto de cada entidade ainda não decodificado.
+    """
+    return _ler_com_posicao(adiar)[0]
+
+
+def _ler_com_posicao(adiar=()):
     """
+    Como ler_dados_brutos, retornando também até onde o journal foi lido (no modo
+    'particionado', a geração de cada partição lida).
+    """
+    if MODO_ARMAZENAMENTO == 'particionado':
+        data, manifesto = obter_particoes().ler(adiar, PROCESSOS_CARGA)
+        data.setdefault('next_ids', {'cliente': 1, 'pedido': 1})
+        return data, manifesto['geracoes']
+    if MODO_ARMAZENAMENTO == 'mapeado':
+        mapa = abrir_mapa()
+        return mapa.como_dados(), mapa.geracao
+
     if not os.path.exists(DB_FILE):
-        with open(DB_FILE, 'w') as f:
-            json.dump(DADOS_INICIAIS, f, indent=4)
-        data = DADOS_INICIAIS
+        escrever_snapshot(DB_FILE, DADOS_INICIAIS)
+        data = copy.deepcopy(DADOS_INICIAIS)
     else:
         try:
-            with open(DB_FILE, 'r') as f:
-                data = json.load(f)
-        except json.JSONDecodeError:
+            data = ler_snapshot(DB_FILE, adiar)
+        except (json.JSONDecodeError, SnapshotBinarioInvalido):
             print("AVISO: Arquivo data.json corrompido. Iniciando com dados padrão.")
-            data = DADOS_INICIAIS
+            data = copy.deepcopy(DADOS_INICIAIS)
+
+    data.setdefault('next_ids', {'cliente': 1, 'pedido': 1})
+    posicao = None
+    if MODO_ARMAZENAMENTO == 'journal':
+        posicao = obter_journal().reproduzir(data)
+    return data, posicao
+
+
+def carregar_dados_json():
+    """
+    Objetivo: Carregar dados do arquivo JSON e reconstruir os objetos Python.
+    Função: Lida com a leitura do disco e chama o método estático 'from_json' 
+            de cada classe para recriar as instâncias. No modo 'sqlite', devolve
+            mapeamentos que buscam cada objeto no banco apenas quando acessado.
+            Com CARREGAMENTO_PREGUICOSO, DB['pedidos'] reconstrói cada pedido
+            só no primeiro acesso.
+    """
+    with metricas.TEMPO_CARGA.cronometrar(modo=MODO_ARMAZENAMENTO):
+        if MODO_ARMAZENAMENTO == 'sqlite':
+            return obter_armazem_sqlite().como_dados()
+        if MODO_ARMAZENAMENTO == 'mapeado':
+            with obter_trava():
+                dados = _colecoes_mapeadas(abrir_mapa())
+                _sincronia[id(dados['pedidos'])] = {'assinatura': _assinatura(_arquivo_mapa())}
+            return dados
+
+        # A carga cria milhões de objetos de uma vez: as coletas automáticas do GC
+        # nesse intervalo custam caro e não liberariam nada
+        gc_ativo = gc.isenabled()
+        gc.disable()
+        try:
+            # Sob a trava: o estado lido e a posição no journal correspondem ao mesmo instante
+            with obter_trava():
+                data, posicao = _ler_com_posicao(adiar=('pedidos',) if CARREGAMENTO_PREGUICOSO else ())
+                dados = _reconstruir_objetos(data)
+                _sincronia[id(dados['pedidos'])] = {
+                    'posicao': posicao,
+                    'assinatura': _assinatura(_arquivo_versionado()),
+                    'ids': dict(data['next_ids']), # next_ids que o disco já garante
+                }
+            return dados
+        finally:
+            if gc_ativo:
+                gc.enable()
+
 
-    # Reconstrução dos Objetos (De JSON para Instâncias Python)
-    produtos_obj = {pid: Produto.from_json(d) for pid, d in data['produtos'].items()}
-    clientes_obj = {cid: Cliente.from_json(d) for cid, d in data['clientes'].items()}
+def _colecoes_mapeadas(mapa):
+    """Monta o DB sobre o snapshot mapeado: cada objeto é criado só no primeiro acesso."""
+    dados = {}
+
+    def reconstruir_pedido(pid, texto):
+        d = json.loads(texto)
+        cliente_ref = dados['clientes'].get(d['cliente_id'])
+        if not cliente_ref:
+            print(f"Erro ao reconstruir Pedido {pid}: cliente {d['cliente_id']} inexistente. Ignorando.")
+            return None
+        return Pedido.from_json(d, cliente_ref, dados['produtos'], pid)
+
+    dados['clientes'] = ColecaoMapeada('cliente', 'clientes', mapa,
+                                       lambda cid, texto: Cliente.from_json(json.loads(texto), cid))
+    dados['produtos'] = ColecaoMapeada('produto', 'produtos', mapa,
+                                       lambda pid, texto: Produto.from_json(json.loads(texto), pid))
+    dados['pedidos'] = ColecaoMapeada('pedido', 'pedidos', mapa, reconstruir_pedido)
+    dados['next_ids'] = dict(mapa.extras.get('next_ids', {'cliente': 1, 'pedido': 1}))
+    return dados
+
+
+def _reconstruir_objetos(data):
+    """Reconstrói as instâncias (De JSON para Instâncias Python) e monta o DB."""
+    produtos_obj = {pid: Produto.from_json(d, pid) for pid, d in data['produtos'].items()}
+    clientes_obj = {cid: Cliente.from_json(d, cid) for cid, d in data['clientes'].items()}
+
+    if CARREGAMENTO_PREGUICOSO:
+        # Os pedidos são montados depois, a partir das coleções (que podem ganhar
+        # clientes/produtos sincronizados de outros processos)
+        clientes = Colecao('cliente', clientes_obj)
+        produtos = Colecao('produto', produtos_obj)
+
+        def reconstruir_pedido(pid, bruto):
+            # Mesmo critério da carga completa: pedido inválido é ignorado com um aviso
+            try:
+                d = json.loads(bruto) if isinstance(bruto, str) else bruto
+                cliente_ref = clientes.get(d['cliente_id'])
+                if not cliente_ref:
+                    print(f"Erro ao reconstruir Pedido {pid}: cliente {d['cliente_id']} inexistente. Ignorando.")
+                    return None
+                return Pedido.from_json(d, cliente_ref, produtos, pid)
+            except Exception as e:
+                print(f"Erro ao reconstruir Pedido {pid}: {e}. Ignorando.")
+                return None
+
+        return {
+            'clientes': clientes,
+            'produtos': produtos,
+            'pedidos': ColecaoPreguicosa('pedido', data['pedidos'], reconstruir_pedido),
+            'next_ids': data['next_ids']
+        }
     
     pedidos_obj = {}
     for pid, d in data['pedidos'].items():
@@ -57,29 +345,543 @@ def carregar_dados_json():
             cliente_ref = clientes_obj.get(d['cliente_id']) 
             if cliente_ref:
                 # O from_json do Pedido lida com a Composição (itens)
-                pedido_obj = Pedido.from_json(d, cliente_ref, produtos_obj)
+                pedido_obj = Pedido.from_json(d, cliente_ref, produtos_obj, pid)
                 pedidos_obj[pid] = pedido_obj
         except Exception as e:
             print(f"Erro ao reconstruir Pedido {pid}: {e}. Ignorando.")
 
+    # As coleções rastreiam as alterações feitas a partir daqui
     return {
-        'clientes': clientes_obj,
-        'produtos': produtos_obj,
-        'pedidos': pedidos_obj,
-        'next_ids': data.get('next_ids', {'cliente': 1, 'pedido': 1})
+        'clientes': Colecao('cliente', clientes_obj),
+        'produtos': Colecao('produto', produtos_obj),
+        'pedidos': Colecao('pedido', pedidos_obj),
+        'next_ids': data['next_ids']
     }
 
-def salvar_dados_json(dados):
+
+# ----------------------------------------------------------------------
+# CONCORRÊNCIA: TRANSAÇÕES E SINCRONIZAÇÃO ENTRE WORKERS
+# ----------------------------------------------------------------------
+
+@contextmanager
+def transacao(dados, duravel=False):
+    """
+    Objetivo: Executar uma alteração do DB com exclusividade entre threads e entre
+              processos (ex.: vários workers do gunicorn servindo o app_web).
+    Função: Trava, aplica o que os outros workers gravaram (sincronizar), executa o
+            bloco e salva antes de liberar a trava. Se o bloco gerar uma exceção,
+            nada é salvo e as entidades que ele alterou voltam à versão gravada
+            (ver _desfazer). Com GRAVACAO_EM_GRUPO, a alteração só entra na fila do
+            gravador em grupo; 'duravel=True' espera até ela estar em disco.
+    Uso:    with database.transacao(DB):
+                pedido_id = database.alocar_id(DB, 'pedido')
+                DB['pedidos'][pedido_id] = novo_pedido
+    """
+    ticket = None
+    with obter_trava():
+        sincronizar(dados)
+        inicio = ({nome: dados[nome].chaves_alteradas() for nome in COLECOES}, dict(dados['next_ids']))
+        try:
+            yield dados
+        except BaseException:
+            _desfazer(dados, *inicio)
+            raise
+        gravador = obter_gravador(dados) if GRAVACAO_EM_GRUPO else None
+        if gravador is not None and not gravador.encerrado:
+            ticket = gravador.registrar()
+        else: # Gravação síncrona (também depois que o gravador foi encerrado na saída)
+            salvar_dados_json(dados)
+    if ticket is not None and duravel:
+        obter_gravador(dados).aguardar(ticket) # Fora da trava: o gravador precisa dela
+
+
+def _desfazer(dados, alteradas_antes, ids_antes):
+    """
+    Desfaz em memória o que um bloco de transacao() alterou antes de falhar: cada
+    entidade alterada, criada ou removida por ele volta à versão gravada (a que
+    os outros processos enxergam). Alterações anteriores ao bloco, ainda não
+    salvas, são mantidas. Fora da GRAVACAO_EM_GRUPO os IDs alocados são devolvidos;
+    nela, o bloco de IDs reservado já está em disco e os IDs são apenas pulados.
+    """
+    tocadas = {}
+    for nome in COLECOES:
+        tocadas[nome] = dados[nome].chaves_alteradas() - alteradas_antes[nome]
+        dados[nome].descartar_alteracoes(tocadas[nome])
+
+    if MODO_ARMAZENAMENTO == 'sqlite':
+        for nome in COLECOES: # Clientes e produtos antes dos pedidos que os referenciam
+            tabela = dados[nome]
+            for chave in tocadas[nome]:
+                obj = tabela.ler_do_arquivo(chave)
+                if obj is None:
+                    tabela.sincronizar_remocao(chave)
+                else:
+                    tabela.sincronizar(chave, obj)
+    elif MODO_ARMAZENAMENTO == 'mapeado':
+        for nome in COLECOES:
+            _aplicar_mapa(dados, dados['pedidos'].mapa, nome, tocadas[nome])
+    elif any(tocadas.values()):
+        data = ler_dados_brutos(adiar=COLECOES)
+        gravadas = {nome: {c: data[nome][c] for c in tocadas[nome] if c in data[nome]} for nome in COLECOES}
+        _aplicar_diferencas(dados, gravadas, candidatas=tocadas)
+
+    if not GRAVACAO_EM_GRUPO:
+        for tipo, valor in ids_antes.items():
+            if dados['next_ids'][tipo] != valor:
+                dados['next_ids'][tipo] = valor
+
+
+def alocar_id(dados, tipo):
+    """
+    Reserva o próximo ID de 'tipo' ('cliente' ou 'pedido') e o retorna como texto.
+    Deve ser chamado dentro de transacao(), para que a entidade seja salva com o ID
+    antes que outro processo possa alocar o próximo. Com GRAVACAO_EM_GRUPO, a
+    entidade só é salva depois: o processo reserva (e grava na hora) um bloco de
+    BLOCO_IDS e entrega os IDs desse bloco sem tocar no disco.
+    """
+    with obter_trava():
+        sincronizar(dados)
+        if not GRAVACAO_EM_GRUPO:
+            valor = dados['next_ids'][tipo]
+            dados['next_ids'][tipo] = valor + 1
+            return str(valor)
+
+        reserva = _reservas.get((id(dados['pedidos']), tipo))
+        if reserva is None or reserva[0] >= reserva[1]:
+            bloco = alocar_ids(dados, tipo, BLOCO_IDS)
+            reserva = _reservas[(id(dados['pedidos']), tipo)] = [bloco.start, bloco.stop]
+        valor = reserva[0]
+        reserva[0] += 1
+        return str(valor)
+
+
+def alocar_ids(dados, tipo, quantidade):
+    """
+    Reserva 'quantidade' IDs consecutivos de 'tipo' de uma só vez (ex.: importação em
+    massa) e retorna o range de inteiros reservado. Como em alocar_id, deve ser
+    chamado dentro de transacao(); com GRAVACAO_EM_GRUPO a reserva é gravada na hora.
+    Tipos sem sequência em next_ids (ex.: 'produto') ganham uma, a partir do maior ID.
+    """
+    with obter_trava():
+        sincronizar(dados)
+        inicio = dados['next_ids'].get(tipo)
+        if inicio is None:
+            colecao = dados[tipo + 's']
+            inicio = max((int(chave) for chave in colecao.keys() if chave.isdigit()), default=0) + 1
+        dados['next_ids'][tipo] = inicio + quantidade
+        if GRAVACAO_EM_GRUPO:
+            salvar_dados_json(dados) # A reserva fica visível aos outros processos antes do uso
+        return range(inicio, inicio + quantidade)
+
+
+def obter_gravador(dados):
+    """
+    Retorna o GravadorEmGrupo do DB (criado no primeiro uso). A saída do programa
+    grava o que ainda estiver na fila (ver encerrar).
+    """
+    gravador = _gravadores.get(id(dados['pedidos']))
+    if gravador is None:
+        with obter_trava():
+            gravador = _gravadores.get(id(dados['pedidos']))
+            if gravador is None:
+                gravador = GravadorEmGrupo(
+                    lambda: salvar_dados_json(dados), JANELA_GRUPO_MS / 1000, MAXIMO_GRUPO
+                )
+                _gravadores[id(dados['pedidos'])] = gravador
+                atexit.register(encerrar, dados)
+    return gravador
+
+
+def descarregar(dados):
+    """Grava agora o que estiver na fila do gravador em grupo (sem efeito fora desse modo)."""
+    gravador = _gravadores.get(id(dados['pedidos']))
+    if gravador is not None:
+        gravador.descarregar()
+
+
+def encerrar(dados):
+    """
+    Objetivo: Ponto único de saída do sistema (menu do main.py e fim do processo).
+    Função: Esvazia a fila do gravador em grupo, para a sua thread e salva qualquer
+            alteração ainda pendente. Pode ser chamado mais de uma vez.
+    """
+    gravador = _gravadores.get(id(dados['pedidos']))
+    if gravador is not None:
+        gravador.encerrar()
+    return salvar_dados_json(dados)
+
+
+def _assinatura(caminho):
+    """Identifica a versão de um arquivo (muda a cada os.replace ou escrita)."""
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+
+def sincronizar(dados):
+    """
+    Objetivo: Trazer para os objetos em memória o que outros processos gravaram,
+              sem recarregar o banco inteiro.
+    Função: 'journal' lê só os registros anexados depois da última posição vista;
+            'sqlite' lê a tabela 'alteracoes' e relê apenas as linhas citadas;
+            'json' só relê o data.json se ele mudou, reconstruindo apenas as
+            entidades cujo texto mudou; 'particionado' faz o mesmo só com as
+            partições cuja geração no manifesto mudou; 'mapeado' troca para a
+            nova geração do mapa e refaz só as entidades do seu histórico. Alterações locais ainda
+            não salvas têm prioridade (não são sobrescritas).
+    """
+    with obter_trava():
+        if MODO_ARMAZENAMENTO == 'sqlite':
+            _sincronizar_sqlite(dados)
+            return
+        estado = _sincronia.get(id(dados['pedidos']))
+        if estado is None: # DB montado fora de carregar_dados_json
+            return
+        if MODO_ARMAZENAMENTO == 'journal':
+            novos = obter_journal().ler_novos(estado['posicao'])
+            if novos is None: # Os segmentos que faltavam já foram compactados
+                data, estado['posicao'] = _ler_com_posicao(adiar=COLECOES)
+                _aplicar_diferencas(dados, data)
+                estado['ids'] = dict(data['next_ids'])
+                return
+            registros, estado['posicao'] = novos
+            for registro in registros:
+                _aplicar_registro_externo(dados, registro)
+                _cobrir_ids(estado['ids'], registro)
+        elif MODO_ARMAZENAMENTO == 'particionado':
+            _sincronizar_particoes(dados, estado)
+        elif MODO_ARMAZENAMENTO == 'mapeado':
+            _sincronizar_mapa(dados, estado)
+        else:
+            assinatura = _assinatura(DB_FILE)
+            if assinatura != estado['assinatura']:
+                snapshot = _snapshot_incremental()
+                cache = snapshot if snapshot.possui_cache(dados) else None
+                _aplicar_diferencas(dados, ler_snapshot(DB_FILE, adiar=COLECOES), cache)
+                if cache is None: # Sem o texto de cada entidade: o próximo salvamento regrava tudo
+                    snapshot.invalidar(dados)
+                estado['assinatura'] = assinatura
+
+
+def _sincronizar_particoes(dados, estado):
+    armazem = obter_particoes()
+    assinatura = _assinatura(armazem.manifesto)
+    if assinatura == estado['assinatura']:
+        return
+    manifesto = armazem.ler_manifesto()
+    geracoes, vistas = manifesto['geracoes'], estado['posicao']
+    mudadas = [arquivo for arquivo in geracoes.keys() | vistas.keys() if geracoes.get(arquivo) != vistas.get(arquivo)]
+    # Clientes e produtos antes dos pedidos que os referenciam
+    for arquivo in sorted(mudadas, key=lambda arquivo: (COLECOES.index(colecao_do_arquivo(arquivo)), arquivo)):
+        nome = colecao_do_arquivo(arquivo)
+        no_disco = armazem.ler_particao(arquivo, adiar=COLECOES) if arquivo in geracoes else {}
+        cache = armazem if armazem.possui_cache(dados, arquivo) else None
+        # Só as entidades desta partição podem ter sido removidas por ela
+        candidatas = armazem.chaves_da_particao(dados[nome], nome, arquivo)
+        _aplicar_diferencas(dados, {nome: no_disco}, cache, {nome: candidatas})
+    for tipo, valor in manifesto['extras'].get('next_ids', {}).items():
+        dados['next_ids'][tipo] = max(dados['next_ids'].get(tipo, valor), valor)
+    estado['assinatura'] = assinatura
+    estado['posicao'] = geracoes
+
+
+def _sincronizar_mapa(dados, estado):
+    assinatura = _assinatura(_arquivo_mapa())
+    if assinatura == estado['assinatura']:
+        return
+    anterior = dados['pedidos'].mapa
+    mapa = _mapear(_arquivo_mapa())
+    # Sem avançar a geração o arquivo foi substituído (ex.: restaurado de um backup): relê tudo
+    alteradas = mapa.alteracoes_desde(anterior.geracao) if mapa.geracao > anterior.geracao else None
+    for nome in COLECOES:
+        dados[nome].trocar_mapa(mapa)
+
+    if alteradas is None:
+        # O histórico não cobre a geração que tínhamos: confere os objetos já em
+        # memória e avisa os observadores para recalcularem o resto
+        for nome in COLECOES:
+            colecao = dados[nome]
+            alteradas = [chave for chave, obj in list(colecao._itens.items()) if not colecao.alterado(chave)
+                         and mapa.texto(nome, chave) != json.dumps(obj.to_json(), separators=(',', ':'))]
+            _aplicar_mapa(dados, mapa, nome, alteradas)
+            colecao.notificar_recarga()
+    else:
+        for nome in COLECOES: # Clientes e produtos antes dos pedidos que os referenciam
+            _aplicar_mapa(dados, mapa, nome, sorted(alteradas[nome], key=int))
+
+    for tipo, valor in mapa.extras.get('next_ids', {}).items():
+        dados['next_ids'][tipo] = max(dados['next_ids'].get(tipo, valor), valor)
+    estado['assinatura'] = assinatura
+
+
+def _aplicar_mapa(dados, mapa, nome, chaves):
+    """Aplica às entidades 'chaves' de DB[nome] a versão da nova geração do mapa."""
+    colecao = dados[nome]
+    for chave in chaves:
+        if colecao.alterado(chave):
+            continue
+        texto = mapa.texto(nome, chave)
+        if texto is None:
+            colecao.sincronizar_remocao(chave)
+            continue
+        obj = _objeto_externo(dados, nome[:-1], chave, json.loads(texto))
+        if obj is not None:
+            colecao.sincronizar(chave, obj)
+
+
+def _objeto_externo(dados, tipo, chave, d):
+    """Reconstrói uma entidade gravada por outro processo (None se ela é inválida aqui)."""
+    if tipo == 'cliente':
+        return Cliente.from_json(d, chave)
+    if tipo == 'produto':
+        return Produto.from_json(d, chave)
+    cliente_ref = dados['clientes'].get(d['cliente_id'])
+    if cliente_ref is None:
+        print(f"Erro ao sincronizar Pedido {chave}: cliente {d['cliente_id']} inexistente. Ignorando.")
+        return None
+    return Pedido.from_json(d, cliente_ref, dados['produtos'], chave)
+
+
+def _aplicar_registro_externo(dados, registro):
+    """Aplica aos objetos em memória um registro do journal escrito por outro processo."""
+    tipo = registro['t']
+    chave = registro.get('id')
+    if tipo in ('cliente', 'produto', 'pedido'):
+        colecao = dados[tipo + 's']
+        if tipo in dados['next_ids']:
+            dados['next_ids'][tipo] = max(dados['next_ids'][tipo], int(chave) + 1)
+        if not colecao.alterado(chave):
+            obj = _objeto_externo(dados, tipo, chave, registro['d'])
+            if obj is not None:
+                colecao.sincronizar(chave, obj)
+    elif tipo == 'pago':
+        if not dados['pedidos'].alterado(chave):
+            dados['pedidos'].sincronizar_campo(chave, 'pago', True)
+    elif tipo == 'remover':
+        dados[registro['c']].sincronizar_remocao(chave)
+    elif tipo == 'ids':
+        for nome, valor in registro['d'].items():
+            dados['next_ids'][nome] = max(dados['next_ids'].get(nome, valor), valor)
+
+
+def _aplicar_diferencas(dados, data, cache=None, candidatas=None):
+    """
+    Compara o estado lido do disco ('data', com as entidades ainda em texto) com os
+    objetos em memória e sincroniza só o que difere. Com o 'cache' do snapshot
+    incremental, a comparação é feita direto no texto de cada linha. Coleções
+    ausentes de 'data' não são tocadas; 'candidatas' ({coleção: IDs}) limita a
+    procura por entidades removidas às que o trecho lido poderia conter.
+    """
+    for nome in COLECOES:
+        if nome not in data:
+            continue
+        tipo = nome[:-1]
+        colecao = dados[nome]
+        no_disco = data[nome]
+        for chave, bruto in no_disco.items():
+            if colecao.alterado(chave):
+                continue
+            if isinstance(bruto, str):
+                linha = json.dumps(chave) + ': ' + bruto
+                if cache is not None and cache.linha(nome, chave) == linha:
+                    continue
+                d = json.loads(bruto)
+            else:
+                d = bruto
+                linha = fragmento(chave, d)
+            if cache is None and chave in colecao:
+                atual = colecao.bruto(chave)
+                atual = json.loads(atual) if isinstance(atual, str) else atual
+                if (atual if atual is not None else colecao[chave].to_json()) == d:
+                    continue
+            obj = _objeto_externo(dados, tipo, chave, d)
+            if obj is not None:
+                colecao.sincronizar(chave, obj)
+                if cache is not None:
+                    cache.sincronizar(nome, chave, linha)
+
+        chaves = colecao.keys() if candidatas is None else candidatas[nome]
+        for chave in [c for c in chaves if c not in no_disco and not colecao.alterado(c)]:
+            colecao.sincronizar_remocao(chave)
+            if cache is not None:
+                cache.sincronizar(nome, chave, None)
+
+    for tipo, valor in data.get('next_ids', {}).items():
+        dados['next_ids'][tipo] = max(dados['next_ids'].get(tipo, valor), valor)
+
+
+def _sincronizar_sqlite(dados):
+    armazem = dados['pedidos'].armazem
+    armazem.sequencias.sincronizar()
+    linhas = armazem.alteracoes_desde(armazem.ultima_alteracao)
+
+    if linhas is None:
+        # Ficamos para trás além da retenção: relê o que está em memória e avisa os
+        # observadores para recalcularem o resto
+        for nome in COLECOES:
+            tabela = dados[nome]
+            for chave in list(tabela._itens):
+                if not tabela.alterado(chave):
+                    obj = tabela.ler_do_arquivo(chave)
+                    if obj is None:
+                        tabela.sincronizar_remocao(chave)
+                    else:
+                        tabela.sincronizar(chave, obj)
+            tabela.notificar_recarga()
+        armazem.ultima_alteracao = armazem.consultar("SELECT COALESCE(MAX(seq), 0) FROM alteracoes")[0][0]
+        return
+
+    if not linhas:
+        return
+    armazem.ultima_alteracao = linhas[-1][0]
+    citadas = {(nome, entidade) for _, nome, entidade in linhas}
+    for nome in COLECOES: # Clientes e produtos antes dos pedidos que os referenciam
+        tabela = dados[nome]
+        for entidade in sorted(e for n, e in citadas if n == nome):
+            chave = str(entidade)
+            if tabela.alterado(chave):
+                continue
+            obj = tabela.ler_do_arquivo(chave)
+            if obj is None:
+                tabela.sincronizar_remocao(chave)
+            else:
+                tabela.sincronizar(chave, obj)
+
+
+def _registros_journal(dados, alteracoes):
+    """Converte as alterações rastreadas em registros compactos do journal."""
+    registros = []
+    for nome in COLECOES:
+        tipo = nome[:-1]
+        sujos, removidos = alteracoes[nome]
+        for chave, campos in sujos.items():
+            obj = dados[nome].get(chave)
+            if obj is None:
+                continue
+            if nome == 'pedidos' and campos == {'pago'} and obj.pago:
+                registros.append({'t': 'pago', 'id': chave})
+            else:
+                registros.append({'t': tipo, 'id': chave, 'd': obj.to_json()})
+        for chave in removidos:
+            registros.append({'t': 'remover', 'c': nome, 'id': chave})
+    return registros
+
+
+def _cobrir_ids(ids, registro):
+    """Atualiza 'ids' com os next_ids que reaplicar o registro do journal garante."""
+    if registro['t'] == 'ids':
+        for tipo, valor in registro['d'].items():
+            ids[tipo] = max(ids.get(tipo, valor), valor)
+    elif registro['t'] in ids:
+        ids[registro['t']] = max(ids[registro['t']], int(registro['id']) + 1)
+
+
+def _snapshot_incremental():
+    snapshot = _snapshots.get(DB_FILE)
+    if snapshot is None:
+        classe = SnapshotBinario if FORMATO_SNAPSHOT == 'binario' else SnapshotIncremental
+        snapshot = _snapshots[DB_FILE] = classe(DB_FILE)
+    return snapshot
+
+
+def _publicar_mapa(dados, alteracoes, completo, estado):
+    caminho = _arquivo_mapa()
+    extras = {'next_ids': dict(dados['next_ids'])}
+    anterior = getattr(dados['pedidos'], 'mapa', None)
+    if anterior is None or completo:
+        # DB que não veio do mapa (ou regravação completa): gera uma geração inteira
+        data = {nome: {chave: obj.to_json() for chave, obj in dados[nome].items() if chave not in alteracoes[nome][1]}
+                for nome in COLECOES} # As remoções já drenadas ainda aparecem no mapa anterior
+        data.update(extras)
+        geracao = anterior.geracao + 1 if anterior is not None else 1
+        escrever_mapa(caminho, data, geracao)
+        gravadas = sum(len(data[nome]) for nome in COLECOES)
+    else:
+        gravadas = publicar_mapa(caminho, anterior, dados, alteracoes, extras)
+        if not gravadas and extras == anterior.extras:
+            return 0
+    if anterior is not None:
+        mapa = MapaCompartilhado(caminho)
+        for nome in COLECOES:
+            dados[nome].trocar_mapa(mapa)
+    estado['assinatura'] = _assinatura(caminho)
+    return gravadas
+
+
+def salvar_dados_json(dados, completo=False):
     """
     Objetivo: Serializar os objetos Python para JSON e salvar no arquivo.
-    Função: Chama o método 'to_json()' de cada objeto e salva o resultado.
+    Função: Grava apenas as entidades alteradas desde o último salvamento
+            (rastreadas pelas Coleções) e retorna quantas entidades foram
+            escritas. No modo 'json', só as entidades sujas são reserializadas;
+            no modo 'journal', cada alteração vira um registro anexado ao log;
+            no modo 'sqlite', tudo é gravado numa única transação; no modo
+            'particionado', só as partições com entidades alteradas são regravadas;
+            no modo 'mapeado', uma nova geração do mapa é publicada.
+            Com 'completo=True', regrava o snapshot inteiro.
     """
-    data_to_save = {
-        'clientes': {cid: obj.to_json() for cid, obj in dados['clientes'].items()},
-        'produtos': {pid: obj.to_json() for pid, obj in dados['produtos'].items()},
-        'pedidos': {pid: obj.to_json() for pid, obj in dados['pedidos'].items()},
-        'next_ids': dados['next_ids']
-    }
-    
-    with open(DB_FILE, 'w') as f:
-        json.dump(data_to_save, f, indent=4)
\ No newline at end of file
+    with metricas.TEMPO_GRAVACAO.cronometrar(modo=MODO_ARMAZENAMENTO), obter_trava():
+        sincronizar(dados) # Aplica antes o que outros processos gravaram
+        alteracoes = {nome: dados[nome].drenar_alteracoes() for nome in COLECOES}
+        try:
+            gravadas = _gravar(dados, alteracoes, completo)
+        except Exception:
+            # Nada foi confirmado: as alterações voltam a ficar pendentes
+            for nome in COLECOES:
+                dados[nome].restaurar_alteracoes(*alteracoes[nome])
+            raise
+    metricas.ENTIDADES_GRAVADAS.incrementar(gravadas, modo=MODO_ARMAZENAMENTO)
+    return gravadas
+
+
+def _gravar(dados, alteracoes, completo):
+    if MODO_ARMAZENAMENTO == 'sqlite':
+        return dados['pedidos'].armazem.gravar(alteracoes)
+
+    estado = _sincronia.get(id(dados['pedidos']), {})
+    if MODO_ARMAZENAMENTO == 'journal' and not completo:
+        registros = _registros_journal(dados, alteracoes)
+        ids = dict(estado.get('ids', {}))
+        for registro in registros:
+            _cobrir_ids(ids, registro)
+        if any(valor > ids.get(tipo, 0) for tipo, valor in dados['next_ids'].items()):
+            # next_ids avançou além do que as criações garantem (bloco de IDs reservado)
+            registros.append({'t': 'ids', 'd': dict(dados['next_ids'])})
+            _cobrir_ids(ids, registros[-1])
+        if registros:
+            estado['posicao'] = obter_journal().anexar(registros)
+            estado['ids'] = ids
+        return len(registros)
+
+    if MODO_ARMAZENAMENTO == 'particionado':
+        armazem = obter_particoes()
+        novo_dono = armazem.dono is not dados
+        if novo_dono:
+            armazem.invalidar(dados)
+        # Um DB que não veio das partições (sem 'posicao') pode não corresponder ao disco
+        completo = completo or (novo_dono and 'posicao' not in estado)
+        gravadas = armazem.gravar(dados, alteracoes, {'next_ids': dict(dados['next_ids'])}, completo)
+        assinatura = _assinatura(armazem.manifesto)
+        if assinatura != estado.get('assinatura'): # O manifesto foi regravado por este salvamento
+            estado['assinatura'] = assinatura
+            estado['posicao'] = armazem.geracoes
+        return gravadas
+
+    if MODO_ARMAZENAMENTO == 'mapeado':
+        return _publicar_mapa(dados, alteracoes, completo, estado)
+
+    if MODO_ARMAZENAMENTO == 'journal':
+        # Snapshot completo: incorpora (e descarta) tudo o que já está no journal
+        data_to_save = {nome: {cid: obj.to_json() for cid, obj in dados[nome].items()} for nome in COLECOES}
+        data_to_save['next_ids'] = dict(dados['next_ids'])
+        estado['posicao'] = obter_journal().substituir_snapshot(data_to_save)
+        return sum(len(dados[nome]) for nome in COLECOES)
+
+    snapshot = _snapshot_incremental()
+    if completo or snapshot.dono is not dados:
+        snapshot.invalidar(dados)
+    gravadas = snapshot.gravar(dados, alteracoes, {'next_ids': dict(dados['next_ids'])})
+    estado['assinatura'] = _assinatura(DB_FILE)
+    return gravadas
@@ -0,0 +1,290 @@
+# Arquivo: exportacao.py - Exportação em fluxo de clientes, produtos e pedidos (NDJSON/CSV)
+#
+# Uso (na raiz do projeto):
+#     python3 exportacao.py <clientes|produtos|pedidos> <arquivo.csv|arquivo.ndjson[.gz]|->
+#                           [--formato F] [--gzip] [--status pago|aberto] [--cliente-id ID] [--desde ID] [--ate ID]
+#
+# Também usada pela rota /api/exportar/<colecao> do app_web e pela opção 8 do main.py.
+# As entidades são lidas página por página (pagina() da coleção, em ordem de ID) e
+# cada página vira um bloco de texto assim que é lida: a memória não depende do
+# tamanho da exportação e os primeiros bytes saem antes de o resto ser lido. Os
+# pedidos arquivados (arquivamento.py) entram intercalados com os de DB['pedidos'].
+#
+# Colunas/campos gerados:
+#     clientes -> id, nome, cpf, endereco
+#     produtos -> id, nome, preco
+#     pedidos  -> uma linha por item: pedido_id, cliente_id, pago, situacao, total, item,
+#                 produto_id, produto, preco_unitario, quantidade, subtotal
+#                 (pedido sem itens: uma linha, com as colunas do item vazias)
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zlib
+from heapq import merge
+
+import database
+from importacao import detectar_formato, em_lotes
+from persistencia.arquivo import montar_pedido
+from persistencia.colecao import ordem_id
+
+
+# Quantas entidades são lidas (e viram um bloco da saída) de cada vez
+TAMANHO_PAGINA = int(os.environ.get('LOJA_EXPORTACAO_PAGINA', 500))
+
+# Nível do gzip: a compressão acontece durante o envio, então rapidez importa mais que tamanho
+NIVEL_GZIP = int(os.environ.get('LOJA_EXPORTACAO_GZIP', 6))
+
+COLUNAS = {
+    'clientes': ('id', 'nome', 'cpf', 'endereco'),
+    'produtos': ('id', 'nome', 'preco'),
+    'pedidos': ('pedido_id', 'cliente_id', 'pago', 'situacao', 'total', 'item',
+                'produto_id', 'produto', 'preco_unitario', 'quantidade', 'subtotal'),
+}
+COLECOES_EXPORTAVEIS = tuple(COLUNAS)
+FORMATOS = ('ndjson', 'csv')
+
+
+# ----------------------------------------------------------------------
+# LEITURA (PÁGINAS EM ORDEM DE ID)
+# ----------------------------------------------------------------------
+
+def _linhas_cliente(chave, cliente):
+    yield {'id': chave, 'nome': cliente.nome, 'cpf': cliente.cpf, 'endereco': cliente.endereco}
+
+
+def _linhas_produto(chave, produto):
+    yield {'id': chave, 'nome': produto.nome, 'preco': produto.preco}
+
+
+def _linhas_pedido(chave, pedido):
+    """Achata o pedido: os dados do pedido se repetem em cada linha de item."""
+    base = {'pedido_id': chave, 'cliente_id': pedido.cliente.id, 'pago': pedido.pago,
+            'situacao': pedido.situacao_pagamento(), 'total': pedido.calcular_total()}
+    if not pedido.itens:
+        yield dict(base, item=None, produto_id=None, produto=None, preco_unitario=None, quantidade=None,
+                   subtotal=None)
+        return
+    for posicao, item in enumerate(pedido.itens, start=1):
+        yield dict(base, item=posicao, produto_id=item.produto.id, produto=item.produto.nome,
+                   preco_unitario=item.preco_unitario, quantidade=item.quantidade, subtotal=item.subtotal)
+
+
+ACHATADORES = {
+    'clientes': _linhas_cliente,
+    'produtos': _linhas_produto,
+    'pedidos': _linhas_pedido,
+}
+
+
+def _do_banco(origem, filtros, desde, ate, tamanho):
+    """
+    Gera (id, objeto) de uma coleção do DB em ordem de ID, lendo uma página de
+    'tamanho' entidades por vez. Depois de cada página, coleções com 'liberar'
+    (SQLite, mapeado) tiram da memória os objetos lidos só para a exportação.
+    """
+    liberar = getattr(origem, 'liberar', None)
+    apos = str(desde - 1) if desde else None
+    while True:
+        pagina, apos = origem.pagina(apos, tamanho, filtros)
+        for chave, obj in pagina:
+            if ate is not None and ordem_id(chave) >= (0, ate + 1):
+                apos = None # A faixa acabou no meio da página
+                break
+            yield chave, obj
+        if liberar is not None:
+            liberar([chave for chave, _ in pagina])
+        if apos is None:
+            return
+
+
+def _do_arquivo(dados, filtros, desde, ate):
+    """Gera (id, Pedido) dos pedidos do arquivo morto (todos pagos) em ordem de ID, um bloco por vez."""
+    filtros = filtros or {}
+    if filtros.get('pago') is False:
+        return
+    cliente_id = filtros.get('cliente_id')
+    for chave, data in database.obter_arquivo().percorrer(desde, ate):
+        if cliente_id is None or data['cliente_id'] == cliente_id:
+            pedido = montar_pedido(dados, chave, data)
+            if pedido is not None:
+                yield chave, pedido
+
+
+def _intercalar(do_banco, do_arquivo):
+    """Une as duas fontes em ordem de ID; se um pedido está nas duas, vale o do DB."""
+    anterior = None
+    for chave, obj in merge(do_banco, do_arquivo, key=lambda par: ordem_id(par[0])):
+        if chave != anterior:
+            yield chave, obj
+        anterior = chave
+
+
+def paginas(dados, colecao, filtros=None, desde=None, ate=None, tamanho=TAMANHO_PAGINA):
+    """
+    Objetivo: Percorrer DB[colecao] em ordem de ID sem montar a exportação inteira.
+    Função: Gera uma lista de linhas (dicionários já achatados) por página de
+            'tamanho' entidades. 'desde'/'ate' limitam a faixa de IDs (inclusive);
+            'filtros' são os mesmos de pagina() (ex.: {'pago': True}). Os pedidos
+            incluem os do arquivo morto (persistencia/arquivo.py), intercalados
+            pelo ID.
+    """
+    entidades = _do_banco(dados[colecao], filtros, desde, ate, tamanho)
+    if colecao == 'pedidos':
+        entidades = _intercalar(entidades, _do_arquivo(dados, filtros, desde, ate))
+    achatar = ACHATADORES[colecao]
+    for grupo in em_lotes(entidades, tamanho):
+        yield [linha for chave, obj in grupo for linha in achatar(chave, obj)]
+
+
+# ----------------------------------------------------------------------
+# FORMATAÇÃO E COMPRESSÃO (GERADORES: UM BLOCO POR PÁGINA)
+# ----------------------------------------------------------------------
+
+# Um codificador só: json.dumps com opções monta um JSONEncoder novo a cada linha
+_CODIFICADOR_JSON = json.JSONEncoder(ensure_ascii=False)
+
+
+def _ndjson(blocos, colunas):
+    codificar = _CODIFICADOR_JSON.encode
+    for linhas in blocos:
+        yield ''.join([codificar(linha) + '\n' for linha in linhas])
+
+
+def _valor_csv(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool): # Como no NDJSON (e aceito de volta pelo importacao.py)
+        return 'true' if valor else 'false'
+    return valor
+
+
+def _csv(blocos, colunas):
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator='\n')
+    escritor.writerow(colunas)
+    yield saida.getvalue() # O cabeçalho sai antes da primeira página ser lida
+    for linhas in blocos:
+        saida.seek(0)
+        saida.truncate()
+        escritor.writerows([_valor_csv(linha[coluna]) for coluna in colunas] for linha in linhas)
+        yield saida.getvalue()
+
+
+FORMATADORES = {
+    'ndjson': _ndjson,
+    'csv': _csv,
+}
+
+
+def _comprimir(partes):
+    """Comprime em gzip durante a geração; cada bloco é liberado (Z_SYNC_FLUSH) assim que fica pronto."""
+    compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31) # 31: cabeçalho e rodapé gzip
+    for parte in partes:
+        yield compressor.compress(parte) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _codificar(partes):
+    for parte in partes:
+        yield parte.encode('utf-8')
+
+
+def exportar(dados, colecao, formato='ndjson', compactar=False, filtros=None, desde=None, ate=None,
+             tamanho=TAMANHO_PAGINA):
+    """
+    Objetivo: Exportar DB[colecao] como NDJSON ou CSV, opcionalmente em gzip.
+    Função: Valida os parâmetros na hora (ValueError) e retorna um gerador de
+            blocos de bytes, que só lê o banco à medida que é consumido.
+    """
+    if colecao not in COLUNAS:
+        raise ValueError(f"Coleção inválida: {colecao!r} (use {', '.join(COLECOES_EXPORTAVEIS)}).")
+    if formato not in FORMATADORES:
+        raise ValueError(f"Formato inválido: {formato!r} (use {', '.join(FORMATOS)}).")
+    if filtros and colecao != 'pedidos':
+        raise ValueError("Filtros de pagamento e cliente só se aplicam a pedidos.")
+    if filtros and not str(filtros.get('cliente_id', '0')).isdigit():
+        raise ValueError(f"ID de cliente inválido: {filtros['cliente_id']!r}")
+    if desde is not None and ate is not None and desde > ate:
+        raise ValueError(f"Faixa de IDs vazia: {desde} a {ate}.")
+
+    blocos = paginas(dados, colecao, filtros, desde, ate, tamanho)
+    partes = _codificar(FORMATADORES[formato](blocos, COLUNAS[colecao]))
+    return _comprimir(partes) if compactar else partes
+
+
+def faixa_id(valor, campo):
+    """Lê um limite da faixa de IDs ('' ou None = sem limite)."""
+    valor = '' if valor is None else str(valor).strip()
+    if not valor:
+        return None
+    if not valor.isdigit():
+        raise ValueError(f"ID inválido em '{campo}': {valor!r}")
+    return int(valor)
+
+
+def formato_do_arquivo(caminho):
+    """(formato, compactar) deduzidos da extensão: dados.csv, dados.ndjson.gz, ..."""
+    compactar = caminho.lower().endswith('.gz')
+    return detectar_formato(caminho[:-3] if compactar else caminho), compactar
+
+
+def exportar_para_arquivo(dados, colecao, caminho, formato=None, compactar=None, **opcoes):
+    """
+    Grava a exportação em 'caminho' ('-' = saída padrão), bloco a bloco.
+    Retorna {'bytes', 'segundos'} para o resumo exibido ao usuário.
+    """
+    if formato is None or compactar is None:
+        deduzido, gz = formato_do_arquivo(caminho) if caminho != '-' else ('ndjson', False)
+        formato = formato or deduzido
+        compactar = gz if compactar is None else compactar
+    inicio = time.perf_counter()
+    partes = exportar(dados, colecao, formato, compactar, **opcoes)
+    escritos = 0
+    saida = sys.stdout.buffer if caminho == '-' else open(caminho, 'wb')
+    try:
+        for parte in partes:
+            saida.write(parte)
+            escritos += len(parte)
+    finally:
+        if saida is not sys.stdout.buffer:
+            saida.close()
+        else:
+            saida.flush()
+    return {'bytes': escritos, 'segundos': time.perf_counter() - inicio}
+
+
+def exibir_resultado(colecao, caminho, resultado):
+    print(f"\n[EXPORTAÇÃO] {colecao} -> {caminho}: {resultado['bytes']} bytes em {resultado['segundos']:.2f}s",
+          file=sys.stderr if caminho == '-' else sys.stdout) # '-': a saída padrão é o próprio arquivo
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exportação em fluxo de clientes, produtos e pedidos.")
+    parser.add_argument('colecao', choices=COLECOES_EXPORTAVEIS)
+    parser.add_argument('arquivo', help="Arquivo .csv ou .ndjson (.gz comprime), ou '-' para a saída padrão")
+    parser.add_argument('--formato', choices=FORMATOS, help="Força o formato (padrão: pela extensão)")
+    parser.add_argument('--gzip', action='store_true', default=None, help="Comprime a saída em gzip")
+    parser.add_argument('--status', choices=('pago', 'aberto'), help="Só pedidos pagos ou em aberto")
+    parser.add_argument('--cliente-id', help="Só pedidos deste cliente")
+    parser.add_argument('--desde', help="Menor ID exportado")
+    parser.add_argument('--ate', help="Maior ID exportado")
+    args = parser.parse_args()
+
+    filtros = {}
+    if args.status:
+        filtros['pago'] = args.status == 'pago'
+    if args.cliente_id:
+        filtros['cliente_id'] = args.cliente_id
+    try:
+        desde, ate = faixa_id(args.desde, 'desde'), faixa_id(args.ate, 'ate')
+        DB = database.carregar_dados_json()
+        resultado = exportar_para_arquivo(DB, args.colecao, args.arquivo, args.formato, args.gzip,
+                                          filtros=filtros or None, desde=desde, ate=ate)
+    except ValueError as e:
+        parser.exit(2, f"[ERRO] {e}\n")
+    exibir_resultado(args.colecao, args.arquivo, resultado)
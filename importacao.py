@@ -0,0 +1,391 @@
+# Arquivo: importacao.py - Importação em massa de clientes, produtos e pedidos (CSV/NDJSON)
+#
+# Uso (na raiz do projeto):
+#     python3 importacao.py <clientes|produtos|pedidos> <arquivo.csv|arquivo.ndjson> [--lote N] [--rejeitados arquivo]
+#
+# Colunas/campos aceitos:
+#     clientes -> nome, cpf, endereco               (CPFs já cadastrados são rejeitados)
+#     produtos -> nome, preco [, id]          (sem 'id', o ID vem da sequência 'produto')
+#     pedidos  -> cliente_id, itens [, pago]  (no CSV, itens = "101:2;102:1"; no NDJSON,
+#                                              também [{"produto_id": "101", "quantidade": 2}])
+
+import argparse
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+import database
+from core.cliente import Cliente
+from core.pedido import Pedido
+from core.produto import Produto
+from persistencia.indices import normalizar_cpf, obter_indices
+
+
+# Quantas linhas válidas são gravadas por transação
+TAMANHO_LOTE = int(os.environ.get('LOJA_IMPORTACAO_LOTE', 5000))
+
+COLECOES_IMPORTAVEIS = ('clientes', 'produtos', 'pedidos')
+VERDADEIROS = ('1', 'true', 'sim', 's', 'yes', 'pago')
+FALSOS = ('', '0', 'false', 'nao', 'não', 'n', 'no', 'aberto')
+
+
+# ----------------------------------------------------------------------
+# LEITURA (GERADORES: UMA LINHA POR VEZ)
+# ----------------------------------------------------------------------
+
+def detectar_formato(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        return 'csv'
+    if extensao in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise ValueError(f"Formato não reconhecido para '{caminho}' (use .csv, .ndjson ou .jsonl).")
+
+
+def ler_registros(caminho, formato=None):
+    """
+    Objetivo: Percorrer o arquivo de entrada sem carregá-lo inteiro na memória.
+    Função: Gera (número da linha, registro) com cada registro como dicionário.
+            Linhas de NDJSON que não são um objeto JSON válido geram o registro
+            None (a validação as rejeita, informando o número da linha).
+    """
+    formato = formato or detectar_formato(caminho)
+    with open(caminho, newline='', encoding='utf-8') as f:
+        if formato == 'csv':
+            leitor = csv.DictReader(f)
+            for registro in leitor:
+                yield leitor.line_num, registro
+            return
+        for numero, linha in enumerate(f, start=1):
+            if not linha.strip():
+                continue
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                registro = None
+            yield numero, registro if isinstance(registro, dict) else None
+
+
+# ----------------------------------------------------------------------
+# VALIDAÇÃO (CADA LINHA VIRA UM OBJETO DE DOMÍNIO OU É REJEITADA)
+# ----------------------------------------------------------------------
+
+def _texto(registro, campo):
+    valor = registro.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if not valor:
+        raise ValueError(f"Campo obrigatório ausente: '{campo}'.")
+    return valor
+
+
+def _inteiro_positivo(valor, campo):
+    try:
+        numero = int(str(valor).strip())
+    except (TypeError, ValueError):
+        raise ValueError(f"'{campo}' deve ser um número inteiro: {valor!r}.")
+    if numero <= 0:
+        raise ValueError(f"'{campo}' deve ser maior que zero: {numero}.")
+    return numero
+
+
+def _booleano(valor, campo):
+    if isinstance(valor, bool):
+        return valor
+    texto = '' if valor is None else str(valor).strip().lower()
+    if texto in VERDADEIROS:
+        return True
+    if texto in FALSOS:
+        return False
+    raise ValueError(f"'{campo}' deve ser verdadeiro/falso: {valor!r}.")
+
+
+def _itens(valor):
+    """Normaliza os itens do pedido em [(produto_id, quantidade)]."""
+    if isinstance(valor, list):
+        pares = []
+        for item in valor:
+            if not isinstance(item, dict):
+                raise ValueError("Cada item deve ser um objeto com 'produto_id' e 'quantidade'.")
+            pares.append((str(item.get('produto_id', '')).strip(), item.get('quantidade')))
+    else:
+        texto = '' if valor is None else str(valor).strip()
+        pares = []
+        for parte in filter(None, (p.strip() for p in texto.split(';'))):
+            produto_id, separador, quantidade = parte.partition(':')
+            if not separador:
+                raise ValueError(f"Item inválido {parte!r} (use produto_id:quantidade).")
+            pares.append((produto_id.strip(), quantidade))
+    if not pares:
+        raise ValueError("O pedido deve ter pelo menos um item.")
+    return [(produto_id, _inteiro_positivo(quantidade, 'quantidade')) for produto_id, quantidade in pares]
+
+
+def cliente_da_linha(dados, registro):
+    """Retorna (None, Cliente): o ID é sempre alocado na gravação."""
+    return None, Cliente(_texto(registro, 'nome'), _texto(registro, 'cpf'), _texto(registro, 'endereco'))
+
+
+def produto_da_linha(dados, registro):
+    """Retorna (ID informado ou None, Produto)."""
+    try:
+        preco = float(str(registro.get('preco', '')).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"'preco' deve ser numérico: {registro.get('preco')!r}.")
+    if not preco > 0 or preco == float('inf'):
+        raise ValueError(f"'preco' deve ser maior que zero: {registro.get('preco')!r}.")
+
+    produto_id = str(registro.get('id') or '').strip() or None
+    if produto_id is not None and not produto_id.isdigit():
+        raise ValueError(f"'id' deve conter apenas dígitos: {produto_id!r}.")
+    return produto_id, Produto(_texto(registro, 'nome'), preco)
+
+
+def pedido_da_linha(dados, registro):
+    """Retorna (None, Pedido), resolvendo o cliente e os produtos já cadastrados."""
+    cliente_id = _texto(registro, 'cliente_id')
+    cliente = dados['clientes'].get(cliente_id)
+    if cliente is None:
+        raise ValueError(f"Cliente {cliente_id} não encontrado.")
+
+    pedido = Pedido(cliente) # ASSOCIAÇÃO
+    for produto_id, quantidade in _itens(registro.get('itens')):
+        produto = dados['produtos'].get(produto_id)
+        if produto is None:
+            raise ValueError(f"Produto {produto_id!r} não encontrado.")
+        pedido.adicionar_item(produto, quantidade) # COMPOSIÇÃO
+    pedido.pago = _booleano(registro.get('pago'), 'pago')
+    return None, pedido
+
+
+CONVERSORES = {
+    'clientes': cliente_da_linha,
+    'produtos': produto_da_linha,
+    'pedidos': pedido_da_linha,
+}
+
+
+def validar(dados, colecao, registros, rejeitar):
+    """
+    Gera (número da linha, ID informado ou None, objeto) para cada registro válido;
+    os inválidos são entregues a rejeitar(número, registro, mensagem).
+    """
+    converter = CONVERSORES[colecao]
+    for numero, registro in registros:
+        if registro is None:
+            rejeitar(numero, None, "Linha não é um objeto JSON válido.")
+            continue
+        try:
+            chave, obj = converter(dados, registro)
+        except ValueError as e:
+            rejeitar(numero, registro, str(e))
+            continue
+        yield numero, chave, obj
+
+
+def em_lotes(itens, tamanho):
+    """Agrupa o gerador em listas de até 'tamanho' itens (só um lote fica na memória)."""
+    itens = iter(itens)
+    while True:
+        lote = list(islice(itens, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+# ----------------------------------------------------------------------
+# GRAVAÇÃO EM LOTES
+# ----------------------------------------------------------------------
+
+class ResultadoImportacao:
+    """
+    Classe de Relatório.
+    Objetivo: Acumular os números de uma importação (lidas, importadas, rejeitadas)
+              e os primeiros erros, para o resumo exibido ao usuário.
+    """
+    MAXIMO_EXEMPLOS = 10
+
+    def __init__(self, colecao):
+        self.colecao = colecao
+        self.importadas = 0
+        self.rejeitadas = 0
+        self.lotes = 0
+        self.exemplos = [] # (linha, mensagem) dos primeiros rejeitados
+        self.inicio = time.perf_counter()
+        self.fim = None
+
+    @property
+    def lidas(self):
+        return self.importadas + self.rejeitadas
+
+    @property
+    def segundos(self):
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    @property
+    def linhas_por_segundo(self):
+        return self.lidas / self.segundos if self.segundos > 0 else 0.0
+
+    def rejeitar(self, numero, mensagem):
+        self.rejeitadas += 1
+        if len(self.exemplos) < self.MAXIMO_EXEMPLOS:
+            self.exemplos.append((numero, mensagem))
+
+    def como_dict(self):
+        return {
+            'colecao': self.colecao,
+            'lidas': self.lidas,
+            'importadas': self.importadas,
+            'rejeitadas': self.rejeitadas,
+            'lotes': self.lotes,
+            'segundos': round(self.segundos, 3),
+            'linhas_por_segundo': round(self.linhas_por_segundo, 1),
+        }
+
+
+def _gravar_lote(dados, colecao, lote, resultado, rejeitar):
+    """
+    Grava o lote numa única transação: os IDs que faltam são reservados de uma vez
+    (alocar_ids); IDs informados e CPFs que já existem (no banco ou no próprio lote)
+    são rejeitados.
+    """
+    destino = dados[colecao]
+    tipo = colecao[:-1]
+    indice_cpf = obter_indices(dados).cpf if colecao == 'clientes' else None
+    with database.transacao(dados, duravel=True):
+        aceitos = []
+        informados = set()
+        cpfs = set()
+        for numero, chave, obj in lote:
+            if chave is not None and (chave in informados or chave in destino):
+                rejeitar(numero, dict(id=chave, **obj.to_json()), f"ID {chave} já existe.")
+                continue
+            if indice_cpf is not None:
+                cpf = normalizar_cpf(obj.cpf)
+                try:
+                    indice_cpf.verificar(obj.cpf)
+                    if cpf in cpfs:
+                        raise ValueError(f"CPF {obj.cpf} repetido no arquivo.")
+                except ValueError as e:
+                    rejeitar(numero, obj.to_json(), str(e))
+                    continue
+                cpfs.add(cpf)
+            if chave is not None:
+                informados.add(chave)
+            aceitos.append((chave, obj))
+
+        sem_id = sum(1 for chave, _ in aceitos if chave is None)
+        novos = iter(database.alocar_ids(dados, tipo, sem_id) if sem_id else ())
+        gravadas = []
+        for chave, obj in aceitos:
+            chave = chave if chave is not None else str(next(novos))
+            destino[chave] = obj
+            gravadas.append(chave)
+
+        if informados and tipo in dados['next_ids']: # A sequência continua depois dos IDs informados
+            maior = max(int(chave) for chave in informados) + 1
+            if maior > dados['next_ids'][tipo]:
+                dados['next_ids'][tipo] = maior
+
+    resultado.importadas += len(gravadas)
+    resultado.lotes += 1
+    liberar = getattr(destino, 'liberar', None)
+    if liberar is not None: # SQLite: os objetos gravados não precisam ficar em memória
+        liberar(gravadas)
+
+
+def importar(dados, colecao, caminho, formato=None, lote=TAMANHO_LOTE, rejeitados=None, progresso=None):
+    """
+    Objetivo: Importar um arquivo CSV/NDJSON grande para DB[colecao].
+    Função: Pipeline de geradores (ler_registros -> validar -> em_lotes): só um lote
+            fica na memória por vez, independentemente do tamanho do arquivo. Cada
+            lote é gravado numa transação, com os IDs reservados em bloco. As linhas
+            rejeitadas vão para o arquivo NDJSON 'rejeitados' (se informado), com o
+            número da linha e o motivo. 'progresso(resultado)' é chamado a cada lote.
+    """
+    if colecao not in COLECOES_IMPORTAVEIS:
+        raise ValueError(f"Coleção inválida: {colecao} (use {', '.join(COLECOES_IMPORTAVEIS)}).")
+    formato = formato or detectar_formato(caminho)
+    resultado = ResultadoImportacao(colecao)
+    saida = open(rejeitados, 'w', encoding='utf-8') if rejeitados else None
+
+    def rejeitar(numero, registro, mensagem):
+        resultado.rejeitar(numero, mensagem)
+        if saida is not None:
+            saida.write(json.dumps({'linha': numero, 'erro': mensagem, 'registro': registro}, ensure_ascii=False) + '\n')
+
+    try:
+        validos = validar(dados, colecao, ler_registros(caminho, formato), rejeitar)
+        for itens in em_lotes(validos, lote):
+            _gravar_lote(dados, colecao, itens, resultado, rejeitar)
+            if progresso is not None:
+                progresso(resultado)
+    finally:
+        resultado.fim = time.perf_counter()
+        if saida is not None:
+            saida.close()
+    return resultado
+
+
+def registrar_pedidos(dados, registros, duravel=False, atomico=False):
+    """
+    Objetivo: Cadastrar de uma vez um lote de pedidos recebido pela API (integrações).
+    Função: Cada registro tem o formato de uma linha NDJSON de pedidos (cliente_id,
+            itens [, pago]). Todos são validados antes de qualquer gravação; os
+            válidos recebem IDs reservados em bloco (alocar_ids) e são gravados numa
+            única transação. Retorna um resultado por registro, na ordem recebida:
+            {'indice', 'id'} ou {'indice', 'erro'}. Com 'atomico', um único registro
+            inválido faz o lote inteiro ser recusado sem gravar nada.
+    """
+    resultados = [None] * len(registros)
+
+    def rejeitar(indice, registro, mensagem):
+        resultados[indice] = {'indice': indice, 'erro': mensagem}
+
+    entradas = ((indice, registro if isinstance(registro, dict) else None) for indice, registro in enumerate(registros))
+    validos = list(validar(dados, 'pedidos', entradas, rejeitar))
+    if atomico and len(validos) < len(registros):
+        for indice, _, _ in validos:
+            resultados[indice] = {'indice': indice, 'erro': "Lote recusado: há pedidos inválidos."}
+        return resultados
+    if not validos:
+        return resultados
+
+    with database.transacao(dados, duravel=duravel):
+        novos = database.alocar_ids(dados, 'pedido', len(validos))
+        for (indice, _, pedido), numero in zip(validos, novos):
+            pedido_id = str(numero)
+            dados['pedidos'][pedido_id] = pedido
+            resultados[indice] = {'indice': indice, 'id': pedido_id}
+    return resultados
+
+
+def exibir_resultado(resultado):
+    r = resultado.como_dict()
+    print(f"\n[IMPORTAÇÃO] {r['colecao']}: {r['importadas']} importadas, {r['rejeitadas']} rejeitadas "
+          f"de {r['lidas']} linhas em {r['segundos']:.2f}s ({r['linhas_por_segundo']:.0f} linhas/s, {r['lotes']} lotes)")
+    for numero, mensagem in resultado.exemplos:
+        print(f"   - linha {numero}: {mensagem}")
+    if resultado.rejeitadas > len(resultado.exemplos):
+        print(f"   ... e mais {resultado.rejeitadas - len(resultado.exemplos)} rejeitadas.")
+
+
+def mostrar_progresso(resultado):
+    print(f"   {resultado.lidas} linhas ({resultado.importadas} importadas, {resultado.rejeitadas} rejeitadas)"
+          f" - {resultado.linhas_por_segundo:.0f} linhas/s", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Importação em massa de clientes, produtos e pedidos.")
+    parser.add_argument('colecao', choices=COLECOES_IMPORTAVEIS)
+    parser.add_argument('arquivo', help="Arquivo .csv, .ndjson ou .jsonl")
+    parser.add_argument('--formato', choices=('csv', 'ndjson'), help="Força o formato (padrão: pela extensão)")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help="Linhas gravadas por transação")
+    parser.add_argument('--rejeitados', help="Grava as linhas rejeitadas (NDJSON) neste arquivo")
+    args = parser.parse_args()
+
+    DB = database.carregar_dados_json()
+    resultado = importar(DB, args.colecao, args.arquivo, args.formato, args.lote, args.rejeitados, mostrar_progresso)
+    database.encerrar(DB)
+    exibir_resultado(resultado)
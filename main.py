@@ -4,15 +4,24 @@
 # IMPORTAÇÕES E INICIALIZAÇÃO
 # ---------------------------------------------------------------------
 
+import os
+
 # Importações dos pacotes de classes (Necessárias para instanciar objetos)
 from core.cliente import Cliente
 from core.produto import Produto
 from core.pedido import Pedido
 from pagamentos.pagamento_cartao import PagamentoCartao
 from pagamentos.pagamento_pix import PagamentoPix
+from pagamentos import processador
+from relatorios import analise_vendas
+from relatorios.totais_loja import obter_totais
+from persistencia.indices import obter_indices
+from monitoramento import metricas
 
 # Importação do módulo de persistência (no mesmo nível)
 import database
+import importacao
+import exportacao
 
 
 # Carrega o estado do sistema do JSON para a memória
@@ -21,11 +30,8 @@ try:
     clientes_db = DB['clientes']
     produtos_db = DB['produtos']
     pedidos_db = DB['pedidos']
-    next_ids = DB['next_ids']
-
-    # REFÊNCIA GLOBAL para a serialização correta do Pedido (Associação)
-    # Objetivo: Permite que o Pedido encontre o ID do Cliente ao salvar no JSON.
-    Cliente.db_ref = clientes_db 
+    indices = obter_indices(DB) # CPF único, busca por nome e pedidos por cliente
+    obter_totais(DB) # Visões de vendas (loja, por cliente e por produto) refeitas na carga
 
 except Exception as e:
     print(f"\nERRO CRÍTICO NA INICIALIZAÇÃO: Não foi possível carregar o banco de dados. {e}")
@@ -33,16 +39,6 @@ except Exception as e:
     exit(1)
 
 
-def salvar_e_sair():
-    """
-    Função: Encerra o loop principal do programa.
-    Objetivo: Chamar o método de persistência final para garantir que o estado
-              do sistema seja salvo no data.json antes de sair.
-    """
-    database.salvar_dados_json(DB)
-    print("Dados salvos. Saindo do sistema. Até logo!")
-
-
 # ---------------------------------------------------------------------
 # FUNÇÕES DE LÓGICA E POO
 # ---------------------------------------------------------------------
@@ -53,21 +49,23 @@ def cadastrar_cliente_func():
     Objetivo: Demonstrar a HERANÇA (instanciando Cliente) e o POLIMORFISMO 
               (chamando o método sobrescrito apresentar_dados).
     """
-    global next_ids
     print("\n--- 1. CADASTRO DE CLIENTE (TESTE HERANÇA) ---")
     
     nome = input("Nome: ")
     cpf = input("CPF: ")
     endereco = input("Endereço: ")
     
-    # Herança: Cria um objeto Cliente
-    novo_cliente = Cliente(nome, cpf, endereco)
-    
-    # Persistência
-    cliente_id = str(next_ids['cliente'])
-    clientes_db[cliente_id] = novo_cliente
-    next_ids['cliente'] += 1
-    database.salvar_dados_json(DB)
+    # Persistência: ID alocado e cliente salvo atomicamente (seguro com o app_web rodando junto)
+    try:
+        with database.transacao(DB):
+            indices.cpf.verificar(cpf) # CPF único (conferido já com os cadastros dos outros processos)
+            cliente_id = database.alocar_id(DB, 'cliente')
+            # Herança: Cria um objeto Cliente (já com o seu ID, usado na serialização do Pedido)
+            novo_cliente = Cliente(nome, cpf, endereco, cliente_id)
+            clientes_db[cliente_id] = novo_cliente
+    except ValueError as e:
+        print(f"[ERRO] {e} Retornando ao menu.")
+        return
     
     # Teste de Output (Polimorfismo por Sobrescrita)
     print(f"\n[SUCESSO] Cliente ID {cliente_id} cadastrado.")
@@ -86,26 +84,30 @@ def listar_entidades_func():
         print("[AVISO] Nenhuma entidade cadastrada para exibição.")
         return
 
+    totais = obter_totais(DB) # Visões materializadas: nenhuma soma por pedido
     print(f"\n[CLIENTES] Total: {len(clientes_db)}")
     for cid, cliente in clientes_db.items():
-        print(f"ID {cid}: {cliente.nome} ({cliente.cpf})")
+        compras = totais.cliente(cid)
+        print(f"ID {cid}: {cliente.nome} ({cliente.cpf}) - {compras.pedidos} pedidos, R$ {compras.total:.2f}")
 
     print(f"\n[PRODUTOS] Total: {len(produtos_db)}")
     for pid, produto in produtos_db.items():
-        print(f"ID {pid}: {produto.nome} (R$ {produto.preco:.2f})")
+        vendido = totais.produto(pid)
+        print(f"ID {pid}: {produto.nome} (R$ {produto.preco:.2f}) - {vendido.unidades} vendidos")
     
-    print(f"\n[PEDIDOS] Total: {len(pedidos_db)}")
+    print(f"\n[PEDIDOS] Total: {len(pedidos_db)} (+ {len(database.obter_arquivo())} pagos no arquivo morto)")
     for pid, pedido in pedidos_db.items():
-        status = 'PAGO' if pedido.pago else 'ABERTO'
+        status = pedido.situacao_pagamento().upper()
         print(f"Pedido ID {pid}: Cliente {pedido.cliente.nome}, Total R$ {pedido.calcular_total():.2f} (Status: {status})")
 
+    print(f"\nTotal pago: R$ {totais.total_pago:.2f} | Total em aberto: R$ {totais.total_aberto:.2f}")
+
 
 def criar_pedido_func():
     """
     Funcionalidade: Criação de Pedido (Opção 3).
     Objetivo: Demonstrar ASSOCIAÇÃO (Cliente-Pedido) e COMPOSIÇÃO (Pedido-ItemPedido).
     """
-    global next_ids
     print("\n--- 3. CRIAR NOVO PEDIDO (TESTE COMPOSIÇÃO/ASSOCIAÇÃO) ---")
     
     # 1. Seleção do Cliente (Teste Associação)
@@ -151,12 +153,11 @@ def criar_pedido_func():
         return
         
     # 3. Persistência
-    pedido_id = str(next_ids['pedido'])
-    pedidos_db[pedido_id] = novo_pedido
-    next_ids['pedido'] += 1
+    with database.transacao(DB):
+        pedido_id = database.alocar_id(DB, 'pedido')
+        pedidos_db[pedido_id] = novo_pedido
     
     print(f"\n[SUCESSO] Pedido ID {pedido_id} criado e salvo. Total: R$ {novo_pedido.calcular_total():.2f}")
-    database.salvar_dados_json(DB)
 
 
 def processar_pagamento_func():
@@ -172,12 +173,18 @@ def processar_pagamento_func():
     pid = input("\nDigite o ID do Pedido para pagar: ")
     pedido_obj = pedidos_db.get(pid)
     
+    if not pedido_obj and database.obter_arquivo().contem(pid):
+        print("[AVISO] Pedido já foi pago (arquivado). Retornando ao menu.")
+        return
     if not pedido_obj:
         print("[ERRO] Pedido não encontrado. Retornando ao menu.")
         return
     if pedido_obj.pago:
         print("[AVISO] Pedido já foi pago. Retornando ao menu.")
         return
+    if pedido_obj.pagamento_em_andamento():
+        print("[AVISO] Pedido já tem um pagamento em andamento. Retornando ao menu.")
+        return
     
     total = pedido_obj.calcular_total()
     
@@ -199,15 +206,138 @@ def processar_pagamento_func():
         print("[ERRO] Opção inválida. Retornando ao menu.")
         return
 
-    # 3. Execução da Lógica POO
+    # 3. Execução da Lógica POO (em segundo plano, pelo processador de pagamentos)
     # Dependência: O Pedido utiliza o objeto Pagamento
     # Polimorfismo: O método processar() correto é chamado
-    pedido_obj.finalizar_compra(forma_pagamento)
+    # 4. O pedido fica PENDENTE e passa a PAGO (ou FALHOU) quando a operadora responder
+    processador.solicitar_pagamento(DB, pid, forma_pagamento)
+    print(f"\n[ENVIADO] Pagamento do Pedido {pid} na fila. Status: PENDENTE (acompanhe pela opção 2).")
+
+
+def relatorio_vendas_func():
+    """
+    Funcionalidade: Relatório de Vendas (Opção 5).
+    Objetivo: Exibir os agregados de vendas (receita por produto, melhores clientes,
+              pago x aberto) calculados em colunas pelo relatorios/analise_vendas.py.
+    """
+    print("\n--- 5. RELATÓRIO DE VENDAS ---")
+
+    if not analise_vendas.numpy_disponivel():
+        print("[ERRO] O relatório de vendas precisa do NumPy (pip install numpy).")
+        return
+
+    relatorio = analise_vendas.montar_relatorio(DB)
+    totais = relatorio['totais']
+    print(f"Pago:   R$ {totais['total_pago']:.2f} ({totais['pedidos_pagos']} pedidos)")
+    print(f"Aberto: R$ {totais['total_aberto']:.2f} ({totais['pedidos_abertos']} pedidos)")
+
+    print("\n[RECEITA POR PRODUTO]")
+    for pid, nome, unidades, receita in relatorio['por_produto']:
+        rotulo = f"ID {pid}" if pid >= 0 else "Sem ID"
+        print(f"{rotulo}: {nome} - {unidades} un. - R$ {receita:.2f}")
+
+    print("\n[MELHORES CLIENTES]")
+    for posicao, (cid, nome, receita) in enumerate(relatorio['top_clientes'], start=1):
+        print(f"{posicao}. {nome} (ID {cid}) - R$ {receita:.2f}")
+
+
+def importar_arquivo_func():
+    """
+    Funcionalidade: Importação em Massa (Opção 6).
+    Objetivo: Carregar clientes, produtos ou pedidos de um arquivo CSV/NDJSON em
+              lotes (importacao.py), em vez de um cadastro por vez.
+    """
+    print("\n--- 6. IMPORTAÇÃO EM MASSA (CSV/NDJSON) ---")
+    colecao = input("Coleção (clientes, produtos ou pedidos): ").strip().lower()
+    if colecao not in importacao.COLECOES_IMPORTAVEIS:
+        print("[ERRO] Coleção inválida. Retornando ao menu.")
+        return
+    caminho = input("Caminho do arquivo: ").strip()
+    try:
+        importacao.detectar_formato(caminho)
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return
+    if not os.path.exists(caminho):
+        print("[ERRO] Arquivo não encontrado. Retornando ao menu.")
+        return
+
+    resultado = importacao.importar(DB, colecao, caminho, progresso=importacao.mostrar_progresso)
+    importacao.exibir_resultado(resultado)
+
+
+def buscar_func():
+    """
+    Funcionalidade: Busca de Clientes e Produtos (Opção 7).
+    Objetivo: Encontrar clientes pelo CPF ou nome e produtos pelo nome usando os
+              índices secundários (persistencia/indices.py), sem listar tudo.
+    """
+    print("\n--- 7. BUSCAR CLIENTE / PRODUTO ---")
+    termo = input("Nome, trecho do nome ou CPF: ").strip()
+    if not termo:
+        print("[AVISO] Termo vazio. Retornando ao menu.")
+        return
+
+    print("\n[CLIENTES]")
+    encontrados = indices.buscar_clientes(termo)
+    for cid in encontrados:
+        cliente = clientes_db[cid]
+        pedidos = indices.pedidos_por_cliente.pedidos(cid)
+        print(f"ID {cid}: {cliente.nome} ({cliente.cpf}) - {len(pedidos)} pedido(s)")
+        if pedidos:
+            ultimos = ', '.join(pedidos[-5:])
+            print(f"   Últimos pedidos: {ultimos}")
+    if not encontrados:
+        print("Nenhum cliente encontrado.")
 
-    # 4. Finalização e Persistência
-    pedido_obj.pago = True
-    database.salvar_dados_json(DB) 
-    print(f"\n[SUCESSO] Pagamento do Pedido {pid} processado e salvo. Status: PAGO.")
+    print("\n[PRODUTOS]")
+    encontrados = indices.buscar_produtos(termo)
+    for pid in encontrados:
+        produto = produtos_db[pid]
+        print(f"ID {pid}: {produto.nome} (R$ {produto.preco:.2f})")
+    if not encontrados:
+        print("Nenhum produto encontrado.")
+
+
+def exportar_arquivo_func():
+    """
+    Funcionalidade: Exportação (Opção 8).
+    Objetivo: Gravar clientes, produtos ou pedidos em CSV/NDJSON (com .gz, comprimido)
+              página por página (exportacao.py), sem montar a exportação na memória.
+    """
+    print("\n--- 8. EXPORTAÇÃO (CSV/NDJSON) ---")
+    colecao = input("Coleção (clientes, produtos ou pedidos): ").strip().lower()
+    if colecao not in exportacao.COLECOES_EXPORTAVEIS:
+        print("[ERRO] Coleção inválida. Retornando ao menu.")
+        return
+    caminho = input("Arquivo de saída (.csv, .ndjson, .jsonl; + .gz para comprimir): ").strip()
+    filtros = {}
+    if colecao == 'pedidos':
+        status = input("Status (pago, aberto ou Enter para todos): ").strip().lower()
+        if status in ('pago', 'aberto'):
+            filtros['pago'] = status == 'pago'
+    try:
+        desde = exportacao.faixa_id(input("Do ID (Enter = início): "), 'desde')
+        ate = exportacao.faixa_id(input("Até o ID (Enter = fim): "), 'ate')
+        resultado = exportacao.exportar_para_arquivo(DB, colecao, caminho, filtros=filtros or None,
+                                                     desde=desde, ate=ate)
+    except (ValueError, OSError) as e:
+        print(f"[ERRO] {e}")
+        return
+    exportacao.exibir_resultado(colecao, caminho, resultado)
+
+
+def exibir_avisos_pagamento():
+    """
+    Função: Exibir os pagamentos concluídos em segundo plano desde o último menu.
+    Objetivo: As threads do processador não escrevem no terminal (o texto cairia
+              no meio de um input()); os resultados são mostrados aqui, entre as opções.
+    """
+    avisos = processador.retirar_avisos(DB)
+    if avisos:
+        print("\n[PAGAMENTOS CONCLUÍDOS]")
+        for aviso in avisos:
+            print(aviso)
 
 
 def exibir_menu():
@@ -222,6 +352,10 @@ def exibir_menu():
     print("2: Listar Entidades (Visualizar Modelos)")
     print("3: Criar Novo Pedido (Teste Composição/Associação)")
     print("4: Processar Pagamento (Teste Polimorfismo/Dependência)")
+    print("5: Relatório de Vendas")
+    print("6: Importação em Massa (CSV/NDJSON)")
+    print("7: Buscar Cliente/Produto (Nome ou CPF)")
+    print("8: Exportação (CSV/NDJSON)")
     print("0: Sair e Salvar Dados")
     print("="*50)
 
@@ -231,6 +365,7 @@ def exibir_menu():
 if __name__ == "__main__":
     while True:
         try:
+            exibir_avisos_pagamento()
             exibir_menu()
             opcao = input("Escolha uma opção: ")
             
@@ -242,8 +377,21 @@ if __name__ == "__main__":
                 criar_pedido_func()
             elif opcao == '4':
                 processar_pagamento_func()
+            elif opcao == '5':
+                relatorio_vendas_func()
+            elif opcao == '6':
+                importar_arquivo_func()
+            elif opcao == '7':
+                buscar_func()
+            elif opcao == '8':
+                exportar_arquivo_func()
             elif opcao == '0':
-                salvar_e_sair()
+                # Conclui os pagamentos na fila, esvazia a gravação em grupo e salva o restante
+                processador.encerrar(DB)
+                exibir_avisos_pagamento()
+                database.encerrar(DB)
+                print("Dados salvos. Saindo do sistema. Até logo!")
+                print(metricas.REGISTRO.resumo()) # Carga, gravações, relatórios e pagamentos da sessão
                 break
             else:
                 print("Opção inválida. Tente novamente.")
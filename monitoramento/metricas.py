@@ -0,0 +1,323 @@
+# Arquivo: monitoramento/metricas.py - Métricas de desempenho (contadores, medidores e histogramas)
+#
+# Registro em memória, sem dependências externas, exportado no formato texto do
+# Prometheus (versão 0.0.4) pela rota /metrics do app_web e resumido na saída do
+# main.py. Cada processo (worker) tem o seu próprio registro.
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# --- CONFIGURAÇÃO ---
+# '0' desliga a coleta: as chamadas de observação passam a não fazer nada
+METRICAS_ATIVAS = os.environ.get('LOJA_METRICAS', '1') == '1'
+
+# Limites (em segundos) dos intervalos dos histogramas de tempo: as operações da
+# loja vão de microssegundos (consultas em memória) a segundos (carga de um banco grande)
+LIMITES_TEMPO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos_texto(nomes, valores, extra=None):
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra is not None:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if valor == math.inf:
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer() and abs(valor) < 1e15:
+        return str(int(valor))
+    return repr(valor)
+
+
+class _Metrica:
+    """Base das métricas: nome, descrição, nomes dos rótulos e uma série por combinação de rótulos."""
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos):
+        if len(rotulos) != len(self.rotulos) or any(nome not in rotulos for nome in self.rotulos):
+            raise ValueError(f"A métrica {self.nome} usa os rótulos {self.rotulos}, recebeu {tuple(rotulos)}.")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def series(self):
+        with self._lock:
+            return sorted(self._series.items())
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return linhas
+
+
+class Contador(_Metrica):
+    """
+    Classe de Métrica.
+    Objetivo: Contar eventos ou somar quantidades que só crescem (requisições, bytes gravados).
+    """
+    tipo = 'counter'
+
+    def incrementar(self, quantidade=1, **rotulos):
+        if not METRICAS_ATIVAS:
+            return
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + quantidade
+
+    def valor(self, **rotulos):
+        with self._lock:
+            return self._series.get(self._chave(rotulos), 0)
+
+    def _amostras(self):
+        return [f"{self.nome}{_rotulos_texto(self.rotulos, chave)} {_numero(valor)}" for chave, valor in self.series()]
+
+
+class Medidor(_Metrica):
+    """
+    Classe de Métrica.
+    Objetivo: Expor um valor que sobe e desce (quantidade de entidades, fila de pagamentos).
+    Função: O valor pode ser definido com 'definir' ou calculado na exportação por
+            uma função sem argumentos registrada com 'observar' (que retorna um
+            número, ou None para omitir a série).
+    """
+    tipo = 'gauge'
+
+    def __init__(self, nome, descricao, rotulos=()):
+        super().__init__(nome, descricao, rotulos)
+        self._funcoes = {}
+
+    def definir(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = valor
+
+    def observar(self, funcao, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._funcoes[chave] = funcao
+
+    def valor(self, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            funcao = self._funcoes.get(chave)
+            if funcao is None:
+                return self._series.get(chave)
+        return funcao()
+
+    def series(self):
+        with self._lock:
+            valores = dict(self._series)
+            funcoes = dict(self._funcoes)
+        for chave, funcao in funcoes.items():
+            try:
+                valores[chave] = funcao()
+            except Exception: # Uma fonte com problema não derruba a exportação das outras
+                valores[chave] = None
+        return sorted((chave, valor) for chave, valor in valores.items() if valor is not None)
+
+    def _amostras(self):
+        return [f"{self.nome}{_rotulos_texto(self.rotulos, chave)} {_numero(valor)}" for chave, valor in self.series()]
+
+
+class _SerieHistograma:
+    __slots__ = ('contagens', 'soma', 'total', 'maximo')
+
+    def __init__(self, intervalos):
+        self.contagens = [0] * intervalos
+        self.soma = 0.0
+        self.total = 0
+        self.maximo = 0.0
+
+
+class Histograma(_Metrica):
+    """
+    Classe de Métrica.
+    Objetivo: Registrar a distribuição de durações (latência por rota, carga, gravação).
+    Função: Cada observação cai no primeiro intervalo cujo limite a comporta; a
+            exportação segue o Prometheus (contagens acumuladas, _sum e _count) e
+            'resumo' estima o p95 interpolando dentro do intervalo.
+    """
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), limites=LIMITES_TEMPO):
+        super().__init__(nome, descricao, rotulos)
+        self.limites = tuple(sorted(limites)) + (math.inf,)
+
+    def registrar(self, valor, **rotulos):
+        if not METRICAS_ATIVAS:
+            return
+        chave = self._chave(rotulos)
+        indice = 0
+        while valor > self.limites[indice]:
+            indice += 1
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = _SerieHistograma(len(self.limites))
+            serie.contagens[indice] += 1
+            serie.soma += valor
+            serie.total += 1
+            if valor > serie.maximo:
+                serie.maximo = valor
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        """Registra o tempo gasto dentro do bloco 'with' (mesmo que ele termine com exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(time.perf_counter() - inicio, **rotulos)
+
+    def resumo(self):
+        """Lista de (rótulos, quantidade, média, p95 estimado, máximo), uma por série."""
+        resultado = []
+        with self._lock:
+            copias = [(chave, list(s.contagens), s.soma, s.total, s.maximo) for chave, s in self._series.items()]
+        for chave, contagens, soma, total, maximo in sorted(copias):
+            rotulos = dict(zip(self.rotulos, chave))
+            resultado.append((rotulos, total, soma / total, self._percentil(contagens, total, 0.95, maximo), maximo))
+        return resultado
+
+    def _percentil(self, contagens, total, fracao, maximo):
+        alvo = fracao * total
+        acumulado = 0
+        for indice, contagem in enumerate(contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = self.limites[indice - 1] if indice else 0.0
+                superior = min(self.limites[indice], maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return maximo
+
+    def _amostras(self):
+        linhas = []
+        with self._lock:
+            copias = [(chave, list(s.contagens), s.soma, s.total) for chave, s in self._series.items()]
+        for chave, contagens, soma, total in sorted(copias):
+            acumulado = 0
+            for limite, contagem in zip(self.limites, contagens):
+                acumulado += contagem
+                rotulos = _rotulos_texto(self.rotulos, chave, f'le="{_numero(float(limite))}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _rotulos_texto(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    """
+    Classe de Serviço.
+    Objetivo: Guardar as métricas do processo pelo nome e exportá-las juntas.
+    Função: 'contador', 'medidor' e 'histograma' criam a métrica no primeiro uso e
+            devolvem a mesma instância nas chamadas seguintes (os módulos
+            instrumentados podem ser importados em qualquer ordem).
+    """
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def _obter(self, classe, nome, descricao, rotulos, **opcoes):
+        with self._lock:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, descricao, rotulos, **opcoes)
+            elif not isinstance(metrica, classe) or metrica.rotulos != tuple(rotulos):
+                raise ValueError(f"A métrica {nome} já foi registrada com outro tipo ou outros rótulos.")
+        return metrica
+
+    def contador(self, nome, descricao, rotulos=()):
+        return self._obter(Contador, nome, descricao, rotulos)
+
+    def medidor(self, nome, descricao, rotulos=()):
+        return self._obter(Medidor, nome, descricao, rotulos)
+
+    def histograma(self, nome, descricao, rotulos=(), limites=LIMITES_TEMPO):
+        return self._obter(Histograma, nome, descricao, rotulos, limites=limites)
+
+    def metricas(self):
+        with self._lock:
+            return [self._metricas[nome] for nome in sorted(self._metricas)]
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (Content-Type: text/plain; version=0.0.4)."""
+        linhas = []
+        for metrica in self.metricas():
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+    def resumo(self):
+        """Resumo legível (quantidade, média, p95 e máximo de cada histograma; contadores)."""
+        linhas = [f"--- MÉTRICAS DA SESSÃO ({time.time() - self.inicio:.0f}s) ---"]
+        for metrica in self.metricas():
+            if isinstance(metrica, Histograma):
+                for rotulos, total, media, p95, maximo in metrica.resumo():
+                    descricao = ' '.join(f"{v}" for v in rotulos.values())
+                    linhas.append(f"{metrica.nome} {descricao}".rstrip() + f": {total}x, média {media * 1000:.2f} ms, "
+                                  f"p95 ~{p95 * 1000:.2f} ms, máx {maximo * 1000:.2f} ms")
+            elif isinstance(metrica, Contador):
+                for chave, valor in metrica.series():
+                    descricao = ' '.join(chave)
+                    linhas.append(f"{metrica.nome} {descricao}".rstrip() + f": {_numero(valor)}")
+        if len(linhas) == 1:
+            linhas.append("Nenhuma operação medida.")
+        return '\n'.join(linhas)
+
+
+# Registro padrão do processo
+REGISTRO = RegistroMetricas()
+
+# --- MÉTRICAS DA LOJA ---
+# Declaradas aqui para que /metrics mostre os nomes (e descrições) num só lugar
+LATENCIA_ROTAS = REGISTRO.histograma(
+    'loja_http_requisicao_segundos', "Latência das requisições HTTP por rota, método e status.",
+    ('rota', 'metodo', 'status'))
+TEMPO_TEMPLATES = REGISTRO.histograma(
+    'loja_template_segundos', "Tempo de renderização de cada template.", ('template',))
+TEMPO_CARGA = REGISTRO.histograma(
+    'loja_carga_segundos', "Duração da carga do banco (carregar_dados_json).", ('modo',))
+TEMPO_GRAVACAO = REGISTRO.histograma(
+    'loja_gravacao_segundos', "Duração de cada salvamento (salvar_dados_json).", ('modo',))
+ENTIDADES_GRAVADAS = REGISTRO.contador(
+    'loja_gravacao_entidades_total', "Entidades serializadas pelos salvamentos.", ('modo',))
+BYTES_GRAVADOS = REGISTRO.contador(
+    'loja_gravacao_bytes_total', "Bytes escritos no disco pelos salvamentos.", ('destino',))
+ENTIDADES = REGISTRO.medidor(
+    'loja_entidades', "Quantidade de entidades carregadas em cada coleção.", ('colecao',))
+TEMPO_RELATORIOS = REGISTRO.histograma(
+    'loja_relatorio_segundos', "Tempo de cálculo dos relatórios (agregações sobre os pedidos).", ('relatorio',))
+TEMPO_PAGAMENTO = REGISTRO.histograma(
+    'loja_pagamento_segundos', "Tempo entre o envio do pagamento à fila e a conclusão.", ('resultado',))
+TEMPO_GATEWAY = REGISTRO.histograma(
+    'loja_pagamento_gateway_segundos', "Duração de cada tentativa de chamada ao gateway de pagamento.",
+    ('resultado',))
+FILA_PAGAMENTOS = REGISTRO.medidor(
+    'loja_pagamentos_pendentes', "Pagamentos na fila ou em processamento.")
+CACHE_CONSULTAS = REGISTRO.contador(
+    'loja_cache_consultas_total', "Consultas ao cache de fragmentos/respostas por resultado.", ('resultado',))
+CACHE_BYTES = REGISTRO.medidor(
+    'loja_cache_bytes', "Memória (estimada) ocupada pelo cache de fragmentos/respostas.")
+
+
+def observar_colecoes(dados):
+    """Publica o tamanho de cada coleção do DB no medidor loja_entidades (calculado a cada exportação)."""
+    for nome in ('clientes', 'produtos', 'pedidos'):
+        colecao = dados[nome]
+        ENTIDADES.observar(lambda colecao=colecao: len(colecao), colecao=nome)
@@ -0,0 +1,60 @@
+# Arquivo: monitoramento/perfil.py - Perfil (cProfile) de uma requisição, sob demanda
+
+import cProfile
+import os
+import re
+import threading
+import time
+
+
+# --- CONFIGURAÇÃO ---
+# Desligado por padrão: com LOJA_PERFIL=1, uma requisição com ?perfil=1 (ou o
+# cabeçalho X-Perfil: 1) roda sob o cProfile e o resultado é gravado em PASTA_PERFIS
+PERFIL_HABILITADO = os.environ.get('LOJA_PERFIL', '0') == '1'
+PASTA_PERFIS = os.environ.get('LOJA_PASTA_PERFIS', 'perfis')
+
+# Um perfil por vez: o cProfile mede só a thread que o ativou e perfis simultâneos
+# (em threads diferentes) disputariam o mesmo gancho do interpretador
+_lock_perfil = threading.Lock()
+
+
+class PerfilRequisicao:
+    """
+    Classe de Diagnóstico.
+    Objetivo: Capturar o cProfile de um único trecho (uma requisição ou uma opção do menu).
+    Função: 'iniciar' liga o profiler (retorna False se outro perfil já estiver em
+            andamento) e 'concluir' desliga e grava o arquivo .prof, que pode ser
+            lido com 'python3 -m pstats <arquivo>' ou ferramentas como o snakeviz.
+    """
+    def __init__(self, rotulo, pasta=None):
+        self.rotulo = re.sub(r'[^A-Za-z0-9_.-]+', '_', rotulo).strip('_') or 'raiz'
+        self.pasta = pasta or PASTA_PERFIS
+        self.caminho = None
+        self._profiler = None
+
+    def iniciar(self):
+        if not _lock_perfil.acquire(blocking=False):
+            return False
+        try:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        except Exception:
+            self._profiler = None
+            _lock_perfil.release()
+            raise
+        return True
+
+    def concluir(self):
+        """Desliga o profiler e retorna o caminho do arquivo gravado (None se não estava ativo)."""
+        if self._profiler is None:
+            return None
+        try:
+            self._profiler.disable()
+            os.makedirs(self.pasta, exist_ok=True)
+            nome = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}-{self.rotulo}.prof"
+            self.caminho = os.path.join(self.pasta, nome)
+            self._profiler.dump_stats(self.caminho)
+            return self.caminho
+        finally:
+            self._profiler = None
+            _lock_perfil.release()
@@ -1,17 +1,30 @@
 # Arquivo: pagamentos/pagamento.py
 from abc import ABC, abstractmethod
 
+
+class PagamentoRecusado(Exception):
+    """Recusa definitiva (ex.: cartão negado): o pagamento não deve ser tentado de novo."""
+
+
 class Pagamento(ABC):
     """
     Classe Abstrata (Interface).
     Objetivo: Definir o contrato do método 'processar()'. Base do POLIMORFISMO e alvo da DEPENDÊNCIA.
     """
+    __slots__ = ('valor',)
+
     def __init__(self, valor=0.0):
         self.valor = valor
 
     @abstractmethod
     def processar(self):
-        """Método abstrato. Deve ser implementado pelas subclasses."""
+        """
+        Método abstrato. Deve ser implementado pelas subclasses.
+        Retorna o recibo (texto) para quem chamou exibir: o processamento pode rodar
+        numa thread do processador assíncrono, que não escreve no terminal.
+        Levanta PagamentoRecusado numa recusa definitiva; qualquer outra exceção é
+        tratada como falha temporária (o processador assíncrono tenta de novo).
+        """
         pass
     
     def to_json(self):
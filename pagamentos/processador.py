@@ -0,0 +1,541 @@
+# Arquivo: pagamentos/processador.py - Processamento assíncrono de pagamentos (fila + pool de threads)
+
+import atexit
+import collections
+import math
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotado
+
+import database
+from core.pedido import Pedido
+from monitoramento import metricas
+from .pagamento import PagamentoRecusado
+
+
+# --- CONFIGURAÇÃO DO PROCESSAMENTO ---
+TRABALHADORES_PAGAMENTO = int(os.environ.get('LOJA_PAGAMENTO_TRABALHADORES', 8))
+TEMPO_LIMITE_PAGAMENTO = float(os.environ.get('LOJA_PAGAMENTO_TEMPO_LIMITE', 5.0)) # Segundos por tentativa
+TENTATIVAS_PAGAMENTO = int(os.environ.get('LOJA_PAGAMENTO_TENTATIVAS', 3))
+# Prazo (segundos) de um pagamento pendente: vencido, o pedido aceita outro pagamento
+# (o processo que pagava caiu ou reiniciou). Nenhuma chamada à operadora começa depois
+# do prazo, então ele deve cobrir a espera na fila e as tentativas (TENTATIVAS x TEMPO_LIMITE)
+PRAZO_PAGAMENTO = float(os.environ.get('LOJA_PAGAMENTO_PRAZO', 300))
+# > 0: usa o GatewaySimulado com essa latência média (ms) no lugar do processar() local
+LATENCIA_SIMULADA_MS = float(os.environ.get('LOJA_PAGAMENTO_SIMULADO_MS', 0))
+
+# Quantos trabalhos já concluídos ficam disponíveis para consulta
+LIMITE_HISTORICO = 10000
+# Quantos avisos de pagamentos concluídos esperam ser exibidos (os mais antigos saem)
+LIMITE_AVISOS = 1000
+
+PENDENTE = Pedido.PAGAMENTO_PENDENTE
+FALHOU = Pedido.PAGAMENTO_FALHOU
+PAGO = 'pago'
+
+
+def processar_localmente(pagamento, chave_idempotencia):
+    """Gateway padrão: a própria lógica polimórfica de cada forma de pagamento (retorna o recibo)."""
+    return pagamento.processar()
+
+
+class GatewaySimulado:
+    """
+    Classe de Simulação.
+    Objetivo: Imitar uma operadora de cartão/Pix remota (lenta e às vezes instável)
+              para medir a vazão do processador sem depender de serviços externos.
+    Função: Cada chamada espera 'latencia' segundos (± 'variacao'), falha com
+            ConnectionError em 'taxa_instabilidade' das vezes (o processador tenta
+            de novo) e recusa em 'taxa_recusa' das vezes. Como uma operadora real,
+            é idempotente pela chave: um pagamento já liquidado não é cobrado de novo.
+    """
+    def __init__(self, latencia=0.2, variacao=0.5, taxa_instabilidade=0.0, taxa_recusa=0.0, semente=None):
+        self.latencia = latencia
+        self.variacao = variacao
+        self.taxa_instabilidade = taxa_instabilidade
+        self.taxa_recusa = taxa_recusa
+        self._aleatorio = random.Random(semente)
+        self._liquidados = set()
+        self._lock = threading.Lock()
+        self.chamadas = 0
+
+    def __call__(self, pagamento, chave_idempotencia):
+        with self._lock:
+            self.chamadas += 1
+            if chave_idempotencia in self._liquidados:
+                return
+            sorteio = self._aleatorio.random()
+            atraso = self.latencia * (1 + self.variacao * (2 * self._aleatorio.random() - 1))
+        time.sleep(max(atraso, 0))
+        if sorteio < self.taxa_recusa:
+            raise PagamentoRecusado("Pagamento recusado pela operadora (simulado).")
+        if sorteio < self.taxa_recusa + self.taxa_instabilidade:
+            raise ConnectionError("Operadora indisponível (simulado).")
+        with self._lock:
+            self._liquidados.add(chave_idempotencia)
+
+
+class TrabalhoPagamento:
+    """
+    Classe de Registro.
+    Objetivo: Acompanhar um pagamento enviado à fila (situação, tentativas e erro).
+    Função: 'chave' é a chave de idempotência enviada ao gateway: o ID do trabalho
+            ou, quando o pedido é reenviado com uma chamada anterior ainda sem
+            resposta, a chave do trabalho anterior (a operadora cobra uma vez só).
+    """
+    __slots__ = ('id', 'pedido_id', 'pagamento', 'prazo', 'chave', 'chamada', 'status', 'tentativas', 'erro',
+                 'enviado_em', 'concluido_em')
+
+    def __init__(self, pedido_id, pagamento, prazo=None, chave=None):
+        self.id = uuid.uuid4().hex
+        self.pedido_id = pedido_id
+        self.pagamento = pagamento
+        self.prazo = prazo # Pedido.pagamento_expira gravado para este trabalho (None = sem prazo)
+        self.chave = chave or self.id
+        self.chamada = None # Última chamada ao gateway (Future)
+        self.status = PENDENTE
+        self.tentativas = 0
+        self.erro = None
+        self.enviado_em = time.time()
+        self.concluido_em = None
+
+    def concluido(self):
+        return self.status != PENDENTE
+
+    def chamada_em_andamento(self):
+        """Se a última chamada ao gateway ainda não respondeu (a cobrança pode acontecer)."""
+        chamada = self.chamada
+        return chamada is not None and not chamada.done()
+
+    def como_dict(self):
+        return {
+            'trabalho': self.id,
+            'pedido_id': self.pedido_id,
+            'status': self.status,
+            'forma': self.pagamento.__class__.__name__,
+            'valor': self.pagamento.valor,
+            'tentativas': self.tentativas,
+            'erro': self.erro,
+        }
+
+
+class ProcessadorPagamentos:
+    """
+    Classe de Serviço.
+    Objetivo: Liquidar pagamentos fora do caminho da requisição (web ou menu), sem
+              prender um worker enquanto a operadora responde.
+    Função: Os pagamentos entram numa fila atendida por 'trabalhadores' threads.
+            Cada tentativa espera o gateway por 'tempo_limite'; falhas temporárias
+            são repetidas até 'tentativas' vezes com espera exponencial, e
+            PagamentoRecusado encerra na hora. Uma chamada com tempo esgotado
+            continua na operadora: a tentativa seguinte volta a esperar por ela em
+            vez de cobrar de novo, então há no máximo uma chamada por trabalho em
+            andamento, e todas levam a mesma chave de idempotência (trabalho.chave):
+            gateway(pagamento, chave_idempotencia). Se as tentativas acabam com a
+            chamada ainda sem resposta, o trabalho continua pendente (e o pedido com
+            o seu prazo) até ela responder: só então o resultado é entregue a
+            'concluir(pedido_id, sucesso, prazo)', que o persiste. Depois do 'prazo'
+            do trabalho nenhuma chamada nova é feita. As threads não escrevem no
+            terminal: o resultado de cada trabalho (com o recibo, se o gateway
+            retornar um texto) vira um aviso, retirado por retirar_avisos().
+    """
+    def __init__(self, concluir, trabalhadores=TRABALHADORES_PAGAMENTO, tempo_limite=TEMPO_LIMITE_PAGAMENTO,
+                 tentativas=TENTATIVAS_PAGAMENTO, espera=0.2, gateway=processar_localmente):
+        self._concluir = concluir
+        self.trabalhadores = trabalhadores
+        self.tempo_limite = tempo_limite
+        self.tentativas = tentativas
+        self.espera = espera
+        self.gateway = gateway
+        self._fila = queue.Queue()
+        # As chamadas ao gateway rodam aqui, para que o tempo limite possa ser aplicado
+        self._chamadas = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='gateway-pagamento')
+        self._threads = []
+        self._condicao = threading.Condition()
+        self._por_pedido = collections.OrderedDict() # pedido_id -> trabalho mais recente
+        self._ativos = 0
+        self._aguardando = set() # Trabalhos sem tentativas restantes, esperando a resposta da operadora
+        self._avisos = collections.deque(maxlen=LIMITE_AVISOS)
+        self._encerrado = False
+        # Estatísticas
+        self.pagos = 0
+        self.falhas = 0
+        self.chamadas = 0
+
+    # ------------------------------------------------------------------
+    # Uso pelas requisições
+    # ------------------------------------------------------------------
+
+    def enviar(self, pedido_id, pagamento, prazo=None):
+        """
+        Enfileira o pagamento do pedido e retorna o TrabalhoPagamento (sem esperar).
+        Se o trabalho anterior do pedido ainda espera a operadora, a chave de
+        idempotência dele é reaproveitada.
+        """
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("O processador de pagamentos já foi encerrado.")
+            anterior = self._por_pedido.get(pedido_id)
+            chave = anterior.chave if anterior is not None and not anterior.concluido() else None
+            trabalho = TrabalhoPagamento(pedido_id, pagamento, prazo, chave)
+            if not self._threads:
+                for numero in range(self.trabalhadores):
+                    thread = threading.Thread(target=self._laco, name=f'pagamentos-{numero}', daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+            self._por_pedido.pop(pedido_id, None)
+            self._por_pedido[pedido_id] = trabalho
+            self._descartar_historico()
+            self._ativos += 1
+        self._fila.put(trabalho)
+        return trabalho
+
+    def trabalho_do_pedido(self, pedido_id):
+        """Último trabalho deste processo para o pedido (None se não houver)."""
+        with self._condicao:
+            return self._por_pedido.get(pedido_id)
+
+    def aguardar(self, trabalho, timeout=None):
+        """Espera o trabalho terminar. Retorna False se 'timeout' se esgotar antes."""
+        with self._condicao:
+            return self._condicao.wait_for(trabalho.concluido, timeout)
+
+    def aguardar_todos(self, timeout=None):
+        """
+        Espera a fila esvaziar e as chamadas sem resposta terminarem. Retorna False
+        se 'timeout' se esgotar antes.
+        """
+        with self._condicao:
+            return self._condicao.wait_for(lambda: self._ativos == 0 and not self._aguardando, timeout)
+
+    def encerrar(self, timeout=None):
+        """
+        Para de aceitar pagamentos, espera os que estão na fila (até 'timeout') e
+        marca como falhos os que sobrarem, para que nenhum pedido fique pendente.
+        Uma chamada ainda sem resposta é esperada no máximo até o prazo do seu
+        trabalho: se não responder, o pedido fica pendente até o prazo vencer
+        (ela ainda pode ter cobrado).
+        """
+        with self._condicao:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._condicao.wait_for(lambda: self._ativos == 0, timeout)
+            prazos = [trabalho.prazo for trabalho in self._aguardando if trabalho.prazo is not None]
+            limite = max(prazos, default=time.time()) - time.time()
+            self._condicao.wait_for(lambda: not self._aguardando,
+                                    max(min(limite, timeout if timeout is not None else limite), 0))
+
+        while True:
+            try:
+                trabalho = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            self._finalizar(trabalho, False, "Interrompido no encerramento do sistema.")
+        for _ in self._threads:
+            self._fila.put(None)
+        self._chamadas.shutdown(wait=False)
+
+    def retirar_avisos(self):
+        """Avisos (texto) dos trabalhos concluídos desde a última chamada, em ordem."""
+        with self._condicao:
+            avisos = list(self._avisos)
+            self._avisos.clear()
+        return avisos
+
+    def estatisticas(self):
+        with self._condicao:
+            return {
+                'trabalhadores': self.trabalhadores,
+                'pendentes': self._ativos,
+                'aguardando_operadora': len(self._aguardando),
+                'pagos': self.pagos,
+                'falhas': self.falhas,
+                'chamadas': self.chamadas,
+            }
+
+    # ------------------------------------------------------------------
+    # Threads do pool
+    # ------------------------------------------------------------------
+
+    def _descartar_historico(self):
+        while len(self._por_pedido) > LIMITE_HISTORICO:
+            pedido_id, trabalho = next(iter(self._por_pedido.items()))
+            if not trabalho.concluido():
+                break
+            del self._por_pedido[pedido_id]
+
+    def _laco(self):
+        while True:
+            trabalho = self._fila.get()
+            if trabalho is None:
+                return
+            self._processar(trabalho)
+
+    def _processar(self, trabalho):
+        erro = None
+        chamada = None # Chamada ao gateway que esgotou o tempo e ainda pode ser aprovada
+        for tentativa in range(1, self.tentativas + 1):
+            if chamada is None:
+                if trabalho.prazo is not None and time.time() >= trabalho.prazo:
+                    # Vencido o prazo, outro processo pode ter assumido o pedido: não cobra mais
+                    self._finalizar(trabalho, False, erro or "Prazo do pagamento esgotado antes do envio à operadora.")
+                    return
+                with self._condicao:
+                    self.chamadas += 1
+                chamada = trabalho.chamada = self._chamadas.submit(self.gateway, trabalho.pagamento, trabalho.chave)
+            trabalho.tentativas = tentativa
+            inicio = time.perf_counter()
+            try:
+                recibo = chamada.result(self.tempo_limite)
+            except PagamentoRecusado as e:
+                metricas.TEMPO_GATEWAY.registrar(time.perf_counter() - inicio, resultado='recusado')
+                self._finalizar(trabalho, False, str(e) or "Pagamento recusado.")
+                return
+            except TempoEsgotado:
+                metricas.TEMPO_GATEWAY.registrar(time.perf_counter() - inicio, resultado='tempo_esgotado')
+                erro = f"Tempo limite de {self.tempo_limite:g}s esgotado."
+            except Exception as e:
+                metricas.TEMPO_GATEWAY.registrar(time.perf_counter() - inicio, resultado='erro')
+                erro = str(e) or e.__class__.__name__
+                chamada = None
+            else:
+                metricas.TEMPO_GATEWAY.registrar(time.perf_counter() - inicio, resultado='aprovado')
+                self._finalizar(trabalho, True, None, recibo)
+                return
+            trabalho.erro = erro
+            if tentativa < self.tentativas:
+                time.sleep(self.espera * 2 ** (tentativa - 1))
+        if chamada is None:
+            self._finalizar(trabalho, False, erro)
+            return
+        # A última chamada ainda pode cobrar: o resultado só é gravado quando ela responder
+        with self._condicao:
+            self._ativos -= 1
+            self._aguardando.add(trabalho)
+        chamada.add_done_callback(lambda chamada: self._resposta_atrasada(trabalho, chamada, erro))
+
+    def _resposta_atrasada(self, trabalho, chamada, erro):
+        """Conclui o trabalho cuja chamada respondeu depois da última tentativa."""
+        recibo = None
+        if chamada.cancelled():
+            sucesso = False
+        else:
+            excecao = chamada.exception()
+            sucesso = excecao is None
+            if sucesso:
+                recibo = chamada.result()
+            else:
+                erro = str(excecao) or excecao.__class__.__name__
+        with self._condicao:
+            self._aguardando.discard(trabalho)
+            self._ativos += 1 # Devolvido por _finalizar
+        self._finalizar(trabalho, sucesso, None if sucesso else erro, recibo)
+
+    def _finalizar(self, trabalho, sucesso, erro, recibo=None):
+        avisos = [f"Pedido {trabalho.pedido_id}: pagamento aprovado." if sucesso
+                  else f"Pedido {trabalho.pedido_id}: pagamento falhou ({erro or 'sem detalhes'})."]
+        if sucesso and isinstance(recibo, str):
+            avisos.append(recibo)
+        try:
+            self._concluir(trabalho.pedido_id, sucesso, trabalho.prazo)
+        except Exception as e:
+            avisos.append(f"AVISO: Não foi possível registrar o pagamento do Pedido {trabalho.pedido_id}: {e}")
+        with self._condicao:
+            self._avisos.append('\n'.join(avisos))
+            trabalho.status = PAGO if sucesso else FALHOU
+            trabalho.erro = erro
+            trabalho.concluido_em = time.time()
+            metricas.TEMPO_PAGAMENTO.registrar(trabalho.concluido_em - trabalho.enviado_em,
+                                               resultado=trabalho.status)
+            if sucesso:
+                self.pagos += 1
+            else:
+                self.falhas += 1
+            self._ativos -= 1
+            self._condicao.notify_all()
+
+
+# ----------------------------------------------------------------------
+# INTEGRAÇÃO COM O DB
+# ----------------------------------------------------------------------
+
+# Um processador por coleção de pedidos (criado no primeiro uso)
+_processadores = {}
+_lock_processadores = threading.Lock()
+
+
+def _registrar_resultado(dados, pedido_id, sucesso, prazo=None):
+    """
+    Persiste a transição do pedido: pendente -> pago ou pendente -> falhou. Uma falha
+    só é gravada se o pedido ainda está com o pagamento de 'prazo' (senão, outro
+    pagamento já o assumiu depois do prazo vencido); uma aprovação sempre vale.
+    """
+    with database.transacao(dados):
+        pedido = dados['pedidos'].get(pedido_id)
+        if pedido is None or pedido.pago:
+            return
+        if sucesso:
+            pedido.pago = True
+            pedido.status_pagamento = None
+            pedido.pagamento_expira = None
+        elif prazo is None or pedido.pagamento_expira == prazo:
+            pedido.status_pagamento = FALHOU
+            pedido.pagamento_expira = None
+
+
+def obter_processador(dados):
+    """Retorna o ProcessadorPagamentos de DB['pedidos'], criando-o no primeiro uso."""
+    pedidos = dados['pedidos']
+    with _lock_processadores:
+        processador = _processadores.get(id(pedidos))
+        if processador is None:
+            gateway = processar_localmente
+            if LATENCIA_SIMULADA_MS > 0:
+                gateway = GatewaySimulado(LATENCIA_SIMULADA_MS / 1000)
+            processador = ProcessadorPagamentos(
+                lambda pedido_id, sucesso, prazo: _registrar_resultado(dados, pedido_id, sucesso, prazo),
+                gateway=gateway
+            )
+            _processadores[id(pedidos)] = processador
+            metricas.FILA_PAGAMENTOS.observar(lambda: processador.estatisticas()['pendentes'])
+            atexit.register(processador.encerrar) # Nenhum pedido fica 'pendente' ao sair
+    return processador
+
+
+def solicitar_pagamento(dados, pedido_id, pagamento, duravel=False):
+    """
+    Objetivo: Iniciar o pagamento assíncrono de um pedido.
+    Função: Marca o pedido como 'pendente' até PRAZO_PAGAMENTO (persistido), define
+            o valor do pagamento e o coloca na fila. Levanta KeyError se o pedido não
+            existe e ValueError se ele já foi pago ou já tem um pagamento em andamento
+            (um pendente de prazo vencido foi interrompido e pode ser pago de novo).
+    """
+    processador = obter_processador(dados)
+    with database.transacao(dados, duravel):
+        pedido = dados['pedidos'].get(pedido_id)
+        if pedido is None:
+            if database.obter_arquivo().contem(pedido_id): # Arquivo morto: só pedidos pagos
+                raise ValueError("Pedido já foi pago.")
+            raise KeyError(pedido_id)
+        if pedido.pago:
+            raise ValueError("Pedido já foi pago.")
+        # Um trabalho local ainda sem resposta da operadora bloqueia até o prazo dele; vencido
+        # o prazo, o novo pagamento reaproveita a chave de idempotência (ver enviar)
+        trabalho = processador.trabalho_do_pedido(pedido_id)
+        if pedido.pagamento_em_andamento() or (trabalho is not None and not trabalho.concluido()
+                                               and (trabalho.prazo is None or time.time() < trabalho.prazo)):
+            raise ValueError("Pedido já tem um pagamento em andamento.")
+        prazo = round(time.time() + PRAZO_PAGAMENTO, 3)
+        pedido.status_pagamento = PENDENTE
+        pedido.pagamento_expira = prazo
+        pagamento.valor = pedido.calcular_total()
+    try:
+        return processador.enviar(pedido_id, pagamento, prazo)
+    except RuntimeError: # Processador já encerrado (saída do sistema): o pedido não fica pendente
+        _registrar_resultado(dados, pedido_id, False)
+        raise
+
+
+def _valor_informado(liquidacao):
+    """'valor' da liquidação como float (None se não foi informado); ValueError se inválido."""
+    valor = liquidacao.get('valor')
+    if valor is None:
+        return None
+    try:
+        valor = float(str(valor).strip().replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"'valor' deve ser numérico: {liquidacao.get('valor')!r}.")
+    if not math.isfinite(valor):
+        raise ValueError(f"'valor' deve ser numérico: {liquidacao.get('valor')!r}.")
+    return valor
+
+
+def liquidar_lote(dados, liquidacoes, duravel=False, atomico=False):
+    """
+    Objetivo: Registrar de uma vez pagamentos já liquidados na operadora (retorno em
+              lote de uma integração), sem passar pela fila um pedido por vez.
+    Função: Cada liquidação é {'pedido_id' [, 'valor']}. Dentro de uma única
+            transação, todas são conferidas antes de qualquer alteração: o pedido
+            existe, não está pago nem com pagamento em andamento, não se repete no
+            lote e, se 'valor' foi informado, ele bate com o total. As válidas
+            marcam o pedido como pago e o lote é salvo uma vez. Retorna um resultado
+            por liquidação, na ordem recebida: {'indice', 'pedido_id', 'total'} ou
+            {'indice', 'erro'}. Com 'atomico', qualquer erro recusa o lote inteiro.
+    """
+    resultados = [None] * len(liquidacoes)
+    with database.transacao(dados, duravel):
+        pedidos = dados['pedidos']
+        aceitos = []
+        vistos = set()
+        for indice, liquidacao in enumerate(liquidacoes):
+            try:
+                if not isinstance(liquidacao, dict):
+                    raise ValueError("Liquidação deve ser um objeto com 'pedido_id'.")
+                pedido_id = str(liquidacao.get('pedido_id') or '').strip()
+                if not pedido_id:
+                    raise ValueError("Campo obrigatório ausente: 'pedido_id'.")
+                valor = _valor_informado(liquidacao)
+                pedido = pedidos.get(pedido_id)
+                if pedido is None and not database.obter_arquivo().contem(pedido_id):
+                    raise ValueError(f"Pedido {pedido_id} não encontrado.")
+                if pedido is None or pedido.pago or pedido_id in vistos: # Arquivado: já pago
+                    raise ValueError(f"Pedido {pedido_id} já foi pago.")
+                if pedido.pagamento_em_andamento():
+                    raise ValueError(f"Pedido {pedido_id} já tem um pagamento em andamento.")
+                total = pedido.calcular_total()
+                if valor is not None and not math.isclose(valor, total, abs_tol=0.005):
+                    raise ValueError(f"Valor {valor:.2f} não confere com o total do Pedido {pedido_id} ({total:.2f}).")
+            except ValueError as e:
+                resultados[indice] = {'indice': indice, 'erro': str(e)}
+                continue
+            vistos.add(pedido_id)
+            aceitos.append((indice, pedido))
+
+        if atomico and len(aceitos) < len(liquidacoes):
+            for indice, _ in aceitos:
+                resultados[indice] = {'indice': indice, 'erro': "Lote recusado: há liquidações inválidas."}
+            return resultados # Nada foi alterado: o salvamento não tem o que gravar
+
+        for indice, pedido in aceitos:
+            pedido.pago = True
+            pedido.status_pagamento = None
+            pedido.pagamento_expira = None
+            resultados[indice] = {'indice': indice, 'pedido_id': pedido.id, 'total': pedido.calcular_total()}
+    return resultados
+
+
+def situacao(dados, pedido_id):
+    """
+    Situação do pagamento de um pedido (KeyError se ele não existe). A situação vem
+    do pedido persistido, então vale em qualquer worker; os detalhes do trabalho
+    (tentativas, erro) só existem no processo que o executou.
+    """
+    pedido = dados['pedidos'].get(pedido_id)
+    if pedido is None:
+        pedido = database.obter_arquivo().pedido(dados, pedido_id) # Arquivo morto: pago, somente leitura
+    if pedido is None:
+        raise KeyError(pedido_id)
+    resposta = {'pedido_id': pedido_id, 'status': pedido.situacao_pagamento(), 'total': pedido.calcular_total()}
+    processador = _processadores.get(id(dados['pedidos']))
+    trabalho = processador.trabalho_do_pedido(pedido_id) if processador is not None else None
+    if trabalho is not None:
+        resposta.update(trabalho=trabalho.id, tentativas=trabalho.tentativas, erro=trabalho.erro)
+    return resposta
+
+
+def retirar_avisos(dados):
+    """Avisos dos pagamentos de DB concluídos desde a última chamada (lista vazia se não há processador)."""
+    processador = _processadores.get(id(dados['pedidos']))
+    return processador.retirar_avisos() if processador is not None else []
+
+
+def encerrar(dados, timeout=None):
+    """Encerra o processador do DB (se existir), esperando os pagamentos na fila."""
+    processador = _processadores.get(id(dados['pedidos']))
+    if processador is not None:
+        processador.encerrar(timeout)
@@ -0,0 +1,350 @@
+# Arquivo: persistencia/arquivo.py - Arquivo morto de pedidos pagos em segmentos imutáveis e comprimidos
+#
+# Pedidos pagos há muito tempo nunca mais mudam: o arquivamento (arquivamento.py) os
+# tira de DB['pedidos'] e grava cada leva num segmento novo, que depois só é lido.
+# Assim a carga, a memória e cada salvamento dependem só dos pedidos em aberto e
+# recentes; os arquivados continuam legíveis por ID, nas exportações e nos relatórios.
+#
+# Layout de um segmento (ordem de bytes nativa da máquina, registrada nos metadados):
+#     MAGICO, [pedidos: u64][tamanho dos metadados: u32], metadados em JSON e, a partir
+#     do próximo múltiplo de 8:
+#       ids      -> int64[n]: IDs dos pedidos em ordem crescente
+#       clientes -> int64[n]: cliente de cada pedido, em ordem de (cliente, pedido)
+#       pedidos  -> int64[n]: o pedido correspondente em 'clientes' (índice por cliente)
+#       inicios  -> int64[blocos + 1]: posição de cada bloco comprimido na área de blocos
+#     seguidos dos blocos: cada um é o zlib de até PEDIDOS_POR_BLOCO linhas com o JSON
+#     compacto de um pedido, na ordem de 'ids' (o pedido i está no bloco i // por_bloco).
+# Os metadados guardam o resumo de vendas do segmento (total e por cliente/produto),
+# que os relatórios somam sem descomprimir nada.
+
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+
+from core.pedido import Pedido
+from .snapshot import escrever_atomico
+
+
+MAGICO = b'LOJAARQ1'
+PEDIDOS_POR_BLOCO = 256
+NIVEL_ZLIB = 6
+
+_CABECALHO = struct.Struct('<QI')
+_INICIO_METADADOS = len(MAGICO) + _CABECALHO.size
+_NOME_SEGMENTO = re.compile(r'^segmento-(\d+)\.arq$')
+
+
+class SegmentoInvalido(ValueError):
+    """O arquivo não é um segmento do arquivo morto válido."""
+
+
+def _alinhar(posicao):
+    return (posicao + 7) & ~7
+
+
+def id_arquivavel(chave):
+    """Só IDs numéricos canônicos ('1', '42') vão para os arrays de int64 do segmento."""
+    return chave.isdigit() and chave.isascii() and (chave == '0' or chave[0] != '0') and len(chave) < 19
+
+
+def _linhas_bruto(data):
+    """(produto_id, unidades, receita) de cada item de um pedido em JSON (novo ou antigo)."""
+    for item in data['itens']:
+        if 'produto_id' in item:
+            yield item['produto_id'], item['quantidade'], item['preco'] * item['quantidade']
+        else: # Formato antigo: produto embutido, sem ID
+            yield None, item['quantidade'], item['produto_data']['preco'] * item['quantidade']
+
+
+def _resumir(pedidos):
+    """Resumo de vendas do segmento: só pedidos pagos são arquivados, então tudo é 'pago'."""
+    total = 0
+    por_cliente = {}
+    por_produto = {}
+    for _, data in pedidos:
+        total_pedido = 0
+        for produto_id, unidades, receita in _linhas_bruto(data):
+            total_pedido += receita
+            vendas = por_produto.setdefault(produto_id, [0, 0])
+            vendas[0] += unidades
+            vendas[1] += receita
+        cliente = por_cliente.setdefault(data['cliente_id'], [0, 0])
+        cliente[0] += 1
+        cliente[1] += total_pedido
+        total += total_pedido
+    return {
+        'pedidos': len(pedidos),
+        'total': total,
+        'por_cliente': [[cliente_id, n, soma] for cliente_id, (n, soma) in por_cliente.items()],
+        'por_produto': [[produto_id, unidades, receita] for produto_id, (unidades, receita) in por_produto.items()],
+    }
+
+
+# ----------------------------------------------------------------------
+# ESCRITA (UMA VEZ POR SEGMENTO)
+# ----------------------------------------------------------------------
+
+def escrever_segmento(caminho, pedidos):
+    """
+    Objetivo: Gravar um segmento imutável com os 'pedidos' [(id, dados JSON), ...].
+    Função: Ordena por ID, comprime em blocos de PEDIDOS_POR_BLOCO e grava tudo de
+            uma vez (escrever_atomico): o segmento aparece completo ou não aparece.
+            Retorna o tamanho do arquivo em bytes.
+    """
+    pedidos = sorted(pedidos, key=lambda par: int(par[0]))
+    ids = array('q', (int(chave) for chave, _ in pedidos))
+    por_cliente = sorted((int(data['cliente_id']), int(chave)) for chave, data in pedidos)
+    clientes = array('q', (cliente_id for cliente_id, _ in por_cliente))
+    pedidos_do_cliente = array('q', (pedido_id for _, pedido_id in por_cliente))
+
+    blocos = []
+    inicios = array('q', [0])
+    for inicio in range(0, len(pedidos), PEDIDOS_POR_BLOCO):
+        texto = '\n'.join(json.dumps(data, separators=(',', ':')) for _, data in pedidos[inicio:inicio + PEDIDOS_POR_BLOCO])
+        blocos.append(zlib.compress(texto.encode('utf-8'), NIVEL_ZLIB))
+        inicios.append(inicios[-1] + len(blocos[-1]))
+
+    metadados = json.dumps({
+        'ordem': sys.byteorder,
+        'por_bloco': PEDIDOS_POR_BLOCO,
+        'resumo': _resumir(pedidos),
+    }, separators=(',', ':')).encode('utf-8')
+    partes = [MAGICO, _CABECALHO.pack(len(pedidos), len(metadados)), metadados]
+    partes.append(b'\0' * (_alinhar(_INICIO_METADADOS + len(metadados)) - _INICIO_METADADOS - len(metadados)))
+    partes += [ids.tobytes(), clientes.tobytes(), pedidos_do_cliente.tobytes(), inicios.tobytes()]
+    partes += blocos
+    conteudo = b''.join(partes)
+    escrever_atomico(caminho, conteudo)
+    return len(conteudo)
+
+
+# ----------------------------------------------------------------------
+# LEITURA (MMAP, UM BLOCO DESCOMPRIMIDO POR VEZ)
+# ----------------------------------------------------------------------
+
+class SegmentoArquivo:
+    """
+    Classe de Persistência (Leitura).
+    Objetivo: Ler um segmento do arquivo morto sem carregá-lo na memória.
+    Função: Mapeia o arquivo (mmap somente leitura); a busca por ID e por cliente é
+            binária nos arrays mapeados e só o bloco do pedido é descomprimido. O
+            último bloco lido fica guardado, pois leituras seguidas costumam cair
+            no mesmo bloco (IDs em sequência, exportações).
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # Arquivo vazio
+                raise SegmentoInvalido(f"{caminho} está vazio.")
+        visao = memoryview(self._mmap)
+        if visao[:len(MAGICO)] != MAGICO or len(visao) < _INICIO_METADADOS:
+            raise SegmentoInvalido(f"{caminho} não é um segmento do arquivo morto.")
+        n, tamanho = _CABECALHO.unpack_from(visao, len(MAGICO))
+        try:
+            metadados = json.loads(bytes(visao[_INICIO_METADADOS:_INICIO_METADADOS + tamanho]))
+        except ValueError as e:
+            raise SegmentoInvalido(f"Metadados do segmento {caminho} corrompidos: {e}") from e
+        if metadados['ordem'] != sys.byteorder:
+            raise SegmentoInvalido(f"{caminho} foi gerado numa máquina {metadados['ordem']}-endian.")
+
+        self.resumo = metadados['resumo']
+        self._por_bloco = metadados['por_bloco']
+        n_blocos = -(-n // self._por_bloco)
+        inicio = _alinhar(_INICIO_METADADOS + tamanho)
+        arrays = []
+        for quantidade in (n, n, n, n_blocos + 1):
+            arrays.append(visao[inicio:inicio + 8 * quantidade].cast('q'))
+            inicio += 8 * quantidade
+        self._ids, self._clientes, self._pedidos_do_cliente, self._inicios = arrays
+        self._blocos = visao[inicio:]
+        if len(self._inicios) != n_blocos + 1 or len(self._blocos) != self._inicios[n_blocos]:
+            raise SegmentoInvalido(f"Segmento {caminho} truncado.")
+        self._ultimo_bloco = (None, None)
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def primeiro(self):
+        return self._ids[0] if len(self._ids) else None
+
+    @property
+    def ultimo(self):
+        return self._ids[-1] if len(self._ids) else None
+
+    def _posicao(self, chave):
+        if not id_arquivavel(chave):
+            return -1
+        valor = int(chave)
+        posicao = bisect_left(self._ids, valor)
+        return posicao if posicao < len(self._ids) and self._ids[posicao] == valor else -1
+
+    def __contains__(self, chave):
+        return self._posicao(chave) >= 0
+
+    def _bloco(self, numero):
+        """Linhas (JSON de cada pedido) do bloco 'numero', descomprimidas."""
+        guardado, linhas = self._ultimo_bloco
+        if guardado != numero:
+            inicio, fim = self._inicios[numero], self._inicios[numero + 1]
+            linhas = zlib.decompress(self._blocos[inicio:fim]).split(b'\n')
+            self._ultimo_bloco = (numero, linhas) # Uma só atribuição: seguro entre threads
+        return linhas
+
+    def dados(self, chave):
+        """Dados JSON do pedido arquivado (dicionário) ou None se ele não está no segmento."""
+        posicao = self._posicao(chave)
+        if posicao < 0:
+            return None
+        return json.loads(self._bloco(posicao // self._por_bloco)[posicao % self._por_bloco])
+
+    def percorrer(self, desde=None, ate=None):
+        """Gera (id, dados JSON) em ordem de ID, descomprimindo um bloco por vez."""
+        inicio = 0 if desde is None else bisect_left(self._ids, desde)
+        fim = len(self._ids) if ate is None else bisect_right(self._ids, ate)
+        for posicao in range(inicio, fim):
+            linhas = self._bloco(posicao // self._por_bloco)
+            yield str(self._ids[posicao]), json.loads(linhas[posicao % self._por_bloco])
+
+    def pedidos_do_cliente(self, cliente_id, apos=None):
+        """IDs (inteiros, em ordem crescente) dos pedidos arquivados do cliente, depois de 'apos'."""
+        cliente_id = int(cliente_id)
+        inicio = bisect_left(self._clientes, cliente_id)
+        fim = bisect_right(self._clientes, cliente_id)
+        if apos is not None:
+            inicio = bisect_right(self._pedidos_do_cliente, int(apos), inicio, fim)
+        return self._pedidos_do_cliente[inicio:fim].tolist()
+
+
+class ArquivoPedidos:
+    """
+    Classe de Persistência (Leitura).
+    Objetivo: Reunir os segmentos de uma pasta do arquivo morto.
+    Função: A pasta é relida (outro processo pode ter arquivado) a cada consulta
+            que não acha o pedido e ao percorrer o arquivo. Os segmentos podem ter faixas de IDs sobrepostas (um pedido
+            pago depois dos vizinhos vai para um segmento mais novo), então as
+            consultas olham todos e as leituras em ordem de ID os intercalam.
+    """
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.segmentos = []
+        self._nomes = set()
+        self._lock = threading.Lock()
+        self.atualizar()
+
+    def atualizar(self):
+        """Abre os segmentos novos da pasta (listá-la custa pouco)."""
+        try:
+            nomes = [nome for nome in os.listdir(self.pasta) if _NOME_SEGMENTO.match(nome)]
+        except FileNotFoundError:
+            return
+        if self._nomes.issuperset(nomes):
+            return
+        with self._lock:
+            novos = [SegmentoArquivo(os.path.join(self.pasta, nome)) for nome in sorted(nomes) if nome not in self._nomes]
+            if novos:
+                self.segmentos = self.segmentos + novos # Nova lista: leituras em andamento seguem com a antiga
+            self._nomes.update(nomes) # Depois dos segmentos: quem vê o nome já acha o segmento
+
+    def proximo_segmento(self):
+        """Caminho do próximo segmento (chamado dentro da transação do arquivamento)."""
+        self.atualizar()
+        numeros = [int(_NOME_SEGMENTO.match(nome).group(1)) for nome in self._nomes]
+        return os.path.join(self.pasta, f"segmento-{max(numeros, default=0) + 1:06d}.arq")
+
+    def __len__(self):
+        return sum(len(segmento) for segmento in self.segmentos)
+
+    def contem(self, chave, atualizar=True):
+        """Se o pedido está arquivado. Antes de responder que não, relê a pasta (se 'atualizar')."""
+        if any(chave in segmento for segmento in self.segmentos):
+            return True
+        if not atualizar:
+            return False
+        self.atualizar()
+        return any(chave in segmento for segmento in self.segmentos)
+
+    def _procurar(self, chave):
+        for segmento in self.segmentos:
+            data = segmento.dados(chave)
+            if data is not None:
+                return data
+        return None
+
+    def dados(self, chave):
+        """Dados JSON do pedido arquivado ou None."""
+        data = self._procurar(chave)
+        if data is None:
+            self.atualizar()
+            data = self._procurar(chave)
+        return data
+
+    def pedido(self, dados, chave):
+        """O pedido arquivado como objeto Pedido (ver montar_pedido), ou None se ele não está no arquivo."""
+        data = self.dados(chave)
+        return montar_pedido(dados, chave, data) if data is not None else None
+
+    def percorrer(self, desde=None, ate=None):
+        """Gera (id, dados JSON) de todos os pedidos arquivados em ordem de ID."""
+        self.atualizar()
+        fontes = [segmento.percorrer(desde, ate) for segmento in self.segmentos]
+        anterior = None
+        for chave, data in merge(*fontes, key=lambda par: int(par[0])):
+            if chave != anterior: # Mesmo pedido em dois segmentos (arquivamento interrompido)
+                yield chave, data
+            anterior = chave
+
+    def pedidos_do_cliente(self, cliente_id, apos=None, limite=None):
+        """IDs (texto) dos pedidos arquivados do cliente, em ordem crescente, depois de 'apos'."""
+        if not id_arquivavel(str(cliente_id)):
+            return []
+        if apos is not None and not id_arquivavel(str(apos)):
+            return [] # IDs não canônicos ficam depois de todos os numéricos (ver ordem_id)
+        self.atualizar()
+        ids = sorted({pedido_id for segmento in self.segmentos
+                      for pedido_id in segmento.pedidos_do_cliente(cliente_id, apos)})
+        return [str(pedido_id) for pedido_id in ids[:limite]]
+
+    def resumos(self):
+        """Resumo de vendas de cada segmento (ver _resumir)."""
+        self.atualizar()
+        return [segmento.resumo for segmento in self.segmentos]
+
+
+def montar_pedido(dados, chave, data):
+    """
+    Pedido arquivado como objeto (somente leitura: não pertence a DB['pedidos'] e
+    não é salvo), ligado ao cliente e aos produtos do DB; None se o cliente não existe.
+    """
+    cliente = dados['clientes'].get(data['cliente_id'])
+    if cliente is None:
+        return None
+    return Pedido.from_json(data, cliente, dados['produtos'], chave)
+
+
+# Um leitor por pasta em cada processo (os segmentos são compartilhados via cache do SO)
+_arquivos = {}
+_lock_arquivos = threading.Lock()
+
+
+def obter_arquivo(pasta):
+    """
+    Retorna o ArquivoPedidos da pasta, criando-o no primeiro uso. A pasta do banco
+    atual é resolvida por database.obter_arquivo(), usado por leitores e pelo arquivamento.
+    """
+    pasta = os.path.abspath(pasta)
+    with _lock_arquivos:
+        arquivo = _arquivos.get(pasta)
+        if arquivo is None:
+            arquivo = _arquivos[pasta] = ArquivoPedidos(pasta)
+    return arquivo
@@ -0,0 +1,488 @@
+# Arquivo: persistencia/binario.py - Snapshot em formato binário compacto (alternativa ao data.json em texto)
+#
+# Layout do arquivo:
+#     MAGICO, seguido de registros  [tipo: 1 byte][tamanho: u32][conteúdo]
+#       'T' -> trecho da tabela de textos (array JSON; os trechos se somam, em ordem)
+#       'C' -> bloco de uma coleção (até TAMANHO_BLOCO entidades, em colunas)
+#       'X' -> extras (next_ids etc.) em JSON
+#       'F' -> fim (um arquivo sem ele está truncado)
+# Cada bloco guarda as entidades coluna a coluna: booleanos em bytes, inteiros e
+# decimais em arrays de 8 bytes, textos como índices (4 bytes) na tabela de
+# textos, onde cada texto repetido (chaves, IDs de produto, nomes) aparece uma
+# vez só. Listas de dicionários (os itens do pedido) viram uma sub-tabela, e
+# colunas com tipos misturados caem num array JSON. Ler um bloco é converter
+# arrays (código C) e montar os dicionários com zip.
+
+import json
+import struct
+import sys
+from array import array
+from itertools import islice
+
+from .snapshot import COLECOES, escrever_atomico
+
+
+MAGICO = b'LOJABIN1'
+TAMANHO_BLOCO = 1024 # Entidades por bloco: o salvamento incremental recodifica só os blocos alterados
+
+_CABECALHO = struct.Struct('<cI')
+_TAMANHO = struct.Struct('<I')
+_INDICES = 'I' if array('I').itemsize == 4 else 'L'
+_INVERTER = sys.byteorder != 'little' # O arquivo é sempre little-endian
+_AUSENTE = object()
+_LIMITE_INTEIRO = 2 ** 63
+
+
+class SnapshotBinarioInvalido(ValueError):
+    """O arquivo começa como snapshot binário, mas está truncado ou corrompido."""
+
+
+def e_binario(caminho):
+    """Se o arquivo é um snapshot binário (detectado pelo cabeçalho)."""
+    try:
+        with open(caminho, 'rb') as f:
+            return f.read(len(MAGICO)) == MAGICO
+    except FileNotFoundError:
+        return False
+
+
+# ----------------------------------------------------------------------
+# TABELA DE TEXTOS
+# ----------------------------------------------------------------------
+
+class TabelaTextos:
+    """
+    Classe de Codificação.
+    Objetivo: Guardar cada texto uma única vez e referenciá-lo pelo índice.
+    Função: Só cresce (os índices já gravados nos blocos continuam válidos); os
+            textos novos desde o último salvamento viram um novo trecho 'T', e os
+            trechos anteriores são reaproveitados já codificados.
+    """
+    def __init__(self):
+        self.textos = []
+        self._indices = {}
+        self._trechos = []
+        self._gravados = 0
+
+    def indice(self, texto):
+        i = self._indices.get(texto)
+        if i is None:
+            i = self._indices[texto] = len(self.textos)
+            self.textos.append(texto)
+        return i
+
+    def trechos(self):
+        if self._gravados < len(self.textos):
+            novos = self.textos[self._gravados:]
+            self._trechos.append(json.dumps(novos, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            self._gravados = len(self.textos)
+        return self._trechos
+
+
+# ----------------------------------------------------------------------
+# CODIFICAÇÃO EM COLUNAS
+# ----------------------------------------------------------------------
+
+def _array_bytes(tipo, valores):
+    dados = array(tipo, valores)
+    if _INVERTER:
+        dados.byteswap()
+    return dados.tobytes()
+
+
+def _array_de(tipo, buffer):
+    dados = array(tipo)
+    dados.frombytes(buffer)
+    if _INVERTER:
+        dados.byteswap()
+    return dados
+
+
+def _tipo_coluna(valores):
+    """Tipo de armazenamento de uma coluna: b, i, f, s, n, l (lista de dicionários) ou j (JSON)."""
+    tipos = set(map(type, valores))
+    if len(tipos) != 1:
+        return 'j'
+    tipo = tipos.pop()
+    if tipo is bool:
+        return 'b'
+    if tipo is int:
+        return 'i' if all(-_LIMITE_INTEIRO <= v < _LIMITE_INTEIRO for v in valores) else 'j'
+    if tipo is float:
+        return 'f'
+    if tipo is str:
+        return 's'
+    if tipo is type(None):
+        return 'n'
+    if tipo is list and all(type(item) is dict for lista in valores for item in lista):
+        return 'l'
+    return 'j'
+
+
+def _codificar_tabela(linhas, textos, buffers):
+    """
+    Acrescenta a 'buffers' as colunas das linhas (dicionários) e retorna o
+    descritor [[chave, tipo, opcional, sub-descritor], ...] usado na leitura.
+    """
+    chaves = {}
+    for linha in linhas:
+        for chave in linha:
+            chaves[chave] = None
+    descritor = []
+    for chave in chaves:
+        valores = [linha.get(chave, _AUSENTE) for linha in linhas]
+        opcional = any(v is _AUSENTE for v in valores)
+        if opcional:
+            buffers.append(bytes(v is not _AUSENTE for v in valores))
+            valores = [v for v in valores if v is not _AUSENTE]
+        tipo = _tipo_coluna(valores)
+        sub = None
+        if tipo == 'n':
+            buffers.append(b'')
+        elif tipo == 'b':
+            buffers.append(bytes(valores))
+        elif tipo == 'i':
+            buffers.append(_array_bytes('q', valores))
+        elif tipo == 'f':
+            buffers.append(_array_bytes('d', valores))
+        elif tipo == 's':
+            indice = textos.indice
+            buffers.append(_array_bytes(_INDICES, [indice(v) for v in valores]))
+        elif tipo == 'l':
+            buffers.append(_array_bytes(_INDICES, [len(v) for v in valores]))
+            sub = _codificar_tabela([item for lista in valores for item in lista], textos, buffers)
+        elif tipo == 'j':
+            buffers.append(json.dumps(valores, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        descritor.append([chave, tipo, opcional, sub])
+    return descritor
+
+
+def _chaves_inteiras(chaves):
+    """As chaves (IDs) são inteiros canônicos ('1', '42'), guardáveis num array?"""
+    for chave in chaves:
+        if not (chave.isdigit() and chave.isascii() and (chave == '0' or chave[0] != '0') and len(chave) < 19):
+            return False
+    return True
+
+
+def codificar_bloco(nome, entidades, textos):
+    """
+    Objetivo: Codificar um bloco de entidades de uma coleção.
+    Função: 'entidades' é uma lista de (id, dicionário no formato do to_json).
+            Retorna o conteúdo do registro 'C'.
+    """
+    chaves = [chave for chave, _ in entidades]
+    buffers = []
+    if _chaves_inteiras(chaves):
+        tipo_chaves = 'i'
+        buffers.append(_array_bytes('q', map(int, chaves)))
+    else:
+        tipo_chaves = 's'
+        buffers.append(_array_bytes(_INDICES, [textos.indice(c) for c in chaves]))
+    descritor = _codificar_tabela([d for _, d in entidades], textos, buffers)
+    cabecalho = json.dumps({'c': nome, 'n': len(chaves), 'k': tipo_chaves, 'd': descritor},
+                           ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    partes = [_TAMANHO.pack(len(cabecalho)), cabecalho]
+    for buffer in buffers:
+        partes.append(_TAMANHO.pack(len(buffer)))
+        partes.append(buffer)
+    return b''.join(partes)
+
+
+class _Leitor:
+    __slots__ = ('dados', 'posicao')
+
+    def __init__(self, dados):
+        self.dados = dados
+        self.posicao = 0
+
+    def proximo(self):
+        inicio = self.posicao + 4
+        tamanho = _TAMANHO.unpack_from(self.dados, self.posicao)[0]
+        self.posicao = inicio + tamanho
+        if self.posicao > len(self.dados):
+            raise SnapshotBinarioInvalido("Bloco truncado.")
+        return self.dados[inicio:self.posicao]
+
+
+_fabricas = {}
+
+
+def _montador(chaves):
+    """
+    Função que monta um dicionário com as 'chaves' a partir dos valores posicionais.
+    Gerada uma vez por quantidade de chaves ({k0: a0, k1: a1, ...}, com as chaves
+    vindas do arquivo por closure, nunca no código): com map() sobre as colunas,
+    monta cada linha bem mais rápido que dict(zip(...)).
+    """
+    fabrica = _fabricas.get(len(chaves))
+    if fabrica is None:
+        nomes = range(len(chaves))
+        codigo = (f"def fabrica({', '.join(f'k{i}' for i in nomes)}):\n"
+                  f"    return lambda {', '.join(f'a{i}' for i in nomes)}: "
+                  f"{{{', '.join(f'k{i}: a{i}' for i in nomes)}}}\n")
+        escopo = {}
+        exec(codigo, escopo)
+        fabrica = _fabricas[len(chaves)] = escopo['fabrica']
+    return fabrica(*chaves)
+
+
+def _decodificar_tabela(n, descritor, leitor, textos):
+    obrigatorias = []
+    colunas = []
+    opcionais = []
+    for chave, tipo, opcional, sub in descritor:
+        presenca = leitor.proximo() if opcional else None
+        buffer = leitor.proximo()
+        if tipo == 'b':
+            valores = list(map(bool, buffer))
+        elif tipo == 'i':
+            valores = _array_de('q', buffer).tolist()
+        elif tipo == 'f':
+            valores = _array_de('d', buffer).tolist()
+        elif tipo == 's':
+            valores = list(map(textos.__getitem__, _array_de(_INDICES, buffer)))
+        elif tipo == 'n':
+            valores = [None] * (n if presenca is None else sum(presenca))
+        elif tipo == 'l':
+            contagens = _array_de(_INDICES, buffer).tolist()
+            itens = iter(_decodificar_tabela(sum(contagens), sub, leitor, textos))
+            valores = [list(islice(itens, c)) for c in contagens]
+        else:
+            valores = json.loads(bytes(buffer))
+        if presenca is None:
+            obrigatorias.append(chave)
+            colunas.append(valores)
+        else:
+            opcionais.append((chave, presenca, valores))
+
+    if colunas:
+        linhas = list(map(_montador(obrigatorias), *colunas))
+    else:
+        linhas = [{} for _ in range(n)]
+    for chave, presenca, valores in opcionais:
+        restantes = iter(valores)
+        for linha, presente in zip(linhas, presenca):
+            if presente:
+                linha[chave] = next(restantes)
+    return linhas
+
+
+def decodificar_bloco(conteudo, textos):
+    """Lê um registro 'C'. Retorna (nome da coleção, [(id, dicionário), ...])."""
+    leitor = _Leitor(conteudo)
+    cabecalho = json.loads(bytes(leitor.proximo()))
+    n = cabecalho['n']
+    buffer = leitor.proximo()
+    if cabecalho['k'] == 'i':
+        chaves = list(map(str, _array_de('q', buffer)))
+    else:
+        chaves = list(map(textos.__getitem__, _array_de(_INDICES, buffer)))
+    linhas = _decodificar_tabela(n, cabecalho['d'], leitor, textos)
+    if len(chaves) != n or len(linhas) != n:
+        raise SnapshotBinarioInvalido("Bloco com quantidade de entidades inconsistente.")
+    return cabecalho['c'], list(zip(chaves, linhas))
+
+
+# ----------------------------------------------------------------------
+# ARQUIVO
+# ----------------------------------------------------------------------
+
+def _registro(tipo, conteudo):
+    return _CABECALHO.pack(tipo, len(conteudo)) + conteudo
+
+
+def montar_arquivo(textos, blocos, extras):
+    """Junta os trechos da tabela de textos, os blocos (já codificados) e os extras."""
+    partes = [MAGICO]
+    partes.extend(_registro(b'T', trecho) for trecho in textos.trechos())
+    partes.extend(_registro(b'C', bloco) for bloco in blocos)
+    partes.append(_registro(b'X', json.dumps(extras, separators=(',', ':')).encode('utf-8')))
+    partes.append(_registro(b'F', b''))
+    return b''.join(partes)
+
+
+def ler_binario(caminho):
+    """
+    Objetivo: Ler um snapshot binário como os dados brutos (dicionários JSON),
+              no mesmo formato devolvido pela leitura do data.json em texto.
+    """
+    with open(caminho, 'rb') as f:
+        conteudo = memoryview(f.read())
+    if conteudo[:len(MAGICO)] != MAGICO:
+        raise SnapshotBinarioInvalido("Cabeçalho do snapshot binário ausente.")
+
+    data = {nome: {} for nome in COLECOES}
+    textos = []
+    posicao = len(MAGICO)
+    try:
+        while posicao < len(conteudo):
+            tipo, tamanho = _CABECALHO.unpack_from(conteudo, posicao)
+            posicao += _CABECALHO.size
+            trecho = conteudo[posicao:posicao + tamanho]
+            if len(trecho) != tamanho:
+                break
+            posicao += tamanho
+            if tipo == b'T':
+                textos.extend(json.loads(bytes(trecho)))
+            elif tipo == b'C':
+                nome, entidades = decodificar_bloco(trecho, textos)
+                data.setdefault(nome, {}).update(entidades)
+            elif tipo == b'X':
+                data.update(json.loads(bytes(trecho)))
+            elif tipo == b'F':
+                return data
+    except (struct.error, IndexError, KeyError, TypeError, ValueError) as e:
+        raise SnapshotBinarioInvalido(f"Snapshot binário corrompido: {e}") from e
+    raise SnapshotBinarioInvalido("Snapshot binário truncado.")
+
+
+def _blocos_da_colecao(nome, itens, textos):
+    blocos = []
+    for inicio in range(0, len(itens), TAMANHO_BLOCO):
+        blocos.append(codificar_bloco(nome, itens[inicio:inicio + TAMANHO_BLOCO], textos))
+    return blocos
+
+
+def escrever_binario(caminho, data):
+    """Grava o snapshot completo (dados brutos) no formato binário, com escrita atômica."""
+    textos = TabelaTextos()
+    blocos = []
+    for nome in COLECOES:
+        blocos.extend(_blocos_da_colecao(nome, list(data.get(nome, {}).items()), textos))
+    extras = {nome: valor for nome, valor in data.items() if nome not in COLECOES}
+    escrever_atomico(caminho, montar_arquivo(textos, blocos, extras))
+
+
+# ----------------------------------------------------------------------
+# SALVAMENTO INCREMENTAL
+# ----------------------------------------------------------------------
+
+class _Bloco:
+    __slots__ = ('chaves', 'codificado')
+
+    def __init__(self):
+        self.chaves = []
+        self.codificado = None # None = precisa ser (re)codificado
+
+
+def _dados_da_entidade(colecao, chave):
+    bruto = colecao.bruto(chave)
+    if isinstance(bruto, str):
+        return json.loads(bruto)
+    return bruto if bruto is not None else colecao[chave].to_json()
+
+
+class SnapshotBinario:
+    """
+    Classe de Persistência.
+    Objetivo: Regravar o snapshot binário sem recodificar as entidades que não mudaram.
+    Função: Mesma interface do SnapshotIncremental (persistencia/snapshot.py). As
+            entidades ficam em blocos de TAMANHO_BLOCO, guardados já codificados;
+            um salvamento recodifica só os blocos com entidades sujas ou
+            removidas (as novas entram no último bloco) e reescreve o arquivo
+            juntando os bytes. A tabela de textos só cresce até a próxima
+            gravação completa ('invalidar').
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.dono = None
+        self._blocos = None # {colecao: [_Bloco, ...]}
+        self._bloco_de = {}
+        self._textos = None
+        self._extras = None
+
+    def invalidar(self, dono=None):
+        """Descarta os blocos; o próximo salvamento codifica tudo de novo."""
+        self.dono = dono
+        self._blocos = None
+        self._bloco_de = {}
+        self._textos = None
+        self._extras = None
+
+    def possui_cache(self, dono):
+        # Os blocos não guardam o texto de cada entidade para comparar com o que
+        # outro processo gravou: a sincronização compara os dicionários e chama
+        # 'invalidar' (ver database.sincronizar)
+        return False
+
+    def gravar(self, dados, alteracoes, extras):
+        """Grava o snapshot e retorna quantas entidades foram codificadas."""
+        gravadas = 0
+        if self._blocos is None:
+            self._textos = TabelaTextos()
+            self._blocos = {}
+            self._bloco_de = {nome: {} for nome in COLECOES}
+            for nome in COLECOES:
+                self._blocos[nome] = []
+                for chave in dados[nome].keys():
+                    self._anexar(nome, chave)
+            alterados = True
+        else:
+            alterados = False
+            for nome in COLECOES:
+                sujos, removidos = alteracoes[nome]
+                posicoes = self._bloco_de[nome]
+                for chave in removidos:
+                    bloco = posicoes.pop(chave, None)
+                    if bloco is not None:
+                        bloco.chaves.remove(chave)
+                        bloco.codificado = None
+                        alterados = True
+                for chave in sujos:
+                    if chave not in dados[nome]:
+                        continue
+                    bloco = posicoes.get(chave)
+                    if bloco is None:
+                        self._anexar(nome, chave)
+                    else:
+                        bloco.codificado = None
+                    alterados = True
+            if not alterados and extras == self._extras:
+                return 0 # O arquivo no disco já está atualizado
+
+        codificados = []
+        for nome in COLECOES:
+            colecao = dados[nome]
+            blocos = self._blocos[nome] = [bloco for bloco in self._blocos[nome] if bloco.chaves]
+            for bloco in blocos:
+                if bloco.codificado is None:
+                    entidades = [(chave, _dados_da_entidade(colecao, chave)) for chave in bloco.chaves]
+                    bloco.codificado = codificar_bloco(nome, entidades, self._textos)
+                    gravadas += len(entidades)
+                codificados.append(bloco.codificado)
+
+        escrever_atomico(self.caminho, montar_arquivo(self._textos, codificados, extras))
+        self._extras = extras
+        return gravadas
+
+    def _anexar(self, nome, chave):
+        blocos = self._blocos[nome]
+        if not blocos or len(blocos[-1].chaves) >= TAMANHO_BLOCO:
+            blocos.append(_Bloco())
+        bloco = blocos[-1]
+        bloco.chaves.append(chave)
+        bloco.codificado = None
+        self._bloco_de[nome][chave] = bloco
+
+
+if __name__ == '__main__':
+    # Conversão manual nos dois sentidos (o formato de origem é detectado pelo cabeçalho):
+    #     python3 -m persistencia.binario data.json data.bin
+    #     python3 -m persistencia.binario data.bin data.json --formato json
+    import argparse
+    import os
+    from .snapshot import escrever_snapshot, ler_snapshot
+
+    parser = argparse.ArgumentParser(description="Converte o snapshot entre o formato JSON e o binário.")
+    parser.add_argument('origem')
+    parser.add_argument('destino')
+    parser.add_argument('--formato', choices=('json', 'binario'),
+                        help="Formato do destino (padrão: o contrário do da origem)")
+    args = parser.parse_args()
+
+    formato = args.formato or ('json' if e_binario(args.origem) else 'binario')
+    data = ler_snapshot(args.origem)
+    escrever_snapshot(args.destino, data, formato)
+    print(f"{args.origem} ({os.path.getsize(args.origem) / 1e6:.2f} MB) -> "
+          f"{args.destino} [{formato}] ({os.path.getsize(args.destino) / 1e6:.2f} MB)")
@@ -0,0 +1,168 @@
+# Arquivo: persistencia/cache.py - Versões do DB e cache LRU de fragmentos/respostas
+
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+
+from monitoramento import metricas
+from .colecao import ObservadorColecao
+
+
+# --- CONFIGURAÇÃO DO CACHE ---
+# Memória máxima (aproximada, em bytes) ocupada pelos fragmentos e páginas guardados
+LIMITE_CACHE_BYTES = int(os.environ.get('LOJA_CACHE_BYTES', 32 * 1024 * 1024))
+
+# Seções versionadas: uma por coleção e 'nomes_clientes', que só muda quando um
+# cliente existente é alterado ou removido (a tabela de pedidos mostra o nome do
+# cliente, mas um cliente novo ainda não tem pedidos)
+SECOES = ('clientes', 'produtos', 'pedidos', 'nomes_clientes')
+
+
+class _ObservadorVersao(ObservadorColecao):
+    """Incrementa as seções de uma coleção a cada evento dela."""
+    def __init__(self, versoes, nome):
+        self.versoes = versoes
+        self.nome = nome
+
+    def ao_inserir(self, chave, obj):
+        self.versoes.incrementar(self.nome)
+
+    def ao_alterar(self, obj, campo):
+        if self.nome == 'clientes':
+            self.versoes.incrementar('clientes', 'nomes_clientes')
+        else:
+            self.versoes.incrementar(self.nome)
+
+    def ao_remover(self, chave, obj):
+        self.ao_alterar(obj, '*')
+
+    def ao_recarregar(self, colecao):
+        self.ao_alterar(None, '*')
+
+
+class VersoesLoja:
+    """
+    Classe de Serviço.
+    Objetivo: Saber, sem olhar os dados, se o que foi renderizado para uma seção
+              (pedidos, clientes, produtos) ainda vale.
+    Função: Um contador único do DB avança a cada inserção/alteração/remoção (as
+            locais e as que chegam de outros workers por database.sincronizar) e
+            cada seção guarda o valor do contador e o instante da sua última
+            alteração. Como o evento só é disparado depois que o objeto já mudou,
+            o que for renderizado depois de ler a versão nunca é mais antigo que ela.
+            'instancia' distingue os processos: versões iguais em workers
+            diferentes não significam o mesmo conteúdo.
+    """
+    def __init__(self, dados):
+        self.instancia = uuid.uuid4().hex[:8]
+        self.versao = 0
+        agora = time.time()
+        self._secoes = {nome: (0, agora) for nome in SECOES}
+        self._lock = threading.Lock()
+        for nome in ('clientes', 'produtos', 'pedidos'):
+            dados[nome].observar(_ObservadorVersao(self, nome))
+
+    def incrementar(self, *secoes):
+        with self._lock:
+            self.versao += 1
+            agora = time.time()
+            for nome in secoes:
+                self._secoes[nome] = (self.versao, agora)
+
+    def versoes_de(self, secoes):
+        """Tupla com a versão de cada seção (chave de cache)."""
+        atual = self._secoes
+        return tuple(atual[nome][0] for nome in secoes)
+
+    def modificado_em(self, secoes):
+        """Instante (time.time()) da alteração mais recente entre as seções."""
+        atual = self._secoes
+        return max(atual[nome][1] for nome in secoes)
+
+    def etag(self, secoes):
+        return f"{self.instancia}-" + '.'.join(str(v) for v in self.versoes_de(secoes))
+
+
+class CacheLRU:
+    """
+    Classe de Serviço.
+    Objetivo: Guardar fragmentos de HTML e respostas prontas até um limite de memória.
+    Função: As chaves já incluem as versões das seções de que o valor depende, então
+            nada precisa ser invalidado: as entradas de versões antigas deixam de ser
+            consultadas e saem pelo LRU quando o espaço acaba. O tamanho de cada
+            entrada é estimado com sys.getsizeof (a parte de texto/bytes do valor).
+    """
+    def __init__(self, limite_bytes=LIMITE_CACHE_BYTES):
+        self.limite_bytes = limite_bytes
+        self._itens = collections.OrderedDict() # chave -> (valor, tamanho)
+        self._ocupado = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+    def obter(self, chave):
+        """Valor guardado (marcado como usado agora) ou None."""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.faltas += 1
+            else:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+        metricas.CACHE_CONSULTAS.incrementar(resultado='falta' if item is None else 'acerto')
+        return None if item is None else item[0]
+
+    def guardar(self, chave, valor, tamanho=None):
+        if tamanho is None:
+            tamanho = sys.getsizeof(valor)
+        if tamanho > self.limite_bytes:
+            return # Maior que o cache inteiro: não expulsa tudo para caber
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._ocupado -= anterior[1]
+            self._itens[chave] = (valor, tamanho)
+            self._ocupado += tamanho
+            while self._ocupado > self.limite_bytes:
+                _, (_, removido) = self._itens.popitem(last=False)
+                self._ocupado -= removido
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._ocupado = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'entradas': len(self._itens),
+                'bytes': self._ocupado,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+            }
+
+
+# Versões e cache por DB carregado (chave: id da coleção de pedidos)
+_versoes = {}
+_caches = {}
+
+
+def obter_versoes(dados):
+    """Retorna as VersoesLoja do DB, passando a observar as coleções no primeiro uso."""
+    versoes = _versoes.get(id(dados['pedidos']))
+    if versoes is None:
+        versoes = _versoes[id(dados['pedidos'])] = VersoesLoja(dados)
+    return versoes
+
+
+def obter_cache(dados):
+    """Retorna o CacheLRU de fragmentos/respostas do DB, criando-o no primeiro uso."""
+    cache = _caches.get(id(dados['pedidos']))
+    if cache is None:
+        cache = _caches[id(dados['pedidos'])] = CacheLRU()
+        metricas.CACHE_BYTES.observar(lambda: cache.estatisticas()['bytes'])
+    return cache
@@ -0,0 +1,384 @@
+# Arquivo: persistencia/colecao.py - Coleção de entidades com rastreamento de alterações
+
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableMapping
+
+
+def ordem_id(chave):
+    """
+    Chave de ordenação de um ID: os numéricos pelo valor (empate desfeito pelo
+    texto, ex.: '7' antes de '007'), depois os não numéricos em ordem alfabética.
+    Para saber se um ID passou do número N: ordem_id(chave) >= (0, N + 1).
+    """
+    try:
+        return (0, int(chave), chave)
+    except ValueError:
+        return (1, 0, chave)
+
+
+class ObservadorColecao:
+    """
+    Classe Base (Interface).
+    Objetivo: Receber, no momento em que acontecem, as inserções, alterações e
+              remoções de uma Colecao (ex.: relatórios mantidos incrementalmente).
+    Função: As subclasses sobrescrevem apenas os eventos que interessam.
+    """
+    def ao_inserir(self, chave, obj):
+        pass
+
+    def ao_alterar(self, obj, campo):
+        pass
+
+    def ao_remover(self, chave, obj):
+        pass
+
+    def ao_recarregar(self, colecao):
+        """A coleção mudou de formas que não foram informadas uma a uma: refaça tudo."""
+        pass
+
+
+class Colecao(MutableMapping):
+    """
+    Classe de Mapeamento.
+    Objetivo: Substituir os dicionários DB['clientes'], DB['produtos'] e DB['pedidos']
+              mantendo o mesmo uso ({id: objeto}), mas sabendo o que mudou desde
+              o último salvamento.
+    Função: Ao registrar um objeto, a coleção vira o seu '_ouvinte' (ver
+            core/rastreavel.py) e acumula os IDs alterados/removidos, que a
+            persistência consome com 'drenar_alteracoes()'.
+    """
+    def __init__(self, tipo, itens=None):
+        self.tipo = tipo # 'cliente', 'produto' ou 'pedido'
+        self._itens = {}
+        self._sujos = {}
+        self._removidos = set()
+        self._observadores = []
+        self._ids_ordenados = None # Índice para paginação (criado no primeiro uso)
+        for chave, obj in (itens or {}).items():
+            self.anexar_carregado(chave, obj)
+
+    # ------------------------------------------------------------------
+    # Rastreamento
+    # ------------------------------------------------------------------
+
+    def anexar_carregado(self, chave, obj):
+        """Registra um objeto lido do disco (já persistido, portanto não alterado)."""
+        if obj.id != chave:
+            object.__setattr__(obj, 'id', chave)
+        obj._ouvinte = self
+        if self._ids_ordenados is not None and chave not in self._itens:
+            self._indexar(chave)
+        self._itens[chave] = obj
+
+    def ao_alterar(self, entidade, campo):
+        """Chamado pelo objeto (Rastreavel) quando um atributo público é escrito."""
+        if entidade.id is not None:
+            self._sujos.setdefault(entidade.id, set()).add(campo)
+        for observador in self._observadores:
+            observador.ao_alterar(entidade, campo)
+
+    def observar(self, observador):
+        """Registra um ObservadorColecao para os próximos eventos desta coleção."""
+        self._observadores.append(observador)
+
+    def deixar_de_observar(self, observador):
+        self._observadores.remove(observador)
+
+    def drenar_alteracoes(self):
+        """
+        Retorna ({id: campos alterados}, {ids removidos}) e zera o rastreamento.
+        Um objeto recém-registrado aparece com o campo especial '*'.
+        """
+        sujos, self._sujos = self._sujos, {}
+        removidos, self._removidos = self._removidos, set()
+        return sujos, removidos
+
+    def restaurar_alteracoes(self, sujos, removidos):
+        """Devolve alterações drenadas cuja gravação falhou (serão tentadas de novo)."""
+        for chave, campos in sujos.items():
+            self._sujos.setdefault(chave, set()).update(campos)
+        self._removidos |= removidos - set(self._sujos)
+
+    def chaves_alteradas(self):
+        """IDs com alterações ou remoções locais ainda não salvas."""
+        return set(self._sujos) | self._removidos
+
+    def descartar_alteracoes(self, chaves):
+        """Esquece as alterações locais dessas entidades (ver database.transacao)."""
+        for chave in chaves:
+            self._sujos.pop(chave, None)
+            self._removidos.discard(chave)
+
+    def possui_alteracoes(self):
+        return bool(self._sujos or self._removidos)
+
+    def alterado(self, chave):
+        """Se a entidade tem alterações locais ainda não salvas."""
+        return chave in self._sujos
+
+    def bruto(self, chave):
+        """Dados ainda não materializados da entidade (None se ela já é um objeto)."""
+        return None
+
+    # ------------------------------------------------------------------
+    # Sincronização com outros processos (ver database.sincronizar)
+    # ------------------------------------------------------------------
+
+    def sincronizar(self, chave, obj):
+        """
+        Instala a versão de uma entidade já gravada por outro processo, sem marcá-la
+        como alterada. Um objeto já carregado é atualizado no lugar (pedidos continuam
+        apontando para o mesmo Cliente/Produto). Retorna o objeto em uso.
+        """
+        atual = self._itens.get(chave)
+        if atual is not None and type(atual) is type(obj):
+            atual._copiar_estado(obj)
+            for observador in self._observadores:
+                observador.ao_alterar(atual, '*')
+            return atual
+
+        if atual is not None and not isinstance(atual, (str, dict)):
+            atual._ouvinte = None
+        self.anexar_carregado(chave, obj)
+        for observador in self._observadores:
+            observador.ao_inserir(chave, obj)
+        return obj
+
+    def sincronizar_campo(self, chave, campo, valor):
+        """Aplica a alteração de um único campo feita por outro processo."""
+        obj = self.get(chave)
+        if obj is None:
+            return
+        object.__setattr__(obj, campo, valor)
+        for observador in self._observadores:
+            observador.ao_alterar(obj, campo)
+
+    def sincronizar_remocao(self, chave):
+        """Aplica a remoção feita (e já gravada) por outro processo."""
+        obj = self._itens.pop(chave, None)
+        if obj is not None:
+            if self._ids_ordenados is not None:
+                self._desindexar(chave)
+            if isinstance(obj, (str, dict)):
+                obj = None
+            else:
+                obj._ouvinte = None
+        self._sujos.pop(chave, None)
+        self._removidos.discard(chave)
+        for observador in self._observadores:
+            observador.ao_remover(chave, obj)
+
+    def notificar_recarga(self):
+        for observador in self._observadores:
+            observador.ao_recarregar(self)
+
+    # ------------------------------------------------------------------
+    # Paginação por cursor (keyset)
+    # ------------------------------------------------------------------
+
+    def _indice_ordenado(self):
+        """
+        Lista ordenada de ordem_id(chave) de todos os IDs (a chave original vai junto,
+        então '007' e 'abc' também são paginados); montada uma vez e mantida a cada
+        inserção/remoção.
+        """
+        if self._ids_ordenados is None:
+            self._ids_ordenados = sorted(ordem_id(chave) for chave in self._itens)
+        return self._ids_ordenados
+
+    def _indexar(self, chave):
+        ids = self._ids_ordenados
+        valor = ordem_id(chave)
+        if not ids or valor > ids[-1]: # Caso comum: IDs novos são sempre os maiores
+            ids.append(valor)
+        else:
+            insort(ids, valor)
+
+    def _desindexar(self, chave):
+        ids = self._ids_ordenados
+        valor = ordem_id(chave)
+        posicao = bisect_left(ids, valor)
+        if posicao < len(ids) and ids[posicao] == valor:
+            del ids[posicao]
+
+    @staticmethod
+    def valor_campo(obj, campo):
+        """Valor de um campo como aparece no JSON ('cliente_id' -> obj.cliente.id)."""
+        if campo.endswith('_id'):
+            return getattr(obj, campo[:-3]).id
+        return getattr(obj, campo)
+
+    def _atende(self, chave, filtros):
+        obj = self._itens[chave]
+        return all(self.valor_campo(obj, campo) == valor for campo, valor in filtros.items())
+
+    def pagina(self, apos=None, limite=20, filtros=None):
+        """
+        Objetivo: Retornar uma página de entidades em ordem crescente de ID.
+        Função: 'apos' é o cursor (último ID da página anterior); a busca começa
+                nele por busca binária, então o custo depende só do tamanho da
+                página (e de quantos itens os 'filtros' rejeitarem), não do total.
+                'filtros' é um dicionário {campo do JSON: valor}, ex.: {'pago': True}.
+                Retorna ([(id, objeto), ...], cursor da próxima página ou None).
+        """
+        ids = self._indice_ordenado()
+        posicao = 0 if apos is None else bisect_right(ids, ordem_id(str(apos)))
+        resultado = []
+        while posicao < len(ids):
+            chave = ids[posicao][2]
+            if filtros and not self._atende(chave, filtros):
+                posicao += 1
+                continue
+            if len(resultado) == limite:
+                return resultado, resultado[-1][0]
+            obj = self.get(chave)
+            if obj is None: # Descartado ao materializar (ver ColecaoPreguicosa): em geral já saiu do índice
+                if posicao < len(ids) and ids[posicao][2] == chave:
+                    posicao += 1
+                continue
+            resultado.append((chave, obj))
+            posicao += 1
+        return resultado, None
+
+    # ------------------------------------------------------------------
+    # Protocolo de dicionário
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, chave):
+        return self._itens[chave]
+
+    def __setitem__(self, chave, obj):
+        anterior = self._itens.get(chave)
+        if anterior is not None and anterior is not obj:
+            anterior._ouvinte = None
+        if obj.id != chave:
+            object.__setattr__(obj, 'id', chave)
+        obj._ouvinte = self
+        if self._ids_ordenados is not None and chave not in self._itens:
+            self._indexar(chave)
+        self._itens[chave] = obj
+        self._removidos.discard(chave)
+        self._sujos.setdefault(chave, set()).add('*')
+        for observador in self._observadores:
+            observador.ao_inserir(chave, obj)
+
+    def __delitem__(self, chave):
+        obj = self._itens.pop(chave)
+        obj._ouvinte = None
+        if self._ids_ordenados is not None:
+            self._desindexar(chave)
+        self._sujos.pop(chave, None)
+        self._removidos.add(chave)
+        for observador in self._observadores:
+            observador.ao_remover(chave, obj)
+
+    def __iter__(self):
+        return iter(self._itens)
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    # Atalhos diretos para o dicionário interno (evitam o caminho genérico do Mapping)
+    def get(self, chave, padrao=None):
+        return self._itens.get(chave, padrao)
+
+    def keys(self):
+        return self._itens.keys()
+
+    def values(self):
+        return self._itens.values()
+
+    def items(self):
+        return self._itens.items()
+
+    def __repr__(self):
+        return f"Colecao({self.tipo!r}, {len(self._itens)} itens)"
+
+
+class ColecaoPreguicosa(Colecao):
+    """
+    Classe de Mapeamento.
+    Objetivo: Permitir que a carga do sistema não reconstrua todos os pedidos
+              na inicialização.
+    Função: Guarda cada entidade como dado bruto (texto da linha do snapshot ou
+            dicionário JSON) e só chama a 'fabrica(chave, bruto)' quando ela é
+            acessada pela primeira vez. A partir daí o objeto substitui o dado
+            bruto no mesmo lugar, preservando a ordem do dicionário. Se a fábrica
+            recusa a entidade (retorna None, ex.: pedido de um cliente que não
+            existe), o dado bruto é descartado, como a carga completa faz.
+    """
+    def __init__(self, tipo, brutos, fabrica):
+        super().__init__(tipo)
+        self._itens = brutos
+        self._fabrica = fabrica
+
+    def _materializar(self, chave, bruto, descartados=None):
+        """
+        Objeto da entidade, ou None se a fábrica a recusou. A entidade recusada sai da
+        coleção (sem ser marcada como removida) na hora ou, se 'descartados' é uma
+        lista (iteração em andamento sobre _itens), quando quem a passou terminar.
+        """
+        obj = self._fabrica(chave, bruto)
+        if obj is None:
+            if descartados is None:
+                self.sincronizar_remocao(chave)
+            else:
+                descartados.append(chave)
+            return None
+        self.anexar_carregado(chave, obj)
+        return obj
+
+    def bruto(self, chave):
+        valor = self._itens.get(chave)
+        return valor if isinstance(valor, (str, dict)) else None
+
+    def _atende(self, chave, filtros):
+        """Avalia os filtros direto no dado bruto, sem materializar o objeto."""
+        valor = self._itens[chave]
+        if isinstance(valor, (str, dict)):
+            data = json.loads(valor) if isinstance(valor, str) else valor
+            return all(data.get(campo) == esperado for campo, esperado in filtros.items())
+        return super()._atende(chave, filtros)
+
+    def __getitem__(self, chave):
+        valor = self._itens[chave]
+        if isinstance(valor, (str, dict)):
+            valor = self._materializar(chave, valor)
+            if valor is None:
+                raise KeyError(chave)
+        return valor
+
+    def __delitem__(self, chave):
+        self[chave] # Materializa para desligar o ouvinte corretamente
+        super().__delitem__(chave)
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def values(self):
+        for _, obj in self.items():
+            yield obj
+
+    def items(self):
+        descartados = []
+        try:
+            for chave, valor in self._itens.items():
+                if isinstance(valor, (str, dict)):
+                    valor = self._materializar(chave, valor, descartados)
+                    if valor is None:
+                        continue
+                yield chave, valor
+        finally:
+            for chave in descartados:
+                self.sincronizar_remocao(chave)
+
+    def pendentes(self):
+        """Quantas entidades ainda não foram materializadas."""
+        return sum(1 for valor in self._itens.values() if isinstance(valor, (str, dict)))
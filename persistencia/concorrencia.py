@@ -0,0 +1,55 @@
+# Arquivo: persistencia/concorrencia.py - Trava exclusiva entre threads e entre processos
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError: # Windows: sem flock, a trava vale apenas entre as threads do processo
+    fcntl = None
+
+
+class TravaArquivo:
+    """
+    Classe de Sincronização.
+    Objetivo: Garantir que só UMA thread, de UM processo (ex.: vários workers do
+              gunicorn), altere os arquivos de dados por vez.
+    Função: Combina um RLock (threads do mesmo processo) com 'flock' exclusivo em
+            um arquivo '.lock' (processos diferentes). É reentrante: a mesma thread
+            pode entrar várias vezes, e o flock só é liberado na última saída.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.RLock()
+        self._profundidade = 0
+        self._fd = None
+
+    def adquirir(self):
+        self._lock.acquire()
+        if self._profundidade == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.caminho, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._lock.release()
+                raise
+        self._profundidade += 1
+
+    def liberar(self):
+        self._profundidade -= 1
+        if self._profundidade == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._lock.release()
+
+    def __enter__(self):
+        self.adquirir()
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+        return False
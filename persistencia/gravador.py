@@ -0,0 +1,159 @@
+# Arquivo: persistencia/gravador.py - Gravação em grupo (group commit) em segundo plano
+
+import threading
+import time
+
+
+class GravadorEmGrupo:
+    """
+    Classe de Persistência.
+    Objetivo: Tirar a gravação em disco do caminho de cada requisição: a alteração
+              é confirmada assim que entra na fila, e várias alterações próximas
+              viram UMA única gravação durável.
+    Função: Uma thread de fundo espera a primeira alteração pendente e, a partir
+            dela, até 'janela' segundos (ou até 'maximo' alterações) antes de chamar
+            'gravar()' uma vez para todo o grupo. Cada alteração recebe um número
+            (ticket), usado por quem precisa esperar até ela estar em disco.
+    """
+    def __init__(self, gravar, janela=0.02, maximo=64):
+        self._gravar = gravar
+        self.janela = janela
+        self.maximo = maximo
+        self._condicao = threading.Condition()
+        self._registrados = 0 # Último ticket entregue
+        self._gravados = 0 # Último ticket já em disco
+        self._primeiro_pendente = None # Instante da alteração mais antiga ainda não gravada
+        self._forcar = False
+        self._erro = None # (ticket, exceção) da última gravação que falhou
+        self._encerrado = False
+        self._thread = None
+        # Estatísticas (expostas em estatisticas())
+        self.gravacoes = 0
+        self.alteracoes_gravadas = 0
+
+    # ------------------------------------------------------------------
+    # Uso pelas requisições
+    # ------------------------------------------------------------------
+
+    def registrar(self):
+        """Enfileira uma alteração (já aplicada em memória) e retorna o seu ticket."""
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError("O gravador em grupo já foi encerrado.")
+            self._registrados += 1
+            if self._primeiro_pendente is None:
+                self._primeiro_pendente = time.monotonic()
+            self._iniciar_thread()
+            self._condicao.notify_all()
+            return self._registrados
+
+    def aguardar(self, ticket, timeout=None):
+        """
+        Bloqueia até a alteração 'ticket' estar gravada em disco. Levanta a exceção
+        da gravação se ela falhou, ou TimeoutError se 'timeout' se esgotar.
+        """
+        with self._condicao:
+            if self._gravados < ticket:
+                self._forcar = True # Quem espera não precisa aguardar a janela toda
+                self._condicao.notify_all()
+            limite = None if timeout is None else time.monotonic() + timeout
+            while self._gravados < ticket:
+                if self._erro is not None and self._erro[0] >= ticket:
+                    raise self._erro[1]
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    raise TimeoutError(f"A alteração {ticket} ainda não foi gravada.")
+                self._condicao.wait(restante)
+
+    def descarregar(self, timeout=None):
+        """Grava agora tudo o que está pendente e espera a gravação terminar."""
+        with self._condicao:
+            ticket = self._registrados
+        if ticket:
+            self.aguardar(ticket, timeout)
+
+    def encerrar(self):
+        """Grava o que estiver pendente e para a thread de fundo (usado na saída do programa)."""
+        with self._condicao:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            self._forcar = True
+            self._condicao.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        # Sem thread (ou se a última gravação falhou): uma tentativa final síncrona
+        with self._condicao:
+            pendente = self._gravados < self._registrados
+            ticket = self._registrados
+        if pendente:
+            self._executar(ticket)
+
+    @property
+    def encerrado(self):
+        return self._encerrado
+
+    def pendentes(self):
+        with self._condicao:
+            return self._registrados - self._gravados
+
+    def estatisticas(self):
+        with self._condicao:
+            return {
+                'gravacoes': self.gravacoes,
+                'alteracoes_gravadas': self.alteracoes_gravadas,
+                'pendentes': self._registrados - self._gravados,
+            }
+
+    # ------------------------------------------------------------------
+    # Thread de fundo
+    # ------------------------------------------------------------------
+
+    def _iniciar_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._laco, name='gravador-em-grupo', daemon=True)
+            self._thread.start()
+
+    def _laco(self):
+        while True:
+            with self._condicao:
+                while self._gravados >= self._registrados and not self._encerrado:
+                    self._condicao.wait()
+                if self._gravados >= self._registrados:
+                    return # Encerrado e nada pendente
+
+                # Junta as alterações que chegarem dentro da janela
+                while not (self._forcar or self._encerrado):
+                    restante = self._primeiro_pendente + self.janela - time.monotonic()
+                    if restante <= 0 or self._registrados - self._gravados >= self.maximo:
+                        break
+                    self._condicao.wait(restante)
+                ticket = self._registrados
+                self._forcar = False
+
+            if not self._executar(ticket) and self._encerrado:
+                return # Falhou na saída: encerrar() faz a última tentativa
+
+    def _executar(self, ticket):
+        """Grava o grupo até 'ticket'. Retorna False se a gravação falhou."""
+        try:
+            self._gravar()
+        except Exception as e:
+            print(f"AVISO: Falha na gravação em grupo: {e}. Nova tentativa em seguida.")
+            with self._condicao:
+                self._erro = (ticket, e)
+                self._primeiro_pendente = time.monotonic() # Tenta de novo após uma janela
+                self._condicao.notify_all()
+            if not self._encerrado:
+                time.sleep(self.janela)
+            return False
+
+        with self._condicao:
+            self.gravacoes += 1
+            self.alteracoes_gravadas += ticket - self._gravados
+            self._gravados = max(self._gravados, ticket)
+            self._erro = None
+            self._primeiro_pendente = time.monotonic() if self._gravados < self._registrados else None
+            self._condicao.notify_all()
+        return True
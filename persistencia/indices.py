@@ -0,0 +1,408 @@
+# Arquivo: persistencia/indices.py - Índices secundários (CPF único, nomes e pedidos por cliente)
+
+import json
+import os
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+
+from .colecao import ObservadorColecao, ordem_id
+
+
+# Inserções acumuladas fora da lista ordenada de nomes antes de uma fusão
+LIMITE_PENDENTES = int(os.environ.get('LOJA_INDICE_PENDENTES', 1024))
+LIMITE_BUSCA_PADRAO = 10
+
+
+# Tabela de str.translate que apaga os acentos combinantes (U+0300 a U+036F) do texto decomposto
+_SEM_ACENTOS = dict.fromkeys(range(0x300, 0x370))
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com espaços simples: 'José  Álvares ' -> 'jose alvares'."""
+    texto = str(texto or '')
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto).translate(_SEM_ACENTOS)
+    return ' '.join(texto.casefold().split())
+
+
+_NAO_DIGITOS = re.compile(r'\D')
+
+
+def normalizar_cpf(cpf):
+    """Só os dígitos do CPF ('000.111.222-33' -> '00011122233'); sem dígitos, o texto normalizado."""
+    cpf = str(cpf or '')
+    if cpf.isdigit() and cpf.isascii():
+        return cpf
+    return _NAO_DIGITOS.sub('', cpf) or normalizar_texto(cpf) or None
+
+
+# Pedido ainda em texto (carga preguiçosa): 'cliente_id' é a primeira chave (ver Pedido.to_json),
+# então é lido sem decodificar os itens
+_CLIENTE_ID_BRUTO = re.compile(r'\{\s*"cliente_id"\s*:\s*"([^"\\]*)"')
+
+
+def _valores(colecao, campos):
+    """
+    Gera (id, (valores dos 'campos')) de todas as entidades, sem materializar o que
+    ainda está em formato bruto (carga preguiçosa) nem ler linhas inteiras do SQLite.
+    """
+    valores_colunas = getattr(colecao, 'valores_colunas', None)
+    if valores_colunas is not None: # Tabela SQLite: uma consulta só com as colunas pedidas
+        yield from valores_colunas(campos)
+        return
+
+    for chave in list(colecao.keys()):
+        bruto = colecao.bruto(chave)
+        if bruto is None:
+            obj = colecao[chave]
+            yield chave, tuple(colecao.valor_campo(obj, campo) for campo in campos)
+        else:
+            data = json.loads(bruto) if isinstance(bruto, str) else bruto
+            yield chave, tuple(data.get(campo) for campo in campos)
+
+
+class IndiceCPF(ObservadorColecao):
+    """
+    Classe de Mapeamento.
+    Objetivo: Encontrar um cliente pelo CPF sem percorrer DB['clientes'] e impedir
+              que um novo cadastro repita um CPF já usado.
+    Função: Mapeia o CPF normalizado para o ID do cliente. CPFs que já chegaram
+            repetidos no banco não impedem a carga: ficam em 'repetidos' (o menor
+            ID é o dono do CPF) e o dono seguinte assume se o atual for removido.
+    """
+    def __init__(self, clientes):
+        self.ao_recarregar(clientes)
+        clientes.observar(self)
+
+    def ao_recarregar(self, clientes):
+        self._por_cpf = {} # CPF normalizado -> ID do dono
+        self._cpf_de = {} # ID -> CPF normalizado
+        self.repetidos = {} # CPF normalizado -> demais IDs com o mesmo CPF
+        for chave, (cpf,) in _valores(clientes, ('cpf',)):
+            self._adicionar(str(chave), cpf)
+
+    def _adicionar(self, chave, cpf):
+        cpf = normalizar_cpf(cpf)
+        if cpf is None:
+            return
+        self._cpf_de[chave] = cpf
+        dono = self._por_cpf.get(cpf)
+        if dono is None:
+            self._por_cpf[cpf] = chave
+            return
+        if ordem_id(chave) < ordem_id(dono): # O menor ID continua sendo o dono
+            self._por_cpf[cpf], chave = chave, dono
+        insort(self.repetidos.setdefault(cpf, []), chave, key=ordem_id)
+
+    def _retirar(self, chave):
+        cpf = self._cpf_de.pop(chave, None)
+        if cpf is None:
+            return
+        outros = self.repetidos.get(cpf)
+        if self._por_cpf.get(cpf) == chave:
+            if outros:
+                self._por_cpf[cpf] = outros.pop(0)
+            else:
+                del self._por_cpf[cpf]
+        elif outros and chave in outros:
+            outros.remove(chave)
+        if outros is not None and not outros:
+            del self.repetidos[cpf]
+
+    def ao_inserir(self, chave, cliente):
+        self._retirar(chave)
+        self._adicionar(chave, cliente.cpf)
+
+    def ao_alterar(self, cliente, campo):
+        if campo in ('cpf', '*'):
+            self.ao_inserir(cliente.id, cliente)
+
+    def ao_remover(self, chave, cliente):
+        self._retirar(chave)
+
+    def buscar(self, cpf):
+        """ID do cliente com este CPF (em qualquer formatação), ou None."""
+        cpf = normalizar_cpf(cpf)
+        return None if cpf is None else self._por_cpf.get(cpf)
+
+    def verificar(self, cpf):
+        """ValueError se o CPF está vazio ou já pertence a um cliente cadastrado."""
+        if normalizar_cpf(cpf) is None:
+            raise ValueError("CPF não informado.")
+        dono = self.buscar(cpf)
+        if dono is not None:
+            raise ValueError(f"CPF {cpf.strip()} já cadastrado (cliente ID {dono}).")
+
+
+class IndiceNomes(ObservadorColecao):
+    """
+    Classe de Mapeamento.
+    Objetivo: Autocompletar e buscar clientes/produtos pelo nome em tempo
+              sublinear, sem diferenciar maiúsculas nem acentos.
+    Função: Mantém (1) uma lista ordenada de (nome normalizado, ID), em que o
+            prefixo do nome completo é uma busca binária, e (2) um índice de
+            palavras (palavra -> IDs, com o vocabulário ordenado) para achar os
+            nomes em que cada palavra digitada começa alguma palavra do nome
+            ('silv jo' encontra 'João da Silva'). Inserções entram em listas
+            pendentes, fundidas às ordenadas a cada LIMITE_PENDENTES; entradas
+            antigas (nome alterado ou removido) são ignoradas na consulta e
+            descartadas quando o índice é refeito.
+    """
+    def __init__(self, colecao):
+        self.ao_recarregar(colecao)
+        colecao.observar(self)
+
+    def ao_recarregar(self, colecao):
+        self._nomes = {str(chave): normalizar_texto(nome) for chave, (nome,) in _valores(colecao, ('nome',))}
+        self._refazer()
+
+    def _refazer(self):
+        """Monta as listas ordenadas e as palavras a partir de _nomes (descarta entradas antigas)."""
+        postagens = defaultdict(list)
+        for chave, nome in self._nomes.items():
+            for palavra in set(nome.split()):
+                postagens[palavra].append(chave)
+        self._postagens = postagens # palavra -> IDs cujo nome a contém
+        self._vocabulario = sorted(postagens)
+        self._ordenados = sorted(zip(self._nomes.values(), self._nomes.keys()))
+        self._pendentes = []
+        self._palavras_pendentes = []
+        self._obsoletos = 0
+
+    def _indexar(self, chave, nome):
+        nome = normalizar_texto(nome)
+        anterior = self._nomes.get(chave)
+        if anterior == nome:
+            return
+        if anterior is not None:
+            self._obsoletos += 1
+        self._nomes[chave] = nome
+        for palavra in set(nome.split()):
+            if palavra not in self._postagens:
+                self._palavras_pendentes.append(palavra)
+            self._postagens[palavra].append(chave)
+        self._pendentes.append((nome, chave))
+
+        if self._obsoletos > len(self._nomes) // 4 + LIMITE_PENDENTES:
+            self._refazer()
+            return
+        # Troca cada lista inteira de uma vez (a ordenada antes de esvaziar a pendente):
+        # consultas em andamento continuam vendo todas as entradas
+        if len(self._pendentes) >= LIMITE_PENDENTES:
+            self._ordenados = sorted(self._ordenados + self._pendentes)
+            self._pendentes = []
+        if len(self._palavras_pendentes) >= LIMITE_PENDENTES:
+            self._vocabulario = sorted(self._vocabulario + self._palavras_pendentes)
+            self._palavras_pendentes = []
+
+    def ao_inserir(self, chave, obj):
+        self._indexar(chave, obj.nome)
+
+    def ao_alterar(self, obj, campo):
+        if campo in ('nome', '*'):
+            self._indexar(obj.id, obj.nome)
+
+    def ao_remover(self, chave, obj):
+        if self._nomes.pop(chave, None) is not None:
+            self._obsoletos += 1
+
+    def prefixo(self, termo, limite=LIMITE_BUSCA_PADRAO):
+        """IDs cujo nome começa com 'termo', em ordem alfabética."""
+        termo = normalizar_texto(termo)
+        if not termo:
+            return []
+        pendentes = self._pendentes
+        ordenados = self._ordenados
+        achados = []
+        posicao = bisect_left(ordenados, (termo,))
+        while posicao < len(ordenados) and len(achados) < limite:
+            nome, chave = ordenados[posicao]
+            if not nome.startswith(termo):
+                break
+            if self._nomes.get(chave) == nome:
+                achados.append((nome, chave))
+            posicao += 1
+        achados.extend(e for e in pendentes if e[0].startswith(termo) and self._nomes.get(e[1]) == e[0])
+        return list(dict.fromkeys(chave for _, chave in sorted(achados)))[:limite]
+
+    def _palavras_com_prefixo(self, prefixo):
+        pendentes = self._palavras_pendentes
+        vocabulario = self._vocabulario
+        posicao = bisect_left(vocabulario, prefixo)
+        while posicao < len(vocabulario) and vocabulario[posicao].startswith(prefixo):
+            yield vocabulario[posicao]
+            posicao += 1
+        yield from (palavra for palavra in pendentes if palavra.startswith(prefixo))
+
+    def _candidatos(self, prefixo, teto):
+        """Quantos IDs as palavras com este prefixo somam (a contagem para ao passar de 'teto')."""
+        total = 0
+        for palavra in self._palavras_com_prefixo(prefixo):
+            total += len(self._postagens[palavra])
+            if total > teto:
+                break
+        return total
+
+    def palavras(self, termo, limite=LIMITE_BUSCA_PADRAO, ignorar=()):
+        """IDs cujo nome tem, para cada palavra do termo, uma palavra que começa com ela."""
+        termos = normalizar_texto(termo).split()
+        if not termos:
+            return []
+        # Percorre só os candidatos da palavra mais seletiva; as outras são conferidas no nome
+        seletiva, menor = None, float('inf')
+        for prefixo in termos:
+            quantidade = self._candidatos(prefixo, menor)
+            if quantidade < menor:
+                seletiva, menor = prefixo, quantidade
+        if seletiva is None:
+            return []
+
+        achados = []
+        vistos = set(ignorar)
+        for palavra in self._palavras_com_prefixo(seletiva):
+            for chave in self._postagens[palavra]:
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+                nome = self._nomes.get(chave)
+                if nome is None:
+                    continue
+                palavras_nome = nome.split()
+                if all(any(p.startswith(t) for p in palavras_nome) for t in termos):
+                    achados.append(chave)
+                    if len(achados) == limite:
+                        return achados
+        return achados
+
+    def buscar(self, termo, limite=LIMITE_BUSCA_PADRAO):
+        """Autocompletar: primeiro os nomes que começam com o termo, depois os que têm as palavras dele."""
+        achados = self.prefixo(termo, limite)
+        if len(achados) < limite:
+            achados += self.palavras(termo, limite - len(achados), ignorar=achados)
+        return achados
+
+
+class IndicePedidosPorCliente(ObservadorColecao):
+    """
+    Classe de Mapeamento.
+    Objetivo: Listar os pedidos de um cliente sem filtrar todos os pedidos da loja.
+    Função: Índice reverso cliente_id -> IDs dos pedidos (em ordem crescente),
+            mantido a cada pedido inserido, alterado ou removido.
+    """
+    def __init__(self, pedidos):
+        self.ao_recarregar(pedidos)
+        pedidos.observar(self)
+
+    def ao_recarregar(self, pedidos):
+        self._por_cliente = {}
+        self._cliente_de = {}
+        for chave, cliente_id in self._clientes_dos_pedidos(pedidos):
+            self._cliente_de[chave] = cliente_id
+            self._por_cliente.setdefault(cliente_id, []).append(chave)
+        for lista in self._por_cliente.values():
+            lista.sort(key=ordem_id)
+
+    @staticmethod
+    def _clientes_dos_pedidos(pedidos):
+        """Gera (pedido_id, cliente_id) de todos os pedidos, como texto."""
+        if getattr(pedidos, 'valores_colunas', None) is None:
+            for chave in list(pedidos.keys()):
+                bruto = pedidos.bruto(chave)
+                achado = _CLIENTE_ID_BRUTO.match(bruto) if isinstance(bruto, str) else None
+                if achado is not None:
+                    yield chave, achado.group(1)
+                else:
+                    yield chave, (bruto.get('cliente_id') if isinstance(bruto, dict) else pedidos[chave].cliente.id)
+            return
+        for chave, (cliente_id,) in _valores(pedidos, ('cliente_id',)):
+            yield chave, str(cliente_id)
+
+    def _retirar(self, chave):
+        cliente_id = self._cliente_de.pop(chave, None)
+        if cliente_id is None:
+            return
+        lista = self._por_cliente[cliente_id]
+        posicao = bisect_left(lista, ordem_id(chave), key=ordem_id)
+        if posicao < len(lista) and lista[posicao] == chave:
+            del lista[posicao]
+        if not lista:
+            del self._por_cliente[cliente_id]
+
+    def ao_inserir(self, chave, pedido):
+        cliente_id = pedido.cliente.id
+        if self._cliente_de.get(chave) == cliente_id:
+            return
+        self._retirar(chave)
+        self._cliente_de[chave] = cliente_id
+        lista = self._por_cliente.setdefault(cliente_id, [])
+        if not lista or ordem_id(chave) > ordem_id(lista[-1]): # Caso comum: IDs novos são os maiores
+            lista.append(chave)
+        else:
+            insort(lista, chave, key=ordem_id)
+
+    def ao_alterar(self, pedido, campo):
+        if campo == '*':
+            self.ao_inserir(pedido.id, pedido)
+
+    def ao_remover(self, chave, pedido):
+        self._retirar(chave)
+
+    def quantidade(self, cliente_id):
+        return len(self._por_cliente.get(cliente_id, ()))
+
+    def pedidos(self, cliente_id, apos=None, limite=None):
+        """IDs dos pedidos do cliente, em ordem crescente; 'apos' é um cursor (último ID visto)."""
+        lista = self._por_cliente.get(cliente_id, [])
+        inicio = 0 if apos is None else bisect_right(lista, ordem_id(str(apos)), key=ordem_id)
+        fim = len(lista) if limite is None else inicio + limite
+        return lista[inicio:fim]
+
+
+class IndicesLoja:
+    """
+    Classe de Serviço.
+    Objetivo: Reunir os índices secundários de um DB carregado.
+    Função: Os índices são montados uma vez (na carga) e daí em diante só
+            acompanham as inserções/alterações/remoções das coleções, inclusive
+            as que chegam de outros workers por database.sincronizar().
+    """
+    def __init__(self, dados):
+        self.cpf = IndiceCPF(dados['clientes'])
+        self.nomes_clientes = IndiceNomes(dados['clientes'])
+        self.nomes_produtos = IndiceNomes(dados['produtos'])
+        self.pedidos_por_cliente = IndicePedidosPorCliente(dados['pedidos'])
+
+    def buscar_clientes(self, termo, limite=LIMITE_BUSCA_PADRAO):
+        """Busca por CPF (se o termo for um CPF cadastrado) e, em seguida, pelo nome."""
+        achados = []
+        dono = self.cpf.buscar(termo) if any(c.isdigit() for c in termo) else None
+        if dono is not None:
+            achados.append(dono)
+        for chave in self.nomes_clientes.buscar(termo, limite):
+            if chave not in achados:
+                achados.append(chave)
+        return achados[:limite]
+
+    def buscar_produtos(self, termo, limite=LIMITE_BUSCA_PADRAO):
+        return self.nomes_produtos.buscar(termo, limite)
+
+
+# Um conjunto de índices por DB carregado (chave: id da coleção de pedidos)
+_indices = {}
+
+
+def obter_indices(dados):
+    """
+    Retorna os IndicesLoja do DB, montando-os no primeiro uso (app_web e main
+    chamam logo após a carga). Avisa se o banco já tem CPFs repetidos.
+    """
+    indices = _indices.get(id(dados['pedidos']))
+    if indices is None:
+        indices = _indices[id(dados['pedidos'])] = IndicesLoja(dados)
+        if indices.cpf.repetidos:
+            total = sum(len(outros) for outros in indices.cpf.repetidos.values())
+            print(f"AVISO: {total} cliente(s) com CPF repetido em {len(indices.cpf.repetidos)} CPF(s); "
+                  f"novos cadastros com esses CPFs serão recusados.")
+    return indices
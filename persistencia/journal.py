@@ -0,0 +1,298 @@
+# Arquivo: persistencia/journal.py - Journal append-only das alterações do sistema
+
+import glob
+import json
+import os
+import threading
+
+from monitoramento import metricas
+
+from .concorrencia import TravaArquivo
+from .snapshot import ler_snapshot, escrever_snapshot
+
+
+def aplicar_registro(data, registro):
+    """
+    Objetivo: Reaplicar um registro do journal sobre os dados brutos (dicionários JSON).
+    Função: Todos os registros são idempotentes (criações sobrescrevem pelo ID, o
+            pagamento só liga a flag 'pago' e a remoção ignora IDs ausentes), então reaplicar um registro já contido
+            no snapshot não altera o resultado.
+    """
+    tipo = registro['t']
+    entidade_id = registro.get('id')
+
+    if tipo in ('cliente', 'produto', 'pedido'):
+        data[tipo + 's'][entidade_id] = registro['d']
+        if tipo in data['next_ids']:
+            proximo = int(entidade_id) + 1
+            data['next_ids'][tipo] = max(data['next_ids'][tipo], proximo)
+    elif tipo == 'pago':
+        pedido = data['pedidos'].get(entidade_id)
+        if isinstance(pedido, str): # Pedido adiado pela carga preguiçosa
+            pedido = data['pedidos'][entidade_id] = json.loads(pedido)
+        if pedido is not None:
+            pedido['pago'] = True
+    elif tipo == 'remover':
+        data[registro['c']].pop(entidade_id, None)
+    elif tipo == 'ids': # Bloco de IDs reservado (gravação em grupo)
+        for nome, valor in registro['d'].items():
+            data['next_ids'][nome] = max(data['next_ids'].get(nome, valor), valor)
+    else:
+        raise ValueError(f"Tipo de registro desconhecido no journal: {tipo}")
+
+
+def ler_segmento(caminho, inicio=0, avisar=True):
+    """
+    Objetivo: Ler os registros de um segmento do journal a partir do byte 'inicio'.
+    Função: Cada linha é um registro JSON compacto. Uma linha final incompleta
+            (queda no meio de uma escrita) é descartada, pois nunca foi confirmada.
+            Retorna (registros, byte logo após o último registro completo).
+    """
+    registros = []
+    fim = inicio
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        for linha in f:
+            if not linha.endswith(b'\n'):
+                if avisar:
+                    print(f"AVISO: Registro incompleto descartado no final de {caminho}.")
+                break
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                if avisar:
+                    print(f"AVISO: Registro corrompido em {caminho}. Ignorando o restante do segmento.")
+                break
+            fim += len(linha)
+    return registros, fim
+
+
+class Journal:
+    """
+    Classe de Persistência.
+    Objetivo: Registrar cada criação/pagamento como UMA linha anexada ao log, em vez
+              de reescrever o data.json inteiro a cada alteração.
+    Função: O log é dividido em segmentos numerados ('data.journal.000001', ...).
+            O snapshot guarda em 'journal_segmento' o último segmento já incorporado;
+            na carga, apenas os segmentos posteriores são reaplicados.
+            Todos os processos anexam ao ÚLTIMO segmento (sob a trava de escrita do
+            database.py), então o log tem uma ordem única que os demais workers
+            acompanham com 'ler_novos()'.
+    """
+    def __init__(self, caminho_snapshot, limite_bytes):
+        self.caminho_snapshot = caminho_snapshot
+        self.prefixo = os.path.splitext(caminho_snapshot)[0] + '.journal.'
+        self.limite_bytes = limite_bytes
+        self._lock = threading.RLock()
+        self._arquivo = None
+        self._segmento_ativo = None
+        self._compactando = None
+        self._incorporado = 0 # Último segmento que este processo sabe estar no snapshot
+        # Compactações (de qualquer processo) nunca rodam ao mesmo tempo
+        self._trava_compactacao = TravaArquivo(self.prefixo + 'lock')
+
+    # ------------------------------------------------------------------
+    # Segmentos
+    # ------------------------------------------------------------------
+
+    def _caminho_segmento(self, numero):
+        return f"{self.prefixo}{numero:06d}"
+
+    def segmentos(self):
+        """Retorna a lista ordenada de (número, caminho) dos segmentos existentes."""
+        encontrados = []
+        for caminho in glob.glob(glob.escape(self.prefixo) + '[0-9]' * 6):
+            encontrados.append((int(caminho[len(self.prefixo):]), caminho))
+        return sorted(encontrados)
+
+    def tamanho_total(self):
+        return sum(os.path.getsize(caminho) for _, caminho in self.segmentos())
+
+    def tamanho_pendente(self):
+        """Bytes dos segmentos ainda não incorporados ao snapshot."""
+        return sum(os.path.getsize(caminho) for numero, caminho in self.segmentos() if numero > self._incorporado)
+
+    def _novo_segmento(self, existentes):
+        """Cria (vazio) e abre o segmento seguinte ao último existente."""
+        if self._arquivo is not None:
+            self._arquivo.close()
+        ultimo = existentes[-1][0] if existentes else 0
+        self._segmento_ativo = max(ultimo, self._incorporado) + 1
+        self._arquivo = open(self._caminho_segmento(self._segmento_ativo), 'ab')
+        return self._arquivo
+
+    def _rotacionar(self):
+        """
+        Fecha o último segmento, criando já o próximo (todos os processos passam a
+        anexar nele). Retorna o número do segmento fechado.
+        """
+        existentes = self.segmentos()
+        fechado = existentes[-1][0] if existentes else self._incorporado
+        self._novo_segmento(existentes)
+        return fechado
+
+    def _abrir_segmento(self):
+        existentes = self.segmentos()
+        if not existentes:
+            return self._novo_segmento(existentes)
+
+        ultimo, caminho = existentes[-1]
+        if self._arquivo is not None and self._segmento_ativo == ultimo:
+            return self._arquivo
+
+        # Outro processo criou o último segmento: passa a anexar nele, a menos que
+        # ele já esteja no snapshot ou termine com um registro incompleto (nada deve
+        # ser anexado depois de um registro quebrado)
+        tamanho = os.path.getsize(caminho)
+        quebrado = False
+        if tamanho:
+            with open(caminho, 'rb') as f:
+                f.seek(tamanho - 1)
+                quebrado = f.read(1) != b'\n'
+        if quebrado or ultimo <= self._incorporado:
+            return self._novo_segmento(existentes)
+
+        if self._arquivo is not None:
+            self._arquivo.close()
+        self._segmento_ativo = ultimo
+        self._arquivo = open(caminho, 'ab')
+        return self._arquivo
+
+    # ------------------------------------------------------------------
+    # Escrita e leitura
+    # ------------------------------------------------------------------
+
+    def anexar(self, registros):
+        """
+        Objetivo: Persistir os registros de uma alteração.
+        Função: Grava todas as linhas com uma única escrita seguida de fsync e,
+                se o log passou do limite, dispara a compactação em segundo plano.
+                Retorna a posição (segmento, byte) logo após os registros gravados.
+        """
+        conteudo = b''.join(
+            json.dumps(r, separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+            for r in registros
+        )
+        with self._lock:
+            arquivo = self._abrir_segmento()
+            arquivo.write(conteudo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+            posicao = (self._segmento_ativo, arquivo.tell())
+
+            if self.tamanho_pendente() > self.limite_bytes and not self.compactacao_em_andamento():
+                self.compactar_em_segundo_plano()
+        metricas.BYTES_GRAVADOS.incrementar(len(conteudo), destino='journal')
+        return posicao
+
+    def reproduzir(self, data):
+        """
+        Reaplica sobre 'data' (dados brutos) os segmentos ainda não incorporados ao
+        snapshot. Retorna a posição (segmento, byte) até onde o log foi lido.
+        """
+        incorporado = data.get('journal_segmento', 0)
+        self._incorporado = max(self._incorporado, incorporado)
+        posicao = (incorporado + 1, 0)
+        for numero, caminho in self.segmentos():
+            if numero <= incorporado:
+                continue
+            registros, fim = ler_segmento(caminho)
+            for registro in registros:
+                aplicar_registro(data, registro)
+            posicao = (numero, fim)
+        return posicao
+
+    def ler_novos(self, posicao):
+        """
+        Objetivo: Acompanhar o log escrito por outros processos.
+        Função: Retorna (registros gravados depois de 'posicao', nova posição), ou
+                None se os segmentos a partir de 'posicao' já foram descartados pela
+                compactação (quem chamou precisa então reler o estado completo).
+        """
+        numero_atual, inicio = posicao
+        existentes = self.segmentos()
+        if existentes and numero_atual < existentes[0][0]:
+            return None
+
+        novos = []
+        for numero, caminho in existentes:
+            if numero < numero_atual:
+                continue
+            registros, fim = ler_segmento(caminho, inicio if numero == numero_atual else 0, avisar=False)
+            novos.extend(registros)
+            posicao = (numero, fim)
+        return novos, posicao
+
+    # ------------------------------------------------------------------
+    # Compactação
+    # ------------------------------------------------------------------
+
+    def compactacao_em_andamento(self):
+        return self._compactando is not None and self._compactando.is_alive()
+
+    def compactar_em_segundo_plano(self):
+        """Fecha o segmento ativo e incorpora os segmentos fechados ao snapshot numa thread."""
+        with self._lock:
+            ate = self._rotacionar()
+            self._compactando = threading.Thread(
+                target=self.compactar, args=(ate,), name='journal-compactacao', daemon=True
+            )
+            self._compactando.start()
+
+    def compactar(self, ate):
+        """
+        Objetivo: Incorporar ao snapshot os segmentos até 'ate'.
+        Função: Trabalha apenas sobre os arquivos (snapshot + segmentos), sem tocar
+                nos objetos em memória, por isso pode rodar em paralelo às escritas.
+                Os segmentos incorporados na compactação ANTERIOR são apagados agora:
+                ficar um ciclo a mais no disco dá tempo aos outros workers de
+                terminarem de lê-los.
+        """
+        with self._trava_compactacao:
+            data = ler_snapshot(self.caminho_snapshot)
+
+            incorporado = data.get('journal_segmento', 0)
+            if incorporado >= ate: # Outro processo já compactou até aqui
+                self._incorporado = max(self._incorporado, incorporado)
+                return
+            for numero, caminho in self.segmentos():
+                if incorporado < numero <= ate:
+                    for registro in ler_segmento(caminho)[0]:
+                        aplicar_registro(data, registro)
+
+            data['journal_segmento'] = ate
+            escrever_snapshot(self.caminho_snapshot, data)
+            self.descartar_ate(incorporado)
+            self._incorporado = ate
+
+    def substituir_snapshot(self, data):
+        """
+        Objetivo: Gravar um snapshot completo gerado a partir dos objetos em memória.
+        Função: Fecha o segmento ativo, grava o snapshot marcando-o como incorporado
+                e descarta os segmentos que já estavam no snapshot anterior.
+                Retorna a posição do log logo após o snapshot.
+        """
+        with self._lock:
+            if self._compactando is not None:
+                self._compactando.join()
+            with self._trava_compactacao:
+                anterior = self._incorporado
+                data['journal_segmento'] = self._rotacionar()
+                escrever_snapshot(self.caminho_snapshot, data)
+                self.descartar_ate(anterior)
+                self._incorporado = data['journal_segmento']
+            return (self._segmento_ativo, 0)
+
+    def descartar_ate(self, ate):
+        """Remove os segmentos já incorporados ao snapshot."""
+        for numero, caminho in self.segmentos():
+            if numero <= ate:
+                os.remove(caminho)
+
+    def fechar(self):
+        with self._lock:
+            if self._compactando is not None:
+                self._compactando.join()
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
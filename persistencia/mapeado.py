@@ -0,0 +1,440 @@
+# Arquivo: persistencia/mapeado.py - Snapshot compartilhado entre processos (mmap), publicado em gerações
+#
+# Layout do arquivo (ordem de bytes nativa da máquina, registrada nos metadados):
+#     MAGICO, [geração: u64][tamanho dos metadados: u32], metadados em JSON e, a partir
+#     do próximo múltiplo de 8 (o "corpo"), para cada coleção:
+#       chaves  -> array de int64 com os IDs em ordem crescente
+#       inicios -> array de int64 com n+1 posições: o texto da entidade i ocupa
+#                  [inicios[i], inicios[i+1]) na área de textos da coleção
+#     seguidos das áreas de textos (o JSON compacto de cada entidade, na ordem dos IDs).
+# Os metadados guardam a posição de cada array no corpo, os extras (next_ids) e o
+# histórico das últimas gerações ([geração, coleção, ID] de cada entidade gravada ou
+# removida), que permite a um leitor atualizar só o que mudou.
+#
+# Cada processo mapeia o arquivo (mmap somente leitura): as páginas ficam no cache do
+# SO uma única vez, compartilhadas por todos os workers, e uma busca por ID é uma
+# busca binária direto no array mapeado. Uma nova geração é gravada num arquivo novo
+# e trocada com os.replace: quem ainda mapeia a anterior continua lendo-a inteira até
+# trocar de mapa, sem nunca ver um arquivo pela metade.
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+from .colecao import Colecao
+from .snapshot import COLECOES, escrever_atomico
+
+
+MAGICO = b'LOJAMAP1'
+# Quantas entradas (entidades gravadas/removidas) o histórico de gerações guarda. Um
+# leitor que ficou para trás além dele relê as entidades que já tinha em memória
+LIMITE_HISTORICO = 10000
+
+_CABECALHO = struct.Struct('<QI')
+_INICIO_METADADOS = len(MAGICO) + _CABECALHO.size
+
+
+class MapaInvalido(ValueError):
+    """O arquivo não é um snapshot mapeado válido (ou foi gerado em outra arquitetura)."""
+
+
+def _alinhar(posicao):
+    return (posicao + 7) & ~7
+
+
+def _inteiro(chave):
+    """ID como inteiro; o arquivo mapeado só guarda IDs numéricos canônicos ('1', '42')."""
+    if not (chave.isdigit() and chave.isascii() and (chave == '0' or chave[0] != '0') and len(chave) < 19):
+        raise ValueError(f"ID {chave!r} não é um inteiro: o snapshot mapeado só aceita IDs numéricos.")
+    return int(chave)
+
+
+def _texto_json(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def geracao_no_disco(caminho):
+    """Geração do arquivo atual, lida só do cabeçalho (None se ele não existe)."""
+    try:
+        with open(caminho, 'rb') as f:
+            inicio = f.read(_INICIO_METADADOS)
+    except FileNotFoundError:
+        return None
+    if inicio[:len(MAGICO)] != MAGICO or len(inicio) < _INICIO_METADADOS:
+        raise MapaInvalido(f"{caminho} não é um snapshot mapeado.")
+    return _CABECALHO.unpack_from(inicio, len(MAGICO))[0]
+
+
+# ----------------------------------------------------------------------
+# LEITURA (MMAP)
+# ----------------------------------------------------------------------
+
+class MapaCompartilhado:
+    """
+    Classe de Persistência (Leitura).
+    Objetivo: Dar acesso a uma geração do snapshot sem copiá-la para a memória do
+              processo.
+    Função: Mapeia o arquivo com mmap somente leitura e expõe, por coleção, os IDs
+            (array ordenado, busca binária) e o texto JSON de cada entidade. Nada é
+            decodificado na abertura além dos metadados. O mapa não é fechado
+            explicitamente: ele é liberado quando nenhuma coleção (ou leitura em
+            andamento em outra thread) o referencia mais.
+    """
+    def __init__(self, caminho):
+        with open(caminho, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # Arquivo vazio
+                raise MapaInvalido(f"{caminho} está vazio.")
+        visao = memoryview(self._mmap)
+        if visao[:len(MAGICO)] != MAGICO or len(visao) < _INICIO_METADADOS:
+            raise MapaInvalido(f"{caminho} não é um snapshot mapeado.")
+        self.geracao, tamanho = _CABECALHO.unpack_from(visao, len(MAGICO))
+        try:
+            metadados = json.loads(bytes(visao[_INICIO_METADADOS:_INICIO_METADADOS + tamanho]))
+        except ValueError as e:
+            raise MapaInvalido(f"Metadados do snapshot mapeado corrompidos: {e}") from e
+        if metadados['ordem'] != sys.byteorder:
+            raise MapaInvalido(f"{caminho} foi gerado numa máquina {metadados['ordem']}-endian; gere-o de novo.")
+
+        self.extras = metadados['extras']
+        self.historico = metadados['historico']
+        self.desde = metadados['desde']
+        self.tamanho_arquivo = len(visao)
+        corpo = _alinhar(_INICIO_METADADOS + tamanho)
+        self._chaves = {}
+        self._inicios = {}
+        self._textos = {}
+        for nome, posicoes in metadados['colecoes'].items():
+            n = posicoes['n']
+            inicio = corpo + posicoes['chaves']
+            self._chaves[nome] = visao[inicio:inicio + 8 * n].cast('q')
+            inicio = corpo + posicoes['inicios']
+            inicios = self._inicios[nome] = visao[inicio:inicio + 8 * (n + 1)].cast('q')
+            inicio = corpo + posicoes['textos']
+            self._textos[nome] = visao[inicio:inicio + inicios[n]]
+            if len(self._chaves[nome]) != n or len(self._textos[nome]) != inicios[n]:
+                raise MapaInvalido("Snapshot mapeado truncado.")
+
+    def tamanho(self, nome):
+        return len(self._chaves[nome])
+
+    def chaves(self, nome):
+        """IDs da coleção em ordem crescente (como texto)."""
+        return map(str, self._chaves[nome])
+
+    def chaves_ordenadas(self, nome):
+        """O array mapeado de IDs (inteiros), para busca binária."""
+        return self._chaves[nome]
+
+    def posicao(self, nome, chave):
+        """Posição da entidade no array da coleção (-1 se ela não está nesta geração)."""
+        if not (chave.isdigit() and chave.isascii()) or len(chave) >= 19:
+            return -1
+        valor = int(chave)
+        chaves = self._chaves[nome]
+        i = bisect_left(chaves, valor)
+        return i if i < len(chaves) and chaves[i] == valor and str(valor) == chave else -1
+
+    def texto(self, nome, chave):
+        """JSON da entidade como texto (None se ela não está nesta geração)."""
+        i = self.posicao(nome, chave)
+        if i < 0:
+            return None
+        inicios = self._inicios[nome]
+        return str(self._textos[nome][inicios[i]:inicios[i + 1]], 'utf-8')
+
+    def alteracoes_desde(self, geracao):
+        """
+        {coleção: IDs gravados ou removidos} entre 'geracao' (exclusive) e esta.
+        None se o histórico não cobre esse intervalo (o leitor deve reler tudo).
+        """
+        if geracao > self.geracao or geracao + 1 < self.desde:
+            return None
+        alteradas = {nome: set() for nome in COLECOES}
+        for numero, nome, chave in self.historico:
+            if numero > geracao:
+                alteradas[nome].add(chave)
+        return alteradas
+
+    def como_dados(self):
+        """Todo o conteúdo como dicionários JSON (o formato de ler_snapshot)."""
+        data = {}
+        for nome in COLECOES:
+            inicios, textos = self._inicios[nome], self._textos[nome]
+            data[nome] = {str(chave): json.loads(str(textos[inicios[i]:inicios[i + 1]], 'utf-8'))
+                          for i, chave in enumerate(self._chaves[nome])}
+        data.update(self.extras)
+        return data
+
+
+# ----------------------------------------------------------------------
+# ESCRITA (PUBLICAÇÃO DE UMA NOVA GERAÇÃO)
+# ----------------------------------------------------------------------
+
+class _Trecho:
+    """Arrays e textos de uma coleção na geração sendo montada."""
+    __slots__ = ('chaves', 'inicios', 'pedacos', 'tamanho')
+
+    def __init__(self):
+        self.chaves = array('q')
+        self.inicios = array('q')
+        self.pedacos = []
+        self.tamanho = 0
+
+    def anexar(self, chave, texto):
+        self.chaves.append(chave)
+        self.inicios.append(self.tamanho)
+        self.pedacos.append(texto)
+        self.tamanho += len(texto)
+
+    def copiar(self, mapa, nome, a, b):
+        """Reaproveita as entidades [a, b) da geração anterior sem decodificá-las."""
+        if b <= a:
+            return
+        inicios = mapa._inicios[nome]
+        self.chaves.frombytes(mapa._chaves[nome][a:b].cast('B'))
+        deslocamento = self.tamanho - inicios[a]
+        if deslocamento:
+            self.inicios.extend([inicio + deslocamento for inicio in inicios[a:b]])
+        else:
+            self.inicios.frombytes(inicios[a:b].cast('B'))
+        self.pedacos.append(mapa._textos[nome][inicios[a]:inicios[b]])
+        self.tamanho += inicios[b] - inicios[a]
+
+
+def _montar_arquivo(geracao, trechos, extras, historico, desde):
+    posicoes = {}
+    deslocamento = 0
+    for nome, trecho in trechos.items():
+        trecho.inicios.append(trecho.tamanho)
+        posicoes[nome] = {'n': len(trecho.chaves), 'chaves': deslocamento}
+        deslocamento += 8 * len(trecho.chaves)
+        posicoes[nome]['inicios'] = deslocamento
+        deslocamento += 8 * len(trecho.inicios)
+    for nome, trecho in trechos.items():
+        posicoes[nome]['textos'] = deslocamento
+        deslocamento += trecho.tamanho
+
+    metadados = _texto_json({'ordem': sys.byteorder, 'colecoes': posicoes, 'extras': extras,
+                             'historico': historico, 'desde': desde})
+    cabecalho = MAGICO + _CABECALHO.pack(geracao, len(metadados)) + metadados
+    partes = [cabecalho, bytes(_alinhar(len(cabecalho)) - len(cabecalho))]
+    for trecho in trechos.values():
+        partes.append(trecho.chaves.tobytes())
+        partes.append(trecho.inicios.tobytes())
+    for trecho in trechos.values():
+        partes.extend(trecho.pedacos)
+    return b''.join(partes)
+
+
+def escrever_mapa(caminho, data, geracao=1):
+    """Grava uma geração completa a partir dos dados brutos (ex.: conversão do data.json)."""
+    trechos = {}
+    for nome in COLECOES:
+        trecho = trechos[nome] = _Trecho()
+        entidades = sorted((_inteiro(chave), d) for chave, d in data.get(nome, {}).items())
+        for chave, d in entidades:
+            trecho.anexar(chave, _texto_json(d))
+    extras = {nome: valor for nome, valor in data.items() if nome not in COLECOES}
+    # Histórico vazio: um leitor de uma geração anterior relê o que tem em memória
+    escrever_atomico(caminho, _montar_arquivo(geracao, trechos, extras, [], geracao + 1))
+
+
+def publicar(caminho, anterior, dados, alteracoes, extras):
+    """
+    Objetivo: Gravar a próxima geração do snapshot mapeado com as alterações do DB.
+    Função: Parte da geração 'anterior' (a que as coleções de 'dados' mapeiam): os
+            trechos sem alterações são copiados byte a byte do mapa e só as entidades
+            sujas são serializadas. As alterações entram no histórico da geração.
+            Retorna quantas entidades foram gravadas ou removidas (0 = nada a gravar).
+            Levanta MapaInvalido se outro processo publicou uma geração que 'anterior'
+            ainda não incorporou (chame depois de sincronizar, sob a trava).
+    """
+    if geracao_no_disco(caminho) != anterior.geracao:
+        raise MapaInvalido("O snapshot mapeado mudou desde a última sincronização.")
+    geracao = anterior.geracao + 1
+    trechos = {}
+    novas = []
+    for nome in COLECOES:
+        colecao = dados[nome]
+        sujos, removidos = alteracoes[nome]
+        textos = {}
+        for chave in sujos:
+            obj = colecao._itens.get(chave)
+            if obj is not None:
+                textos[_inteiro(chave)] = _texto_json(obj.to_json())
+        excluidas = {int(chave) for chave in removidos if anterior.posicao(nome, chave) >= 0}
+
+        trecho = trechos[nome] = _Trecho()
+        chaves = anterior.chaves_ordenadas(nome)
+        cursor = 0
+        for chave in sorted(textos.keys() | excluidas):
+            i = bisect_left(chaves, chave, cursor)
+            trecho.copiar(anterior, nome, cursor, i)
+            cursor = i + 1 if i < len(chaves) and chaves[i] == chave else i
+            if chave in textos:
+                trecho.anexar(chave, textos[chave])
+            novas.append([geracao, nome, str(chave)])
+        trecho.copiar(anterior, nome, cursor, len(chaves))
+
+    if not novas and extras == anterior.extras:
+        return 0
+
+    historico = anterior.historico + novas
+    desde = anterior.desde
+    while len(historico) > LIMITE_HISTORICO: # Descarta gerações inteiras, das mais antigas
+        descartada = historico[0][0]
+        historico = [entrada for entrada in historico if entrada[0] != descartada]
+        desde = descartada + 1
+    escrever_atomico(caminho, _montar_arquivo(geracao, trechos, extras, historico, desde))
+    return len(novas)
+
+
+# ----------------------------------------------------------------------
+# COLEÇÃO SOBRE O MAPA
+# ----------------------------------------------------------------------
+
+class ColecaoMapeada(Colecao):
+    """
+    Classe de Mapeamento.
+    Objetivo: Comportar-se como o dicionário {id: objeto} do DB lendo as entidades
+              direto do snapshot mapeado, compartilhado por todos os processos.
+    Função: Como em TabelaSQLite, o dicionário interno da Colecao é só o mapa de
+            identidade dos objetos já usados (e das inserções ainda não gravadas);
+            o resto fica no arquivo e 'fabrica(chave, texto)' monta o objeto no
+            primeiro acesso. 'trocar_mapa' passa a coleção para uma nova geração.
+    """
+    def __init__(self, tipo, nome, mapa, fabrica):
+        super().__init__(tipo)
+        self.nome = nome
+        self.mapa = mapa
+        self._fabrica = fabrica
+        self._novos = set() # IDs inseridos que ainda não estão no mapa
+
+    def trocar_mapa(self, mapa):
+        self.mapa = mapa
+        self._novos = {chave for chave in self._novos if mapa.posicao(self.nome, chave) < 0}
+
+    def _no_mapa(self, chave):
+        return chave not in self._removidos and self.mapa.posicao(self.nome, chave) >= 0
+
+    def bruto(self, chave):
+        if chave in self._itens or chave in self._removidos:
+            return None
+        return self.mapa.texto(self.nome, chave)
+
+    def liberar(self, chaves):
+        """Tira do mapa de identidade objetos já gravados e não alterados (como em TabelaSQLite)."""
+        for chave in chaves:
+            if chave in self._novos or chave in self._sujos:
+                continue
+            obj = self._itens.pop(chave, None)
+            if obj is not None:
+                obj._ouvinte = None
+
+    def _atende(self, chave, filtros):
+        """Avalia os filtros direto no texto mapeado, sem materializar o objeto."""
+        if chave in self._itens:
+            return super()._atende(chave, filtros)
+        data = json.loads(self.mapa.texto(self.nome, chave))
+        return all(data.get(campo) == esperado for campo, esperado in filtros.items())
+
+    def pagina(self, apos=None, limite=20, filtros=None):
+        """Paginação por cursor com busca binária no array de IDs mapeado (mais as inserções não gravadas)."""
+        chaves = self.mapa.chaves_ordenadas(self.nome)
+        minimo = -1 if apos is None else int(apos)
+        inicio = bisect_right(chaves, minimo)
+        candidatas = chain((str(chaves[i]) for i in range(inicio, len(chaves))),
+                           (chave for chave in sorted(self._novos, key=int) if int(chave) > minimo))
+        resultado = []
+        for chave in candidatas:
+            if chave in self._removidos or (filtros and not self._atende(chave, filtros)):
+                continue
+            if len(resultado) == limite:
+                return resultado, resultado[-1][0]
+            resultado.append((chave, self[chave]))
+        return resultado, None
+
+    # --- Protocolo de dicionário ---
+    def __getitem__(self, chave):
+        obj = self._itens.get(chave)
+        if obj is None:
+            texto = None if chave in self._removidos else self.mapa.texto(self.nome, chave)
+            obj = self._fabrica(chave, texto) if texto is not None else None
+            if obj is None:
+                raise KeyError(chave)
+            self.anexar_carregado(chave, obj)
+        return obj
+
+    def __setitem__(self, chave, obj):
+        if chave not in self._itens and self.mapa.posicao(self.nome, chave) < 0:
+            self._novos.add(chave)
+        super().__setitem__(chave, obj)
+
+    def __delitem__(self, chave):
+        self[chave] # Materializa (ou gera KeyError para IDs inexistentes)
+        super().__delitem__(chave)
+        self._novos.discard(chave)
+
+    def sincronizar_remocao(self, chave):
+        super().sincronizar_remocao(chave)
+        self._novos.discard(chave)
+
+    def __iter__(self):
+        removidos = self._removidos
+        for chave in self.mapa.chaves(self.nome):
+            if chave not in removidos:
+                yield chave
+        yield from sorted(self._novos, key=int)
+
+    def __len__(self):
+        removidos = sum(1 for chave in self._removidos if self.mapa.posicao(self.nome, chave) >= 0)
+        return self.mapa.tamanho(self.nome) + len(self._novos) - removidos
+
+    def __contains__(self, chave):
+        return chave in self._itens or self._no_mapa(chave)
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        for chave in self:
+            try:
+                yield chave, self[chave]
+            except KeyError: # Pedido inválido (ex.: cliente inexistente), ignorado como na carga
+                continue
+
+    def values(self):
+        for _, obj in self.items():
+            yield obj
+
+    def __repr__(self):
+        return f"ColecaoMapeada({self.tipo!r}, geração {self.mapa.geracao}, {len(self)} itens)"
+
+
+if __name__ == '__main__':
+    # Conversão manual (o formato de origem é detectado pelo cabeçalho):
+    #     python3 -m persistencia.mapeado data.json data.mapa
+    import argparse
+    import os
+    from .snapshot import ler_snapshot
+
+    parser = argparse.ArgumentParser(description="Gera o snapshot mapeado a partir de um data.json.")
+    parser.add_argument('origem')
+    parser.add_argument('destino')
+    args = parser.parse_args()
+
+    escrever_mapa(args.destino, ler_snapshot(args.origem))
+    print(f"{args.origem} ({os.path.getsize(args.origem) / 1e6:.2f} MB) -> "
+          f"{args.destino} ({os.path.getsize(args.destino) / 1e6:.2f} MB)")
@@ -0,0 +1,291 @@
+# Arquivo: persistencia/particoes.py - Armazenamento particionado (um arquivo por coleção/faixa de pedidos)
+#
+# Layout da pasta:
+#     manifesto.json            -> next_ids, tamanho das faixas e a geração de cada partição
+#     clientes.json             -> todos os clientes
+#     produtos.json             -> todos os produtos
+#     pedidos-000000.json       -> pedidos com ID em [0, TAMANHO_PARTICAO)
+#     pedidos-000001.json       -> pedidos com ID em [TAMANHO_PARTICAO, 2*TAMANHO_PARTICAO) ...
+#     pedidos-outros.json       -> pedidos com ID não numérico (se houver)
+# Cada partição é um snapshot comum (uma entidade por linha, ver snapshot.py) que só
+# tem a sua coleção. O manifesto é a fonte da verdade: partições que não aparecem
+# nele são ignoradas e uma partição listada que não existe está vazia.
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .snapshot import COLECOES, escrever_atomico, fragmento, ler_snapshot, montar_snapshot
+
+
+TAMANHO_PARTICAO = int(os.environ.get('LOJA_TAMANHO_PARTICAO', 10000)) # IDs de pedido por arquivo
+MANIFESTO = 'manifesto.json'
+
+
+def _ler_particao(caminho, nome, adiar):
+    """Entidades de 'nome' gravadas em uma partição ({} se o arquivo não existe)."""
+    try:
+        return ler_snapshot(caminho, adiar).get(nome, {})
+    except FileNotFoundError:
+        return {}
+
+
+def colecao_do_arquivo(arquivo):
+    return arquivo.split('.')[0].split('-')[0]
+
+
+class ArmazemParticionado:
+    """
+    Classe de Persistência.
+    Objetivo: Guardar o DB em vários arquivos pequenos, para que pagar um pedido
+              regrave só a faixa de pedidos que o contém (e não clientes, produtos
+              e todo o histórico) e para que a carga possa ler as partições em paralelo.
+    Função: Interface semelhante à do SnapshotIncremental (persistencia/snapshot.py): guarda
+            o fragmento (linha JSON) de cada entidade, mas só das partições que já
+            precisou gravar. Um salvamento regrava as partições com entidades sujas
+            ou removidas e o manifesto, que é gravado antes delas: uma queda no
+            meio deixa no máximo next_ids adiantado, nunca um ID reaproveitado.
+            Cada partição gravada ganha uma nova geração no manifesto, que é como
+            outros processos sabem quais arquivos reler (ver database.sincronizar).
+    """
+    def __init__(self, pasta, tamanho_particao=None):
+        self.pasta = pasta
+        self.manifesto = os.path.join(pasta, MANIFESTO)
+        self._tamanho_padrao = tamanho_particao or TAMANHO_PARTICAO
+        self._tamanho = None
+        self.geracoes = None # Gerações gravadas por este processo no último salvamento
+        self.dono = None
+        self._linhas = {} # {partição: {id: linha}} das partições já montadas
+        self._extras = None
+
+    # ------------------------------------------------------------------
+    # Manifesto e partições
+    # ------------------------------------------------------------------
+
+    def existe(self):
+        return os.path.exists(self.manifesto)
+
+    def ler_manifesto(self):
+        try:
+            with open(self.manifesto, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'tamanho_particao': self._tamanho_padrao, 'extras': {}, 'geracoes': {}}
+
+    @property
+    def tamanho_particao(self):
+        """Tamanho das faixas com que a pasta foi criada (o do ambiente só vale para pastas novas)."""
+        if self._tamanho is None:
+            self._tamanho = self.ler_manifesto()['tamanho_particao']
+        return self._tamanho
+
+    def particao_de(self, nome, chave):
+        """Arquivo (dentro da pasta) que guarda a entidade 'chave' da coleção 'nome'."""
+        if nome != 'pedidos':
+            return f'{nome}.json'
+        if chave.isdigit():
+            return f'pedidos-{int(chave) // self.tamanho_particao:06d}.json'
+        return 'pedidos-outros.json'
+
+    def chaves_da_particao(self, colecao, nome, arquivo):
+        """IDs em memória que pertencem à partição (sem percorrer toda a coleção quando é uma faixa)."""
+        if nome == 'pedidos' and arquivo != 'pedidos-outros.json':
+            inicio = int(arquivo[len('pedidos-'):-len('.json')]) * self.tamanho_particao
+            return [str(i) for i in range(inicio, inicio + self.tamanho_particao) if str(i) in colecao]
+        return [chave for chave in colecao.keys() if self.particao_de(nome, chave) == arquivo]
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def ler(self, adiar=(), processos=1, arquivos=None):
+        """
+        Objetivo: Ler o DB (ou só as partições em 'arquivos') como dicionários JSON.
+        Função: Retorna (data, manifesto). Com 'processos' > 1, as partições são lidas
+                e decodificadas em paralelo num pool de processos; o resultado chega
+                a este processo já como dicionários, na ordem das partições.
+        """
+        manifesto = self.ler_manifesto()
+        self._tamanho = manifesto['tamanho_particao']
+        if arquivos is None:
+            arquivos = manifesto['geracoes']
+        arquivos = sorted(arquivos) # 'pedidos-000000' ... 'pedidos-outros': ordem crescente de ID
+        nomes = [colecao_do_arquivo(arquivo) for arquivo in arquivos]
+        caminhos = [os.path.join(self.pasta, arquivo) for arquivo in arquivos]
+
+        if processos > 1 and len(arquivos) > 1:
+            with ProcessPoolExecutor(min(processos, len(arquivos))) as pool:
+                partes = list(pool.map(_ler_particao, caminhos, nomes, [adiar] * len(arquivos)))
+        else:
+            partes = [_ler_particao(caminho, nome, adiar) for caminho, nome in zip(caminhos, nomes)]
+
+        data = {nome: {} for nome in COLECOES}
+        for nome, parte in zip(nomes, partes):
+            data[nome].update(parte)
+        data.update(manifesto['extras'])
+        return data, manifesto
+
+    def ler_particao(self, arquivo, adiar=()):
+        """Entidades de uma única partição ({} se ela não existe)."""
+        return _ler_particao(os.path.join(self.pasta, arquivo), colecao_do_arquivo(arquivo), adiar)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def escrever(self, data):
+        """Grava a pasta inteira a partir dos dados brutos (conversão de um data.json)."""
+        os.makedirs(self.pasta, exist_ok=True)
+        self._tamanho = self._tamanho_padrao
+        particoes = {'clientes.json': [], 'produtos.json': []} # Sempre presentes, mesmo vazias
+        for nome in COLECOES:
+            for chave, d in data[nome].items():
+                particoes.setdefault(self.particao_de(nome, chave), []).append(fragmento(chave, d))
+        extras = {nome: valor for nome, valor in data.items() if nome not in COLECOES}
+        self._gravar_particoes(particoes, extras, tudo=True)
+        self.invalidar()
+
+    def _gravar_particoes(self, textos, extras, tudo=False):
+        """
+        Grava o manifesto (com a nova geração das partições em 'textos') e depois as
+        partições. Partições vazias saem do manifesto e do disco (exceto as fixas).
+        Com 'tudo', as partições antigas que não estão em 'textos' também saem.
+        """
+        manifesto = self.ler_manifesto()
+        geracoes = {} if tudo else dict(manifesto['geracoes'])
+        antigas = set(manifesto['geracoes'])
+        removidas = []
+        for arquivo, linhas in textos.items():
+            if not linhas and arquivo.startswith('pedidos-'):
+                geracoes.pop(arquivo, None)
+                removidas.append(arquivo)
+            else:
+                geracoes[arquivo] = manifesto['geracoes'].get(arquivo, 0) + 1
+        if tudo:
+            removidas.extend(antigas - set(geracoes))
+
+        escrever_atomico(self.manifesto, json.dumps({
+            'tamanho_particao': self.tamanho_particao,
+            'extras': extras,
+            'geracoes': geracoes,
+        }, separators=(',', ':')))
+        for arquivo, linhas in textos.items():
+            if arquivo not in removidas:
+                nome = colecao_do_arquivo(arquivo)
+                escrever_atomico(os.path.join(self.pasta, arquivo), montar_snapshot({nome: ',\n'.join(linhas)}, {}))
+        for arquivo in removidas:
+            try:
+                os.remove(os.path.join(self.pasta, arquivo))
+            except FileNotFoundError:
+                pass
+        self.geracoes = geracoes
+
+    # ------------------------------------------------------------------
+    # Interface do snapshot incremental (usada por database.py)
+    # ------------------------------------------------------------------
+
+    def invalidar(self, dono=None):
+        """Descarta os fragmentos; as partições são montadas de novo quando precisarem ser gravadas."""
+        self.dono = dono
+        self._linhas = {}
+        self._extras = None
+
+    def possui_cache(self, dono, arquivo):
+        """Se os fragmentos da partição estão em memória (comparação de texto na sincronização)."""
+        return self.dono is dono and arquivo in self._linhas
+
+    def linha(self, nome, chave):
+        linhas = self._linhas.get(self.particao_de(nome, chave))
+        return None if linhas is None else linhas.get(chave)
+
+    def sincronizar(self, nome, chave, linha):
+        """Registra que a partição em disco (gravada por outro processo) já contém 'linha' ('None' = removida)."""
+        linhas = self._linhas.get(self.particao_de(nome, chave))
+        if linhas is None:
+            return
+        if linha is None:
+            linhas.pop(chave, None)
+        else:
+            linhas[chave] = linha
+
+    def _montar(self, dados, nome, arquivo):
+        """Fragmentos de todas as entidades da partição (reaproveitando as linhas lidas do disco)."""
+        colecao = dados[nome]
+        linhas = self._linhas[arquivo] = {}
+        for chave in self.chaves_da_particao(colecao, nome, arquivo):
+            bruto = colecao.bruto(chave)
+            if isinstance(bruto, str):
+                linhas[chave] = json.dumps(chave) + ': ' + bruto
+            else:
+                linhas[chave] = fragmento(chave, bruto if bruto is not None else colecao[chave].to_json())
+        return linhas
+
+    def gravar(self, dados, alteracoes, extras, completo=False):
+        """
+        Grava as partições alteradas e retorna quantas entidades foram serializadas.
+        'alteracoes' segue o formato {'clientes': (sujos, removidos), ...}. Com
+        'completo', todas as partições são regravadas (o disco pode não
+        corresponder aos objetos em memória, ex.: DB montado fora da carga).
+        """
+        gravadas = 0
+        alteradas = set()
+        if completo:
+            self._linhas = {}
+            alteradas = {'clientes.json', 'produtos.json'}
+            for nome in COLECOES:
+                alteradas.update(self.particao_de(nome, chave) for chave in dados[nome].keys())
+
+        pendentes = {} # partição -> [(nome, chave, removida)]
+        for nome in COLECOES:
+            sujos, removidos = alteracoes[nome]
+            for chave in removidos:
+                pendentes.setdefault(self.particao_de(nome, chave), []).append((nome, chave, True))
+            for chave in sujos:
+                pendentes.setdefault(self.particao_de(nome, chave), []).append((nome, chave, False))
+
+        for arquivo in alteradas | set(pendentes):
+            nome = colecao_do_arquivo(arquivo)
+            linhas = self._linhas.get(arquivo)
+            if linhas is None: # Montada agora: já reflete as alterações
+                linhas = self._montar(dados, nome, arquivo)
+                gravadas += len(linhas) if completo else len(pendentes.get(arquivo, ()))
+                continue
+            for nome, chave, removida in pendentes.get(arquivo, ()):
+                obj = None if removida else dados[nome].get(chave)
+                if obj is None:
+                    linhas.pop(chave, None)
+                else:
+                    linhas[chave] = fragmento(chave, obj.to_json())
+                gravadas += 1
+        alteradas |= set(pendentes)
+
+        if not alteradas and extras == self._extras:
+            return 0 # As partições no disco já estão atualizadas
+        self._gravar_particoes({arquivo: list(self._linhas[arquivo].values()) for arquivo in alteradas},
+                               extras, tudo=completo)
+        self._extras = extras
+        return gravadas
+
+
+if __name__ == '__main__':
+    # Conversão manual nos dois sentidos (a origem é uma pasta particionada ou um snapshot):
+    #     python3 -m persistencia.particoes data.json data.particoes
+    #     python3 -m persistencia.particoes data.particoes data.json
+    import argparse
+    from .snapshot import escrever_snapshot
+
+    parser = argparse.ArgumentParser(description="Converte entre o snapshot único (data.json) e a pasta particionada.")
+    parser.add_argument('origem')
+    parser.add_argument('destino')
+    parser.add_argument('--tamanho', type=int, default=TAMANHO_PARTICAO, help="IDs de pedido por partição")
+    parser.add_argument('--formato', choices=('json', 'binario'), help="Formato do snapshot de destino")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.origem):
+        data, manifesto = ArmazemParticionado(args.origem).ler()
+        escrever_snapshot(args.destino, data, args.formato)
+        print(f"{args.origem} ({len(manifesto['geracoes'])} partições) -> {args.destino}")
+    else:
+        armazem = ArmazemParticionado(args.destino, args.tamanho)
+        armazem.escrever(ler_snapshot(args.origem))
+        print(f"{args.origem} -> {args.destino} ({len(armazem.geracoes)} partições)")
@@ -0,0 +1,237 @@
+# Arquivo: persistencia/snapshot.py - Leitura e escrita segura do snapshot (data.json)
+
+import json
+import os
+import threading
+
+from monitoramento import metricas
+
+
+# Formato em que o snapshot é gravado: 'json' (texto, uma entidade por linha) ou
+# 'binario' (ver persistencia/binario.py). Na leitura o formato é detectado pelo
+# cabeçalho do arquivo, então trocar a opção converte o data.json no próximo
+# salvamento completo.
+FORMATO_SNAPSHOT = os.environ.get('LOJA_FORMATO_SNAPSHOT', 'json')
+
+
+def escrever_atomico(caminho, conteudo):
+    """
+    Objetivo: Gravar um arquivo inteiro sem nunca deixar uma versão pela metade no disco.
+    Função: Escreve em um arquivo temporário no mesmo diretório, força o fsync e
+            troca pelo destino com 'os.replace' (operação atômica).
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    temporario = f"{caminho}.tmp-{os.getpid()}-{threading.get_ident()}"
+    modo = 'wb' if isinstance(conteudo, bytes) else 'w'
+    try:
+        with open(temporario, modo) as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+            tamanho = os.fstat(f.fileno()).st_size
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    metricas.BYTES_GRAVADOS.incrementar(tamanho, destino='snapshot')
+
+    # Garante que a troca de nome também foi persistida (quando o SO permite)
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+COLECOES = ('clientes', 'produtos', 'pedidos')
+
+
+_decodificador = json.JSONDecoder()
+
+
+def ler_snapshot(caminho, adiar=()):
+    """
+    Objetivo: Ler o snapshot bruto (dicionários JSON) do disco.
+    Função: As coleções listadas em 'adiar' não são decodificadas: cada entidade
+            fica como o texto da sua linha, para ser decodificada só quando usada.
+            O arquivo é lido linha a linha (layout de uma entidade por linha);
+            arquivos no formato antigo (indent=4) são lidos com json.load.
+            Um snapshot binário é detectado pelo cabeçalho e vem inteiro como
+            dicionários (os objetos continuam sendo criados só quando usados).
+    """
+    with open(caminho, 'rb') as f:
+        inicio = f.read(8)
+    if inicio == b'LOJABIN1':
+        from .binario import ler_binario
+        return ler_binario(caminho)
+    if adiar:
+        try:
+            return _ler_em_linhas(caminho, adiar)
+        except (ValueError, KeyError):
+            pass # Layout antigo ou inesperado: usa a leitura completa
+    with open(caminho, 'r') as f:
+        return json.load(f)
+
+
+def _ler_em_linhas(caminho, adiar):
+    data = {}
+    secao = None
+    with open(caminho, 'r') as f:
+        if f.readline() != '{\n':
+            raise ValueError("Snapshot fora do layout de uma entidade por linha.")
+        for linha in f:
+            linha = linha.rstrip('\n')
+            if secao is None:
+                if linha == '}':
+                    return data
+                nome, fim = _decodificador.raw_decode(linha)
+                resto = linha[fim + 2:].rstrip(',')
+                if nome in COLECOES and resto == '{':
+                    secao = data[nome] = {}
+                    adiada = nome in adiar
+                else:
+                    data[nome] = json.loads(resto)
+            elif linha.startswith('}'):
+                secao = None
+            else:
+                chave, fim = _decodificador.raw_decode(linha)
+                resto = linha[fim + 2:].rstrip(',')
+                secao[chave] = resto if adiada else json.loads(resto)
+    raise ValueError("Snapshot truncado.")
+
+
+def fragmento(chave, data):
+    """Serializa uma entidade como uma linha '"id": {...}' do snapshot."""
+    return json.dumps(chave) + ': ' + json.dumps(data, separators=(',', ':'))
+
+
+def montar_snapshot(segmentos, extras):
+    """
+    Objetivo: Montar o texto do snapshot a partir dos segmentos já serializados.
+    Função: Cada coleção é um segmento com UMA entidade por linha; o resultado
+            continua sendo JSON válido (lido normalmente com json.load).
+    """
+    partes = []
+    for nome in COLECOES:
+        corpo = segmentos.get(nome, '')
+        partes.append(f'{json.dumps(nome)}: {{\n{corpo}\n}}' if corpo else f'{json.dumps(nome)}: {{}}')
+    for nome, valor in extras.items():
+        partes.append(f'{json.dumps(nome)}: {json.dumps(valor, separators=(",", ":"))}')
+    return '{\n' + ',\n'.join(partes) + '\n}\n'
+
+
+def escrever_snapshot(caminho, data, formato=None):
+    """
+    Objetivo: Gravar o snapshot completo (dados brutos) no disco.
+    Função: Usa escrita atômica, para que uma queda no meio da gravação
+            mantenha a versão anterior do arquivo intacta. 'formato' é 'json'
+            ou 'binario' (padrão: FORMATO_SNAPSHOT).
+    """
+    if (formato or FORMATO_SNAPSHOT) == 'binario':
+        from .binario import escrever_binario
+        escrever_binario(caminho, data)
+        return
+    segmentos = {
+        nome: ',\n'.join(fragmento(chave, d) for chave, d in data[nome].items())
+        for nome in COLECOES
+    }
+    extras = {nome: valor for nome, valor in data.items() if nome not in COLECOES}
+    escrever_atomico(caminho, montar_snapshot(segmentos, extras))
+
+
+class SnapshotIncremental:
+    """
+    Classe de Persistência.
+    Objetivo: Regravar o data.json sem reserializar as entidades que não mudaram.
+    Função: Guarda em memória o fragmento (linha JSON) de cada entidade e o texto
+            de cada segmento (coleção). A cada salvamento só as entidades sujas
+            são reserializadas e só os segmentos que as contêm são remontados.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.dono = None # O DB cujos fragmentos estão em memória
+        self._fragmentos = None # {colecao: {id: linha}}
+        self._segmentos = {}
+        self._extras = None
+        self._obsoletos = set() # Coleções com fragmentos trocados por sincronizar()
+
+    def invalidar(self, dono=None):
+        """Descarta os fragmentos; o próximo salvamento serializa tudo de novo."""
+        self.dono = dono
+        self._fragmentos = None
+        self._segmentos = {}
+        self._extras = None
+        self._obsoletos = set()
+
+    def possui_cache(self, dono):
+        return self.dono is dono and self._fragmentos is not None
+
+    def linha(self, nome, chave):
+        """Fragmento em cache de uma entidade (None se ausente)."""
+        return self._fragmentos[nome].get(chave)
+
+    def sincronizar(self, nome, chave, linha):
+        """
+        Registra que o arquivo em disco (gravado por outro processo) já contém 'linha'
+        para a entidade ('None' = removida), sem reserializá-la no próximo salvamento.
+        """
+        if self._fragmentos is None:
+            return
+        if linha is None:
+            self._fragmentos[nome].pop(chave, None)
+        else:
+            self._fragmentos[nome][chave] = linha
+        self._obsoletos.add(nome)
+
+    def gravar(self, dados, alteracoes, extras):
+        """
+        Grava o snapshot e retorna quantas entidades foram serializadas.
+        'alteracoes' segue o formato {'clientes': (sujos, removidos), ...}.
+        """
+        gravadas = 0
+        if self._fragmentos is None:
+            # Primeiro salvamento deste processo: serializa tudo uma única vez
+            self._fragmentos = {}
+            for nome in COLECOES:
+                colecao = dados[nome]
+                fragmentos = self._fragmentos[nome] = {}
+                for chave in colecao.keys():
+                    bruto = colecao.bruto(chave)
+                    if isinstance(bruto, str):
+                        # Entidade nunca acessada: a linha lida do disco é reaproveitada
+                        fragmentos[chave] = json.dumps(chave) + ': ' + bruto
+                        continue
+                    fragmentos[chave] = fragmento(chave, bruto if bruto is not None else colecao[chave].to_json())
+                    gravadas += 1
+            alterados = set(COLECOES)
+        else:
+            alterados = set()
+            for nome in COLECOES:
+                sujos, removidos = alteracoes[nome]
+                fragmentos = self._fragmentos[nome]
+                for chave in removidos:
+                    if fragmentos.pop(chave, None) is not None:
+                        gravadas += 1
+                for chave in sujos:
+                    obj = dados[nome].get(chave)
+                    if obj is not None:
+                        fragmentos[chave] = fragmento(chave, obj.to_json())
+                        gravadas += 1
+                if sujos or removidos:
+                    alterados.add(nome)
+            if not alterados and extras == self._extras:
+                return 0 # O arquivo no disco já está atualizado
+            alterados |= self._obsoletos
+        self._obsoletos = set()
+
+        for nome in alterados:
+            self._segmentos[nome] = ',\n'.join(self._fragmentos[nome].values())
+
+        escrever_atomico(self.caminho, montar_snapshot(self._segmentos, extras))
+        self._extras = extras
+        return gravadas
@@ -0,0 +1,582 @@
+# Arquivo: persistencia/sqlite.py - Motor de armazenamento SQLite (alternativo ao data.json)
+
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from itertools import groupby
+
+from .colecao import Colecao
+
+from core.cliente import Cliente
+from core.produto import Produto
+from core.pedido import Pedido
+from core.item_pedido import ItemPedido, resolver_produto
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS clientes (
+    id       INTEGER PRIMARY KEY,
+    nome     TEXT NOT NULL,
+    cpf      TEXT NOT NULL,
+    endereco TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS produtos (
+    id    INTEGER PRIMARY KEY,
+    nome  TEXT NOT NULL,
+    preco REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pedidos (
+    id         INTEGER PRIMARY KEY,
+    cliente_id INTEGER NOT NULL REFERENCES clientes(id),
+    pago       INTEGER NOT NULL DEFAULT 0,
+    status_pagamento TEXT,
+    pagamento_expira REAL
+);
+CREATE TABLE IF NOT EXISTS itens_pedido (
+    pedido_id  INTEGER NOT NULL REFERENCES pedidos(id) ON DELETE CASCADE,
+    posicao    INTEGER NOT NULL,
+    produto_id INTEGER,
+    nome       TEXT NOT NULL,
+    preco      REAL NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (pedido_id, posicao)
+);
+CREATE TABLE IF NOT EXISTS sequencias (
+    nome  TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alteracoes (
+    seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+    colecao  TEXT NOT NULL,
+    entidade INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos(cliente_id);
+CREATE INDEX IF NOT EXISTS idx_pedidos_pago ON pedidos(pago);
+CREATE INDEX IF NOT EXISTS idx_itens_produto ON itens_pedido(produto_id);
+CREATE INDEX IF NOT EXISTS idx_clientes_cpf ON clientes(cpf);
+"""
+
+
+# Quantas entradas da tabela 'alteracoes' são mantidas para os outros workers
+RETENCAO_ALTERACOES = 10000
+
+
+class ArmazemSQLite:
+    """
+    Classe de Persistência.
+    Objetivo: Guardar clientes, produtos, pedidos e itens em tabelas SQLite.
+    Função: Mantém a conexão (compartilhada entre threads, protegida por lock) e
+            grava cada lote de alterações em UMA transação pequena.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.lock = threading.RLock()
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.execute("PRAGMA foreign_keys=ON")
+        with self.lock, self.conexao:
+            self.conexao.executescript(ESQUEMA)
+            colunas = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(pedidos)")}
+            if 'status_pagamento' not in colunas: # Banco criado antes do pagamento assíncrono
+                self.conexao.execute("ALTER TABLE pedidos ADD COLUMN status_pagamento TEXT")
+            if 'pagamento_expira' not in colunas: # Banco criado antes do prazo do pagamento pendente
+                self.conexao.execute("ALTER TABLE pedidos ADD COLUMN pagamento_expira REAL")
+
+        self.clientes = TabelaClientes(self)
+        self.produtos = TabelaProdutos(self)
+        self.pedidos = TabelaPedidos(self)
+        self.sequencias = Sequencias(self)
+        # Última entrada de 'alteracoes' já refletida nos objetos em memória
+        self.ultima_alteracao = self.consultar("SELECT COALESCE(MAX(seq), 0) FROM alteracoes")[0][0]
+
+    def vazio(self):
+        with self.lock:
+            return self.conexao.execute("SELECT COUNT(*) FROM sequencias").fetchone()[0] == 0
+
+    def consultar(self, sql, parametros=()):
+        with self.lock:
+            return self.conexao.execute(sql, parametros).fetchall()
+
+    def como_dados(self):
+        """Retorna o dicionário 'DB' no mesmo formato usado pelo restante do sistema."""
+        return {
+            'clientes': self.clientes,
+            'produtos': self.produtos,
+            'pedidos': self.pedidos,
+            'next_ids': self.sequencias,
+        }
+
+    def alteracoes_desde(self, seq):
+        """
+        Objetivo: Listar o que outros processos gravaram depois de 'seq'.
+        Função: Retorna [(seq, coleção, id), ...], ou None se as entradas seguintes
+                a 'seq' já foram descartadas (é preciso recarregar tudo).
+        """
+        with self.lock:
+            menor = self.conexao.execute("SELECT MIN(seq) FROM alteracoes").fetchone()[0]
+            if menor is not None and menor > seq + 1 and seq > 0:
+                return None
+            return self.conexao.execute(
+                "SELECT seq, colecao, entidade FROM alteracoes WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def gravar(self, alteracoes):
+        """
+        Objetivo: Persistir as alterações rastreadas numa única transação.
+        Função: Recebe {'clientes': (sujos, removidos), ...} (ver Colecao) e grava
+                só as linhas afetadas. Um pedido cujo único campo alterado foi
+                'pago' vira um UPDATE simples. Retorna quantas entidades gravou.
+        """
+        alteradas = []
+        with self.lock, self.conexao:
+            for nome in ('produtos', 'clientes', 'pedidos'):
+                tabela = getattr(self, nome)
+                sujos, _ = alteracoes[nome]
+                for chave, campos in sujos.items():
+                    obj = tabela._itens.get(chave)
+                    if obj is None:
+                        continue
+                    if nome == 'pedidos' and campos == {'pago'}:
+                        self.conexao.execute("UPDATE pedidos SET pago = ? WHERE id = ?", (int(obj.pago), int(chave)))
+                    else:
+                        tabela.gravar_linha(chave, obj)
+                    alteradas.append((nome, int(chave)))
+
+            for nome in ('pedidos', 'clientes', 'produtos'):
+                _, removidos = alteracoes[nome]
+                for chave in removidos:
+                    self.conexao.execute(f"DELETE FROM {nome} WHERE id = ?", (int(chave),))
+                    alteradas.append((nome, int(chave)))
+            self.sequencias.gravar_pendentes()
+
+            # Registro das alterações, lido pelos outros workers (ver database.sincronizar)
+            if alteradas:
+                self.conexao.executemany("INSERT INTO alteracoes (colecao, entidade) VALUES (?, ?)", alteradas)
+                self.ultima_alteracao = self.conexao.execute("SELECT MAX(seq) FROM alteracoes").fetchone()[0]
+                self.conexao.execute(
+                    "DELETE FROM alteracoes WHERE seq <= ?", (self.ultima_alteracao - RETENCAO_ALTERACOES,)
+                )
+
+        for nome in ('clientes', 'produtos', 'pedidos'):
+            getattr(self, nome)._novos.clear()
+        return len(alteradas)
+
+    def migrar_de_json(self, data):
+        """
+        Objetivo: Importar de uma vez um snapshot do data.json (dados brutos).
+        Função: Insere tudo numa única transação; usado quando o arquivo SQLite
+                ainda não existe.
+        """
+        with self.lock, self.conexao:
+            c = self.conexao
+            c.executemany(
+                "INSERT OR REPLACE INTO produtos (id, nome, preco) VALUES (?, ?, ?)",
+                ((int(pid), d['nome'], d['preco']) for pid, d in data['produtos'].items()),
+            )
+            c.executemany(
+                "INSERT OR REPLACE INTO clientes (id, nome, cpf, endereco) VALUES (?, ?, ?, ?)",
+                ((int(cid), d['nome'], d['cpf'], d['endereco']) for cid, d in data['clientes'].items()),
+            )
+            for pid, d in data['pedidos'].items():
+                if d.get('cliente_id') not in data['clientes']:
+                    print(f"AVISO: Pedido {pid} sem cliente válido. Ignorando na migração.")
+                    continue
+                c.execute(
+                    "INSERT OR REPLACE INTO pedidos (id, cliente_id, pago, status_pagamento, pagamento_expira) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (int(pid), int(d['cliente_id']), int(d.get('pago', False)), d.get('status_pagamento'),
+                     d.get('pagamento_expira')),
+                )
+                c.executemany(
+                    "INSERT INTO itens_pedido (pedido_id, posicao, produto_id, nome, preco, quantidade) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (_linha_item(int(pid), pos, item, data['produtos']) for pos, item in enumerate(d['itens'])),
+                )
+            for nome, valor in data.get('next_ids', {}).items():
+                c.execute("INSERT OR REPLACE INTO sequencias (nome, valor) VALUES (?, ?)", (nome, valor))
+        self.sequencias.recarregar()
+
+
+def _linha_item(pedido_id, posicao, item, produtos):
+    """Converte um item do data.json (formato novo ou antigo) em linha de itens_pedido."""
+    if 'produto_id' in item:
+        produto = produtos.get(item['produto_id'], {})
+        nome = produto.get('nome', f"Produto {item['produto_id']} (removido)")
+        return (pedido_id, posicao, int(item['produto_id']), nome, item['preco'], item['quantidade'])
+    embutido = item['produto_data']
+    return (pedido_id, posicao, None, embutido['nome'], embutido['preco'], item['quantidade'])
+
+
+class TabelaSQLite(Colecao):
+    """
+    Classe Base (Mapeamento).
+    Objetivo: Comportar-se como o dicionário {id: objeto} do DB, mas buscando as
+              linhas no SQLite sob demanda (nada é carregado na inicialização).
+    Função: O dicionário interno da Colecao funciona como mapa de identidade (o
+            mesmo ID devolve sempre o mesmo objeto); as inserções ficam pendentes
+            até o próximo salvamento.
+    """
+    tabela = None
+    tipo = None
+    colunas_filtro = () # Colunas aceitas como filtro em pagina()
+
+    def __init__(self, armazem):
+        super().__init__(self.tipo)
+        self.armazem = armazem
+        self._novos = set() # IDs inseridos que ainda não estão no arquivo
+
+    # --- Métodos a implementar nas subclasses ---
+    def _objeto_da_linha(self, linha):
+        raise NotImplementedError
+
+    def gravar_linha(self, entidade_id, obj):
+        raise NotImplementedError
+
+    def _buscar(self, entidade_id):
+        linhas = self.armazem.consultar(f"SELECT * FROM {self.tabela} WHERE id = ?", (entidade_id,))
+        return self._objeto_da_linha(linhas[0]) if linhas else None
+
+    def ler_do_arquivo(self, chave):
+        """Lê a versão gravada da entidade, sem passar pelo mapa de identidade (None se não existe)."""
+        return self._buscar(int(chave))
+
+    def _existe_no_arquivo(self, chave):
+        try:
+            entidade_id = int(chave)
+        except (TypeError, ValueError):
+            return False
+        return bool(self.armazem.consultar(f"SELECT 1 FROM {self.tabela} WHERE id = ?", (entidade_id,)))
+
+    # --- Protocolo de dicionário ---
+    def __getitem__(self, chave):
+        obj = self._itens.get(chave)
+        if obj is None:
+            if chave in self._removidos:
+                raise KeyError(chave)
+            try:
+                entidade_id = int(chave)
+            except (TypeError, ValueError):
+                raise KeyError(chave)
+            obj = self._buscar(entidade_id)
+            if obj is None:
+                raise KeyError(chave)
+            self.anexar_carregado(chave, obj)
+        return obj
+
+    def __setitem__(self, chave, obj):
+        if chave not in self._itens and not self._existe_no_arquivo(chave):
+            self._novos.add(chave)
+        super().__setitem__(chave, obj)
+
+    def __delitem__(self, chave):
+        self[chave] # Materializa (ou gera KeyError para IDs inexistentes)
+        super().__delitem__(chave)
+        self._novos.discard(chave)
+
+    def sincronizar_remocao(self, chave):
+        super().sincronizar_remocao(chave)
+        self._novos.discard(chave)
+
+    def liberar(self, chaves):
+        """
+        Tira do mapa de identidade objetos já gravados e não alterados, que voltam a
+        ser lidos do banco se forem acessados de novo (ex.: após cada lote de uma
+        importação em massa, para a memória não crescer com o arquivo importado).
+        """
+        for chave in chaves:
+            if chave in self._novos or chave in self._sujos:
+                continue
+            obj = self._itens.pop(chave, None)
+            if obj is not None:
+                obj._ouvinte = None
+
+    def __iter__(self):
+        for (entidade_id,) in self.armazem.consultar(f"SELECT id FROM {self.tabela} ORDER BY id"):
+            chave = str(entidade_id)
+            if chave not in self._removidos:
+                yield chave
+        yield from sorted(self._novos, key=int)
+
+    def __len__(self):
+        no_arquivo = self.armazem.consultar(f"SELECT COUNT(*) FROM {self.tabela}")[0][0]
+        return no_arquivo + len(self._novos) - len(self._removidos)
+
+    def __contains__(self, chave):
+        try:
+            self[chave]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        """Percorre a tabela com uma única consulta (evita uma consulta por ID)."""
+        for linha in self.armazem.consultar(f"SELECT * FROM {self.tabela} ORDER BY id"):
+            chave = str(linha[0])
+            if chave in self._removidos:
+                continue
+            obj = self._itens.get(chave)
+            if obj is None:
+                obj = self._objeto_da_linha(linha)
+                self.anexar_carregado(chave, obj)
+            yield chave, obj
+        for chave in sorted(self._novos, key=int):
+            yield chave, self._itens[chave]
+
+    def values(self):
+        for _, obj in self.items():
+            yield obj
+
+    def valores_colunas(self, colunas):
+        """
+        Gera (id, (valores das 'colunas')) de toda a tabela com uma consulta que lê só
+        essas colunas (ex.: para montar os índices de persistencia/indices.py).
+        Objetos já carregados em memória usam os valores atuais do objeto.
+        """
+        linhas = self.armazem.consultar(f"SELECT id, {', '.join(colunas)} FROM {self.tabela} ORDER BY id")
+        for linha in linhas:
+            chave = str(linha[0])
+            if chave in self._removidos:
+                continue
+            obj = self._itens.get(chave)
+            if obj is not None:
+                yield chave, tuple(self.valor_campo(obj, coluna) for coluna in colunas)
+            else:
+                yield chave, linha[1:]
+        for chave in sorted(self._novos, key=int):
+            obj = self._itens[chave]
+            yield chave, tuple(self.valor_campo(obj, coluna) for coluna in colunas)
+
+    def pagina(self, apos=None, limite=20, filtros=None):
+        """
+        Paginação por cursor direto no SQLite ('WHERE id > ? ... ORDER BY id LIMIT ?'),
+        usando a chave primária e os índices: só as linhas da página são lidas.
+        Os 'filtros' viram condições SQL (apenas colunas listadas em 'colunas_filtro').
+        """
+        filtros = filtros or {}
+        for campo in filtros:
+            if campo not in self.colunas_filtro:
+                raise ValueError(f"Filtro não suportado em {self.tabela}: {campo}")
+        condicoes = ''.join(f" AND {campo} = ?" for campo in filtros)
+        valores = tuple(int(valor) for valor in filtros.values())
+
+        resultado = []
+        minimo = cursor = -1 if apos is None else int(apos)
+        lote = limite + 1
+        while len(resultado) <= limite:
+            linhas = self.armazem.consultar(
+                f"SELECT * FROM {self.tabela} WHERE id > ?{condicoes} ORDER BY id LIMIT ?",
+                (cursor,) + valores + (lote,),
+            )
+            for linha in linhas:
+                cursor = linha[0]
+                chave = str(cursor)
+                if chave in self._removidos:
+                    continue
+                obj = self._itens.get(chave)
+                if obj is None:
+                    obj = self._objeto_da_linha(linha)
+                    self.anexar_carregado(chave, obj)
+                elif not all(self.valor_campo(obj, c) == v for c, v in filtros.items()):
+                    continue # Alterado em memória e ainda não salvo
+                resultado.append((chave, obj))
+                if len(resultado) > limite:
+                    break
+            if len(linhas) < lote:
+                break
+
+        # Inserções ainda não gravadas no arquivo (IDs sempre maiores que os do arquivo)
+        for chave in sorted(self._novos, key=int):
+            obj = self._itens[chave]
+            if int(chave) > minimo and all(self.valor_campo(obj, c) == v for c, v in filtros.items()):
+                resultado.append((chave, obj))
+
+        if len(resultado) > limite:
+            return resultado[:limite], resultado[limite - 1][0]
+        return resultado, None
+
+
+class TabelaClientes(TabelaSQLite):
+    tabela = 'clientes'
+    tipo = 'cliente'
+
+    def _objeto_da_linha(self, linha):
+        cid, nome, cpf, endereco = linha
+        return Cliente(nome, cpf, endereco, str(cid))
+
+    def gravar_linha(self, entidade_id, obj):
+        self.armazem.conexao.execute(
+            "INSERT INTO clientes (id, nome, cpf, endereco) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET nome = excluded.nome, cpf = excluded.cpf, "
+            "endereco = excluded.endereco",
+            (int(entidade_id), obj.nome, obj.cpf, obj.endereco),
+        )
+
+
+class TabelaProdutos(TabelaSQLite):
+    tabela = 'produtos'
+    tipo = 'produto'
+
+    def _objeto_da_linha(self, linha):
+        pid, nome, preco = linha
+        return Produto(nome, preco, str(pid))
+
+    def gravar_linha(self, entidade_id, obj):
+        self.armazem.conexao.execute(
+            "INSERT INTO produtos (id, nome, preco) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET nome = excluded.nome, preco = excluded.preco",
+            (int(entidade_id), obj.nome, obj.preco),
+        )
+
+
+class TabelaPedidos(TabelaSQLite):
+    tabela = 'pedidos'
+    tipo = 'pedido'
+    colunas_filtro = ('cliente_id', 'pago')
+
+    def _itens_do_pedido(self, pedido_id):
+        return self.armazem.consultar(
+            "SELECT produto_id, nome, preco, quantidade FROM itens_pedido "
+            "WHERE pedido_id = ? ORDER BY posicao",
+            (pedido_id,),
+        )
+
+    def _montar(self, linha, itens):
+        pid, cliente_id, pago, status_pagamento, pagamento_expira = linha
+        pedido = Pedido(self.armazem.clientes[str(cliente_id)], str(pid))
+        pedido.pago = bool(pago)
+        pedido.status_pagamento = status_pagamento
+        pedido.pagamento_expira = pagamento_expira
+        for produto_id, nome, preco, quantidade in itens:
+            # Itens apontam para a instância compartilhada do catálogo
+            produto_id = None if produto_id is None else str(produto_id)
+            produto = resolver_produto(self.armazem.produtos, produto_id, nome, preco)
+            pedido._anexar_item(ItemPedido(produto, quantidade, preco))
+        return pedido
+
+    def _objeto_da_linha(self, linha):
+        return self._montar(linha, self._itens_do_pedido(linha[0]))
+
+    @staticmethod
+    def _resumo_objeto(pedido):
+        return pedido.cliente.id, bool(pedido.pago), [(i.produto.id, i.quantidade, i.subtotal) for i in pedido.itens]
+
+    def resumos_por_pedido(self):
+        """
+        Objetivo: Gerar (id, cliente_id, pago, linhas) de todos os pedidos sem materializá-los,
+                  com 'linhas' = [(produto_id, quantidade, subtotal), ...] (ver relatorios/totais_loja.py).
+        Função: Lê pedidos e itens numa única consulta, agrupando as linhas por pedido;
+                pedidos já carregados em memória (possivelmente alterados) usam o objeto.
+        """
+        linhas = self.armazem.consultar(
+            "SELECT p.id, p.cliente_id, p.pago, i.produto_id, i.quantidade, i.preco FROM pedidos p "
+            "LEFT JOIN itens_pedido i ON i.pedido_id = p.id ORDER BY p.id, i.posicao"
+        )
+        for pid, grupo in groupby(linhas, key=lambda linha: linha[0]):
+            chave = str(pid)
+            if chave in self._removidos:
+                continue
+            obj = self._itens.get(chave)
+            if obj is not None:
+                yield chave, *self._resumo_objeto(obj)
+                continue
+            grupo = list(grupo)
+            itens = [
+                (None if produto_id is None else str(produto_id), quantidade, preco * quantidade)
+                for _, _, _, produto_id, quantidade, preco in grupo if quantidade is not None
+            ]
+            yield chave, str(grupo[0][1]), bool(grupo[0][2]), itens
+        for chave in sorted(self._novos, key=int):
+            obj = self._itens[chave]
+            yield chave, *self._resumo_objeto(obj)
+
+    def gravar_linha(self, entidade_id, obj):
+        c = self.armazem.conexao
+        pid = int(entidade_id)
+        c.execute(
+            "INSERT INTO pedidos (id, cliente_id, pago, status_pagamento, pagamento_expira) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET cliente_id = excluded.cliente_id, pago = excluded.pago, "
+            "status_pagamento = excluded.status_pagamento, pagamento_expira = excluded.pagamento_expira",
+            (pid, int(obj.cliente.id), int(obj.pago), obj.status_pagamento, obj.pagamento_expira),
+        )
+        c.execute("DELETE FROM itens_pedido WHERE pedido_id = ?", (pid,))
+        c.executemany(
+            "INSERT INTO itens_pedido (pedido_id, posicao, produto_id, nome, preco, quantidade) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (pid, pos, None if item.produto.id is None else int(item.produto.id),
+                 item.produto.nome, item.preco_unitario, item.quantidade)
+                for pos, item in enumerate(obj.itens)
+            ),
+        )
+
+
+class Sequencias(MutableMapping):
+    """
+    Classe de Mapeamento.
+    Objetivo: Substituir o dicionário DB['next_ids'] mantendo o mesmo uso
+              (DB['next_ids']['pedido'] += 1), gravado junto da próxima transação.
+    """
+    def __init__(self, armazem):
+        self.armazem = armazem
+        self._alteradas = set()
+        self.recarregar()
+
+    def recarregar(self):
+        self._valores = dict(self.armazem.consultar("SELECT nome, valor FROM sequencias"))
+
+    def sincronizar(self):
+        """Lê os valores gravados por outros processos, sem perder os ainda não gravados aqui."""
+        for nome, valor in self.armazem.consultar("SELECT nome, valor FROM sequencias"):
+            self._valores[nome] = max(valor, self._valores.get(nome, valor))
+
+    def __getitem__(self, nome):
+        return self._valores[nome]
+
+    def __setitem__(self, nome, valor):
+        self._valores[nome] = valor
+        self._alteradas.add(nome)
+
+    def __delitem__(self, nome):
+        raise TypeError("Sequências não podem ser removidas.")
+
+    def __iter__(self):
+        return iter(self._valores)
+
+    def __len__(self):
+        return len(self._valores)
+
+    def gravar_pendentes(self):
+        """Grava as sequências alteradas (chamado dentro da transação do armazém)."""
+        for nome in self._alteradas:
+            self.armazem.conexao.execute(
+                "INSERT OR REPLACE INTO sequencias (nome, valor) VALUES (?, ?)", (nome, self._valores[nome])
+            )
+        self._alteradas.clear()
+
+
+if __name__ == '__main__':
+    # Migração manual: python3 -m persistencia.sqlite data.json data.db
+    import sys
+    from .snapshot import ler_snapshot
+
+    if len(sys.argv) != 3:
+        print("Uso: python3 -m persistencia.sqlite <data.json> <arquivo.db>")
+        sys.exit(1)
+    armazem = ArmazemSQLite(sys.argv[2])
+    armazem.migrar_de_json(ler_snapshot(sys.argv[1]))
+    print(f"Migração concluída: {len(armazem.clientes)} clientes, "
+          f"{len(armazem.produtos)} produtos, {len(armazem.pedidos)} pedidos.")
@@ -0,0 +1,285 @@
+# Arquivo: relatorios/analise_vendas.py - Motor de análise de vendas em colunas (NumPy)
+
+try:
+    import numpy as np
+except ImportError: # Dependência opcional: só os relatórios precisam dela
+    np = None
+
+import database
+from monitoramento import metricas
+from persistencia.colecao import ObservadorColecao
+
+
+def numpy_disponivel():
+    return np is not None
+
+
+class ColunaCrescente:
+    """
+    Classe Auxiliar.
+    Objetivo: Array NumPy que aceita inserções no final em tempo amortizado O(1).
+    Função: Reserva capacidade extra e dobra o buffer quando ele enche; 'dados'
+            devolve apenas a parte preenchida (sem cópia).
+    """
+    def __init__(self, tipo, capacidade=1024):
+        self._buffer = np.zeros(capacidade, dtype=tipo)
+        self.tamanho = 0
+
+    def _garantir(self, extra):
+        necessario = self.tamanho + extra
+        if necessario > len(self._buffer):
+            novo = np.zeros(max(necessario, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            novo[:self.tamanho] = self._buffer[:self.tamanho]
+            self._buffer = novo
+
+    def estender(self, valores):
+        valores = np.asarray(valores, dtype=self._buffer.dtype)
+        self._garantir(len(valores))
+        self._buffer[self.tamanho:self.tamanho + len(valores)] = valores
+        self.tamanho += len(valores)
+
+    @property
+    def dados(self):
+        return self._buffer[:self.tamanho]
+
+    def manter(self, mascara):
+        """Descarta as posições em que 'mascara' é False, no próprio buffer (mantendo a ordem)."""
+        restantes = self.dados[mascara]
+        self._buffer[:len(restantes)] = restantes
+        self.tamanho = len(restantes)
+
+
+# Campos do Pedido que mudam as suas linhas ('*' = pedido inteiro sincronizado de outro processo)
+_CAMPOS_DAS_LINHAS = frozenset({'itens', 'cliente', '*'})
+
+
+class MotorAnalise(ObservadorColecao):
+    """
+    Classe de Relatório.
+    Objetivo: Responder perguntas agregadas de vendas (receita por produto, por
+              cliente, pago x aberto, melhores clientes) sem percorrer os objetos
+              Pedido/ItemPedido a cada consulta.
+    Função: Mantém uma linha por ItemPedido em colunas NumPy (pedido, cliente,
+            produto, quantidade, preço, pago, válida). Observa DB['pedidos'] e
+            atualiza as colunas a cada pedido inserido, pago, alterado ou removido:
+            um pedido com o mesmo número de itens é regravado no lugar; senão, as
+            linhas antigas são invalidadas e as novas vão para o fim. Quando as
+            inválidas passam das válidas, as colunas são compactadas. As linhas
+            dos pedidos arquivados (persistencia/arquivo.py) entram na montagem
+            e não mudam mais.
+    """
+    def __init__(self, pedidos, arquivo=None):
+        if np is None:
+            raise RuntimeError("Os relatórios de vendas precisam do NumPy (pip install numpy).")
+        self.arquivo = arquivo
+        self.ao_recarregar(pedidos)
+        pedidos.observar(self)
+
+    def ao_recarregar(self, pedidos):
+        """Monta as colunas do zero a partir de todos os pedidos."""
+        self.pedido_id = ColunaCrescente(np.int64)
+        self.cliente_id = ColunaCrescente(np.int64)
+        self.produto_id = ColunaCrescente(np.int64) # -1 = produto sem ID (formato antigo)
+        self.quantidade = ColunaCrescente(np.int64)
+        self.preco = ColunaCrescente(np.float64)
+        self.pago = ColunaCrescente(np.bool_)
+        self.valida = ColunaCrescente(np.bool_) # Linhas de versões antigas de um pedido
+        self._faixas = {} # pedido_id -> (início, fim) das suas linhas atuais
+        self._invalidas = 0
+
+        arquivo = self.arquivo
+        if arquivo is not None:
+            arquivo.atualizar()
+        for chave, pedido in pedidos.items():
+            if arquivo is not None and arquivo.contem(chave, atualizar=False):
+                continue # Cópia deixada por um arquivamento interrompido: entra pelo arquivo
+            self._anexar(chave, pedido)
+        if arquivo is not None:
+            for chave, data in arquivo.percorrer():
+                self._anexar_arquivado(chave, data)
+
+    # ------------------------------------------------------------------
+    # Manutenção incremental
+    # ------------------------------------------------------------------
+
+    def _anexar(self, chave, pedido):
+        itens = pedido.itens
+        n = len(itens)
+        inicio = self.pedido_id.tamanho
+        self.pedido_id.estender([int(chave)] * n)
+        self.cliente_id.estender([int(pedido.cliente.id)] * n)
+        self.produto_id.estender([-1 if i.produto.id is None else int(i.produto.id) for i in itens])
+        self.quantidade.estender([i.quantidade for i in itens])
+        self.preco.estender([i.preco_unitario for i in itens])
+        self.pago.estender([bool(pedido.pago)] * n)
+        self.valida.estender([True] * n)
+        self._faixas[chave] = (inicio, inicio + n)
+
+    def _anexar_arquivado(self, chave, data):
+        """Linhas de um pedido do arquivo morto, lidas do JSON (pago e imutável: sem faixa)."""
+        itens = data['itens']
+        n = len(itens)
+        self.pedido_id.estender([int(chave)] * n)
+        self.cliente_id.estender([int(data['cliente_id'])] * n)
+        self.produto_id.estender([int(i['produto_id']) if 'produto_id' in i else -1 for i in itens])
+        self.quantidade.estender([i['quantidade'] for i in itens])
+        self.preco.estender([i['preco'] if 'produto_id' in i else i['produto_data']['preco'] for i in itens])
+        self.pago.estender([True] * n)
+        self.valida.estender([True] * n)
+
+    def _invalidar(self, chave):
+        faixa = self._faixas.pop(chave, None)
+        if faixa is not None:
+            self.valida.dados[faixa[0]:faixa[1]] = False
+            self._invalidas += faixa[1] - faixa[0]
+            if self._invalidas > self.valida.tamanho - self._invalidas:
+                self._compactar()
+
+    def _compactar(self):
+        """Remove as linhas inválidas e reposiciona as faixas dos pedidos (as linhas mantêm a ordem)."""
+        mascara = self.valida.dados.copy()
+        novas_posicoes = np.concatenate(([0], np.cumsum(mascara)))
+        for coluna in (self.pedido_id, self.cliente_id, self.produto_id,
+                       self.quantidade, self.preco, self.pago, self.valida):
+            coluna.manter(mascara)
+        self._faixas = {chave: (int(novas_posicoes[inicio]), int(novas_posicoes[fim]))
+                        for chave, (inicio, fim) in self._faixas.items()}
+        self._invalidas = 0
+
+    def _regravar(self, chave, pedido):
+        """Regrava no lugar as linhas do pedido se o número de itens não mudou; senão, troca as linhas."""
+        itens = pedido.itens
+        inicio, fim = self._faixas.get(chave, (0, -1))
+        if fim - inicio != len(itens):
+            self._invalidar(chave)
+            self._anexar(chave, pedido)
+            return
+        self.cliente_id.dados[inicio:fim] = int(pedido.cliente.id)
+        self.produto_id.dados[inicio:fim] = [-1 if i.produto.id is None else int(i.produto.id) for i in itens]
+        self.quantidade.dados[inicio:fim] = [i.quantidade for i in itens]
+        self.preco.dados[inicio:fim] = [i.preco_unitario for i in itens]
+        self.pago.dados[inicio:fim] = bool(pedido.pago)
+
+    def ao_inserir(self, chave, pedido):
+        self._invalidar(chave)
+        self._anexar(chave, pedido)
+
+    def ao_alterar(self, pedido, campo):
+        if campo == 'pago':
+            inicio, fim = self._faixas.get(pedido.id, (0, 0))
+            self.pago.dados[inicio:fim] = bool(pedido.pago)
+        elif campo in _CAMPOS_DAS_LINHAS:
+            self._regravar(pedido.id, pedido)
+        # Os demais campos (ex.: status_pagamento) não aparecem nas linhas
+
+    def ao_remover(self, chave, pedido):
+        if self.arquivo is not None and self.arquivo.contem(chave):
+            # Foi para o arquivo morto: as linhas continuam valendo (já como pagas)
+            inicio, fim = self._faixas.pop(chave, (0, 0))
+            self.pago.dados[inicio:fim] = True
+            return
+        self._invalidar(chave)
+
+    # ------------------------------------------------------------------
+    # Consultas vetorizadas
+    # ------------------------------------------------------------------
+
+    def _colunas(self):
+        mascara = self.valida.dados
+        receita = (self.quantidade.dados * self.preco.dados)[mascara]
+        return mascara, receita
+
+    @staticmethod
+    def _somar_por(chaves, valores):
+        """Soma 'valores' agrupando por 'chaves'; retorna (chaves únicas, somas)."""
+        unicas, posicoes = np.unique(chaves, return_inverse=True)
+        return unicas, np.bincount(posicoes, weights=valores, minlength=len(unicas))
+
+    def receita_por_produto(self):
+        """Lista de (produto_id, unidades, receita), da maior para a menor receita."""
+        mascara, receita = self._colunas()
+        produtos = self.produto_id.dados[mascara]
+        ids, receitas = self._somar_por(produtos, receita)
+        _, unidades = self._somar_por(produtos, self.quantidade.dados[mascara])
+        ordem = np.argsort(-receitas, kind='stable')
+        return [(int(ids[i]), int(unidades[i]), float(receitas[i])) for i in ordem]
+
+    def receita_por_cliente(self):
+        """Dicionário {cliente_id: receita} (somando pedidos pagos e abertos)."""
+        mascara, receita = self._colunas()
+        ids, receitas = self._somar_por(self.cliente_id.dados[mascara], receita)
+        return {int(c): float(r) for c, r in zip(ids, receitas)}
+
+    def top_clientes(self, n=10):
+        """Os 'n' clientes de maior receita: lista de (cliente_id, receita)."""
+        mascara, receita = self._colunas()
+        ids, receitas = self._somar_por(self.cliente_id.dados[mascara], receita)
+        n = min(n, len(ids))
+        if n == 0:
+            return []
+        melhores = np.argpartition(-receitas, n - 1)[:n]
+        melhores = melhores[np.argsort(-receitas[melhores], kind='stable')]
+        return [(int(ids[i]), float(receitas[i])) for i in melhores]
+
+    def totais_pago_aberto(self):
+        """Totais e quantidade de pedidos pagos e em aberto."""
+        mascara, receita = self._colunas()
+        pago = self.pago.dados[mascara]
+        pedidos = self.pedido_id.dados[mascara]
+        return {
+            'total_pago': float(receita[pago].sum()),
+            'total_aberto': float(receita[~pago].sum()),
+            'pedidos_pagos': int(len(np.unique(pedidos[pago]))),
+            'pedidos_abertos': int(len(np.unique(pedidos[~pago]))),
+        }
+
+
+# Um motor por coleção de pedidos: as colunas são montadas uma única vez e
+# depois acompanham as alterações (ver MotorAnalise.ao_inserir/ao_alterar).
+_motores = {}
+
+
+def obter_motor(dados):
+    """Retorna o MotorAnalise da coleção DB['pedidos'], criando-o no primeiro uso."""
+    pedidos = dados['pedidos']
+    motor = _motores.get(id(pedidos))
+    if motor is None:
+        motor = _motores[id(pedidos)] = MotorAnalise(pedidos, database.obter_arquivo())
+    return motor
+
+
+def montar_relatorio(dados, n_clientes=10):
+    """
+    Objetivo: Reunir os agregados de vendas já com os nomes de clientes e produtos.
+    Função: Usado tanto pela página /relatorios (app_web.py) quanto pelo menu (main.py).
+    """
+    with metricas.TEMPO_RELATORIOS.cronometrar(relatorio='vendas'):
+        return _montar_relatorio(dados, n_clientes)
+
+
+def _montar_relatorio(dados, n_clientes):
+    motor = obter_motor(dados)
+    clientes = dados['clientes']
+    produtos = dados['produtos']
+
+    def nome_cliente(cliente_id):
+        cliente = clientes.get(str(cliente_id))
+        return cliente.nome if cliente is not None else f"Cliente {cliente_id}"
+
+    def nome_produto(produto_id):
+        produto = produtos.get(str(produto_id)) if produto_id >= 0 else None
+        if produto is not None:
+            return produto.nome
+        return "Produto sem ID" if produto_id < 0 else f"Produto {produto_id} (removido)"
+
+    return {
+        'totais': motor.totais_pago_aberto(),
+        'por_produto': [
+            (pid, nome_produto(pid), unidades, receita)
+            for pid, unidades, receita in motor.receita_por_produto()
+        ],
+        'top_clientes': [
+            (cid, nome_cliente(cid), receita)
+            for cid, receita in motor.top_clientes(n_clientes)
+        ],
+    }
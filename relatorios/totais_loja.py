@@ -0,0 +1,270 @@
+# Arquivo: relatorios/totais_loja.py - Totais da loja, por cliente e por produto mantidos incrementalmente
+
+import json
+import math
+
+import database
+from monitoramento import metricas
+from persistencia.colecao import ObservadorColecao
+
+
+def _resumo_bruto(data):
+    """(cliente_id, pago, linhas) de um pedido ainda em formato JSON (novo ou antigo), sem criar objetos."""
+    linhas = []
+    for item in data['itens']:
+        if 'produto_id' in item:
+            produto_id, preco = item['produto_id'], item['preco']
+        else: # Formato antigo: produto embutido, sem ID
+            produto_id, preco = None, item['produto_data']['preco']
+        linhas.append((produto_id, item['quantidade'], preco * item['quantidade']))
+    return data['cliente_id'], bool(data.get('pago', False)), linhas
+
+
+def _resumo_objeto(pedido):
+    linhas = [(item.produto.id, item.quantidade, item.subtotal) for item in pedido.itens]
+    return pedido.cliente.id, bool(pedido.pago), linhas
+
+
+def _resumos(pedidos):
+    """Gera (id, cliente_id, pago, linhas) de cada pedido, evitando materializar o que ainda está em disco."""
+    resumos_por_pedido = getattr(pedidos, 'resumos_por_pedido', None)
+    if resumos_por_pedido is not None: # Tabela SQLite: lê pedidos e itens numa única consulta
+        yield from resumos_por_pedido()
+        return
+
+    for chave in pedidos.keys():
+        bruto = pedidos.bruto(chave) # Carga preguiçosa: linha ainda não convertida em objeto
+        if bruto is None:
+            yield (chave, *_resumo_objeto(pedidos[chave]))
+        else:
+            yield (chave, *_resumo_bruto(json.loads(bruto) if isinstance(bruto, str) else bruto))
+
+
+class VendasCliente:
+    """Visão materializada de um cliente: quantos pedidos e quanto gastou (pago e em aberto)."""
+    __slots__ = ('pedidos', 'total_pago', 'total_aberto')
+
+    def __init__(self):
+        self.pedidos = 0
+        self.total_pago = 0
+        self.total_aberto = 0
+
+    @property
+    def total(self):
+        return self.total_pago + self.total_aberto
+
+    def como_dict(self):
+        return {'pedidos': self.pedidos, 'total': self.total,
+                'total_pago': self.total_pago, 'total_aberto': self.total_aberto}
+
+
+class VendasProduto:
+    """Visão materializada de um produto: unidades vendidas e receita (em pedidos pagos ou não)."""
+    __slots__ = ('unidades', 'receita')
+
+    def __init__(self):
+        self.unidades = 0
+        self.receita = 0
+
+    def como_dict(self):
+        return {'unidades': self.unidades, 'receita': self.receita}
+
+
+_SEM_VENDAS_CLIENTE = VendasCliente()
+_SEM_VENDAS_PRODUTO = VendasProduto()
+
+
+class TotaisLoja(ObservadorColecao):
+    """
+    Classe de Relatório.
+    Objetivo: Responder "quanto o cliente X gastou", "quantas unidades do produto
+              101 foram vendidas" e o total pago x aberto da loja sem percorrer
+              os pedidos e seus itens a cada pergunta.
+    Função: Soma tudo uma única vez e depois observa DB['pedidos']. Cada pedido
+            guarda a sua contribuição (cliente, total, pago, linhas); quando ele é
+            inserido, alterado (adicionar_item, remover_item...) ou removido, só
+            essa contribuição sai e volta a entrar, em tempo proporcional aos itens
+            do pedido e não ao tamanho da loja. O pagamento (finalizar_compra) apenas
+            move o total do pedido entre pago e em aberto: O(1). Os pedidos do
+            arquivo morto (persistencia/arquivo.py) entram pelo resumo de cada
+            segmento, sem ler os pedidos.
+    """
+    def __init__(self, pedidos, arquivo=None):
+        self.arquivo = arquivo
+        self.ao_recarregar(pedidos)
+        pedidos.observar(self)
+
+    def ao_recarregar(self, pedidos):
+        """Soma todos os pedidos do zero (os em DB['pedidos'] e os arquivados)."""
+        self.total_pago = 0
+        self.total_aberto = 0
+        self.pedidos_pagos = 0
+        self.pedidos_abertos = 0
+        self.por_cliente = {} # cliente_id -> VendasCliente
+        self.por_produto = {} # produto_id -> VendasProduto (None = produto sem ID, formato antigo)
+        self._contribuicoes = {} # pedido_id -> (cliente_id, total, pago, linhas) já somado
+
+        resumos = self.arquivo.resumos() if self.arquivo is not None else []
+        for chave, cliente_id, pago, linhas in _resumos(pedidos):
+            if resumos and self.arquivo.contem(chave, atualizar=False):
+                continue # Cópia deixada por um arquivamento interrompido: conta pelo arquivo
+            self._somar(chave, cliente_id, pago, linhas)
+        for resumo in resumos:
+            self._somar_arquivados(resumo)
+
+    # ------------------------------------------------------------------
+    # Manutenção incremental
+    # ------------------------------------------------------------------
+
+    def _somar(self, chave, cliente_id, pago, linhas):
+        total = 0
+        for produto_id, unidades, receita in linhas:
+            total += receita
+            vendas = self.por_produto.get(produto_id)
+            if vendas is None:
+                vendas = self.por_produto[produto_id] = VendasProduto()
+            vendas.unidades += unidades
+            vendas.receita += receita
+        self._contribuicoes[chave] = (cliente_id, total, pago, linhas)
+
+        cliente = self.por_cliente.get(cliente_id)
+        if cliente is None:
+            cliente = self.por_cliente[cliente_id] = VendasCliente()
+        cliente.pedidos += 1
+        self._mover(cliente, total, pago, 1)
+
+    def _somar_arquivados(self, resumo):
+        """Soma o resumo de um segmento do arquivo morto (só pedidos pagos, sem contribuições individuais)."""
+        self.total_pago += resumo['total']
+        self.pedidos_pagos += resumo['pedidos']
+        for cliente_id, pedidos, total in resumo['por_cliente']:
+            cliente = self.por_cliente.get(cliente_id)
+            if cliente is None:
+                cliente = self.por_cliente[cliente_id] = VendasCliente()
+            cliente.pedidos += pedidos
+            cliente.total_pago += total
+        for produto_id, unidades, receita in resumo['por_produto']:
+            vendas = self.por_produto.get(produto_id)
+            if vendas is None:
+                vendas = self.por_produto[produto_id] = VendasProduto()
+            vendas.unidades += unidades
+            vendas.receita += receita
+
+    def _subtrair(self, chave):
+        anterior = self._contribuicoes.pop(chave, None)
+        if anterior is None:
+            return
+        cliente_id, total, pago, linhas = anterior
+        for produto_id, unidades, receita in linhas:
+            vendas = self.por_produto[produto_id]
+            vendas.unidades -= unidades
+            vendas.receita -= receita
+            if vendas.unidades == 0:
+                del self.por_produto[produto_id]
+
+        cliente = self.por_cliente[cliente_id]
+        cliente.pedidos -= 1
+        self._mover(cliente, total, pago, -1)
+        if cliente.pedidos == 0:
+            del self.por_cliente[cliente_id]
+
+    def _mover(self, cliente, total, pago, sinal):
+        """Soma (sinal=1) ou subtrai (sinal=-1) o total do pedido do lado pago ou em aberto."""
+        if pago:
+            self.total_pago += sinal * total
+            self.pedidos_pagos += sinal
+            cliente.total_pago += sinal * total
+        else:
+            self.total_aberto += sinal * total
+            self.pedidos_abertos += sinal
+            cliente.total_aberto += sinal * total
+
+    def ao_inserir(self, chave, pedido):
+        self._subtrair(chave)
+        self._somar(chave, *_resumo_objeto(pedido))
+
+    def ao_alterar(self, pedido, campo):
+        if campo == 'pago':
+            anterior = self._contribuicoes.get(pedido.id)
+            pago = bool(pedido.pago)
+            if anterior is not None and anterior[2] != pago:
+                cliente_id, total, _, linhas = anterior
+                cliente = self.por_cliente[cliente_id]
+                self._mover(cliente, total, not pago, -1)
+                self._mover(cliente, total, pago, 1)
+                self._contribuicoes[pedido.id] = (cliente_id, total, pago, linhas)
+        elif campo in ('itens', 'cliente', '*'):
+            self.ao_inserir(pedido.id, pedido)
+
+    def ao_remover(self, chave, pedido):
+        if self.arquivo is not None and self.arquivo.contem(chave):
+            # Foi para o arquivo morto: a venda continua na conta, sem a contribuição individual
+            anterior = self._contribuicoes.pop(chave, None)
+            if anterior is not None and not anterior[2]: # O pagamento ainda não tinha chegado aqui
+                cliente = self.por_cliente[anterior[0]]
+                self._mover(cliente, anterior[1], False, -1)
+                self._mover(cliente, anterior[1], True, 1)
+            return
+        self._subtrair(chave)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def cliente(self, cliente_id):
+        """VendasCliente do cliente (zerada se ele não tem pedidos): O(1)."""
+        return self.por_cliente.get(cliente_id, _SEM_VENDAS_CLIENTE)
+
+    def produto(self, produto_id):
+        """VendasProduto do produto (zerada se ele nunca foi vendido): O(1)."""
+        return self.por_produto.get(produto_id, _SEM_VENDAS_PRODUTO)
+
+    def como_dict(self):
+        return {
+            'total_pago': self.total_pago,
+            'total_aberto': self.total_aberto,
+            'pedidos_pagos': self.pedidos_pagos,
+            'pedidos_abertos': self.pedidos_abertos,
+        }
+
+    def conferir(self, pedidos, limite=10):
+        """
+        Objetivo: Verificar as visões contra uma soma completa feita do zero.
+        Função: Retorna até 'limite' divergências em texto (lista vazia = tudo
+                confere). Valores em ponto flutuante são comparados com tolerância,
+                pois somar e subtrair na ordem dos eventos acumula arredondamento.
+        """
+        referencia = TotaisLoja.__new__(TotaisLoja) # Sem observar a coleção
+        referencia.arquivo = self.arquivo
+        referencia.ao_recarregar(pedidos)
+
+        def difere(a, b):
+            return not math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+        divergencias = []
+        for nome, valor in referencia.como_dict().items():
+            if difere(getattr(self, nome), valor):
+                divergencias.append(f"{nome}: {getattr(self, nome)} != {valor}")
+        for visao, vazia, campos in (('por_cliente', _SEM_VENDAS_CLIENTE, ('pedidos', 'total_pago', 'total_aberto')),
+                                     ('por_produto', _SEM_VENDAS_PRODUTO, ('unidades', 'receita'))):
+            atual, esperado = getattr(self, visao), getattr(referencia, visao)
+            for chave in atual.keys() | esperado.keys():
+                a, b = atual.get(chave, vazia), esperado.get(chave, vazia)
+                for campo in campos:
+                    if difere(getattr(a, campo), getattr(b, campo)):
+                        divergencias.append(f"{visao}[{chave!r}].{campo}: {getattr(a, campo)} != {getattr(b, campo)}")
+        return divergencias[:limite]
+
+
+# Um acumulador por coleção de pedidos (criado no primeiro uso)
+_totais = {}
+
+
+def obter_totais(dados):
+    """Retorna o TotaisLoja da coleção DB['pedidos'], criando-o no primeiro uso."""
+    pedidos = dados['pedidos']
+    totais = _totais.get(id(pedidos))
+    if totais is None:
+        with metricas.TEMPO_RELATORIOS.cronometrar(relatorio='totais_loja'): # Percorre todos os pedidos
+            totais = _totais[id(pedidos)] = TotaisLoja(pedidos, database.obter_arquivo())
+    return totais
@@ -0,0 +1,39 @@
+# Arquivo: tests/conftest.py - Configuração comum dos testes (pytest, na raiz: python -m pytest -q)
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def loja(tmp_path, monkeypatch):
+    """
+    Diretório temporário com o DB_FILE (caminho absoluto: os armazéns são guardados
+    por caminho) apontando para ele, no modo 'json'.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, 'DB_FILE', str(tmp_path / 'data.json'))
+    monkeypatch.setattr(database, 'SQLITE_FILE', str(tmp_path / 'data.db'))
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', 'json')
+    return tmp_path
+
+
+@pytest.fixture
+def app_loja(loja, monkeypatch):
+    """(cliente de testes do Flask, DB) com o app_web servindo o banco carregado de 'loja'."""
+    import app_web
+    from persistencia.cache import obter_versoes
+    from persistencia.indices import obter_indices
+    from relatorios.totais_loja import obter_totais
+
+    DB = database.carregar_dados_json()
+    obter_indices(DB) # Na mesma ordem da carga do app_web
+    obter_totais(DB)
+    obter_versoes(DB)
+    monkeypatch.setattr(app_web, 'DB', DB)
+    return app_web.app.test_client(), DB
@@ -0,0 +1,56 @@
+# Arquivo: tests/test_analise_vendas.py - Motor de análise em colunas (relatorios/analise_vendas.py)
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import database
+from core.pedido import Pedido
+from relatorios.analise_vendas import obter_motor
+
+
+def _novo_pedido(DB, itens):
+    pedido = Pedido(DB['clientes']['1'])
+    for produto_id, quantidade in itens:
+        pedido.adicionar_item(DB['produtos'][produto_id], quantidade)
+    with database.transacao(DB):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+    return chave, pedido
+
+
+def _receita_total(motor):
+    totais = motor.totais_pago_aberto()
+    return totais['total_pago'] + totais['total_aberto']
+
+
+def test_mudancas_de_status_nao_acumulam_linhas(loja):
+    DB = database.carregar_dados_json()
+    motor = obter_motor(DB)
+    _, pedido = _novo_pedido(DB, [('101', 1), ('102', 2)])
+    linhas = motor.pedido_id.tamanho
+
+    for _ in range(50):
+        pedido.status_pagamento = Pedido.PAGAMENTO_PENDENTE
+        pedido.status_pagamento = Pedido.PAGAMENTO_FALHOU
+
+    assert motor.pedido_id.tamanho == linhas
+    assert _receita_total(motor) == pytest.approx(pedido.calcular_total())
+
+
+def test_edicoes_de_itens_mantem_as_colunas_compactas(loja):
+    DB = database.carregar_dados_json()
+    motor = obter_motor(DB)
+    _, pedido = _novo_pedido(DB, [('101', 1)])
+    _novo_pedido(DB, [('102', 3)])
+
+    for quantidade in range(1, 51):
+        pedido.alterar_quantidade(0, quantidade) # Mesmo número de itens: no lugar
+        pedido.adicionar_item(DB['produtos']['102'], 1) # Mais um item: linhas novas
+        pedido.remover_item(1)
+
+    assert motor.pedido_id.tamanho <= 2 * len(pedido.itens) + 2
+    esperado = sum(p.calcular_total() for p in DB['pedidos'].values())
+    assert _receita_total(motor) == pytest.approx(esperado)
+    pedido.pago = True
+    assert motor.totais_pago_aberto()['total_pago'] == pytest.approx(pedido.calcular_total())
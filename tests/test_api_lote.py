@@ -0,0 +1,73 @@
+# Arquivo: tests/test_api_lote.py - API em lote: /api/pedidos/lote e /api/pagamentos/lote
+
+import database
+
+
+def _pedido(cliente_id='1', produto_id='101', quantidade=1):
+    return {'cliente_id': cliente_id, 'itens': [{'produto_id': produto_id, 'quantidade': quantidade}]}
+
+
+def test_lote_de_pedidos_com_itens_invalidos(app_loja):
+    cliente, DB = app_loja
+    resposta = cliente.post('/api/pedidos/lote', json={'pedidos': [
+        _pedido(), _pedido(cliente_id='99'), _pedido(produto_id='102', quantidade=2), 'texto',
+    ]})
+
+    assert resposta.status_code == 207
+    corpo = resposta.get_json()
+    assert (corpo['aceitos'], corpo['rejeitados']) == (2, 2)
+    assert [r['indice'] for r in corpo['resultados']] == [0, 1, 2, 3]
+    assert [r.get('id') for r in corpo['resultados']] == ['1', None, '2', None]
+    assert 'erro' in corpo['resultados'][1] and 'erro' in corpo['resultados'][3]
+    assert DB['pedidos']['2'].calcular_total() == 2400.0 and DB['next_ids']['pedido'] == 3
+
+    lido = database.carregar_dados_json() # O lote foi gravado
+    assert sorted(lido['pedidos']) == ['1', '2'] and lido['pedidos']['1'].cliente is lido['clientes']['1']
+    database.encerrar(lido)
+
+
+def test_lote_atomico_recusa_tudo_sem_alocar_ids(app_loja):
+    cliente, DB = app_loja
+    resposta = cliente.post('/api/pedidos/lote?atomico=1', json=[_pedido(), _pedido(quantidade=0), _pedido()])
+
+    assert resposta.status_code == 422
+    resultados = resposta.get_json()['resultados']
+    assert all('erro' in r for r in resultados)
+    assert resultados[0]['erro'] == resultados[2]['erro'] == "Lote recusado: há pedidos inválidos."
+    assert len(DB['pedidos']) == 0 and DB['next_ids']['pedido'] == 1
+
+    assert cliente.post('/api/pedidos/lote?atomico=1', json=[_pedido()]).status_code == 201
+    assert list(DB['pedidos']) == ['1'] # Nenhum ID foi gasto pelo lote recusado
+
+
+def test_corpo_invalido_ou_grande_demais(app_loja, monkeypatch):
+    import app_web
+    cliente, _ = app_loja
+    assert cliente.post('/api/pedidos/lote', json=[]).status_code == 400
+    assert cliente.post('/api/pedidos/lote', json={'outro': [_pedido()]}).status_code == 400
+    monkeypatch.setattr(app_web, 'LIMITE_LOTE', 2)
+    assert cliente.post('/api/pedidos/lote', json=[_pedido()] * 3).status_code == 400
+
+
+def test_lote_de_pagamentos(app_loja):
+    cliente, DB = app_loja
+    cliente.post('/api/pedidos/lote', json=[_pedido(), _pedido(produto_id='102', quantidade=2), _pedido()])
+
+    resposta = cliente.post('/api/pagamentos/lote', json={'pagamentos': [
+        {'pedido_id': '1', 'valor': 6500.0},
+        {'pedido_id': '2', 'valor': 1.0},   # Valor não confere com o total
+        {'pedido_id': '1'},                 # Repetido no lote
+        {'pedido_id': '42'},
+    ]})
+    assert resposta.status_code == 207
+    resultados = resposta.get_json()['resultados']
+    assert resultados[0] == {'indice': 0, 'pedido_id': '1', 'total': 6500.0}
+    assert [('erro' in r) for r in resultados] == [False, True, True, True]
+    assert DB['pedidos']['1'].pago and not DB['pedidos']['2'].pago
+
+    recusado = cliente.post('/api/pagamentos/lote?atomico=1', json=[{'pedido_id': '2'}, {'pedido_id': '1'}])
+    assert recusado.status_code == 422 and not DB['pedidos']['2'].pago
+    assert cliente.post('/api/pagamentos/lote', json=[{'pedido_id': '2'}, {'pedido_id': '3'}]).status_code == 200
+    lido = database.carregar_dados_json()
+    assert all(pedido.pago for pedido in lido['pedidos'].values())
+    database.encerrar(lido)
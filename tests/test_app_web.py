@@ -0,0 +1,20 @@
+# Arquivo: tests/test_app_web.py - Respostas condicionais (ETag/304) do dashboard
+
+
+def test_etag_decide_o_304_mesmo_com_escrita_no_mesmo_segundo(app_loja):
+    cliente, DB = app_loja
+    primeira = cliente.get('/')
+    assert primeira.status_code == 200
+    etag, modificado = primeira.headers['ETag'], primeira.headers['Last-Modified']
+    assert cliente.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    # Escrita logo depois (normalmente no mesmo segundo do Last-Modified anterior)
+    resposta = cliente.post('/cadastrar_cliente', data={'nome': 'Ana', 'cpf': '52998224725', 'endereco': 'Rua A'})
+    assert resposta.status_code == 302
+
+    # Só o If-Modified-Since antigo: a data não basta para um 304
+    depois = cliente.get('/', headers={'If-Modified-Since': modificado})
+    assert depois.status_code == 200
+    assert 'Ana' in depois.get_data(as_text=True)
+    assert cliente.get('/', headers={'If-None-Match': etag, 'If-Modified-Since': modificado}).status_code == 200
+    assert cliente.get('/', headers={'If-None-Match': depois.headers['ETag']}).status_code == 304
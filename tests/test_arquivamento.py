@@ -0,0 +1,56 @@
+# Arquivo: tests/test_arquivamento.py - Arquivo morto ao lado de um DB_FILE que não é o padrão
+
+import os
+
+import pytest
+
+import arquivamento
+import database
+from core.pedido import Pedido
+from relatorios.totais_loja import obter_totais
+
+
+@pytest.fixture
+def loja(loja, monkeypatch):
+    """A loja de conftest.py, com o banco em 'loja.json' (arquivo morto em 'loja.arquivo')."""
+    monkeypatch.setattr(database, 'DB_FILE', str(loja / 'loja.json'))
+    return loja
+
+
+def _novo_pedido(DB, itens, pago):
+    pedido = Pedido(DB['clientes']['1'])
+    for produto_id, quantidade in itens:
+        pedido.adicionar_item(DB['produtos'][produto_id], quantidade)
+    pedido.pago = pago
+    with database.transacao(DB):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+    return chave
+
+
+def test_arquivamento_usa_a_pasta_do_db_file(app_loja, loja):
+    cliente, DB = app_loja
+    pagos = [_novo_pedido(DB, [('101', 1)], True), _novo_pedido(DB, [('102', 2)], True)]
+    aberto = _novo_pedido(DB, [('102', 1)], False)
+    esperado = {'total_pago': 8900, 'total_aberto': 1200, 'pedidos_pagos': 2, 'pedidos_abertos': 1}
+
+    resultado = arquivamento.arquivar(DB, manter=0)
+
+    assert resultado['arquivados'] == 2 and sorted(DB['pedidos']) == [aberto]
+    assert os.listdir(loja / 'loja.arquivo') and not os.path.exists(loja / 'data.arquivo')
+    assert database.obter_arquivo().pasta == str(loja / 'loja.arquivo')
+    assert obter_totais(DB).como_dict() == esperado
+    assert obter_totais(DB).conferir(DB['pedidos']) == []
+
+    # Os leitores acham a mesma pasta que o arquivamento: a listagem por cliente junta os dois lados
+    primeira = cliente.get('/api/clientes/1/pedidos?limite=2').get_json()
+    assert [item['id'] for item in primeira['itens']] == pagos
+    assert primeira['vendas']['total'] == 10100 and primeira['total_pedidos'] == 3
+    segunda = cliente.get(f"/api/clientes/1/pedidos?limite=2&apos={primeira['proximo']}").get_json()
+    assert [item['id'] for item in segunda['itens']] == [aberto] and segunda['proximo'] is None
+    assert cliente.get('/api/clientes/1/pedidos?apos=abc').get_json()['itens'] == []
+
+    # Uma carga nova (outro worker) continua somando os pedidos arquivados
+    recarregado = database.carregar_dados_json()
+    assert obter_totais(recarregado).como_dict() == esperado
+    database.encerrar(recarregado)
@@ -0,0 +1,63 @@
+# Arquivo: tests/test_benchmarks.py - Gerador de bancos sintéticos e suíte de benchmarks (escala mínima)
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import database
+from benchmarks import gerador, suite
+
+
+def test_gerador_e_reprodutivel_e_consistente():
+    escala = {'clientes': 20, 'produtos': 5, 'pedidos': 50, 'linhas': 2}
+    dados = gerador.gerar_dados(semente=7, **escala)
+    assert dados == gerador.gerar_dados(semente=7, **escala)
+    assert dados != gerador.gerar_dados(semente=8, **escala)
+
+    assert (len(dados['clientes']), len(dados['produtos']), len(dados['pedidos'])) == (20, 5, 50)
+    assert dados['next_ids'] == {'cliente': 21, 'pedido': 51}
+    for pedido in dados['pedidos'].values():
+        assert pedido['cliente_id'] in dados['clientes']
+        assert 1 <= len(pedido['itens']) <= 3
+        assert all(item['produto_id'] in dados['produtos'] for item in pedido['itens'])
+
+
+def test_arquivo_gerado_carrega_no_sistema(loja):
+    gerador.gerar_arquivo(database.DB_FILE, clientes=10, produtos=3, pedidos=30)
+    DB = database.carregar_dados_json()
+    assert (len(DB['clientes']), len(DB['pedidos'])) == (10, 30)
+    assert all(p.cliente is DB['clientes'][p.cliente.id] for p in DB['pedidos'].values())
+
+
+def test_exibir_aponta_regressoes_pelo_melhor_tempo():
+    def documento(min_s):
+        return {'resultados': {'json': {'pedido_to_json': suite.estatisticas([min_s, min_s * 2])}}}
+
+    assert suite.exibir(documento(0.0105), documento(0.01), tolerancia=0.15) == []
+    ((modo, nome, razao),) = suite.exibir(documento(0.02), documento(0.01), tolerancia=0.15)
+    assert (modo, nome) == ('json', 'pedido_to_json') and razao == pytest.approx(1.0)
+
+
+def test_suite_gera_resultado_json(tmp_path):
+    pytest.importorskip('flask')
+    saida = tmp_path / 'resultado.json'
+    comando = [sys.executable, os.path.join(suite.RAIZ, 'benchmarks', 'suite.py'),
+               '--clientes', '5', '--produtos', '3', '--pedidos', '20', '--repeticoes', '1',
+               '--requisicoes', '2', '--modos', 'json,sqlite', '--saida', str(saida)]
+    subprocess.run(comando, check=True, capture_output=True, timeout=120)
+
+    with open(saida, encoding='utf-8') as f:
+        documento = json.load(f)
+    assert documento['escala'] == {'clientes': 5, 'produtos': 3, 'pedidos': 20, 'linhas': 3, 'semente': 42}
+    assert sorted(documento['resultados']) == ['json', 'sqlite']
+    medicoes = documento['resultados']['json']
+    for nome in ('carregar_dados_json', 'salvar_dados_json_incremental', 'pedido_to_json', 'pedido_from_json',
+                 'dashboard_get', 'cadastrar_pedido_post'):
+        assert medicoes[nome]['n'] >= 1 and medicoes[nome]['min_s'] > 0
+
+    # Comparado consigo mesmo, nada piora
+    subprocess.run(comando[:-2] + ['--saida', str(tmp_path / 'de_novo.json'), '--comparar', str(saida),
+                                   '--tolerancia', '100'], check=True, capture_output=True, timeout=120)
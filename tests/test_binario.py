@@ -0,0 +1,87 @@
+# Arquivo: tests/test_binario.py - Snapshot binário: ida e volta, detecção automática e conversão
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import database
+from benchmarks import gerador
+from core.pedido import Pedido
+from persistencia import snapshot
+from persistencia.binario import SnapshotBinarioInvalido, e_binario, ler_binario
+from persistencia.snapshot import escrever_snapshot, ler_snapshot
+
+
+def _dados_variados():
+    data = gerador.gerar_dados(clientes=30, produtos=8, pedidos=2500, linhas=3) # Mais de um bloco de pedidos
+    data['clientes']['7']['nome'] = "Conceição D'Ávila \"Zé\" 🛒"
+    data['produtos']['101']['preco'] = 10 # Inteiro numa coluna de decimais
+    data['pedidos']['3']['itens'].append({'produto_data': {'nome': "Antigo", 'preco': 9.9}, 'quantidade': 1})
+    data['pedidos']['4'].update(status_pagamento='pendente', pagamento_expira=1700000000.5) # Colunas opcionais
+    data['pedidos']['5']['itens'] = []
+    data['next_ids']['produto'] = 2 ** 40
+    return data
+
+
+def test_ida_e_volta_preserva_os_dados(tmp_path):
+    data = _dados_variados()
+    json_txt, binario = str(tmp_path / 'data.json'), str(tmp_path / 'data.bin')
+    escrever_snapshot(json_txt, data, 'json')
+    escrever_snapshot(binario, data, 'binario')
+
+    assert e_binario(binario) and not e_binario(json_txt)
+    assert ler_binario(binario) == data
+    assert ler_snapshot(binario) == ler_snapshot(json_txt) == data # Formato detectado pelo cabeçalho
+    assert os.path.getsize(binario) < os.path.getsize(json_txt) / 2
+
+
+def test_arquivo_truncado_e_recusado(tmp_path):
+    caminho = str(tmp_path / 'data.bin')
+    escrever_snapshot(caminho, _dados_variados(), 'binario')
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    with open(caminho, 'wb') as f:
+        f.write(conteudo[:len(conteudo) // 2])
+    with pytest.raises(SnapshotBinarioInvalido):
+        ler_binario(caminho)
+
+
+def test_salvamento_incremental_no_formato_binario(loja, monkeypatch):
+    monkeypatch.setattr(database, 'FORMATO_SNAPSHOT', 'binario')
+    monkeypatch.setattr(snapshot, 'FORMATO_SNAPSHOT', 'binario')
+    escrever_snapshot(database.DB_FILE, _dados_variados())
+    DB = database.carregar_dados_json()
+
+    pedido = Pedido(DB['clientes']['7'])
+    pedido.adicionar_item(DB['produtos']['102'], 2)
+    with database.transacao(DB):
+        DB['pedidos'][database.alocar_id(DB, 'pedido')] = pedido
+        DB['pedidos']['1'].pago = True
+        del DB['pedidos']['2']
+    database.encerrar(DB)
+
+    assert e_binario(database.DB_FILE)
+    lido = database.carregar_dados_json()
+    assert sorted(lido['pedidos'], key=int)[-1] == '2501' and '2' not in lido['pedidos']
+    assert lido['pedidos']['1'].pago and lido['pedidos']['2501'].cliente is lido['clientes']['7']
+    assert lido['clientes']['7'].nome == "Conceição D'Ávila \"Zé\" 🛒"
+    assert {c: p.to_json() for c, p in lido['pedidos'].items()} == {c: p.to_json() for c, p in DB['pedidos'].items()}
+    database.encerrar(lido)
+
+
+def test_conversao_nos_dois_sentidos(tmp_path):
+    data = _dados_variados()
+    origem = str(tmp_path / 'data.json')
+    escrever_snapshot(origem, data, 'json')
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def converter(*argumentos):
+        subprocess.run([sys.executable, '-m', 'persistencia.binario', *argumentos], cwd=raiz, check=True,
+                       capture_output=True, timeout=60)
+
+    converter(origem, str(tmp_path / 'data.bin'))
+    converter(str(tmp_path / 'data.bin'), str(tmp_path / 'de_volta.json'))
+    assert e_binario(str(tmp_path / 'data.bin')) and not e_binario(str(tmp_path / 'de_volta.json'))
+    assert ler_snapshot(str(tmp_path / 'de_volta.json')) == data
@@ -0,0 +1,104 @@
+# Arquivo: tests/test_colecao.py - Paginação por cursor (IDs fora do formato numérico canônico, pedidos inválidos)
+
+import json
+
+import pytest
+
+import database
+import exportacao
+from persistencia.snapshot import escrever_snapshot
+
+
+def _pedido(cliente_id, pago=False):
+    return {'cliente_id': cliente_id, 'itens': [{'produto_id': '101', 'preco': 10.0, 'quantidade': 1}], 'pago': pago}
+
+
+@pytest.fixture
+def ids_irregulares(loja):
+    """data.json com IDs '007' e 'abc' (aceitos pela carga desde a versão original)."""
+    escrever_snapshot(database.DB_FILE, {
+        'clientes': {nome: {'nome': f"Cliente {nome}", 'cpf': f"000.000.000-0{i}", 'endereco': "Rua"}
+                     for i, nome in enumerate(['1', '007', 'abc', '12'])},
+        'produtos': {'101': {'nome': "PC", 'preco': 10.0}, 'abc': {'nome': "Cabo", 'preco': 5.0}},
+        'pedidos': {'1': _pedido('1'), '007': _pedido('007', True), 'abc': _pedido('abc'), '12': _pedido('1')},
+        'next_ids': {'cliente': 13, 'pedido': 13},
+    })
+    return loja
+
+
+def test_pagina_ordena_e_percorre_ids_irregulares(ids_irregulares):
+    DB = database.carregar_dados_json()
+    vistos, apos = [], None
+    while True:
+        pagina, apos = DB['clientes'].pagina(apos, 1)
+        vistos += [chave for chave, _ in pagina]
+        if apos is None:
+            break
+    assert vistos == ['1', '007', '12', 'abc'] # Numéricos pelo valor, depois os demais
+
+    with database.transacao(DB):
+        DB['clientes']['5'] = DB['clientes'].pop('12')
+        del DB['clientes']['abc']
+    assert [chave for chave, _ in DB['clientes'].pagina(None, 10)[0]] == ['1', '5', '007']
+    assert [chave for chave, _ in DB['pedidos'].pagina('007', 10, {'pago': False})[0]] == ['12', 'abc']
+
+
+def test_dashboard_api_e_exportacao_com_ids_irregulares(ids_irregulares, app_loja):
+    cliente_web, _ = app_loja
+
+    assert cliente_web.get('/').status_code == 200
+    assert cliente_web.get('/?clientes_apos=007&pedidos_apos=abc').status_code == 200
+
+    resposta = cliente_web.get('/api/clientes?limite=2')
+    assert resposta.status_code == 200
+    assert [item['id'] for item in resposta.get_json()['itens']] == ['1', '007']
+    resposta = cliente_web.get(f"/api/clientes?limite=2&apos={resposta.get_json()['proximo']}")
+    assert [item['id'] for item in resposta.get_json()['itens']] == ['12', 'abc']
+
+    resposta = cliente_web.get('/api/pedidos?apos=1')
+    assert [item['id'] for item in resposta.get_json()['itens']] == ['007', '12', 'abc']
+
+    resposta = cliente_web.get('/api/exportar/pedidos')
+    assert resposta.status_code == 200
+    linhas = [json.loads(linha) for linha in resposta.get_data().splitlines()]
+    assert [linha['pedido_id'] for linha in linhas] == ['1', '007', '12', 'abc']
+    corpo = b''.join(exportacao.exportar(database.carregar_dados_json(), 'clientes', 'csv', ate=10))
+    assert [linha.split(b',')[0] for linha in corpo.splitlines()[1:]] == [b'1', b'007'] # Até o ID 10
+
+
+@pytest.mark.parametrize('preguicosa', [False, True])
+def test_pedido_de_cliente_inexistente_e_ignorado(loja, monkeypatch, capsys, preguicosa):
+    monkeypatch.setattr(database, 'CARREGAMENTO_PREGUICOSO', preguicosa)
+    escrever_snapshot(database.DB_FILE, {
+        'clientes': {'1': {'nome': "Cliente 1", 'cpf': "000.000.000-01", 'endereco': "Rua"}},
+        'produtos': {'101': {'nome': "PC", 'preco': 10.0}},
+        'pedidos': {'1': _pedido('1'), '2': _pedido('99'), '3': _pedido('1', True), '4': _pedido('98')},
+        'next_ids': {'cliente': 2, 'pedido': 5},
+    })
+    DB = database.carregar_dados_json()
+
+    assert [chave for chave, _ in DB['pedidos'].pagina(None, 1)[0]] == ['1']
+    assert [chave for chave, _ in DB['pedidos'].pagina('1', 1)[0]] == ['3'] # O '2' é pulado
+    assert [chave for chave, _ in DB['pedidos'].items()] == ['1', '3']
+    assert sorted(DB['pedidos']) == ['1', '3'] and DB['pedidos'].get('4') is None
+    if preguicosa:
+        assert "inexistente. Ignorando." in capsys.readouterr().out
+
+
+def test_dashboard_com_carga_preguicosa_ignora_pedido_invalido(loja, monkeypatch):
+    monkeypatch.setattr(database, 'CARREGAMENTO_PREGUICOSO', True)
+    escrever_snapshot(database.DB_FILE, {
+        'clientes': {'1': {'nome': "Cliente 1", 'cpf': "000.000.000-01", 'endereco': "Rua"}},
+        'produtos': {'101': {'nome': "PC", 'preco': 10.0}},
+        'pedidos': {'1': _pedido('1'), '2': _pedido('99'), '3': _pedido('1', True)},
+        'next_ids': {'cliente': 2, 'pedido': 4},
+    })
+    import app_web
+    DB = database.carregar_dados_json()
+    monkeypatch.setattr(app_web, 'DB', DB)
+    cliente_web = app_web.app.test_client()
+
+    assert cliente_web.get('/').status_code == 200
+    resposta = cliente_web.get('/api/pedidos')
+    assert resposta.status_code == 200
+    assert [item['id'] for item in resposta.get_json()['itens']] == ['1', '3']
@@ -0,0 +1,19 @@
+# Arquivo: tests/test_concorrencia.py - Escritas concorrentes de vários workers (versão reduzida do
+# benchmarks/stress_concorrencia.py: poucos processos e pedidos, para rodar junto com os testes)
+
+import pytest
+
+pytest.importorskip('flask')
+
+from benchmarks import stress_concorrencia
+
+
+@pytest.mark.parametrize('modo', stress_concorrencia.MODOS)
+@pytest.mark.parametrize('em_grupo', ['0', '1'], ids=['sincrona', 'em_grupo'])
+def test_workers_concorrentes_nao_perdem_nem_duplicam_pedidos(monkeypatch, capsys, modo, em_grupo):
+    monkeypatch.setenv('LOJA_ARMAZENAMENTO', modo) # Herdado pelos workers (spawn)
+    monkeypatch.setenv('LOJA_GRAVACAO_EM_GRUPO', em_grupo)
+
+    sucesso = stress_concorrencia.rodar(modo, processos=2, threads=2, por_thread=5)
+
+    assert sucesso, capsys.readouterr().out
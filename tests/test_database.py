@@ -0,0 +1,98 @@
+# Arquivo: tests/test_database.py - Carga e recuperação do data.json e do snapshot mapeado
+
+import copy
+import json
+import os
+
+import pytest
+
+import database
+from core.cliente import Cliente
+from persistencia.mapeado import MapaInvalido
+
+
+@pytest.mark.parametrize('modo', ['json', 'journal'])
+def test_data_json_corrompido_volta_aos_dados_iniciais(loja, monkeypatch, capsys, modo):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', modo)
+    with open(database.DB_FILE, 'w') as f:
+        f.write('{"clientes": {"1": {"nome": ')
+
+    DB = database.carregar_dados_json()
+
+    assert "corrompido" in capsys.readouterr().out
+    assert sorted(DB['clientes']) == sorted(database.DADOS_INICIAIS['clientes'])
+    assert sorted(DB['produtos']) == sorted(database.DADOS_INICIAIS['produtos'])
+    assert len(DB['pedidos']) == 0
+    assert DB['next_ids'] == database.DADOS_INICIAIS['next_ids']
+    database.encerrar(DB)
+
+
+def _snapshot_com_cliente_novo():
+    data = copy.deepcopy(database.DADOS_INICIAIS)
+    data['clientes']['2'] = {'nome': "Maria Souza", 'cpf': "529.982.247-25", 'endereco': "Rua B"}
+    data['next_ids']['cliente'] = 3
+    with open(database.DB_FILE, 'w') as f:
+        json.dump(data, f)
+
+
+
+def test_mapa_invalido_nao_e_gerado_de_novo_na_carga(loja, monkeypatch):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', 'mapeado')
+    _snapshot_com_cliente_novo()
+    caminho = database._arquivo_mapa()
+    with open(caminho, 'wb') as f:
+        f.write(b'isto nao e um mapa')
+
+    # O data.json não recebe as gravações do modo 'mapeado': gerar o mapa dele perderia dados
+    with pytest.raises(MapaInvalido, match="restaure-o de um backup"):
+        database.carregar_dados_json()
+    with open(caminho, 'rb') as f:
+        assert f.read() == b'isto nao e um mapa' # Intocado, para ser recuperado
+
+
+def test_mapa_invalido_na_sincronizacao_mantem_o_db(loja, monkeypatch):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', 'mapeado')
+    DB = database.carregar_dados_json()
+    with database.transacao(DB):
+        cliente_id = database.alocar_id(DB, 'cliente')
+        DB['clientes'][cliente_id] = Cliente("Maria Souza", "529.982.247-25", "Rua B", cliente_id)
+    _snapshot_com_cliente_novo() # data.json antigo, sem as gravações do mapa
+    with open(database._arquivo_mapa(), 'wb') as f:
+        f.write(b'isto nao e um mapa')
+
+    with pytest.raises(MapaInvalido):
+        database.sincronizar(DB)
+    assert DB['clientes'][cliente_id].nome == "Maria Souza"
+    assert DB['next_ids']['cliente'] == int(cliente_id) + 1
+
+
+@pytest.mark.parametrize('modo', ['json', 'journal', 'sqlite', 'particionado', 'mapeado'])
+def test_transacao_com_erro_desfaz_as_alteracoes_em_memoria(loja, monkeypatch, modo):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', modo)
+    DB = database.carregar_dados_json()
+    DB['clientes']['1'].endereco = "Rua Nova" # Alteração anterior, ainda não salva: é mantida
+    ids = dict(DB['next_ids'])
+
+    with pytest.raises(ValueError):
+        with database.transacao(DB):
+            cliente_id = database.alocar_id(DB, 'cliente')
+            DB['clientes'][cliente_id] = Cliente("Maria Souza", "529.982.247-25", "Rua B", cliente_id)
+            DB['produtos']['101'].preco = 1.0
+            del DB['produtos']['102']
+            raise ValueError("falha no meio do bloco")
+
+    assert cliente_id not in DB['clientes']
+    assert DB['produtos']['101'].preco == 6500.00
+    assert DB['produtos']['102'].nome == "Monitor Ultra"
+    assert DB['clientes']['1'].endereco == "Rua Nova"
+    assert dict(DB['next_ids']) == ids # O ID alocado é devolvido
+
+    with database.transacao(DB): # A próxima transação não grava nada do bloco desfeito
+        assert database.alocar_id(DB, 'cliente') == cliente_id
+    database.encerrar(DB)
+    recarregado = database.carregar_dados_json()
+    assert sorted(recarregado['clientes']) == ['1']
+    assert sorted(recarregado['produtos']) == ['101', '102']
+    assert recarregado['produtos']['101'].preco == 6500.00
+    assert recarregado['clientes']['1'].endereco == "Rua Nova"
+    database.encerrar(recarregado)
@@ -0,0 +1,98 @@
+# Arquivo: tests/test_exportacao.py - Exportação em fluxo (NDJSON/CSV): filtros, faixa de IDs e gzip
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import database
+import exportacao
+from persistencia.snapshot import escrever_snapshot
+
+
+@pytest.fixture
+def exportavel(loja):
+    """Dois clientes e quatro pedidos: pagos e em aberto, com dois, um e nenhum item."""
+    escrever_snapshot(database.DB_FILE, {
+        'clientes': {
+            '1': {'nome': "João Silva", 'cpf': "000.111.222-33", 'endereco': "Rua Principal"},
+            '2': {'nome': "Ana, \"Lima\"", 'cpf': "529.982.247-25", 'endereco': "Rua B"},
+        },
+        'produtos': {'101': {'nome': "PC Gamer Z100", 'preco': 6500.0}, '102': {'nome': "Monitor Ultra", 'preco': 1200.0}},
+        'pedidos': {
+            '1': {'cliente_id': '1', 'pago': True, 'itens': [{'produto_id': '101', 'preco': 6500.0, 'quantidade': 1},
+                                                             {'produto_id': '102', 'preco': 1200.0, 'quantidade': 2}]},
+            '2': {'cliente_id': '2', 'pago': False, 'itens': [{'produto_id': '102', 'preco': 1200.0, 'quantidade': 1}]},
+            '3': {'cliente_id': '1', 'pago': False, 'itens': []},
+            '4': {'cliente_id': '2', 'pago': True, 'itens': [{'produto_id': '101', 'preco': 6500.0, 'quantidade': 1}]},
+        },
+        'next_ids': {'cliente': 3, 'pedido': 5},
+    }, 'json')
+
+
+def _ndjson(texto):
+    return [json.loads(linha) for linha in texto.splitlines()]
+
+
+def test_pedidos_saem_com_uma_linha_por_item(exportavel, app_loja):
+    cliente, _ = app_loja
+    resposta = cliente.get('/api/exportar/pedidos')
+    assert resposta.status_code == 200 and resposta.content_type == 'application/x-ndjson'
+    assert resposta.headers['Content-Disposition'] == 'attachment; filename="pedidos.ndjson"'
+
+    linhas = _ndjson(resposta.get_data(as_text=True))
+    assert [(l['pedido_id'], l['item']) for l in linhas] == [('1', 1), ('1', 2), ('2', 1), ('3', None), ('4', 1)]
+    assert linhas[1] == {'pedido_id': '1', 'cliente_id': '1', 'pago': True, 'situacao': 'pago', 'total': 8900.0,
+                         'item': 2, 'produto_id': '102', 'produto': "Monitor Ultra", 'preco_unitario': 1200.0,
+                         'quantidade': 2, 'subtotal': 2400.0}
+    assert linhas[3]['produto_id'] is None and linhas[3]['total'] == 0
+
+
+@pytest.mark.parametrize('parametros, esperados', [
+    ('status=pago', ['1', '4']),
+    ('status=aberto', ['2', '3']),
+    ('cliente_id=2', ['2', '4']),
+    ('status=aberto&cliente_id=1', ['3']),
+    ('desde=2&ate=3', ['2', '3']),
+    ('desde=3', ['3', '4']),
+    ('ate=1&status=pago', ['1']),
+])
+def test_filtros_e_faixa_de_ids(exportavel, app_loja, parametros, esperados):
+    cliente, _ = app_loja
+    linhas = _ndjson(cliente.get(f'/api/exportar/pedidos?{parametros}').get_data(as_text=True))
+    assert sorted({l['pedido_id'] for l in linhas}, key=int) == esperados
+
+
+def test_csv_com_gzip(exportavel, app_loja):
+    cliente, _ = app_loja
+    resposta = cliente.get('/api/exportar/clientes?formato=csv&gzip=1&desde=2')
+    assert resposta.content_type == 'application/gzip'
+    assert resposta.headers['Content-Disposition'] == 'attachment; filename="clientes.csv.gz"'
+
+    linhas = list(csv.reader(io.StringIO(gzip.decompress(resposta.get_data()).decode('utf-8'))))
+    assert linhas == [['id', 'nome', 'cpf', 'endereco'], ['2', 'Ana, "Lima"', "529.982.247-25", "Rua B"]]
+
+
+def test_parametros_invalidos(exportavel, app_loja):
+    cliente, _ = app_loja
+    assert cliente.get('/api/exportar/vendas').status_code == 404
+    for parametros in ('formato=xml', 'desde=abc', 'desde=4&ate=2', 'cliente_id=x'):
+        assert cliente.get(f'/api/exportar/pedidos?{parametros}').status_code == 400
+    with pytest.raises(ValueError):
+        exportacao.exportar({}, 'clientes', filtros={'pago': True})
+
+
+def test_paginas_pequenas_e_arquivo_com_extensao(exportavel, tmp_path):
+    DB = database.carregar_dados_json()
+    paginas = list(exportacao.paginas(DB, 'pedidos', {'pago': True}, tamanho=1))
+    assert [[l['pedido_id'] for l in pagina] for pagina in paginas] == [['1', '1'], ['4']]
+
+    caminho = str(tmp_path / 'pedidos.csv.gz')
+    resultado = exportacao.exportar_para_arquivo(DB, 'pedidos', caminho, tamanho=2)
+    with gzip.open(caminho, 'rt', encoding='utf-8') as f:
+        linhas = list(csv.DictReader(f))
+    assert resultado['bytes'] > 0 and len(linhas) == 5
+    assert linhas[0]['pago'] == 'true' and linhas[3]['subtotal'] == ''
+    database.encerrar(DB)
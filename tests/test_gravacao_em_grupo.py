@@ -0,0 +1,84 @@
+# Arquivo: tests/test_gravacao_em_grupo.py - Gravação em grupo: agrupamento, espera durável e saída
+
+import threading
+import time
+
+import pytest
+
+import database
+from core.cliente import Cliente
+from persistencia.gravador import GravadorEmGrupo
+
+
+class GravacaoLenta:
+    """'gravar()' de mentira: conta as chamadas e demora um pouco, como um fsync."""
+    def __init__(self, demora=0.0):
+        self.demora = demora
+        self.chamadas = 0
+
+    def __call__(self):
+        time.sleep(self.demora)
+        self.chamadas += 1
+
+
+def test_alteracoes_proximas_viram_uma_gravacao():
+    gravar = GravacaoLenta()
+    gravador = GravadorEmGrupo(gravar, janela=0.05, maximo=100)
+    tickets = [gravador.registrar() for _ in range(20)]
+    gravador.aguardar(tickets[-1], timeout=5)
+
+    assert gravar.chamadas == 1
+    assert gravador.estatisticas() == {'gravacoes': 1, 'alteracoes_gravadas': 20, 'pendentes': 0}
+    gravador.encerrar()
+
+
+def test_espera_duravel_termina_quando_o_programa_encerra():
+    gravar = GravacaoLenta(demora=0.05)
+    gravador = GravadorEmGrupo(gravar, janela=60, maximo=100) # A janela sozinha não venceria
+    gravador.registrar()
+    ticket = gravador.registrar()
+    erros = []
+
+    def esperar():
+        try:
+            gravador.aguardar(ticket, timeout=5)
+        except Exception as e:
+            erros.append(e)
+
+    quem_espera = threading.Thread(target=esperar)
+    quem_espera.start()
+    gravador.encerrar() # Na saída, ao mesmo tempo que a requisição espera
+    quem_espera.join(5)
+
+    assert not quem_espera.is_alive() and erros == []
+    assert gravador.pendentes() == 0 and gravar.chamadas >= 1
+    with pytest.raises(RuntimeError):
+        gravador.registrar()
+
+
+@pytest.fixture
+def em_grupo(loja, monkeypatch):
+    """Modo de gravação em grupo com gravadores só deste teste (a saída do pytest não grava nada)."""
+    monkeypatch.setattr(database, 'GRAVACAO_EM_GRUPO', True)
+    monkeypatch.setattr(database, '_gravadores', {})
+    monkeypatch.setattr(database, '_reservas', {})
+    monkeypatch.setattr(database.atexit, 'register', lambda *args: None)
+    return loja
+
+
+def test_encerrar_grava_o_que_ficou_na_fila(em_grupo, monkeypatch):
+    monkeypatch.setattr(database, 'JANELA_GRUPO_MS', 60000) # Nada é gravado antes da saída
+    DB = database.carregar_dados_json()
+    with database.transacao(DB):
+        cliente_id = database.alocar_id(DB, 'cliente')
+        DB['clientes'][cliente_id] = Cliente("Maria Souza", "529.982.247-25", "Rua B", cliente_id)
+    assert database.obter_gravador(DB).pendentes() == 1
+
+    database.encerrar(DB)
+    # Depois da saída, uma transação volta a gravar na hora
+    with database.transacao(DB):
+        DB['clientes'][cliente_id].endereco = "Rua C"
+
+    lido = database.carregar_dados_json()
+    assert lido['clientes'][cliente_id].endereco == "Rua C"
+    assert lido['next_ids']['cliente'] > int(cliente_id)
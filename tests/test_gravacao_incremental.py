@@ -0,0 +1,54 @@
+# Arquivo: tests/test_gravacao_incremental.py - Rastreamento de alterações: cada salvamento grava só o que mudou
+
+import pytest
+
+import database
+from core.cliente import Cliente
+from core.pedido import Pedido
+
+MODOS = ['json', 'journal', 'sqlite', 'particionado', 'mapeado']
+
+
+def _povoar(DB, quantidade):
+    with database.transacao(DB):
+        for _ in range(quantidade):
+            pedido = Pedido(DB['clientes']['1'])
+            pedido.adicionar_item(DB['produtos']['101'], 1)
+            DB['pedidos'][database.alocar_id(DB, 'pedido')] = pedido
+
+
+@pytest.mark.parametrize('modo', MODOS)
+def test_salvamento_grava_apenas_as_entidades_alteradas(loja, monkeypatch, modo):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', modo)
+    DB = database.carregar_dados_json()
+    _povoar(DB, 20)
+    assert database.salvar_dados_json(DB) == 0 # Nada pendente
+
+    DB['pedidos']['3'].pago = True # Flip de 'pago'
+    assert database.salvar_dados_json(DB) == 1
+    DB['pedidos']['4'].adicionar_item(DB['produtos']['102'], 2) # Novo item
+    DB['pedidos']['5'].itens[0].quantidade = 7 # Edição de um ItemPedido
+    DB['clientes']['1'].endereco = "Rua Nova"
+    assert database.salvar_dados_json(DB) == 3
+
+    database.encerrar(DB)
+    lido = database.carregar_dados_json()
+    assert lido['pedidos']['3'].pago and not lido['pedidos']['2'].pago
+    assert lido['pedidos']['4'].calcular_total() == 6500.00 + 2 * 1200.00
+    assert lido['pedidos']['5'].quantidade_itens() == 7
+    assert lido['clientes']['1'].endereco == "Rua Nova"
+    database.encerrar(lido)
+
+
+def test_objetos_fora_do_banco_nao_sao_rastreados(loja):
+    DB = database.carregar_dados_json()
+    cliente = Cliente("Maria Souza", "529.982.247-25", "Rua B")
+    cliente.endereco = "Rua C" # Ainda não registrado: ninguém a avisar
+    assert not DB['clientes'].possui_alteracoes()
+
+    DB['clientes']['2'] = cliente
+    assert DB['clientes'].drenar_alteracoes() == ({'2': {'*'}}, set())
+    cliente.nome = "Maria S."
+    del DB['produtos']['102']
+    assert DB['clientes'].drenar_alteracoes() == ({'2': {'nome'}}, set())
+    assert DB['produtos'].drenar_alteracoes() == ({}, {'102'})
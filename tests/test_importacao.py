@@ -0,0 +1,81 @@
+# Arquivo: tests/test_importacao.py - Importação em massa (CSV/NDJSON) em lotes
+
+import json
+
+import database
+import importacao
+
+
+def _escrever(caminho, conteudo):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(conteudo)
+    return str(caminho)
+
+
+def _ndjson(caminho, registros):
+    return _escrever(caminho, ''.join(json.dumps(r) + '\n' for r in registros))
+
+
+def test_clientes_com_cpf_repetido_sao_rejeitados(loja):
+    DB = database.carregar_dados_json()
+    arquivo = _escrever(loja / 'clientes.csv', (
+        "nome,cpf,endereco\n"
+        "Maria Souza,529.982.247-25,Rua B\n"
+        "Outro João,00011122233,Rua C\n"      # CPF do cliente 1 (sem pontuação)
+        "Maria de Novo,52998224725,Rua D\n"   # Repetido no próprio arquivo
+        "Sem Endereço,111.444.777-35,\n"
+        "Ana Lima,111.444.777-35,Rua E\n"
+    ))
+
+    resultado = importacao.importar(DB, 'clientes', arquivo, lote=2, rejeitados=str(loja / 'rejeitados.ndjson'))
+
+    assert (resultado.importadas, resultado.rejeitadas) == (2, 3)
+    assert sorted(numero for numero, _ in resultado.exemplos) == [3, 4, 5]
+    assert resultado.lotes == 2 and resultado.como_dict()['linhas_por_segundo'] > 0
+    assert sorted(DB['clientes']) == ['1', '2', '3']
+    assert DB['clientes']['3'].nome == "Ana Lima" and DB['next_ids']['cliente'] == 4
+    with open(loja / 'rejeitados.ndjson', encoding='utf-8') as f:
+        rejeitados = [json.loads(linha) for linha in f]
+    assert sorted(r['linha'] for r in rejeitados) == [3, 4, 5]
+    assert all('CPF' in r['erro'] for r in rejeitados if r['linha'] != 5)
+
+
+def test_ids_importados_avancam_a_sequencia(loja):
+    DB = database.carregar_dados_json()
+    arquivo = _ndjson(loja / 'produtos.ndjson', [
+        {'id': '500', 'nome': "Teclado", 'preco': 150},
+        {'nome': "Mouse", 'preco': "80,50"},
+        {'id': '101', 'nome': "Outro PC", 'preco': 10}, # ID já cadastrado
+        {'id': '500', 'nome': "Teclado 2", 'preco': 10}, # ID repetido no arquivo
+        {'nome': "Cabo", 'preco': 0},
+    ])
+
+    resultado = importacao.importar(DB, 'produtos', arquivo)
+
+    assert (resultado.importadas, resultado.rejeitadas) == (2, 3)
+    assert DB['produtos']['500'].nome == "Teclado" and DB['produtos']['103'].preco == 80.5
+    assert DB['next_ids']['produto'] == 501 # Depois do maior ID importado
+    assert database.alocar_ids(DB, 'produto', 1) == range(501, 502)
+
+
+def test_pedidos_importados_usam_clientes_e_produtos_cadastrados(loja):
+    DB = database.carregar_dados_json()
+    csv = _escrever(loja / 'pedidos.csv', (
+        "cliente_id,itens,pago\n"
+        "1,101:1;102:2,sim\n"
+        "9,101:1,\n"        # Cliente inexistente
+        "1,999:1,\n"        # Produto inexistente
+        "1,101:0,\n"        # Quantidade inválida
+    ))
+    ndjson = _ndjson(loja / 'pedidos.ndjson', [{'cliente_id': '1', 'itens': [{'produto_id': '102', 'quantidade': 3}]}])
+
+    assert importacao.importar(DB, 'pedidos', csv).rejeitadas == 3
+    assert importacao.importar(DB, 'pedidos', ndjson).importadas == 1
+    database.encerrar(DB)
+
+    lido = database.carregar_dados_json()
+    assert sorted(lido['pedidos']) == ['1', '2']
+    assert lido['pedidos']['1'].pago and lido['pedidos']['1'].calcular_total() == 8900.0
+    assert lido['pedidos']['2'].itens[0].produto is lido['produtos']['102']
+    assert lido['next_ids']['pedido'] == 3
+    database.encerrar(lido)
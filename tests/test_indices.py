@@ -0,0 +1,86 @@
+# Arquivo: tests/test_indices.py - Índices secundários: CPF único, busca por nome e pedidos por cliente
+
+import json
+
+import database
+from core.pedido import Pedido
+from persistencia.indices import obter_indices
+
+
+def _cadastrar_cliente(cliente, nome, cpf):
+    return cliente.post('/cadastrar_cliente', data={'nome': nome, 'cpf': cpf, 'endereco': "Rua B"})
+
+
+def _novo_pedido(DB, cliente_id):
+    pedido = Pedido(DB['clientes'][cliente_id])
+    pedido.adicionar_item(DB['produtos']['101'], 1)
+    with database.transacao(DB):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+    return chave
+
+
+def test_cpf_unico_em_qualquer_formatacao(app_loja):
+    cliente, DB = app_loja
+    assert _cadastrar_cliente(cliente, "José Álvares", "529.982.247-25").status_code == 302
+    resposta = _cadastrar_cliente(cliente, "Outro José", "52998224725")
+    assert resposta.status_code == 409 and "já cadastrado" in resposta.get_data(as_text=True)
+    assert _cadastrar_cliente(cliente, "Sem CPF", " ").status_code == 409
+    assert sorted(DB['clientes']) == ['1', '2']
+
+    with database.transacao(DB): # Removido, o CPF volta a ficar livre
+        del DB['clientes']['2']
+    assert _cadastrar_cliente(cliente, "José Álvares", "529.982.247-25").status_code == 302
+
+
+def test_busca_de_clientes_e_produtos(app_loja):
+    cliente, DB = app_loja
+    _cadastrar_cliente(cliente, "José Álvares da Silva", "529.982.247-25")
+
+    def buscar(rota, termo):
+        resposta = cliente.get(rota, query_string={'q': termo})
+        assert resposta.status_code == 200
+        return [item['id'] for item in resposta.get_json()['itens']]
+
+    assert buscar('/api/clientes/busca', "jose") == ['2'] # Sem acento nem maiúsculas
+    assert buscar('/api/clientes/busca', "silv jo") == ['1', '2'] # Palavras em qualquer ordem
+    assert buscar('/api/clientes/busca', "alva") == ['2'] # Começo de qualquer palavra do nome
+    assert buscar('/api/clientes/busca', "000.111.222-33") == ['1'] # Pelo CPF
+    assert buscar('/api/produtos/busca', "moni") == ['102']
+    assert buscar('/api/produtos/busca', "ultra") == ['102']
+    assert cliente.get('/api/clientes/busca').status_code == 400
+
+    # Alterações chegam ao índice na hora
+    with database.transacao(DB):
+        DB['produtos']['102'].nome = "Tela Curva"
+    assert buscar('/api/produtos/busca', "ultra") == []
+    assert buscar('/api/produtos/busca', "tela") == ['102']
+
+
+def test_pedidos_do_cliente_pelo_indice_reverso(app_loja):
+    cliente, DB = app_loja
+    _cadastrar_cliente(cliente, "Maria Souza", "529.982.247-25")
+    chaves = [_novo_pedido(DB, cliente_id) for cliente_id in ('1', '2', '1', '1')]
+
+    resposta = cliente.get('/api/clientes/1/pedidos', query_string={'limite': 2}).get_json()
+    assert [p['id'] for p in resposta['itens']] == [chaves[0], chaves[2]]
+    assert resposta['total_pedidos'] == 3 and resposta['proximo'] == chaves[2]
+    resposta = cliente.get('/api/clientes/1/pedidos', query_string={'apos': resposta['proximo']}).get_json()
+    assert [p['id'] for p in resposta['itens']] == [chaves[3]]
+    assert cliente.get('/api/clientes/99/pedidos').status_code == 404
+
+
+def test_carga_com_cpfs_repetidos_avisa_e_recusa_novos(loja, capsys):
+    data = json.loads(json.dumps(database.DADOS_INICIAIS))
+    data['clientes']['2'] = {'nome': "João Repetido", 'cpf': "000.111.222-33", 'endereco': "Rua C"}
+    data['next_ids']['cliente'] = 3
+    with open(database.DB_FILE, 'w') as f:
+        json.dump(data, f)
+
+    DB = database.carregar_dados_json()
+    indices = obter_indices(DB)
+    assert "CPF repetido" in capsys.readouterr().out
+    assert indices.cpf.buscar("00011122233") == '1' # O menor ID é o dono
+    with database.transacao(DB):
+        del DB['clientes']['1']
+    assert indices.cpf.buscar("00011122233") == '2'
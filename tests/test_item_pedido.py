@@ -0,0 +1,82 @@
+# Arquivo: tests/test_item_pedido.py - Linhas de pedido: referência ao catálogo e formato antigo
+
+import json
+
+import database
+from core.item_pedido import ItemPedido, resolver_produto
+from core.pedido import Pedido
+from core.produto import Produto
+
+
+def _linha_antiga(nome, preco, quantidade=1):
+    return {'produto_data': {'nome': nome, 'preco': preco}, 'quantidade': quantidade}
+
+
+def test_linha_normalizada_usa_a_instancia_do_catalogo():
+    catalogo = {'101': Produto("PC", 10.0, '101')}
+    item = ItemPedido.from_json({'produto_id': '101', 'preco': 9.0, 'quantidade': 2}, catalogo)
+    assert item.produto is catalogo['101'] and item.subtotal == 18.0 # Preço da compra
+    assert item.to_json() == {'produto_id': '101', 'preco': 9.0, 'quantidade': 2}
+
+    removido = ItemPedido.from_json({'produto_id': '999', 'preco': 5.0, 'quantidade': 1}, catalogo)
+    outro = ItemPedido.from_json({'produto_id': '999', 'preco': 5.0, 'quantidade': 3}, catalogo)
+    assert removido.produto is outro.produto and removido.produto.id == '999' # Uma instância por produto
+
+
+def test_formato_antigo_acha_produto_criado_depois():
+    catalogo = {'101': Produto("PC", 10.0, '101')}
+    sem_catalogo = ItemPedido.from_json(_linha_antiga("Cabo", 5.0), catalogo)
+    assert sem_catalogo.produto.id is None
+    assert sem_catalogo.to_json() == _linha_antiga("Cabo", 5.0) # Continua no formato antigo
+
+    catalogo['102'] = Produto("Cabo", 5.0, '102') # Criado (ou importado) depois: não fica "ausente"
+    item = ItemPedido.from_json(_linha_antiga("Cabo", 5.0), catalogo)
+    assert item.produto is catalogo['102']
+    assert item.to_json() == {'produto_id': '102', 'preco': 5.0, 'quantidade': 1}
+
+
+def test_formato_antigo_resolve_no_catalogo_de_cada_db():
+    primeiro = {'101': Produto("PC", 10.0, '101')}
+    segundo = {'7': Produto("PC", 10.0, '7')} # Outro DB (ex.: recarga), mesmo nome e preço
+    assert ItemPedido.from_json(_linha_antiga("PC", 10.0), primeiro).produto is primeiro['101']
+    assert ItemPedido.from_json(_linha_antiga("PC", 10.0), segundo).produto is segundo['7']
+
+    # Produto alterado no mesmo catálogo (tamanho igual): o ID indexado é conferido
+    segundo['7'].nome = "PC Antigo"
+    segundo['8'] = Produto("PC", 10.0, '8')
+    del segundo['7']
+    assert ItemPedido.from_json(_linha_antiga("PC", 10.0), segundo).produto is segundo['8']
+
+
+def test_data_json_guarda_referencias_e_a_carga_compartilha_os_produtos(loja):
+    DB = database.carregar_dados_json()
+    with database.transacao(DB):
+        for quantidade in (1, 2):
+            pedido = Pedido(DB['clientes']['1'])
+            pedido.adicionar_item(DB['produtos']['101'], quantidade)
+            pedido.adicionar_item(DB['produtos']['102'], 1)
+            DB['pedidos'][database.alocar_id(DB, 'pedido')] = pedido
+    with database.transacao(DB):
+        del DB['produtos']['102']
+    database.encerrar(DB)
+
+    with open(database.DB_FILE) as f:
+        linhas = json.load(f)['pedidos']['1']['itens']
+    assert linhas == [{'produto_id': '101', 'preco': 6500.0, 'quantidade': 1},
+                      {'produto_id': '102', 'preco': 1200.0, 'quantidade': 1}]
+
+    lido = database.carregar_dados_json()
+    primeiro, segundo = lido['pedidos']['1'], lido['pedidos']['2']
+    assert primeiro.itens[0].produto is segundo.itens[0].produto is lido['produtos']['101']
+    removido = primeiro.itens[1].produto
+    assert removido is segundo.itens[1].produto and removido.id == '102' # Internado
+    assert primeiro.calcular_total() == 7700.0
+    database.encerrar(lido)
+
+
+def test_produto_removido_e_internado_por_catalogo():
+    primeiro, segundo = {}, {}
+    de_um_db = resolver_produto(primeiro, '102', "Monitor Ultra", 1200.0)
+    assert resolver_produto(primeiro, '102', preco=1200.0) is de_um_db
+    de_outro_db = resolver_produto(segundo, '102', "Teclado", 150.0) # Mesmo ID, outro produto
+    assert de_outro_db is not de_um_db and de_outro_db.nome == "Teclado"
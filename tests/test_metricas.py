@@ -0,0 +1,68 @@
+# Arquivo: tests/test_metricas.py - Métricas no formato do Prometheus, /metrics e perfil sob demanda
+
+import pstats
+
+import pytest
+
+import app_web
+import database
+from monitoramento import metricas, perfil
+from monitoramento.metricas import RegistroMetricas
+
+
+def test_exportacao_no_formato_do_prometheus():
+    registro = RegistroMetricas()
+    tempo = registro.histograma('t_segundos', "Tempo.", ('rota',), limites=(0.1, 1.0))
+    for valor in (0.05, 0.5, 0.5, 3.0):
+        tempo.registrar(valor, rota='/a"b')
+    registro.contador('c_total', "Eventos.").incrementar(2)
+    registro.medidor('m', "Fila.", ('nome',)).observar(lambda: 7, nome='x')
+
+    texto = registro.exportar()
+    assert '# TYPE t_segundos histogram' in texto
+    assert 't_segundos_bucket{rota="/a\\"b",le="0.1"} 1' in texto
+    assert 't_segundos_bucket{rota="/a\\"b",le="1"} 3' in texto # Contagens acumuladas
+    assert 't_segundos_bucket{rota="/a\\"b",le="+Inf"} 4' in texto
+    assert 't_segundos_sum{rota="/a\\"b"} 4.05' in texto and 't_segundos_count{rota="/a\\"b"} 4' in texto
+    assert 'c_total 2' in texto and 'm{nome="x"} 7' in texto
+    ((rotulos, total, media, p95, maximo),) = tempo.resumo()
+    assert (total, maximo) == (4, 3.0) and 1.0 < p95 <= 3.0
+
+    assert registro.contador('c_total', "Eventos.") is registro.metricas()[0] # Mesma instância
+    with pytest.raises(ValueError):
+        registro.histograma('c_total', "Outro tipo.")
+    with pytest.raises(ValueError):
+        tempo.registrar(1.0) # Rótulo 'rota' ausente
+
+
+def test_rota_metrics_mede_requisicoes_e_gravacoes(app_loja):
+    cliente, DB = app_loja
+    serie = {'rota': '/', 'metodo': 'GET', 'status': 200}
+    antes = sum(total for rotulos, total, *_ in metricas.LATENCIA_ROTAS.resumo()
+                if rotulos == {chave: str(valor) for chave, valor in serie.items()})
+    database.salvar_dados_json(DB, completo=True) # O primeiro salvamento do processo serializa tudo
+    entidades_antes = metricas.ENTIDADES_GRAVADAS.valor(modo='json')
+
+    assert cliente.get('/').status_code == 200
+    cliente.post('/cadastrar_pedido', data={'cliente_id': '1', 'produto_id': ['101'], 'quantidade_101': '1'})
+    resposta = cliente.get('/metrics')
+
+    assert resposta.status_code == 200 and resposta.content_type.startswith('text/plain; version=0.0.4')
+    texto = resposta.get_data(as_text=True)
+    assert f'loja_http_requisicao_segundos_count{{rota="/",metodo="GET",status="200"}} {antes + 1}' in texto
+    assert 'loja_http_requisicao_segundos_count{rota="/cadastrar_pedido",metodo="POST",status="302"}' in texto
+    assert 'loja_template_segundos_count{template="dashboard.html"}' in texto
+    assert 'loja_gravacao_segundos_count{modo="json"}' in texto
+    assert 'loja_entidades{colecao="pedidos"}' in texto
+    assert metricas.ENTIDADES_GRAVADAS.valor(modo='json') == entidades_antes + 1 # Só o pedido novo
+
+
+def test_perfil_de_uma_requisicao(app_loja, tmp_path, monkeypatch):
+    cliente, DB = app_loja
+    monkeypatch.setattr(app_web, 'PERFIL_HABILITADO', True)
+    monkeypatch.setattr(perfil, 'PASTA_PERFIS', str(tmp_path / 'perfis'))
+
+    assert 'X-Perfil-Arquivo' not in cliente.get('/').headers # Só quando pedido
+    arquivo = cliente.get('/', query_string={'perfil': '1'}).headers['X-Perfil-Arquivo']
+    assert arquivo.startswith(str(tmp_path / 'perfis')) and 'GET-' in arquivo
+    assert pstats.Stats(arquivo).total_calls > 0
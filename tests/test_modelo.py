@@ -0,0 +1,41 @@
+# Arquivo: tests/test_modelo.py - Modelo de domínio compacto (__slots__) com os mesmos contratos JSON
+
+import pytest
+
+from core.cliente import Cliente
+from core.item_pedido import ItemPedido
+from core.pedido import Pedido
+from core.produto import Produto
+from pagamentos.pagamento_cartao import PagamentoCartao
+from pagamentos.pagamento_pix import PagamentoPix
+
+
+def _modelo():
+    cliente = Cliente("Maria Souza", "529.982.247-25", "Rua B", '2')
+    produto = Produto("Monitor Ultra", 1200.0, '102')
+    pedido = Pedido(cliente, '7')
+    pedido.adicionar_item(produto, 2)
+    return cliente, produto, pedido
+
+
+def test_objetos_nao_tem_dict_por_instancia():
+    cliente, produto, pedido = _modelo()
+    objetos = [cliente, produto, pedido, pedido.itens[0], PagamentoPix(10.0, "chave"), PagamentoCartao(10.0, "1234")]
+    for obj in objetos:
+        assert not hasattr(obj, '__dict__'), type(obj).__name__
+        with pytest.raises(AttributeError):
+            obj.atributo_inexistente = 1
+
+
+def test_to_json_e_from_json_mantem_o_contrato():
+    cliente, produto, pedido = _modelo()
+    assert cliente.to_json() == {'nome': "Maria Souza", 'cpf': "529.982.247-25", 'endereco': "Rua B"}
+    assert Cliente.from_json(cliente.to_json(), '2').apresentar_dados() == cliente.apresentar_dados()
+    assert Produto.from_json(produto.to_json(), '102').to_json() == {'nome': "Monitor Ultra", 'preco': 1200.0}
+
+    copia = Pedido.from_json(pedido.to_json(), cliente, {'102': produto}, '7')
+    assert copia.to_json() == pedido.to_json() == {
+        'cliente_id': '2', 'itens': [{'produto_id': '102', 'preco': 1200.0, 'quantidade': 2}], 'pago': False
+    }
+    assert ItemPedido.from_json(copia.itens[0].to_json(), {'102': produto}).produto is produto
+    assert PagamentoPix(5.0, "chave").to_json() == {'valor': 5.0, 'tipo': 'PagamentoPix'}
@@ -0,0 +1,166 @@
+# Arquivo: tests/test_pagamentos.py - Pagamento assíncrono: prazo do pendente e chamadas únicas ao gateway
+
+import threading
+import time
+
+import pytest
+
+import database
+from core.pedido import Pedido
+from pagamentos import processador
+from pagamentos.pagamento_pix import PagamentoPix
+
+
+def _pedido_pendente(DB, expira):
+    """Cria um pedido e o grava como se um pagamento tivesse ficado 'pendente' (ex.: processo morto)."""
+    pedido = Pedido(DB['clientes']['1'])
+    pedido.adicionar_item(DB['produtos']['101'], 1)
+    with database.transacao(DB, duravel=True):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+        pedido.status_pagamento = Pedido.PAGAMENTO_PENDENTE
+        pedido.pagamento_expira = expira
+    return chave
+
+
+@pytest.mark.parametrize('expira', [None, 1.0]) # Sem prazo (versão antiga) ou com o prazo vencido
+def test_pendente_interrompido_pode_ser_pago_depois_de_recarregar(loja, expira):
+    chave = _pedido_pendente(database.carregar_dados_json(), expira)
+
+    DB = database.carregar_dados_json() # Reinício do processo
+    assert processador.situacao(DB, chave)['status'] == 'falhou'
+    trabalho = processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert processador.obter_processador(DB).aguardar(trabalho, 5)
+    assert DB['pedidos'][chave].pago and DB['pedidos'][chave].pagamento_expira is None
+    processador.encerrar(DB)
+
+
+def test_pendente_dentro_do_prazo_continua_bloqueado(loja):
+    chave = _pedido_pendente(database.carregar_dados_json(), time.time() + 60)
+
+    DB = database.carregar_dados_json()
+    assert processador.situacao(DB, chave)['status'] == 'pendente'
+    with pytest.raises(ValueError, match="em andamento"):
+        processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert 'erro' in processador.liquidar_lote(DB, [{'pedido_id': chave}])[0]
+
+
+def test_falha_de_um_pagamento_vencido_nao_sobrescreve_o_novo(loja):
+    DB = database.carregar_dados_json()
+    chave = _pedido_pendente(DB, time.time() + 60)
+    processador._registrar_resultado(DB, chave, False, prazo=1.0) # Trabalho antigo, de outro prazo
+    assert DB['pedidos'][chave].pagamento_em_andamento()
+    processador._registrar_resultado(DB, chave, False, prazo=DB['pedidos'][chave].pagamento_expira)
+    assert DB['pedidos'][chave].situacao_pagamento() == 'falhou'
+
+
+class GatewayTravado:
+    """Gateway que só responde quando 'liberar' é acionado; conta as chamadas."""
+    def __init__(self):
+        self.liberar = threading.Event()
+        self.chaves = []
+
+    def __call__(self, pagamento, chave_idempotencia):
+        self.chaves.append(chave_idempotencia)
+        self.liberar.wait(5)
+
+
+def test_tempo_esgotado_nao_repete_a_cobranca(loja):
+    gateway = GatewayTravado()
+    resultados = []
+    pool = processador.ProcessadorPagamentos(lambda *resultado: resultados.append(resultado), trabalhadores=1,
+                                             tempo_limite=0.02, tentativas=3, espera=0.01, gateway=gateway)
+    trabalho = pool.enviar('1', PagamentoPix(chave_pix="teste@pix"), prazo=time.time() + 60)
+
+    # Sem tentativas restantes, o trabalho espera a chamada em vez de gravar a falha
+    assert not pool.aguardar(trabalho, 0.3)
+    assert trabalho.tentativas == 3 and resultados == []
+    assert gateway.chaves == [trabalho.chave] # Uma única chamada, com a chave de idempotência do trabalho
+    gateway.liberar.set() # A operadora aprova a chamada que tinha esgotado o tempo
+    assert pool.aguardar(trabalho, 5)
+    assert trabalho.status == processador.PAGO
+    assert resultados == [('1', True, trabalho.prazo)]
+    pool.encerrar()
+
+
+def _pool_do_db(DB, gateway, monkeypatch):
+    """Processador de DB com 'gateway' (tempo limite curto), usado por solicitar_pagamento."""
+    pool = processador.ProcessadorPagamentos(
+        lambda pedido_id, sucesso, prazo: processador._registrar_resultado(DB, pedido_id, sucesso, prazo),
+        trabalhadores=2, tempo_limite=0.02, tentativas=2, espera=0.01, gateway=gateway)
+    monkeypatch.setitem(processador._processadores, id(DB['pedidos']), pool)
+    return pool
+
+
+def _novo_pedido(DB):
+    pedido = Pedido(DB['clientes']['1'])
+    pedido.adicionar_item(DB['produtos']['101'], 1)
+    with database.transacao(DB):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+    return chave
+
+
+def test_resposta_atrasada_mantem_o_pedido_pendente(loja, monkeypatch):
+    DB = database.carregar_dados_json()
+    gateway = GatewayTravado()
+    pool = _pool_do_db(DB, gateway, monkeypatch)
+    chave = _novo_pedido(DB)
+
+    trabalho = processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert not pool.aguardar(trabalho, 0.3) # Tentativas esgotadas, chamada ainda na operadora
+    assert processador.situacao(DB, chave)['status'] == 'pendente'
+    assert DB['pedidos'][chave].pagamento_expira == trabalho.prazo
+    with pytest.raises(ValueError, match="em andamento"):
+        processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="outra@pix"))
+
+    gateway.liberar.set() # Aprovação atrasada
+    assert pool.aguardar(trabalho, 5)
+    assert DB['pedidos'][chave].pago
+    with pytest.raises(ValueError, match="já foi pago"):
+        processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="outra@pix"))
+    assert gateway.chaves == [trabalho.chave]
+    pool.encerrar()
+
+
+def test_novo_pedido_de_pagamento_reaproveita_a_chave_da_chamada_sem_resposta(loja, monkeypatch):
+    monkeypatch.setattr(processador, 'PRAZO_PAGAMENTO', 0.3)
+    DB = database.carregar_dados_json()
+    gateway = GatewayTravado()
+    pool = _pool_do_db(DB, gateway, monkeypatch)
+    chave = _novo_pedido(DB)
+
+    primeiro = processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert not pool.aguardar(primeiro, 0.4) # O prazo vence com a chamada ainda sem resposta
+    assert processador.situacao(DB, chave)['status'] == 'falhou'
+    segundo = processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert segundo.chave == primeiro.chave
+
+    gateway.liberar.set() # As duas chamadas respondem: a operadora cobra a chave uma vez
+    assert pool.aguardar_todos(5)
+    assert set(gateway.chaves) == {primeiro.chave}
+    assert DB['pedidos'][chave].pago and processador.situacao(DB, chave)['status'] == 'pago'
+    pool.encerrar()
+
+
+def test_prazo_vencido_na_fila_nao_chama_o_gateway(loja):
+    gateway = GatewayTravado()
+    pool = processador.ProcessadorPagamentos(lambda *resultado: None, trabalhadores=1, gateway=gateway)
+    trabalho = pool.enviar('1', PagamentoPix(chave_pix="teste@pix"), prazo=time.time() - 1)
+    assert pool.aguardar(trabalho, 5)
+    assert trabalho.status == processador.FALHOU and gateway.chaves == []
+    pool.encerrar()
+
+
+def test_resultado_vira_aviso_em_vez_de_ir_para_o_terminal(loja, capsys):
+    DB = database.carregar_dados_json()
+    chave = _novo_pedido(DB)
+    trabalho = processador.solicitar_pagamento(DB, chave, PagamentoPix(chave_pix="teste@pix"))
+    assert processador.obter_processador(DB).aguardar(trabalho, 5)
+
+    assert capsys.readouterr().out == '' # Nada escrito pelas threads (o menu pode estar num input())
+    avisos = processador.retirar_avisos(DB)
+    assert len(avisos) == 1
+    assert f"Pedido {chave}: pagamento aprovado." in avisos[0] and "via Pix" in avisos[0]
+    assert processador.retirar_avisos(DB) == []
+    processador.encerrar(DB)
@@ -0,0 +1,109 @@
+# Arquivo: tests/test_particoes.py - Modo 'particionado': conversão, salvamento por partição e carga paralela
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import database
+from benchmarks import gerador
+from core.pedido import Pedido
+from persistencia import particoes
+from persistencia.particoes import ArmazemParticionado
+from persistencia.snapshot import escrever_snapshot, ler_snapshot
+
+
+@pytest.fixture
+def particionada(loja, monkeypatch):
+    """data.json com 250 pedidos e o DB no modo 'particionado' com faixas de 100 IDs."""
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', 'particionado')
+    monkeypatch.setattr(database, 'PASTA_PARTICOES', None)
+    monkeypatch.setattr(particoes, 'TAMANHO_PARTICAO', 100)
+    data = gerador.gerar_dados(clientes=20, produtos=5, pedidos=250, linhas=2)
+    escrever_snapshot(database.DB_FILE, data, 'json')
+    return data
+
+
+def _geracoes():
+    return dict(database.obter_particoes().ler_manifesto()['geracoes'])
+
+
+def test_primeira_carga_converte_o_data_json(particionada):
+    antes = os.path.getmtime(database.DB_FILE)
+    DB = database.carregar_dados_json()
+
+    pasta = os.path.splitext(database.DB_FILE)[0] + '.particoes'
+    assert sorted(os.listdir(pasta)) == ['clientes.json', 'manifesto.json', 'pedidos-000000.json',
+                                         'pedidos-000001.json', 'pedidos-000002.json', 'produtos.json']
+    assert {c: p.to_json() for c, p in DB['pedidos'].items()} == particionada['pedidos']
+    assert dict(DB['next_ids']) == particionada['next_ids']
+    assert os.path.getmtime(database.DB_FILE) == antes # O data.json não é alterado
+    database.encerrar(DB)
+
+
+def test_salvamento_regrava_so_as_particoes_alteradas(particionada):
+    DB = database.carregar_dados_json()
+    inicio = _geracoes()
+
+    DB['pedidos']['150'].pago = True
+    database.salvar_dados_json(DB)
+    geracoes = _geracoes()
+    assert [arquivo for arquivo in geracoes if geracoes[arquivo] != inicio[arquivo]] == ['pedidos-000001.json']
+
+    pedido = Pedido(DB['clientes']['1'])
+    pedido.adicionar_item(DB['produtos']['101'], 3)
+    with database.transacao(DB):
+        novo = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][novo] = pedido
+        del DB['pedidos']['20']
+    assert novo == '251'
+    depois = _geracoes()
+    assert {arquivo for arquivo in depois if depois[arquivo] != geracoes[arquivo]} == {'pedidos-000000.json',
+                                                                                      'pedidos-000002.json'}
+
+    lido = database.carregar_dados_json()
+    assert lido['pedidos']['150'].pago and '20' not in lido['pedidos']
+    assert lido['pedidos']['251'].cliente is lido['clientes']['1']
+    assert lido['next_ids']['pedido'] == 252
+    assert {c: p.to_json() for c, p in lido['pedidos'].items()} == {c: p.to_json() for c, p in DB['pedidos'].items()}
+    database.encerrar(lido)
+    database.encerrar(DB)
+
+
+def test_particao_esvaziada_sai_do_manifesto(particionada):
+    DB = database.carregar_dados_json()
+    with database.transacao(DB):
+        for chave in [str(i) for i in range(200, 251)]:
+            del DB['pedidos'][chave]
+    assert 'pedidos-000002.json' not in _geracoes()
+    assert not os.path.exists(os.path.join(database.obter_particoes().pasta, 'pedidos-000002.json'))
+    assert len(database.carregar_dados_json()['pedidos']) == 199
+    database.encerrar(DB)
+
+
+def test_carga_paralela_igual_a_sequencial(particionada, monkeypatch):
+    sequencial = database.carregar_dados_json()
+    monkeypatch.setattr(database, 'PROCESSOS_CARGA', 2)
+    paralela = database.carregar_dados_json()
+
+    for nome in ('clientes', 'produtos', 'pedidos'):
+        assert {c: o.to_json() for c, o in paralela[nome].items()} == {c: o.to_json() for c, o in sequencial[nome].items()}
+    assert ArmazemParticionado(database.obter_particoes().pasta).ler(processos=2)[0] == particionada
+
+
+def test_conversao_nos_dois_sentidos(tmp_path):
+    data = gerador.gerar_dados(clientes=10, produtos=4, pedidos=120, linhas=2)
+    origem, pasta, volta = str(tmp_path / 'data.json'), str(tmp_path / 'data.particoes'), str(tmp_path / 'volta.bin')
+    escrever_snapshot(origem, data, 'json')
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def converter(*argumentos):
+        subprocess.run([sys.executable, '-m', 'persistencia.particoes', *argumentos], cwd=raiz, check=True,
+                       capture_output=True, timeout=60)
+
+    converter(origem, pasta, '--tamanho', '50')
+    assert sorted(ArmazemParticionado(pasta).ler_manifesto()['geracoes']) == [
+        'clientes.json', 'pedidos-000000.json', 'pedidos-000001.json', 'pedidos-000002.json', 'produtos.json']
+    converter(pasta, volta, '--formato', 'binario')
+    assert ler_snapshot(volta) == data
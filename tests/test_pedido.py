@@ -0,0 +1,51 @@
+# Arquivo: tests/test_pedido.py - Pedido: referência ao cliente e total mantido em cache
+
+import database
+from core.cliente import Cliente
+from core.pedido import Pedido
+
+
+def test_pedido_serializa_o_id_do_proprio_cliente(app_loja):
+    cliente, DB = app_loja
+    resposta = cliente.post('/cadastrar_cliente', data={
+        'nome': "Maria Souza", 'cpf': "529.982.247-25", 'endereco': "Rua B"
+    })
+    assert resposta.status_code == 302
+    resposta = cliente.post('/cadastrar_pedido', data={
+        'cliente_id': '2', 'produto_id': ['101'], 'quantidade_101': '3'
+    })
+    assert resposta.status_code == 302
+
+    assert not hasattr(Cliente, 'db_ref') # Sem varredura de todos os clientes
+    maria = DB['clientes']['2']
+    assert maria.id == '2'
+    pedido = next(p for p in DB['pedidos'].values() if p.cliente is maria)
+    assert pedido.to_json()['cliente_id'] == '2'
+
+    # Na carga, o ID vem da chave do banco e o pedido aponta para a mesma instância do cliente
+    recarregado = database.carregar_dados_json()
+    assert [c.id for c in recarregado['clientes'].values()] == list(recarregado['clientes'])
+    (pedido,) = recarregado['pedidos'].values()
+    assert pedido.cliente is recarregado['clientes']['2']
+    assert pedido.to_json()['cliente_id'] == '2'
+    database.encerrar(recarregado)
+
+
+def test_total_em_cache_acompanha_os_itens(loja):
+    DB = database.carregar_dados_json()
+    pedido = Pedido(DB['clientes']['1'])
+    pedido.adicionar_item(DB['produtos']['101'], 1)
+    pedido.adicionar_item(DB['produtos']['102'], 2)
+    assert (pedido.calcular_total(), pedido.quantidade_itens()) == (8900.0, 3)
+
+    pedido.alterar_quantidade(1, 5)
+    assert (pedido.calcular_total(), pedido.quantidade_itens()) == (12500.0, 6)
+    pedido.itens[0].quantidade = 2 # Edição direta do item também é percebida
+    assert pedido.calcular_total() == 19000.0
+    assert pedido.remover_item(0).produto is DB['produtos']['101']
+    assert (pedido.calcular_total(), pedido.quantidade_itens()) == (6000.0, 5)
+
+    copia = Pedido.from_json(pedido.to_json(), pedido.cliente, DB['produtos'])
+    assert (copia.calcular_total(), copia.quantidade_itens()) == (6000.0, 5)
+    DB['produtos']['102'].preco = 1.0 # O total usa o preço da compra, não o do catálogo
+    assert copia.calcular_total() == 6000.0
@@ -0,0 +1,77 @@
+# Arquivo: tests/test_sqlite.py - Motor SQLite: migração do data.json e gravação em transações pequenas
+
+import json
+
+import pytest
+
+import database
+from core.cliente import Cliente
+from core.pedido import Pedido
+from persistencia.sqlite import ArmazemSQLite
+
+
+@pytest.fixture
+def loja_sqlite(loja, monkeypatch):
+    monkeypatch.setattr(database, 'MODO_ARMAZENAMENTO', 'sqlite')
+    monkeypatch.setattr(database, '_armazens_sqlite', {})
+    return loja
+
+
+def _reabrir():
+    """O banco lido de novo do arquivo, por outra conexão (sem o mapa de identidade atual)."""
+    return ArmazemSQLite(database.SQLITE_FILE).como_dados()
+
+
+def test_migracao_unica_do_data_json(loja_sqlite, capsys):
+    data = json.loads(json.dumps(database.DADOS_INICIAIS))
+    data['pedidos'] = {
+        '1': {'cliente_id': '1', 'pago': True, 'itens': [{'produto_id': '102', 'preco': 1100.0, 'quantidade': 2}]},
+        '2': {'cliente_id': '1', 'pago': False, 'itens': [
+            {'produto_data': {'nome': "PC Gamer Z100", 'preco': 6500.0}, 'quantidade': 1}, # Formato antigo
+        ]},
+        '3': {'cliente_id': '99', 'pago': False, 'itens': []},
+    }
+    data['next_ids']['pedido'] = 4
+    with open(database.DB_FILE, 'w') as f:
+        json.dump(data, f)
+
+    DB = database.carregar_dados_json()
+
+    assert "Pedido 3 sem cliente" in capsys.readouterr().out
+    assert sorted(DB['pedidos']) == ['1', '2']
+    assert DB['pedidos']['1'].pago and DB['pedidos']['1'].calcular_total() == 2200.0 # Preço da compra
+    assert DB['pedidos']['2'].itens[0].produto is DB['produtos']['101']
+    assert DB['pedidos']['2'].cliente is DB['clientes']['1']
+    assert dict(DB['next_ids']) == {'cliente': 2, 'pedido': 4}
+
+    # A migração é feita uma vez só: depois o data.json não é mais lido
+    with open(database.DB_FILE, 'w') as f:
+        json.dump(database.DADOS_INICIAIS, f)
+    assert sorted(_reabrir()['pedidos']) == ['1', '2']
+
+
+def test_cada_alteracao_e_uma_transacao_pequena(loja_sqlite):
+    DB = database.carregar_dados_json()
+    with database.transacao(DB):
+        cliente_id = database.alocar_id(DB, 'cliente')
+        DB['clientes'][cliente_id] = Cliente("Maria Souza", "529.982.247-25", "Rua B", cliente_id)
+    pedido = Pedido(DB['clientes'][cliente_id])
+    pedido.adicionar_item(DB['produtos']['101'], 1)
+    pedido.adicionar_item(DB['produtos']['102'], 2)
+    with database.transacao(DB):
+        pedido_id = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][pedido_id] = pedido
+
+    pedido.pago = True
+    assert database.salvar_dados_json(DB) == 1 # Só o pedido pago
+    del DB['produtos']['102']
+    assert database.salvar_dados_json(DB) == 1
+    assert database.salvar_dados_json(DB) == 0
+
+    lido = _reabrir()
+    assert sorted(lido['produtos']) == ['101']
+    assert lido['clientes'][cliente_id].to_json() == DB['clientes'][cliente_id].to_json()
+    assert lido['pedidos'][pedido_id].to_json() == pedido.to_json()
+    assert lido['pedidos'][pedido_id].itens[1].produto.nome == "Monitor Ultra" # Produto removido do catálogo
+    assert dict(lido['next_ids']) == {'cliente': 3, 'pedido': 2}
+    database.encerrar(DB)
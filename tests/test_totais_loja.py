@@ -0,0 +1,60 @@
+# Arquivo: tests/test_totais_loja.py - Visões por cliente/produto e o cache das tabelas do dashboard
+
+import arquivamento
+import database
+from core.pedido import Pedido
+from persistencia.cache import obter_cache
+from relatorios.totais_loja import obter_totais
+
+
+def _novo_pedido(DB, itens):
+    pedido = Pedido(DB['clientes']['1'])
+    for produto_id, quantidade in itens:
+        pedido.adicionar_item(DB['produtos'][produto_id], quantidade)
+    with database.transacao(DB):
+        chave = database.alocar_id(DB, 'pedido')
+        DB['pedidos'][chave] = pedido
+    return chave
+
+
+def test_visoes_acompanham_pagamento_remocao_de_item_e_arquivamento(app_loja):
+    cliente, DB = app_loja
+    totais = obter_totais(DB)
+    pago = _novo_pedido(DB, [('101', 1), ('102', 2)])
+    aberto = _novo_pedido(DB, [('101', 2), ('102', 1)])
+    with database.transacao(DB):
+        DB['pedidos'][pago].pago = True
+    with database.transacao(DB):
+        DB['pedidos'][aberto].remover_item(0) # Sobra 1 x 102 em aberto
+    assert totais.conferir(DB['pedidos']) == []
+
+    resultado = arquivamento.arquivar(DB, manter=0)
+    assert resultado['arquivados'] == 1 and pago not in DB['pedidos']
+    assert totais.conferir(DB['pedidos']) == []
+
+    # Conta feita à mão: 6500 + 2 x 1200 pagos, 1 x 1200 em aberto
+    compras = totais.cliente('1')
+    assert (compras.pedidos, compras.total_pago, compras.total_aberto) == (2, 8900, 1200)
+    assert (totais.produto('101').unidades, totais.produto('101').receita) == (1, 6500)
+    assert (totais.produto('102').unidades, totais.produto('102').receita) == (3, 3600)
+    assert totais.como_dict() == {'total_pago': 8900, 'total_aberto': 1200, 'pedidos_pagos': 1, 'pedidos_abertos': 1}
+
+    pagina = cliente.get('/').get_data(as_text=True)
+    assert 'R$ 10100.00' in pagina and 'R$ 3600.00' in pagina
+
+
+def test_pedido_novo_refaz_so_as_colunas_de_vendas(app_loja, monkeypatch):
+    cliente, DB = app_loja
+    assert cliente.get('/').status_code == 200
+
+    cache = obter_cache(DB)
+    guardados = []
+    guardar = cache.guardar
+    monkeypatch.setattr(cache, 'guardar', lambda chave, *args: (guardados.append(chave[:2]), guardar(chave, *args)))
+    _novo_pedido(DB, [('102', 3)])
+    pagina = cliente.get('/').get_data(as_text=True)
+
+    fragmentos = {secao for tipo, secao in guardados if tipo == 'fragmento'}
+    assert fragmentos == {'pedidos', 'clientes_vendas', 'produtos_vendas'}
+    assert 'R$ 3600.00' in pagina and 'João Silva' in pagina and 'Monitor Ultra' in pagina
+